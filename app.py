@@ -17,18 +17,14 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 # Import modules
+# Los servicios (pandas, protobufs de Google Ads, plotly...) se importan de forma
+# diferida a través de utils.service_registry, después de autenticar
 from modules.auth import GoogleAdsAuth, require_auth
-from modules.google_ads_client import GoogleAdsClientWrapper
-from modules.ai_ad_generator import AIAdGenerator
-from services.billing_service import BillingService
-from services.campaign_service import CampaignService
-from services.report_service import ReportService
-from services.alert_service import AlertService
 from utils.logger import get_logger, setup_logging
 from utils.cache import CacheManager
 from utils.i18n import I18n, init_i18n, t, create_locale_selector
 from utils.account_cache_manager import AccountCacheManager  # ✅ CORRECTO
-from modules.google_ads_client import GoogleAdsClientWrapper
+from utils.service_registry import create_service_registry, get_import_report, timed_import
 
 
 
@@ -614,14 +610,6 @@ def initialize_session_state():
     if 'authenticated' not in st.session_state:
         st.session_state.authenticated = False
     
-    if 'google_ads_client' not in st.session_state:
-        wrapper = GoogleAdsClientWrapper()
-        st.session_state.google_ads_client = wrapper
-        
-        real_client = wrapper.get_client()
-        if real_client:
-            logger.info("✅ Cliente de Google Ads inicializado")
-    
     if 'services' not in st.session_state:
         st.session_state.services = {}
     
@@ -641,21 +629,28 @@ def initialize_session_state():
             cache_days=30
         )
         logger.info("✅ Account Cache Manager inicializado")
+
+
+def initialize_google_ads_client():
+    """Initialize the Google Ads client wrapper (only once authenticated)"""
+    if st.session_state.get('google_ads_client') is not None:
+        return
     
-    if 'ai_ad_generator' not in st.session_state:
-        try:
-            st.session_state.ai_ad_generator = AIAdGenerator()
-            logger.info("✅ AI Ad Generator inicializado")
-        except Exception as e:
-            logger.error(f"❌ Error inicializando AI Ad Generator: {e}")
-            st.session_state.ai_ad_generator = None
+    GoogleAdsClientWrapper = timed_import('modules.google_ads_client').GoogleAdsClientWrapper
+    wrapper = GoogleAdsClientWrapper()
+    st.session_state.google_ads_client = wrapper
+    
+    real_client = wrapper.get_client()
+    if real_client:
+        logger.info("✅ Cliente de Google Ads inicializado")
 
 
- 
 def initialize_services():
-    """Initialize Google Ads services"""
+    """Initialize Google Ads services (built lazily on first access)"""
     try:
-        client = st.session_state.get('google_ads_client') or GoogleAdsClientWrapper()
+        client = st.session_state.get('google_ads_client')
+        if client is None:
+            client = timed_import('modules.google_ads_client').GoogleAdsClientWrapper()
         
         if not st.session_state.get('google_ads_client'):
             if client.test_connection():
@@ -664,12 +659,7 @@ def initialize_services():
                 return False
         
         if not st.session_state.get('services'):
-            st.session_state.services = {
-                'billing': BillingService(client),
-                'campaign': CampaignService(client),
-                'report': ReportService(client),
-                'alert': AlertService(client)
-            }
+            st.session_state.services = create_service_registry(client)
         
         if not st.session_state.get('customer_ids'):
             st.session_state.customer_ids = client.get_customer_ids()
@@ -681,6 +671,7 @@ def initialize_services():
             st.session_state.pending_ai_ads = []
         
         logger.info(f"✅ Services initialized. {len(st.session_state.customer_ids)} accounts found.")
+        _log_import_report()
         return True
     
     except Exception as e:
@@ -688,6 +679,22 @@ def initialize_services():
         return False
 
 
+_import_report_logged = False
+
+
+def _log_import_report():
+    """Log the deferred import breakdown once per process"""
+    global _import_report_logged
+    if _import_report_logged:
+        return
+    _import_report_logged = True
+    
+    report = get_import_report(top=10)
+    if report:
+        breakdown = ", ".join(f"{module} {seconds * 1000:.0f} ms" for module, seconds in report)
+        logger.info(f"⏱️ Imports diferidos más lentos: {breakdown}")
+
+
 def get_account_names(customer_ids: list) -> dict:
     """
     Obtiene los nombres de las cuentas con sistema de caché inteligente
@@ -799,8 +806,7 @@ def render_ultra_modern_sidebar():
             # Detectar moneda
             if 'services' in st.session_state and st.session_state.services:
                 try:
-                    from services.bid_adjustment_service import BidAdjustmentService
-                    bid_service = BidAdjustmentService(st.session_state.google_ads_client)
+                    bid_service = st.session_state.services['bid_adjustment']
                     currency = bid_service.get_account_currency(st.session_state.selected_customer)
                     min_bid = bid_service.get_min_bid_for_currency(currency)
                     
@@ -921,6 +927,16 @@ def render_ultra_modern_sidebar():
             </div>
             """, unsafe_allow_html=True)
         
+        # Servicios construidos (se crean al primer uso)
+        if hasattr(st.session_state.services, 'get_stats'):
+            service_stats = st.session_state.services.get_stats()
+            st.markdown(f"""
+            <div class="system-info">
+                <div class="system-info-label">Servicios</div>
+                <div class="system-info-value">{len(service_stats['loaded'])}/{service_stats['registered']}</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
         # Cache stats
         if hasattr(st.session_state.cache_manager, 'get_stats'):
             try:
@@ -1252,6 +1268,8 @@ def main():
             
             return
         
+        initialize_google_ads_client()
+        
         if not st.session_state.get('services'):
             with st.spinner("Inicializando servicios..."):
                 if not initialize_services():
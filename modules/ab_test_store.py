@@ -0,0 +1,331 @@
+"""
+🗄️ AB TEST STORE - Repositorio indexado de pruebas A/B
+Almacena los tests en SQLite con columnas indexadas para consultas rápidas
+Versión: 1.0
+Autor: saltbalente
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+
+class ABTestStore:
+    """
+    Repositorio de tests A/B respaldado por SQLite.
+
+    - Una fila por test con columnas indexadas (estado, fecha, tipo de negocio)
+    - Tabla auxiliar con los tonos de cada variación y su CTR predicho
+    - El documento completo se guarda una sola vez; estado y resultados
+      se actualizan en columnas propias sin reescribir el documento
+    - Importa automáticamente los JSON legacy del directorio de resultados
+    """
+
+    DB_FILENAME = "ab_tests.sqlite3"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ab_tests (
+            test_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT,
+            business_type TEXT,
+            variation_count INTEGER DEFAULT 0,
+            document TEXT NOT NULL,
+            results TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_ab_tests_status ON ab_tests(status, created_at);
+        CREATE INDEX IF NOT EXISTS idx_ab_tests_created ON ab_tests(created_at);
+        CREATE INDEX IF NOT EXISTS idx_ab_tests_business ON ab_tests(business_type, created_at);
+
+        CREATE TABLE IF NOT EXISTS ab_test_tones (
+            test_id TEXT NOT NULL,
+            label TEXT NOT NULL,
+            tone TEXT,
+            predicted_ctr REAL,
+            PRIMARY KEY (test_id, label)
+        );
+        CREATE INDEX IF NOT EXISTS idx_ab_test_tones_tone ON ab_test_tones(tone);
+    """
+
+    def __init__(self, results_dir: Path, import_legacy: bool = True):
+        """
+        Inicializa el repositorio.
+
+        Args:
+            results_dir: Directorio de resultados (contiene la base de datos)
+            import_legacy: Importar archivos {test_id}.json existentes
+        """
+        self.results_dir = Path(results_dir)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.results_dir / self.DB_FILENAME
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self._conn.commit()
+
+        if import_legacy:
+            self.import_json_files()
+
+    # =========================================================================
+    # ESCRITURA
+    # =========================================================================
+
+    def save(self, test: Dict[str, Any]) -> None:
+        """Inserta o reemplaza un test completo."""
+        document = {k: v for k, v in test.items() if k != 'results'}
+        predictions = test.get('predictions', {}) or {}
+        tone_rows = [
+            (test['test_id'], label, pred.get('tone'), pred.get('predicted_ctr'))
+            for label, pred in predictions.get('by_variation', {}).items()
+        ]
+        # Variaciones sin predicción también se indexan por tono
+        predicted_labels = {row[1] for row in tone_rows}
+        for variation in test.get('variations', []):
+            label = variation.get('label')
+            if label and label not in predicted_labels:
+                tone_rows.append((test['test_id'], label, variation.get('tone'), None))
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO ab_tests
+                    (test_id, status, created_at, updated_at, business_type,
+                     variation_count, document, results)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    test['test_id'],
+                    test.get('status', 'draft'),
+                    test.get('created_at', ''),
+                    test.get('updated_at'),
+                    predictions.get('business_type'),
+                    test.get('variation_count', len(test.get('variations', []))),
+                    json.dumps(document, ensure_ascii=False, separators=(',', ':')),
+                    json.dumps(test['results'], ensure_ascii=False)
+                    if test.get('results') is not None else None
+                )
+            )
+            self._conn.execute("DELETE FROM ab_test_tones WHERE test_id = ?", (test['test_id'],))
+            self._conn.executemany(
+                "INSERT INTO ab_test_tones (test_id, label, tone, predicted_ctr) VALUES (?, ?, ?, ?)",
+                tone_rows
+            )
+
+    def update_status(
+        self,
+        test_id: str,
+        status: str,
+        updated_at: str,
+        results: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Actualiza estado (y opcionalmente resultados) sin tocar el documento.
+
+        Returns:
+            True si el test existía
+        """
+        with self._lock, self._conn:
+            if results is not None:
+                cursor = self._conn.execute(
+                    "UPDATE ab_tests SET status = ?, updated_at = ?, results = ? WHERE test_id = ?",
+                    (status, updated_at, json.dumps(results, ensure_ascii=False), test_id)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE ab_tests SET status = ?, updated_at = ? WHERE test_id = ?",
+                    (status, updated_at, test_id)
+                )
+        return cursor.rowcount > 0
+
+    def delete(self, test_id: str) -> bool:
+        """Elimina un test. Retorna True si existía."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM ab_tests WHERE test_id = ?", (test_id,))
+            self._conn.execute("DELETE FROM ab_test_tones WHERE test_id = ?", (test_id,))
+        return cursor.rowcount > 0
+
+    # =========================================================================
+    # LECTURA
+    # =========================================================================
+
+    def get(self, test_id: str) -> Optional[Dict[str, Any]]:
+        """Obtiene un test completo por ID."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM ab_tests WHERE test_id = ?", (test_id,)
+            ).fetchone()
+        return self._row_to_test(row) if row else None
+
+    def exists(self, test_id: str) -> bool:
+        """Indica si el test está indexado."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM ab_tests WHERE test_id = ?", (test_id,)
+            ).fetchone()
+        return row is not None
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        business_type: Optional[str] = None,
+        tone: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Consulta tests usando los índices.
+
+        Args:
+            status: Filtrar por estado
+            business_type: Filtrar por tipo de negocio
+            tone: Filtrar por tono de alguna variación
+            created_after: Fecha ISO mínima (inclusive)
+            created_before: Fecha ISO máxima (exclusiva)
+            limit: Máximo de resultados
+            offset: Desplazamiento para paginación
+
+        Returns:
+            Lista de tests, más recientes primero
+        """
+        sql, params = self._build_where(status, business_type, tone, created_after, created_before)
+        sql = f"SELECT * FROM ab_tests {sql} ORDER BY created_at DESC"
+        if limit:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([int(limit), int(offset)])
+        elif offset:
+            # SQLite no admite OFFSET sin LIMIT; -1 = sin límite
+            sql += " LIMIT -1 OFFSET ?"
+            params.append(int(offset))
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_test(row) for row in rows]
+
+    def count(
+        self,
+        status: Optional[str] = None,
+        business_type: Optional[str] = None,
+        tone: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None
+    ) -> int:
+        """Cuenta tests que cumplen los filtros."""
+        sql, params = self._build_where(status, business_type, tone, created_after, created_before)
+        with self._lock:
+            row = self._conn.execute(f"SELECT COUNT(*) FROM ab_tests {sql}", params).fetchone()
+        return int(row[0])
+
+    def tone_performance(self) -> Dict[str, float]:
+        """CTR predicho promedio por tono, agregado en SQL."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT tone, AVG(predicted_ctr) AS avg_ctr
+                FROM ab_test_tones
+                WHERE tone IS NOT NULL AND predicted_ctr IS NOT NULL
+                GROUP BY tone
+                """
+            ).fetchall()
+        return {row['tone']: float(row['avg_ctr']) for row in rows}
+
+    def totals(self) -> Dict[str, int]:
+        """Totales de tests y variaciones almacenados."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(variation_count), 0) FROM ab_tests"
+            ).fetchone()
+        return {'total_tests': int(row[0]), 'total_variations': int(row[1])}
+
+    # =========================================================================
+    # MIGRACIÓN
+    # =========================================================================
+
+    def import_json_files(self) -> int:
+        """
+        Importa archivos JSON legacy ({test_id}.json) que aún no estén indexados.
+
+        Returns:
+            Número de tests importados
+        """
+        imported = 0
+        for test_file in self.results_dir.glob("*.json"):
+            test_id = test_file.stem
+            if self.exists(test_id):
+                continue
+            try:
+                with open(test_file, 'r', encoding='utf-8') as f:
+                    test = json.load(f)
+                if not isinstance(test, dict) or 'test_id' not in test:
+                    continue
+                self.save(test)
+                imported += 1
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo importar {test_file.name}: {e}")
+
+        if imported:
+            logger.info(f"📥 {imported} tests A/B importados al índice")
+        return imported
+
+    def close(self) -> None:
+        """Cierra la conexión."""
+        with self._lock:
+            self._conn.close()
+
+    # =========================================================================
+    # HELPERS
+    # =========================================================================
+
+    @staticmethod
+    def _build_where(
+        status: Optional[str],
+        business_type: Optional[str],
+        tone: Optional[str],
+        created_after: Optional[str],
+        created_before: Optional[str]
+    ):
+        clauses: List[str] = []
+        params: List[Any] = []
+
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if business_type:
+            clauses.append("business_type = ?")
+            params.append(business_type)
+        if created_after:
+            clauses.append("created_at >= ?")
+            params.append(created_after)
+        if created_before:
+            clauses.append("created_at < ?")
+            params.append(created_before)
+        if tone:
+            clauses.append(
+                "test_id IN (SELECT test_id FROM ab_test_tones WHERE tone = ?)"
+            )
+            params.append(tone)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    @staticmethod
+    def _row_to_test(row: sqlite3.Row) -> Dict[str, Any]:
+        test = json.loads(row['document'])
+        # Las columnas mutables prevalecen sobre el documento original
+        test['status'] = row['status']
+        if row['updated_at']:
+            test['updated_at'] = row['updated_at']
+        if row['results'] is not None:
+            test['results'] = json.loads(row['results'])
+        return test
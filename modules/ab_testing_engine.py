@@ -15,6 +15,8 @@ import statistics
 import json
 from pathlib import Path
 
+from modules.ab_test_store import ABTestStore
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -66,7 +68,8 @@ class ABTestingEngine:
         self,
         ai_generator=None,
         save_results: bool = True,
-        results_dir: Optional[str] = None
+        results_dir: Optional[str] = None,
+        storage_backend: str = 'sqlite'
     ):
         """
         Inicializa el motor de pruebas A/B.
@@ -75,6 +78,7 @@ class ABTestingEngine:
             ai_generator: Generador de IA para crear variaciones
             save_results: Guardar resultados de tests
             results_dir: Directorio para guardar resultados
+            storage_backend: 'sqlite' (índice consultable) o 'json' (un archivo por test)
         """
         self.ai_generator = ai_generator
         self.save_results = save_results
@@ -87,6 +91,16 @@ class ABTestingEngine:
         
         self.results_dir.mkdir(parents=True, exist_ok=True)
         
+        # Repositorio indexado (None = archivos JSON legacy)
+        self.storage_backend = storage_backend
+        self.store: Optional[ABTestStore] = None
+        if save_results and storage_backend == 'sqlite':
+            try:
+                self.store = ABTestStore(self.results_dir)
+            except Exception as e:
+                logger.error(f"❌ Error abriendo repositorio SQLite, usando JSON: {e}")
+                self.storage_backend = 'json'
+        
         # Historial de tests
         self.test_history: List[Dict[str, Any]] = []
         
@@ -101,6 +115,7 @@ class ABTestingEngine:
         logger.info(f"✅ ABTestingEngine inicializado")
         logger.info(f"   - Resultados dir: {self.results_dir}")
         logger.info(f"   - Guardar resultados: {save_results}")
+        logger.info(f"   - Almacenamiento: {self.storage_backend if save_results else 'memoria'}")
     
     # =========================================================================
     # CREACIÓN DE VARIACIONES
@@ -803,6 +818,15 @@ class ABTestingEngine:
             if test['test_id'] == test_id:
                 return test
         
+        # Buscar en el repositorio indexado
+        if self.store:
+            try:
+                test = self.store.get(test_id)
+                if test:
+                    return test
+            except Exception as e:
+                logger.error(f"❌ Error consultando test {test_id}: {e}")
+        
         # Buscar en disco
         test_file = self.results_dir / f"{test_id}.json"
         if test_file.exists():
@@ -817,28 +841,76 @@ class ABTestingEngine:
     def list_tests(
         self,
         status: Optional[str] = None,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        business_type: Optional[str] = None,
+        tone: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        offset: int = 0
     ) -> List[Dict[str, Any]]:
         """
         Lista tests del historial.
         
+        Con almacenamiento SQLite la consulta se resuelve sobre el índice e
+        incluye tests de sesiones anteriores; sin él, sobre el historial en memoria.
+        
         Args:
             status: Filtrar por estado ('draft', 'running', 'completed')
             limit: Número máximo de tests a retornar
+            business_type: Filtrar por tipo de negocio ('esoteric', 'generic')
+            tone: Filtrar por tono de alguna variación
+            created_after: Fecha ISO mínima de creación (inclusive)
+            created_before: Fecha ISO máxima de creación (exclusiva)
+            offset: Desplazamiento para paginación
         
         Returns:
             Lista de tests
         """
+        if self.store:
+            try:
+                return self.store.query(
+                    status=status,
+                    business_type=business_type,
+                    tone=tone,
+                    created_after=created_after,
+                    created_before=created_before,
+                    limit=limit,
+                    offset=offset
+                )
+            except Exception as e:
+                logger.error(f"❌ Error consultando repositorio, usando memoria: {e}")
+        
         tests = self.test_history.copy()
         
         # Filtrar por estado
         if status:
             tests = [t for t in tests if t.get('status') == status]
         
+        if business_type:
+            tests = [
+                t for t in tests
+                if t.get('predictions', {}).get('business_type') == business_type
+            ]
+        
+        if tone:
+            tests = [
+                t for t in tests
+                if any(v.get('tone') == tone for v in t.get('variations', []))
+            ]
+        
+        if created_after:
+            tests = [t for t in tests if t.get('created_at', '') >= created_after]
+        
+        if created_before:
+            tests = [t for t in tests if t.get('created_at', '') < created_before]
+        
         # Ordenar por fecha (más recientes primero)
         tests.sort(key=lambda x: x.get('created_at', ''), reverse=True)
         
         # Limitar cantidad
+        if offset:
+            tests = tests[offset:]
+        
         if limit:
             tests = tests[:limit]
         
@@ -853,6 +925,9 @@ class ABTestingEngine:
         """
         Actualiza el estado de un test.
         
+        Con almacenamiento SQLite solo se actualizan las columnas de estado y
+        resultados; el documento del test no se reescribe.
+        
         Args:
             test_id: ID del test
             status: Nuevo estado
@@ -861,14 +936,33 @@ class ABTestingEngine:
         Returns:
             True si se actualizó exitosamente
         """
-        test = self.get_test(test_id)
+        updated_at = datetime.now().isoformat()
+        
+        # Mantener sincronizada la copia en memoria
+        cached = next((t for t in self.test_history if t['test_id'] == test_id), None)
+        if cached:
+            cached['status'] = status
+            cached['updated_at'] = updated_at
+            if results:
+                cached['results'] = results
+        
+        if self.store:
+            try:
+                if self.store.update_status(test_id, status, updated_at, results or None):
+                    logger.info(f"✅ Test {test_id} actualizado a estado: {status}")
+                    return True
+            except Exception as e:
+                logger.error(f"❌ Error actualizando test {test_id}: {e}")
+                return False
+        
+        test = cached or self.get_test(test_id)
         
         if not test:
             logger.error(f"❌ Test {test_id} no encontrado")
             return False
         
         test['status'] = status
-        test['updated_at'] = datetime.now().isoformat()
+        test['updated_at'] = updated_at
         
         if results:
             test['results'] = results
@@ -884,6 +978,15 @@ class ABTestingEngine:
     def _save_test(self, test: Dict[str, Any]) -> None:
         """Guarda test en disco."""
         test_id = test['test_id']
+        
+        if self.store:
+            try:
+                self.store.save(test)
+                logger.debug(f"💾 Test indexado: {test_id}")
+                return
+            except Exception as e:
+                logger.error(f"❌ Error indexando test, guardando JSON: {e}")
+        
         test_file = self.results_dir / f"{test_id}.json"
         
         try:
@@ -907,6 +1010,14 @@ class ABTestingEngine:
         # Eliminar de historial
         self.test_history = [t for t in self.test_history if t['test_id'] != test_id]
         
+        # Eliminar del repositorio indexado
+        if self.store:
+            try:
+                self.store.delete(test_id)
+            except Exception as e:
+                logger.error(f"❌ Error eliminando test del índice: {e}")
+                return False
+        
         # Eliminar de disco
         test_file = self.results_dir / f"{test_id}.json"
         
@@ -927,39 +1038,63 @@ class ABTestingEngine:
     
     def get_statistics(self) -> Dict[str, Any]:
         """Obtiene estadísticas del motor A/B."""
-        # Analizar historial para encontrar mejor tono
-        tone_performance = defaultdict(list)
-        
-        for test in self.test_history:
-            predictions = test.get('predictions', {})
-            
-            for var_label, var_pred in predictions.get('by_variation', {}).items():
-                tone = var_pred.get('tone')
-                ctr = var_pred.get('predicted_ctr', 0)
-                
-                if tone:
-                    tone_performance[tone].append(ctr)
+        # Con repositorio indexado el promedio por tono se agrega en SQL
+        # sobre todos los tests almacenados
+        if self.store:
+            try:
+                tone_averages = self.store.tone_performance()
+                stored = self.store.totals()
+            except Exception as e:
+                logger.error(f"❌ Error agregando estadísticas: {e}")
+                tone_averages, stored = self._tone_performance_from_history(), None
+        else:
+            tone_averages, stored = self._tone_performance_from_history(), None
         
         # Calcular promedio por tono
         best_tone = None
         best_avg_ctr = 0
         
-        for tone, ctrs in tone_performance.items():
-            avg_ctr = statistics.mean(ctrs)
+        for tone, avg_ctr in tone_averages.items():
             if avg_ctr > best_avg_ctr:
                 best_avg_ctr = avg_ctr
                 best_tone = tone
         
         self.stats['best_performing_tone'] = best_tone
         
-        return {
+        statistics_data = {
             **self.stats,
             'history_size': len(self.test_history),
             'tone_performance': {
-                tone: round(statistics.mean(ctrs), 2)
-                for tone, ctrs in tone_performance.items()
+                tone: round(avg_ctr, 2)
+                for tone, avg_ctr in tone_averages.items()
             }
         }
+        
+        if stored:
+            statistics_data['stored_tests'] = stored['total_tests']
+            statistics_data['stored_variations'] = stored['total_variations']
+        
+        return statistics_data
+    
+    def _tone_performance_from_history(self) -> Dict[str, float]:
+        """CTR predicho promedio por tono sobre el historial en memoria."""
+        # Analizar historial para encontrar mejor tono
+        tone_performance = defaultdict(list)
+        
+        for test in self.test_history:
+            predictions = test.get('predictions', {})
+            
+            for var_label, var_pred in predictions.get('by_variation', {}).items():
+                tone = var_pred.get('tone')
+                ctr = var_pred.get('predicted_ctr', 0)
+                
+                if tone:
+                    tone_performance[tone].append(ctr)
+        
+        return {
+            tone: statistics.mean(ctrs)
+            for tone, ctrs in tone_performance.items()
+        }
     
     def export_test_results(
         self,
@@ -1042,7 +1177,8 @@ class ABTestingEngine:
 
 def create_ab_testing_engine(
     ai_generator=None,
-    save_results: bool = True
+    save_results: bool = True,
+    storage_backend: str = 'sqlite'
 ) -> ABTestingEngine:
     """
     Factory function para crear una instancia de ABTestingEngine.
@@ -1050,13 +1186,15 @@ def create_ab_testing_engine(
     Args:
         ai_generator: Generador de IA
         save_results: Guardar resultados
+        storage_backend: 'sqlite' o 'json'
     
     Returns:
         Instancia de ABTestingEngine
     """
     return ABTestingEngine(
         ai_generator=ai_generator,
-        save_results=save_results
+        save_results=save_results,
+        storage_backend=storage_backend
     )
 
 
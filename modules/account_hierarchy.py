@@ -0,0 +1,456 @@
+"""
+🌳 ACCOUNT HIERARCHY - Árbol persistente de cuentas MCC
+Guarda managers y cuentas cliente (nombre, moneda, zona horaria, estado) en
+disco, se carga al iniciar y se refresca de forma incremental en segundo plano
+Versión: 1.0
+Autor: saltbalente
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AccountNode:
+    """Cuenta de Google Ads dentro del árbol"""
+    customer_id: str
+    name: str = ''
+    currency_code: str = ''
+    time_zone: str = ''
+    status: str = 'ENABLED'  # ENABLED, SUSPENDED, CANCELED, CLOSED, UNAVAILABLE
+    manager: bool = False
+    hidden: bool = False
+    test_account: bool = False
+    level: int = 0
+    parent_id: Optional[str] = None
+    children: List[str] = field(default_factory=list)
+
+    @property
+    def is_usable(self) -> bool:
+        """Cuenta habilitada, visible y consultable"""
+        return self.status == 'ENABLED' and not self.hidden
+
+    def fingerprint(self) -> str:
+        """Hash de los atributos para detectar cambios"""
+        data = asdict(self)
+        data['children'] = sorted(data['children'])
+        return hashlib.md5(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class AccountHierarchy:
+    """
+    Jerarquía de cuentas MCC persistida en JSON
+
+    - load(): lectura local instantánea al iniciar (sin llamadas a la API)
+    - refresh(): una llamada a list_accessible_customers, una consulta
+      customer_client por MCC raíz (trae todos los niveles con sus atributos)
+      y consultas extra solo para sub-MCCs o cuentas directas nuevas;
+      refresh(full=True) vuelve a resolver todo
+    - refresh_in_background(): refresco en un hilo si los datos están viejos
+    - Detección de cambios (altas, bajas, modificaciones): solo se escribe
+      el archivo y se notifica a los listeners si algo cambió
+    """
+
+    CUSTOMER_CLIENT_QUERY = """
+        SELECT
+            customer_client.id,
+            customer_client.descriptive_name,
+            customer_client.currency_code,
+            customer_client.time_zone,
+            customer_client.status,
+            customer_client.manager,
+            customer_client.hidden,
+            customer_client.test_account,
+            customer_client.level
+        FROM customer_client
+    """
+
+    CUSTOMER_QUERY = """
+        SELECT
+            customer.id,
+            customer.descriptive_name,
+            customer.currency_code,
+            customer.time_zone,
+            customer.status,
+            customer.manager,
+            customer.test_account
+        FROM customer
+        LIMIT 1
+    """
+
+    def __init__(self, storage_path: str = "data/account_hierarchy.json",
+                 refresh_interval: float = 6 * 3600,
+                 full_refresh_interval: float = 24 * 3600):
+        """
+        Inicializa la jerarquía
+
+        Args:
+            storage_path: Archivo JSON donde se persiste el árbol
+            refresh_interval: Segundos tras los que se refresca incrementalmente
+            full_refresh_interval: Segundos tras los que se rehace todo el árbol
+        """
+        self.storage_path = Path(storage_path)
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+
+        self.accounts: Dict[str, AccountNode] = {}
+        self.root_ids: List[str] = []
+        self.refreshed_at: Optional[float] = None
+        self.full_refreshed_at: Optional[float] = None
+
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[Dict[str, List[str]]], None]] = []
+
+        self.load()
+
+    # =========================================================================
+    # PERSISTENCIA
+    # =========================================================================
+
+    def load(self) -> bool:
+        """Carga el árbol desde disco. Retorna True si había datos"""
+        if not self.storage_path.exists():
+            return False
+        try:
+            with open(self.storage_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            accounts = {
+                cid: AccountNode(**node) for cid, node in data.get('accounts', {}).items()
+            }
+            with self._lock:
+                self.accounts = accounts
+                self.root_ids = data.get('root_ids', [])
+                self.refreshed_at = data.get('refreshed_at')
+                self.full_refreshed_at = data.get('full_refreshed_at')
+            logger.info(f"🌳 Jerarquía cargada: {len(accounts)} cuentas")
+            return bool(accounts)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo cargar la jerarquía de cuentas: {e}")
+            return False
+
+    def _save(self) -> None:
+        """Escribe el árbol de forma atómica"""
+        with self._lock:
+            data = {
+                'root_ids': self.root_ids,
+                'refreshed_at': self.refreshed_at,
+                'full_refreshed_at': self.full_refreshed_at,
+                'updated_at': datetime.now().isoformat(),
+                'accounts': {cid: asdict(node) for cid, node in self.accounts.items()}
+            }
+        try:
+            self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.storage_path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.storage_path)
+        except OSError as e:
+            logger.error(f"❌ Error guardando jerarquía de cuentas: {e}")
+
+    # =========================================================================
+    # CONSULTA
+    # =========================================================================
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.accounts
+
+    @property
+    def is_stale(self) -> bool:
+        return self.refreshed_at is None or time.time() - self.refreshed_at >= self.refresh_interval
+
+    def get_customer_ids(self, include_managers: bool = True) -> List[str]:
+        """
+        IDs de cuentas utilizables (habilitadas y visibles), ordenados
+
+        Args:
+            include_managers: Incluir cuentas MCC (sub-MCCs y raíces)
+        """
+        with self._lock:
+            return sorted(
+                cid for cid, node in self.accounts.items()
+                if node.is_usable and (include_managers or not node.manager)
+            )
+
+    def get_account(self, customer_id: str) -> Optional[AccountNode]:
+        with self._lock:
+            return self.accounts.get(str(customer_id).replace('-', ''))
+
+    def get_descendants(self, manager_id: str) -> List[AccountNode]:
+        """Todas las cuentas bajo un manager (sin incluirlo)"""
+        with self._lock:
+            result = []
+            pending = list(self.accounts.get(manager_id, AccountNode(manager_id)).children)
+            seen = set()
+            while pending:
+                cid = pending.pop()
+                node = self.accounts.get(cid)
+                if node is None or cid in seen:
+                    continue
+                seen.add(cid)
+                result.append(node)
+                pending.extend(node.children)
+            return result
+
+    def add_listener(self, callback: Callable[[Dict[str, List[str]]], None]) -> None:
+        """Registra una función que recibe los cambios tras cada refresco"""
+        self._listeners.append(callback)
+
+    # =========================================================================
+    # REFRESCO
+    # =========================================================================
+
+    def refresh_in_background(self, ads_client: Any, force: bool = False) -> bool:
+        """
+        Lanza un refresco en un hilo daemon si los datos están viejos
+
+        Returns:
+            True si se inició un refresco
+        """
+        if not force and not self.is_stale:
+            return False
+        with self._lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return False
+            self._refresh_thread = threading.Thread(
+                target=self.refresh, args=(ads_client,),
+                name="account-hierarchy-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+        return True
+
+    def refresh(self, ads_client: Any, full: Optional[bool] = None) -> Dict[str, List[str]]:
+        """
+        Refresca el árbol contra la API
+
+        Args:
+            ads_client: GoogleAdsClientWrapper (o GoogleAdsClient)
+            full: Rehacer todo el árbol; None = según full_refresh_interval
+
+        Returns:
+            Cambios detectados: {'added', 'removed', 'changed'}
+        """
+        with self._refresh_lock:
+            if full is None:
+                full = (self.full_refreshed_at is None
+                        or time.time() - self.full_refreshed_at >= self.full_refresh_interval)
+            try:
+                return self._refresh(ads_client, full)
+            except Exception as e:
+                logger.error(f"❌ Error refrescando jerarquía de cuentas: {e}")
+                return {'added': [], 'removed': [], 'changed': []}
+
+    def _refresh(self, ads_client: Any, full: bool) -> Dict[str, List[str]]:
+        client = ads_client.get_client() if hasattr(ads_client, 'get_client') else ads_client
+        if not client:
+            raise RuntimeError("Cliente de Google Ads no disponible")
+
+        started = time.time()
+        customer_service = client.get_service("CustomerService")
+        ga_service = client.get_service("GoogleAdsService")
+
+        accessible = [name.split('/')[-1] for name in
+                      customer_service.list_accessible_customers().resource_names]
+        login_id = str(getattr(client, 'login_customer_id', None) or '').replace('-', '')
+
+        with self._lock:
+            previous = dict(self.accounts)
+
+        accounts: Dict[str, AccountNode] = {}
+        queries = 0
+
+        # Raíz: el login_customer_id si es accesible; primero su propia fila
+        roots = [login_id] if login_id in accessible else []
+        for root_id in roots:
+            root = None if full else previous.get(root_id)
+            if root is None:
+                root = self._probe_customer(ga_service, root_id)
+                queries += 1
+            root = AccountNode(**{**asdict(root), 'level': 0, 'parent_id': None, 'children': []})
+            accounts[root_id] = root
+            if root.manager:
+                queries += self._load_tree(ga_service, root_id, accounts, previous, full)
+
+        # Cuentas con acceso directo fuera del árbol: solo se sondean las nuevas
+        for customer_id in accessible:
+            if customer_id in accounts:
+                continue
+            node = None if full else previous.get(customer_id)
+            if node is None or node.parent_id is not None:
+                node = self._probe_customer(ga_service, customer_id)
+                queries += 1
+            accounts[customer_id] = AccountNode(**{**asdict(node), 'level': 0,
+                                                   'parent_id': None, 'children': []})
+
+        self._link_children(accounts)
+        changes = self._diff(previous, accounts)
+
+        now = time.time()
+        with self._lock:
+            self.accounts = accounts
+            self.root_ids = [cid for cid in accounts if accounts[cid].parent_id is None]
+            self.refreshed_at = now
+            if full:
+                self.full_refreshed_at = now
+        self._save()
+
+        logger.info(
+            f"🌳 Jerarquía {'completa' if full else 'incremental'}: {len(accounts)} cuentas, "
+            f"{queries} consultas, {len(changes['added'])} nuevas, {len(changes['removed'])} eliminadas, "
+            f"{len(changes['changed'])} modificadas en {now - started:.1f}s"
+        )
+
+        if any(changes.values()):
+            for callback in list(self._listeners):
+                try:
+                    callback(changes)
+                except Exception as e:
+                    logger.warning(f"⚠️ Error notificando cambios de jerarquía: {e}")
+        return changes
+
+    def _load_tree(self, ga_service: Any, root_id: str, accounts: Dict[str, AccountNode],
+                   previous: Dict[str, AccountNode], full: bool) -> int:
+        """
+        Carga todos los descendientes de un MCC con una consulta customer_client
+
+        El padre directo de las cuentas de nivel > 1 se resuelve consultando
+        los sub-MCCs, pero solo cuando la cuenta es nueva o cambió de nivel.
+
+        Returns:
+            Número de consultas realizadas
+        """
+        queries = 1
+        descendants: Dict[str, AccountNode] = {}
+        for row in ga_service.search(customer_id=root_id, query=self.CUSTOMER_CLIENT_QUERY):
+            node = self._node_from_customer_client(row.customer_client)
+            if node.customer_id != root_id:
+                descendants[node.customer_id] = node
+
+        unresolved = set()
+        for cid, node in descendants.items():
+            if node.level <= 1:
+                node.parent_id = root_id
+                continue
+            known = previous.get(cid)
+            if not full and known and known.level == node.level and known.parent_id in descendants:
+                node.parent_id = known.parent_id
+            else:
+                unresolved.add(cid)
+
+        if unresolved:
+            max_level = max(descendants[cid].level for cid in unresolved)
+            sub_managers = sorted(
+                (node for node in descendants.values() if node.manager and node.level < max_level),
+                key=lambda n: (n.level, n.customer_id)
+            )
+            for manager in sub_managers:
+                if not unresolved:
+                    break
+                query = self.CUSTOMER_CLIENT_QUERY + " WHERE customer_client.level = 1"
+                try:
+                    rows = ga_service.search(customer_id=manager.customer_id, query=query)
+                    queries += 1
+                    for row in rows:
+                        child_id = str(row.customer_client.id)
+                        if child_id in unresolved:
+                            descendants[child_id].parent_id = manager.customer_id
+                            unresolved.discard(child_id)
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudieron leer hijos de {manager.customer_id}: {e}")
+
+            for cid in unresolved:
+                descendants[cid].parent_id = root_id
+
+        accounts.update(descendants)
+        return queries
+
+    def _probe_customer(self, ga_service: Any, customer_id: str) -> AccountNode:
+        """Lee los atributos de una cuenta; las inaccesibles quedan UNAVAILABLE"""
+        try:
+            for row in ga_service.search(customer_id=customer_id, query=self.CUSTOMER_QUERY):
+                customer = row.customer
+                return AccountNode(
+                    customer_id=customer_id,
+                    name=customer.descriptive_name or '',
+                    currency_code=customer.currency_code or '',
+                    time_zone=customer.time_zone or '',
+                    status=_enum_name(customer.status),
+                    manager=bool(customer.manager),
+                    test_account=bool(customer.test_account)
+                )
+        except Exception as e:
+            error_msg = str(e)
+            if "PERMISSION_DENIED" in error_msg:
+                logger.warning(f"⚠️ Sin permisos para {customer_id}")
+            elif "CUSTOMER_NOT_ENABLED" in error_msg:
+                logger.warning(f"⚠️ Cuenta deshabilitada {customer_id}")
+            else:
+                logger.warning(f"⚠️ Error en {customer_id}: {error_msg[:100]}")
+        return AccountNode(customer_id=customer_id, status='UNAVAILABLE')
+
+    @staticmethod
+    def _node_from_customer_client(customer_client: Any) -> AccountNode:
+        return AccountNode(
+            customer_id=str(customer_client.id),
+            name=customer_client.descriptive_name or '',
+            currency_code=customer_client.currency_code or '',
+            time_zone=customer_client.time_zone or '',
+            status=_enum_name(customer_client.status),
+            manager=bool(customer_client.manager),
+            hidden=bool(customer_client.hidden),
+            test_account=bool(customer_client.test_account),
+            level=int(customer_client.level)
+        )
+
+    @staticmethod
+    def _link_children(accounts: Dict[str, AccountNode]) -> None:
+        for node in accounts.values():
+            node.children = []
+        for cid, node in accounts.items():
+            parent = accounts.get(node.parent_id) if node.parent_id else None
+            if parent is not None:
+                parent.children.append(cid)
+        for node in accounts.values():
+            node.children.sort()
+
+    @staticmethod
+    def _diff(previous: Dict[str, AccountNode], current: Dict[str, AccountNode]) -> Dict[str, List[str]]:
+        added = sorted(set(current) - set(previous))
+        removed = sorted(set(previous) - set(current))
+        changed = sorted(
+            cid for cid in set(current) & set(previous)
+            if current[cid].fingerprint() != previous[cid].fingerprint()
+        )
+        return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def _enum_name(value: Any) -> str:
+    """Nombre de un enum proto-plus (o el valor como texto)"""
+    return getattr(value, 'name', None) or str(value)
+
+
+# Instancia global
+_account_hierarchy: Optional[AccountHierarchy] = None
+_account_hierarchy_lock = threading.Lock()
+
+
+def get_account_hierarchy() -> AccountHierarchy:
+    """Obtiene la jerarquía de cuentas del proceso (cargada desde disco)"""
+    global _account_hierarchy
+    if _account_hierarchy is None:
+        with _account_hierarchy_lock:
+            if _account_hierarchy is None:
+                _account_hierarchy = AccountHierarchy()
+    return _account_hierarchy
@@ -16,6 +16,8 @@ import statistics
 import hashlib
 from pathlib import Path
 import json
+import os
+from datetime import timedelta
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -100,11 +102,16 @@ class CompetitiveAnalyzer:
         'very_hard': (86, 100)
     }
     
+    # Versión del formato de perfiles por keyword en caché persistente
+    PROFILE_CACHE_VERSION = 2
+    PROFILE_CACHE_FILE = "keyword_profiles.json"
+    
     def __init__(
         self,
         business_type: str = 'esoteric',
         cache_enabled: bool = True,
-        cache_dir: Optional[str] = None
+        cache_dir: Optional[str] = None,
+        cache_ttl_days: int = 7
     ):
         """
         Inicializa el analizador competitivo.
@@ -113,9 +120,11 @@ class CompetitiveAnalyzer:
             business_type: Tipo de negocio
             cache_enabled: Habilitar caché
             cache_dir: Directorio de caché
+            cache_ttl_days: Días de validez de las estimaciones por keyword
         """
         self.business_type = business_type
         self.cache_enabled = cache_enabled
+        self.cache_ttl_days = cache_ttl_days
         
         # Configurar caché
         if cache_dir:
@@ -129,12 +138,21 @@ class CompetitiveAnalyzer:
         self.analysis_history: List[Dict[str, Any]] = []
         self.cache: Dict[str, Any] = {}
         
+        # Perfiles memoizados por keyword (estimaciones, competidores y
+        # patrones de anuncios), persistidos en cache_dir entre ejecuciones
+        self.keyword_profiles: Dict[str, Dict[str, Any]] = {}
+        self._profiles_dirty = False
+        if cache_enabled:
+            self._load_keyword_profiles()
+        
         # Estadísticas
         self.stats = {
             'total_analyses': 0,
             'keywords_analyzed': 0,
             'competitors_identified': 0,
-            'gaps_found': 0
+            'gaps_found': 0,
+            'profile_cache_hits': 0,
+            'profile_cache_misses': 0
         }
         
         logger.info(f"✅ CompetitiveAnalyzer inicializado")
@@ -149,7 +167,8 @@ class CompetitiveAnalyzer:
         self,
         keywords: List[str],
         your_ad: Optional[Dict[str, Any]] = None,
-        deep_analysis: bool = True
+        deep_analysis: bool = True,
+        persist_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Realiza análisis competitivo completo.
@@ -158,6 +177,7 @@ class CompetitiveAnalyzer:
             keywords: Lista de keywords a analizar
             your_ad: Tu anuncio (opcional para comparación)
             deep_analysis: Análisis profundo (más lento pero más completo)
+            persist_cache: Guardar en disco los perfiles de keyword nuevos
         
         Returns:
             Diccionario con análisis competitivo completo
@@ -234,6 +254,10 @@ class CompetitiveAnalyzer:
         # Guardar en historial
         self.analysis_history.append(result)
         
+        # Persistir perfiles nuevos (en modo batch se persiste al final)
+        if persist_cache:
+            self.save_keyword_profiles()
+        
         # Actualizar estadísticas
         self.stats['total_analyses'] += 1
         self.stats['keywords_analyzed'] += len(keywords)
@@ -247,6 +271,266 @@ class CompetitiveAnalyzer:
         
         return result
     
+    # =========================================================================
+    # ANÁLISIS EN LOTE
+    # =========================================================================
+    
+    def analyze_batch(
+        self,
+        keyword_sets: Dict[str, List[str]],
+        your_ads: Optional[Dict[str, Dict[str, Any]]] = None,
+        deep_analysis: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Analiza muchos conjuntos de keywords (p. ej. todos los grupos de
+        anuncios) reutilizando estimaciones por keyword.
+        
+        Las keywords compartidas entre conjuntos se estiman una sola vez, los
+        perfiles se guardan en disco al final y la saturación de mercado y el
+        potencial de gaps se consolidan en una tabla comparativa.
+        
+        Args:
+            keyword_sets: Diccionario {nombre_conjunto: keywords}
+            your_ads: Anuncio propio por conjunto (opcional)
+            deep_analysis: Análisis profundo
+        
+        Returns:
+            Diccionario con análisis por conjunto y resumen consolidado
+        """
+        batch_id = f"comp_batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        your_ads = your_ads or {}
+        
+        hits_before = self.stats['profile_cache_hits']
+        misses_before = self.stats['profile_cache_misses']
+        
+        # 1. Precalcular perfiles para la unión de keywords (una vez por keyword)
+        unique_keywords = {kw.lower(): kw for kws in keyword_sets.values() for kw in kws}
+        for keyword in unique_keywords.values():
+            self._get_keyword_profile(keyword)
+        
+        logger.info(f"📦 Análisis competitivo en lote: {batch_id}")
+        logger.info(f"   - Conjuntos: {len(keyword_sets)}")
+        logger.info(f"   - Keywords únicas: {len(unique_keywords)}")
+        
+        # 2. Analizar cada conjunto sobre perfiles ya memoizados
+        results: Dict[str, Dict[str, Any]] = {}
+        for set_name, keywords in keyword_sets.items():
+            if not keywords:
+                continue
+            results[set_name] = self.analyze(
+                keywords,
+                your_ad=your_ads.get(set_name),
+                deep_analysis=deep_analysis,
+                persist_cache=False
+            )
+        
+        # 3. Persistir perfiles una sola vez
+        self.save_keyword_profiles()
+        
+        # 4. Resumen consolidado de saturación y gaps
+        summary_rows = []
+        for set_name, result in results.items():
+            saturation = result['competitor_analysis'].get('market_saturation', {})
+            opportunities = result['market_gaps'].get('opportunities', [])
+            summary_rows.append({
+                'set_name': set_name,
+                'keywords': len(result['keywords']),
+                'overall_difficulty': result['keyword_analysis']['overall_difficulty'],
+                'avg_cpc': result['keyword_analysis']['avg_cpc'],
+                'market_saturation': saturation.get('level'),
+                'estimated_total_spend': saturation.get('estimated_total_spend', 0),
+                'gap_count': len(opportunities),
+                'top_gap_potential': max(
+                    (o.get('potential_score', 0) for o in opportunities),
+                    default=0
+                ),
+                'competitive_score': result['competitive_score']['score']
+            })
+        
+        summary_rows.sort(key=lambda row: row['top_gap_potential'], reverse=True)
+        
+        saturation_levels = Counter(row['market_saturation'] for row in summary_rows)
+        
+        batch_result = {
+            'batch_id': batch_id,
+            'timestamp': datetime.now().isoformat(),
+            'total_sets': len(results),
+            'unique_keywords': len(unique_keywords),
+            'results': results,
+            'summary': summary_rows,
+            'saturation_distribution': dict(saturation_levels),
+            'cache': {
+                'hits': self.stats['profile_cache_hits'] - hits_before,
+                'misses': self.stats['profile_cache_misses'] - misses_before,
+                'stored_profiles': len(self.keyword_profiles)
+            }
+        }
+        
+        logger.info(f"✅ Lote completado: {batch_id}")
+        logger.info(f"   - Perfiles reutilizados: {batch_result['cache']['hits']}")
+        logger.info(f"   - Perfiles nuevos: {batch_result['cache']['misses']}")
+        
+        return batch_result
+    
+    # =========================================================================
+    # PERFILES DE KEYWORD MEMOIZADOS
+    # =========================================================================
+    
+    def _get_keyword_profile(self, keyword: str) -> Dict[str, Any]:
+        """
+        Obtiene (o calcula y memoiza) el perfil competitivo de una keyword.
+        
+        Returns:
+            Diccionario con difficulty, volume, cpc, competitors (nombres de
+            KNOWN_COMPETITORS) y patterns (tipos de COMPETITOR_AD_PATTERNS)
+        """
+        kw_lower = keyword.lower()
+        
+        profile = self.keyword_profiles.get(kw_lower)
+        if profile is not None and self._is_profile_fresh(profile):
+            self.stats['profile_cache_hits'] += 1
+            return profile
+        
+        self.stats['profile_cache_misses'] += 1
+        
+        # Buscar en base de datos de competencia
+        if kw_lower in self.HIGH_COMPETITION_KEYWORDS:
+            data = self.HIGH_COMPETITION_KEYWORDS[kw_lower]
+            difficulty = data['difficulty']
+            volume = data['volume']
+            cpc = data['cpc']
+        else:
+            # Estimar competencia basándose en palabras
+            difficulty = self._estimate_keyword_difficulty(keyword)
+            volume = self._estimate_search_volume(keyword)
+            cpc = self._estimate_cpc_for_keyword(keyword)
+        
+        competitors = [
+            competitor['name'] for competitor in self.KNOWN_COMPETITORS
+            if any(
+                focus_area in kw_lower or kw_lower in focus_area
+                for focus_area in competitor['focus']
+            )
+        ]
+        
+        patterns = [
+            pattern_type
+            for pattern_type, words in self.COMPETITOR_AD_PATTERNS.items()
+            if any(word in kw_lower for word in words)
+        ]
+        
+        profile = {
+            'difficulty': difficulty,
+            'volume': volume,
+            'cpc': cpc,
+            'competitors': competitors,
+            'patterns': patterns,
+            'estimated_at': datetime.now().isoformat()
+        }
+        
+        self.keyword_profiles[kw_lower] = profile
+        self._profiles_dirty = True
+        
+        return profile
+    
+    def _is_profile_fresh(self, profile: Dict[str, Any]) -> bool:
+        """Verifica si un perfil sigue dentro del TTL."""
+        try:
+            estimated_at = datetime.fromisoformat(profile['estimated_at'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return datetime.now() - estimated_at < timedelta(days=self.cache_ttl_days)
+    
+    def _profiles_file(self) -> Path:
+        return self.cache_dir / self.PROFILE_CACHE_FILE
+    
+    @classmethod
+    def _profile_fingerprint(cls) -> str:
+        """Hash de los datos con los que se calculan los perfiles."""
+        payload = json.dumps(
+            {
+                'competitors': cls.KNOWN_COMPETITORS,
+                'patterns': cls.COMPETITOR_AD_PATTERNS,
+                'keywords': cls.HIGH_COMPETITION_KEYWORDS
+            },
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    
+    def _load_keyword_profiles(self) -> None:
+        """Carga perfiles persistidos desde cache_dir."""
+        profiles_file = self._profiles_file()
+        if not profiles_file.exists():
+            return
+        
+        try:
+            with open(profiles_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            if data.get('version') != self.PROFILE_CACHE_VERSION:
+                logger.info("⚠️ Caché de perfiles con versión distinta, se regenerará")
+                return
+            
+            # Competidores, patrones o keywords editados invalidan los perfiles
+            if data.get('fingerprint') != self._profile_fingerprint():
+                logger.info("⚠️ Datos de competencia modificados, se regenerarán los perfiles")
+                return
+            
+            self.keyword_profiles = data.get('profiles', {})
+            logger.info(f"✅ Perfiles de keyword cargados: {len(self.keyword_profiles)}")
+        except Exception as e:
+            logger.error(f"❌ Error cargando perfiles de keyword: {e}")
+    
+    def save_keyword_profiles(self) -> bool:
+        """
+        Persiste los perfiles de keyword si hubo cambios.
+        
+        Returns:
+            True si se escribió el archivo
+        """
+        if not self.cache_enabled or not self._profiles_dirty:
+            return False
+        
+        profiles_file = self._profiles_file()
+        tmp_file = profiles_file.with_suffix('.tmp')
+        
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {
+                        'version': self.PROFILE_CACHE_VERSION,
+                        'fingerprint': self._profile_fingerprint(),
+                        'updated_at': datetime.now().isoformat(),
+                        'profiles': self.keyword_profiles
+                    },
+                    f,
+                    ensure_ascii=False
+                )
+            os.replace(tmp_file, profiles_file)
+            self._profiles_dirty = False
+            logger.debug(f"💾 Perfiles de keyword guardados: {len(self.keyword_profiles)}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error guardando perfiles de keyword: {e}")
+            return False
+    
+    def clear_keyword_profiles(self) -> int:
+        """Limpia perfiles memoizados (memoria y disco)."""
+        count = len(self.keyword_profiles)
+        self.keyword_profiles.clear()
+        self._profiles_dirty = False
+        
+        profiles_file = self._profiles_file()
+        if profiles_file.exists():
+            try:
+                profiles_file.unlink()
+            except Exception as e:
+                logger.error(f"❌ Error eliminando caché de perfiles: {e}")
+        
+        logger.info(f"🗑️ Perfiles de keyword eliminados: {count}")
+        return count
+    
     # =========================================================================
     # ANÁLISIS DE KEYWORDS
     # =========================================================================
@@ -267,19 +551,11 @@ class CompetitiveAnalyzer:
         total_cpc = 0
         
         for keyword in keywords:
-            kw_lower = keyword.lower()
-            
-            # Buscar en base de datos de competencia
-            if kw_lower in self.HIGH_COMPETITION_KEYWORDS:
-                data = self.HIGH_COMPETITION_KEYWORDS[kw_lower]
-                difficulty = data['difficulty']
-                volume = data['volume']
-                cpc = data['cpc']
-            else:
-                # Estimar competencia basándose en palabras
-                difficulty = self._estimate_keyword_difficulty(keyword)
-                volume = self._estimate_search_volume(keyword)
-                cpc = self._estimate_cpc_for_keyword(keyword)
+            # Estimaciones memoizadas (base de competencia o heurísticas)
+            profile = self._get_keyword_profile(keyword)
+            difficulty = profile['difficulty']
+            volume = profile['volume']
+            cpc = profile['cpc']
             
             # Calcular oportunidad
             opportunity_score = self._calculate_opportunity_score(
@@ -517,18 +793,16 @@ class CompetitiveAnalyzer:
         
         relevant_competitors = []
         
+        # Coincidencias por keyword memoizadas: se agregan por competidor
+        matches_by_competitor: Dict[str, List[str]] = defaultdict(list)
+        for keyword in keywords:
+            for competitor_name in self._get_keyword_profile(keyword)['competitors']:
+                matches_by_competitor[competitor_name].append(keyword)
+        
         for competitor in self.KNOWN_COMPETITORS:
             # Calcular relevancia basándose en keywords
-            relevance_score = 0
-            matching_keywords = []
-            
-            for keyword in keywords:
-                kw_lower = keyword.lower()
-                for focus_area in competitor['focus']:
-                    if focus_area in kw_lower or kw_lower in focus_area:
-                        relevance_score += 1
-                        matching_keywords.append(keyword)
-                        break
+            matching_keywords = matches_by_competitor.get(competitor['name'], [])
+            relevance_score = len(matching_keywords)
             
             if relevance_score > 0:
                 competitor_info = {
@@ -648,11 +922,8 @@ class CompetitiveAnalyzer:
         
         # Contar frecuencia de patrones
         for keyword in keywords:
-            kw_lower = keyword.lower()
-            
-            for pattern_type, words in self.COMPETITOR_AD_PATTERNS.items():
-                if any(word in kw_lower for word in words):
-                    pattern_frequency[pattern_type] += 1
+            for pattern_type in self._get_keyword_profile(keyword)['patterns']:
+                pattern_frequency[pattern_type] += 1
         
         # Identificar patrones más usados
         most_common_patterns = sorted(
@@ -1263,7 +1534,8 @@ class CompetitiveAnalyzer:
         """Obtiene estadísticas del analizador."""
         return {
             **self.stats,
-            'analysis_history_size': len(self.analysis_history)
+            'analysis_history_size': len(self.analysis_history),
+            'keyword_profiles': len(self.keyword_profiles)
         }
     
     def get_analysis_history(
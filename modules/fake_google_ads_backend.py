@@ -0,0 +1,1247 @@
+"""
+Fake Google Ads Backend - Sustituto offline de la API de Google Ads
+Sirve cuentas sintéticas de tamaño configurable (campañas, grupos, keywords,
+anuncios y métricas diarias) a través de las mismas interfaces que usa el
+código real: GoogleAdsService.search / search_stream / mutate, los servicios
+mutate por recurso y BatchJobService, con latencia y errores de cuota
+configurables. Permite medir ingesta, health scoring y publicación a escala
+de producción sin red ni credenciales.
+
+Uso:
+    backend = FakeGoogleAdsBackend(accounts=3, spec=SyntheticAccountSpec(campaigns=50),
+                                   latency=0.05, quota_error_rate=0.01)
+    wrapper = backend.create_wrapper()        # GoogleAdsClientWrapper
+    rows = wrapper.execute_query(backend.customer_ids[0], "SELECT ... FROM keyword_view ...")
+"""
+
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import grpc
+from google.ads.googleads.errors import GoogleAdsException
+from google.protobuf import any_pb2
+from google.rpc import status_pb2
+
+from modules.google_ads_client import GoogleAdsClientWrapper
+from modules.google_ads_client_pool import get_client_pool
+from services.batch_job_service import LocalBatchJobService
+from utils.query_partition_cache import resolve_during
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+@dataclass
+class SyntheticAccountSpec:
+    """Tamaño y forma de una cuenta sintética"""
+    campaigns: int = 10
+    ad_groups_per_campaign: int = 10
+    keywords_per_ad_group: int = 20
+    ads_per_ad_group: int = 2
+    days: int = 90
+    currency_code: str = 'USD'
+    time_zone: str = 'America/New_York'
+
+    @property
+    def total_keywords(self) -> int:
+        return self.campaigns * self.ad_groups_per_campaign * self.keywords_per_ad_group
+
+
+_ADJECTIVES = ['barato', 'mejor', 'rapido', 'online', 'profesional', 'urgente', 'premium', 'economico',
+               'cerca', 'oficial', 'certificado', 'garantizado']
+_NOUNS = ['abogado', 'dentista', 'cerrajero', 'fontanero', 'seguro', 'hotel', 'curso', 'software',
+          'tarot', 'mudanza', 'electricista', 'taller', 'clinica', 'gimnasio', 'restaurante']
+_PLACES = ['madrid', 'barcelona', 'mexico', 'bogota', 'lima', 'miami', 'santiago', 'quito',
+           'valencia', 'sevilla', 'medellin', 'monterrey']
+_MATCH_TYPES = ['EXACT', 'PHRASE', 'BROAD']
+
+# Colección de la API por recurso (para resource names)
+_COLLECTIONS = {
+    'campaign_budget': 'campaignBudgets',
+    'campaign': 'campaigns',
+    'ad_group': 'adGroups',
+    'ad_group_criterion': 'adGroupCriteria',
+    'ad_group_ad': 'adGroupAds',
+    'campaign_criterion': 'campaignCriteria',
+}
+
+# Recursos que acepta el FROM de los queries
+_QUERYABLE_RESOURCES = {
+    'customer', 'campaign_budget', 'campaign', 'ad_group', 'ad_group_ad', 'ad_group_criterion',
+    'keyword_view', 'campaign_criterion'
+}
+
+_METRIC_FIELDS = {
+    'impressions', 'clicks', 'cost_micros', 'conversions', 'conversions_value', 'all_conversions',
+    'all_conversions_value', 'interactions', 'ctr', 'average_cpc', 'average_cost',
+    'cost_per_conversion', 'conversions_from_interactions_rate', 'value_per_conversion'
+}
+
+_GAQL_RE = re.compile(
+    r"^\s*SELECT\s+(?P<select>.+?)\s+FROM\s+(?P<resource>\w+)"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+(?P<order>.+?))?"
+    r"(?:\s+LIMIT\s+(?P<limit>\d+))?"
+    r"(?:\s+PARAMETERS\s+.+?)?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+_AND_RE = re.compile(r"\s+AND\s+(?=(?:[^']*'[^']*')*[^']*$)", re.IGNORECASE)
+_CONDITION_RE = re.compile(
+    r"^(?P<field>[\w.]+)\s*(?P<op>NOT\s+IN|IN|NOT\s+LIKE|LIKE|BETWEEN|DURING|IS\s+NOT\s+NULL|IS\s+NULL"
+    r"|!=|>=|<=|=|>|<)\s*(?P<value>.*)$",
+    re.IGNORECASE | re.DOTALL
+)
+
+
+# ============================================================================
+# ERRORES
+# ============================================================================
+
+class _FakeRpcError(grpc.RpcError, grpc.Call):
+    """RpcError mínimo para construir GoogleAdsException"""
+
+    def __init__(self, code: grpc.StatusCode, details: str):
+        self._code = code
+        self._details = details
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._details
+
+    def initial_metadata(self):
+        return ()
+
+    def trailing_metadata(self):
+        return ()
+
+    def is_active(self):
+        return False
+
+    def time_remaining(self):
+        return None
+
+    def cancel(self):
+        return False
+
+    def add_callback(self, callback):
+        return False
+
+    def __str__(self):
+        return f"<FakeRpcError {self._code.name}: {self._details}>"
+
+
+class _OperationError(Exception):
+    """Error de una operación de mutate (se convierte en GoogleAdsError)"""
+
+    def __init__(self, code_field: str, code_name: str, message: str):
+        super().__init__(message)
+        self.code_field = code_field
+        self.code_name = code_name
+        self.message = message
+
+
+# ============================================================================
+# BACKEND
+# ============================================================================
+
+class FakeGoogleAdsBackend:
+    """
+    Estado en memoria de cuentas sintéticas y lógica de la API simulada
+
+    - Las entidades se generan de forma determinista (seed) la primera vez
+      que se consulta cada cuenta
+    - Las métricas diarias se calculan bajo demanda a partir de una base por
+      entidad, así 100k keywords x 365 días no ocupan memoria; cada nivel
+      (campaña, grupo, keyword) tiene su propia serie y no son sumas exactas
+    - Los mutates modifican el estado y son atómicos salvo partial_failure
+    - latency (+ jitter) se aplica por request, latency_per_row por fila
+      devuelta y latency_per_operation por operación de mutate
+    - quota_error_rate y max_requests_per_second generan QuotaError
+      RESOURCE_EXHAUSTED con retry_delay, como la API real
+    """
+
+    def __init__(
+        self,
+        accounts: Any = 1,
+        spec: Optional[SyntheticAccountSpec] = None,
+        seed: int = 42,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        latency_per_row: float = 0.0,
+        latency_per_operation: float = 0.0,
+        quota_error_rate: float = 0.0,
+        max_requests_per_second: Optional[float] = None,
+        retry_delay_seconds: int = 1,
+        today: Optional[date] = None
+    ):
+        """
+        Args:
+            accounts: Número de cuentas o lista de customer IDs
+            spec: Tamaño de cada cuenta (o dict customer_id -> spec)
+            seed: Semilla de los datos sintéticos y de los errores aleatorios
+            latency: Segundos por request
+            latency_jitter: Variación aleatoria máxima de la latencia (segundos)
+            latency_per_row: Segundos adicionales por fila devuelta
+            latency_per_operation: Segundos adicionales por operación de mutate
+            quota_error_rate: Probabilidad de QuotaError por request
+            max_requests_per_second: Límite de requests por segundo (por cuenta)
+            retry_delay_seconds: retry_delay de los errores de cuota
+            today: Fecha "actual" de las métricas (default: hoy)
+        """
+        if isinstance(accounts, int):
+            customer_ids = [str(1000000000 + i * 1111) for i in range(1, accounts + 1)]
+        else:
+            customer_ids = [str(customer_id).replace('-', '') for customer_id in accounts]
+
+        if isinstance(spec, dict):
+            self._specs = {customer_id: spec.get(customer_id, SyntheticAccountSpec()) for customer_id in customer_ids}
+        else:
+            self._specs = {customer_id: spec or SyntheticAccountSpec() for customer_id in customer_ids}
+
+        self.customer_ids = customer_ids
+        self.seed = seed
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.latency_per_row = latency_per_row
+        self.latency_per_operation = latency_per_operation
+        self.quota_error_rate = quota_error_rate
+        self.max_requests_per_second = max_requests_per_second
+        self.retry_delay_seconds = retry_delay_seconds
+        self.today = today or date.today()
+
+        self._lock = threading.RLock()
+        self._rng = random.Random(seed)
+        self._accounts: Dict[str, Dict[str, Any]] = {}
+        self._request_times: Dict[str, deque] = {}
+        self._types_client = None
+        self._stats = {
+            'requests': 0, 'search_requests': 0, 'mutate_requests': 0, 'rows_returned': 0,
+            'operations': 0, 'failed_operations': 0, 'quota_errors': 0
+        }
+
+    # ------------------------------------------------------------------------
+    # Clientes
+    # ------------------------------------------------------------------------
+
+    @property
+    def types_client(self):
+        """GoogleAdsClient sin credenciales, solo para tipos y enums"""
+        if self._types_client is None:
+            from google.ads.googleads.client import GoogleAdsClient
+            from google.auth.credentials import AnonymousCredentials
+
+            client = GoogleAdsClient(AnonymousCredentials(), developer_token='fake-developer-token',
+                                     use_proto_plus=True)
+            # get_service carga los módulos de servicios; sin esto get_type no
+            # encuentra los tipos de request/response (MutateOperation, etc.)
+            client.get_service("GoogleAdsService")
+            self._types_client = client
+        return self._types_client
+
+    def create_client(self) -> 'FakeGoogleAdsClient':
+        """Cliente con la interfaz de GoogleAdsClient"""
+        return FakeGoogleAdsClient(self)
+
+    def create_wrapper(self) -> 'FakeGoogleAdsClientWrapper':
+        """GoogleAdsClientWrapper que usa este backend"""
+        return FakeGoogleAdsClientWrapper(self)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    # ------------------------------------------------------------------------
+    # Generación de datos
+    # ------------------------------------------------------------------------
+
+    def _account(self, customer_id: str) -> Dict[str, Any]:
+        customer_id = str(customer_id).replace('-', '')
+        account = self._accounts.get(customer_id)
+        if account is not None:
+            return account
+        with self._lock:
+            if customer_id not in self._accounts:
+                if customer_id not in self._specs:
+                    raise _OperationError('authorization_error', 'USER_PERMISSION_DENIED',
+                                          f"User doesn't have permission to access customer {customer_id}")
+                self._accounts[customer_id] = self._generate_account(customer_id, self._specs[customer_id])
+            return self._accounts[customer_id]
+
+    def _generate_account(self, customer_id: str, spec: SyntheticAccountSpec) -> Dict[str, Any]:
+        start = time.perf_counter()
+        rng = random.Random(f"{self.seed}:{customer_id}")
+        account = {
+            'spec': spec,
+            'next_id': 10_000,
+            'history_start': self.today - timedelta(days=spec.days),
+            'customer': {
+                'customer.id': int(customer_id),
+                'customer.resource_name': f"customers/{customer_id}",
+                'customer.descriptive_name': f"Cuenta Sintética {customer_id[-4:]}",
+                'customer.currency_code': spec.currency_code,
+                'customer.time_zone': spec.time_zone,
+                'customer.manager': False,
+                'customer.test_account': True,
+                'customer.status': 'ENABLED',
+            },
+            'campaign_budget': {},
+            'campaign': {},
+            'ad_group': {},
+            'ad_group_ad': {},
+            'ad_group_criterion': {},
+            'campaign_criterion': {},
+        }
+
+        keyword_index = 0
+        for c in range(spec.campaigns):
+            budget = self._new_entity(account, customer_id, 'campaign_budget', {
+                'name': f"Presupuesto {c + 1}",
+                'amount_micros': rng.randint(10, 500) * 1_000_000,
+                'delivery_method': 'STANDARD',
+                'status': 'ENABLED',
+            })
+            campaign = self._new_entity(account, customer_id, 'campaign', {
+                'name': f"Campaña {c + 1} - {_NOUNS[c % len(_NOUNS)].title()}",
+                'status': 'ENABLED' if rng.random() > 0.15 else 'PAUSED',
+                'advertising_channel_type': 'SEARCH',
+                'bidding_strategy_type': rng.choice(['MANUAL_CPC', 'MAXIMIZE_CONVERSIONS', 'TARGET_SPEND']),
+                'campaign_budget': budget['campaign_budget.resource_name'],
+                'start_date': (self.today - timedelta(days=spec.days)).isoformat(),
+            }, parents={'campaign_budget': budget})
+            campaign_base = 0
+
+            for g in range(spec.ad_groups_per_campaign):
+                ad_group = self._new_entity(account, customer_id, 'ad_group', {
+                    'name': f"Grupo {c + 1}.{g + 1}",
+                    'status': 'ENABLED' if rng.random() > 0.1 else 'PAUSED',
+                    'type': 'SEARCH_STANDARD',
+                    'cpc_bid_micros': rng.randint(20, 300) * 10_000,
+                    'target_cpa_micros': 0,
+                    'target_roas': 0.0,
+                }, parents={'campaign': campaign})
+                ad_group_base = 0
+
+                for k in range(spec.keywords_per_ad_group):
+                    impressions = max(1, int(rng.lognormvariate(3.0, 1.2)))
+                    criterion = self._new_entity(account, customer_id, 'ad_group_criterion', {
+                        'type': 'KEYWORD',
+                        'keyword.text': _keyword_text(keyword_index),
+                        'keyword.match_type': _MATCH_TYPES[keyword_index % len(_MATCH_TYPES)],
+                        'status': 'ENABLED' if rng.random() > 0.1 else 'PAUSED',
+                        'negative': False,
+                        'cpc_bid_micros': rng.randint(20, 300) * 10_000,
+                        'quality_info.quality_score': rng.randint(1, 10),
+                    }, parents={'ad_group': ad_group}, metrics_base=self._metrics_base(rng, impressions))
+                    keyword_index += 1
+                    ad_group_base += impressions
+
+                for a in range(spec.ads_per_ad_group):
+                    self._new_entity(account, customer_id, 'ad_group_ad', {
+                        'status': 'ENABLED',
+                        'ad.type': 'RESPONSIVE_SEARCH_AD',
+                        'ad.name': '',
+                        'ad.final_urls': [f"https://www.ejemplo.com/{c + 1}/{g + 1}"],
+                        'ad.responsive_search_ad.headlines': [
+                            {'text': f"Título {i + 1} Grupo {g + 1}"} for i in range(5)
+                        ],
+                        'ad.responsive_search_ad.descriptions': [
+                            {'text': f"Descripción {i + 1} del grupo {g + 1}"} for i in range(2)
+                        ],
+                        'ad.responsive_search_ad.path1': 'ofertas',
+                        'ad.responsive_search_ad.path2': '',
+                        'policy_summary.approval_status': 'APPROVED',
+                    }, parents={'ad_group': ad_group},
+                        metrics_base=self._metrics_base(rng, max(1, ad_group_base // spec.ads_per_ad_group)))
+
+                ad_group['_metrics'] = self._metrics_base(rng, max(1, ad_group_base))
+                campaign_base += ad_group_base
+
+            campaign['_metrics'] = self._metrics_base(rng, max(1, campaign_base))
+
+        logger.info(
+            f"🧪 Cuenta sintética {customer_id}: {spec.campaigns} campañas, "
+            f"{len(account['ad_group'])} grupos, {len(account['ad_group_criterion'])} keywords "
+            f"en {time.perf_counter() - start:.2f}s"
+        )
+        return account
+
+    @staticmethod
+    def _metrics_base(rng: random.Random, impressions: int) -> Tuple[int, float, int, float, float]:
+        """(impresiones/día, CTR, CPC micros, tasa de conversión, valor por conversión)"""
+        return (
+            impressions,
+            rng.uniform(0.01, 0.12),
+            rng.randint(10, 400) * 10_000,
+            rng.uniform(0.0, 0.15),
+            rng.uniform(10.0, 200.0),
+        )
+
+    def _new_entity(self, account: Dict[str, Any], customer_id: str, resource: str,
+                    fields: Dict[str, Any], parents: Optional[Dict[str, Dict[str, Any]]] = None,
+                    metrics_base: Optional[Tuple] = None, entity_id: Optional[int] = None) -> Dict[str, Any]:
+        """Crea una entidad con claves planas 'recurso.campo'"""
+        if entity_id is None:
+            entity_id = account['next_id']
+            account['next_id'] += 1
+
+        parents = parents or {}
+        entity: Dict[str, Any] = {f"{resource}.{name}": value for name, value in fields.items()}
+        entity['_parents'] = parents
+        entity['_metrics'] = metrics_base
+
+        collection = _COLLECTIONS[resource]
+        if resource == 'ad_group_criterion':
+            parent_id = parents['ad_group']['ad_group.id']
+            entity['ad_group_criterion.criterion_id'] = entity_id
+            resource_name = f"customers/{customer_id}/{collection}/{parent_id}~{entity_id}"
+        elif resource == 'campaign_criterion':
+            parent_id = parents['campaign']['campaign.id']
+            entity['campaign_criterion.criterion_id'] = entity_id
+            resource_name = f"customers/{customer_id}/{collection}/{parent_id}~{entity_id}"
+        elif resource == 'ad_group_ad':
+            parent_id = parents['ad_group']['ad_group.id']
+            entity['ad_group_ad.ad.id'] = entity_id
+            resource_name = f"customers/{customer_id}/{collection}/{parent_id}~{entity_id}"
+        else:
+            entity[f"{resource}.id"] = entity_id
+            resource_name = f"customers/{customer_id}/{collection}/{entity_id}"
+
+        entity[f"{resource}.resource_name"] = resource_name
+        account[resource][resource_name] = entity
+        return entity
+
+    # ------------------------------------------------------------------------
+    # Latencia y cuota
+    # ------------------------------------------------------------------------
+
+    def _begin_request(self, customer_id: str, kind: str) -> None:
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats[f"{kind}_requests"] += 1
+
+            quota_exceeded = self.quota_error_rate and self._rng.random() < self.quota_error_rate
+            if self.max_requests_per_second:
+                now = time.monotonic()
+                window = self._request_times.setdefault(customer_id, deque())
+                while window and now - window[0] > 1.0:
+                    window.popleft()
+                if len(window) >= self.max_requests_per_second:
+                    quota_exceeded = True
+                else:
+                    window.append(now)
+
+            if quota_exceeded:
+                self._stats['quota_errors'] += 1
+            jitter = self._rng.uniform(0, self.latency_jitter) if self.latency_jitter else 0.0
+
+        if self.latency or jitter:
+            time.sleep(self.latency + jitter)
+        if quota_exceeded:
+            raise self._quota_exception()
+
+    def _quota_exception(self) -> GoogleAdsException:
+        failure = type(self.types_client.get_type("GoogleAdsFailure"))({
+            'errors': [{
+                'error_code': {'quota_error': 'RESOURCE_EXHAUSTED'},
+                'message': f"Too many requests. Retry in {self.retry_delay_seconds} seconds.",
+                'details': {'quota_error_details': {
+                    'rate_scope': 'ACCOUNT',
+                    'rate_name': 'Requests per account',
+                    'retry_delay': {'seconds': self.retry_delay_seconds}
+                }}
+            }]
+        })
+        error = _FakeRpcError(grpc.StatusCode.RESOURCE_EXHAUSTED, "Resource has been exhausted")
+        return GoogleAdsException(error, error, failure, f"fake-{self._rng.getrandbits(32):08x}")
+
+    def _request_exception(self, errors: List[Tuple[Optional[int], _OperationError]],
+                           field_name: str) -> GoogleAdsException:
+        failure = self._failure(errors, field_name)
+        error = _FakeRpcError(grpc.StatusCode.INVALID_ARGUMENT, "Request contains an invalid argument.")
+        return GoogleAdsException(error, error, failure, f"fake-{self._rng.getrandbits(32):08x}")
+
+    def _failure(self, errors: List[Tuple[Optional[int], _OperationError]], field_name: str):
+        items = []
+        for index, op_error in errors:
+            item = {'error_code': {op_error.code_field: op_error.code_name}, 'message': op_error.message}
+            if index is not None:
+                item['location'] = {'field_path_elements': [{'field_name': field_name, 'index': index}]}
+            items.append(item)
+        return type(self.types_client.get_type("GoogleAdsFailure"))({'errors': items})
+
+    # ------------------------------------------------------------------------
+    # Búsqueda (GAQL)
+    # ------------------------------------------------------------------------
+
+    def search(self, customer_id: str, query: str) -> List[Any]:
+        """Ejecuta un query GAQL y devuelve GoogleAdsRow"""
+        customer_id = str(customer_id).replace('-', '')
+        self._begin_request(customer_id, 'search')
+        try:
+            rows = self._run_query(customer_id, query)
+        except _OperationError as e:
+            raise self._request_exception([(None, e)], 'query')
+
+        if self.latency_per_row and rows:
+            time.sleep(self.latency_per_row * len(rows))
+        with self._lock:
+            self._stats['rows_returned'] += len(rows)
+        return rows
+
+    def _run_query(self, customer_id: str, query: str) -> List[Any]:
+        match = _GAQL_RE.match(query)
+        if not match:
+            raise _OperationError('query_error', 'UNEXPECTED_END_OF_QUERY', f"Query inválido: {query[:120]}")
+
+        resource = match.group('resource').lower()
+        if resource not in _QUERYABLE_RESOURCES:
+            raise _OperationError('query_error', 'INVALID_RESOURCE_NAME',
+                                  f"Recurso no soportado por el backend simulado: {resource}")
+
+        fields = [field.strip() for field in match.group('select').split(',') if field.strip()]
+        conditions = _parse_where(match.group('where') or '')
+        order = _parse_order(match.group('order') or '')
+        limit = int(match.group('limit')) if match.group('limit') else None
+
+        account = self._account(customer_id)
+        date_range = self._date_range(account, conditions)
+        metric_conditions = [c for c in conditions if c[0].startswith('metrics.')]
+        entity_conditions = [c for c in conditions if not c[0].startswith(('metrics.', 'segments.date'))]
+
+        wants_metrics = any(field.startswith('metrics.') for field in fields) or bool(metric_conditions) \
+            or any(field.startswith('metrics.') for field, _ in order)
+        by_date = 'segments.date' in fields
+        days = _date_span(*date_range) if by_date else [None]
+
+        # Campos de la entidad (se leen una vez) y campos por fila (métricas y fecha)
+        wanted = list(dict.fromkeys(fields + [field for field, _ in order]))
+        entity_fields = [field for field in wanted if not field.startswith(('metrics.', 'segments.date'))]
+        metric_fields = [(field, field.split('.', 1)[1]) for field in wanted if field.startswith('metrics.')]
+        metric_fields += [(field, field.split('.', 1)[1]) for field, _, _ in metric_conditions
+                          if field not in wanted]
+
+        flat_rows: List[Dict[str, Any]] = []
+        for context, metrics_base, entity_key in self._contexts(account, resource):
+            if not all(_evaluate(context.get(field), op, value) for field, op, value in entity_conditions):
+                continue
+
+            entity_row = {field: context.get(field) for field in entity_fields}
+            if not wants_metrics and not by_date:
+                flat_rows.append(entity_row)
+                continue
+
+            for day in days:
+                metrics = self._metrics(metrics_base, entity_key, date_range, day)
+                if by_date and metrics['impressions'] == 0:
+                    continue  # la API no devuelve filas de días sin actividad
+                row = dict(entity_row)
+                for field, name in metric_fields:
+                    row[field] = metrics.get(name)
+                if day is not None:
+                    row['segments.date'] = day.isoformat()
+                if all(_evaluate(row.get(field), op, value) for field, op, value in metric_conditions):
+                    flat_rows.append(row)
+
+        for field, descending in reversed(order):
+            flat_rows.sort(key=lambda row: _sort_key(row.get(field)), reverse=descending)
+        if limit is not None:
+            flat_rows = flat_rows[:limit]
+
+        # Construir el protobuf crudo y envolverlo es ~5x más rápido que
+        # pasar el dict al constructor proto-plus
+        row_type = type(self.types_client.get_type("GoogleAdsRow"))
+        raw_type = row_type.pb()
+        paths = [(field, ['type_' if part == 'type' else part for part in field.split('.')]) for field in fields]
+        return [row_type.wrap(raw_type(**_nest(row, paths))) for row in flat_rows]
+
+    def _contexts(self, account: Dict[str, Any], resource: str) -> Iterator[Tuple[Dict[str, Any], Any, str]]:
+        """(campos del recurso y de sus padres, base de métricas, clave de la serie)"""
+        if resource == 'customer':
+            yield account['customer'], None, account['customer']['customer.resource_name']
+            return
+
+        entity_resource = 'ad_group_criterion' if resource == 'keyword_view' else resource
+        for resource_name, entity in account[entity_resource].items():
+            context = dict(account['customer'])
+            layers = [entity]
+            parent = entity
+            while parent['_parents']:
+                parent = next(iter(parent['_parents'].values()))
+                layers.append(parent)
+            for layer in reversed(layers):
+                context.update(layer)
+            yield context, entity['_metrics'], resource_name
+
+    def _date_range(self, account: Dict[str, Any], conditions: List[Tuple[str, str, Any]]) -> Tuple[date, date]:
+        start, end = account['history_start'], self.today
+        for field, op, value in conditions:
+            if field != 'segments.date':
+                continue
+            if op == 'DURING':
+                resolved = resolve_during(value, self.today)
+                if resolved is None:
+                    raise _OperationError('query_error', 'INVALID_VALUE_WITH_DURING_OPERATOR',
+                                          f"Rango DURING no soportado: {value}")
+                start, end = max(start, resolved[0]), min(end, resolved[1])
+            elif op == 'BETWEEN':
+                start = max(start, date.fromisoformat(value[0]))
+                end = min(end, date.fromisoformat(value[1]))
+            elif op in ('>=', '>'):
+                bound = date.fromisoformat(value) + timedelta(days=1 if op == '>' else 0)
+                start = max(start, bound)
+            elif op in ('<=', '<'):
+                bound = date.fromisoformat(value) - timedelta(days=1 if op == '<' else 0)
+                end = min(end, bound)
+            elif op == '=':
+                start = max(start, date.fromisoformat(value))
+                end = min(end, date.fromisoformat(value))
+        return start, end
+
+    def _metrics(self, base: Optional[Tuple], key: str, date_range: Tuple[date, date],
+                 day: Optional[date]) -> Dict[str, Any]:
+        """Métricas de un día (day) o acumuladas en el rango (day=None)"""
+        impressions = clicks = cost_micros = 0
+        conversions = conversions_value = 0.0
+        if base:
+            base_impressions, ctr, cpc_micros, conversion_rate, conversion_value = base
+            days = [day] if day is not None else _date_span(*date_range)
+            for current in days:
+                noise = zlib.crc32(f"{self.seed}:{key}:{current.toordinal()}".encode()) / 0xFFFFFFFF
+                weekday_factor = 0.75 if current.weekday() >= 5 else 1.0
+                day_impressions = int(base_impressions * (0.4 + 1.2 * noise) * weekday_factor)
+                day_clicks = int(day_impressions * ctr * (0.7 + 0.6 * noise))
+                day_conversions = round(day_clicks * conversion_rate, 2)
+                impressions += day_impressions
+                clicks += day_clicks
+                cost_micros += day_clicks * cpc_micros
+                conversions += day_conversions
+                conversions_value += round(day_conversions * conversion_value, 2)
+
+        return {
+            'impressions': impressions,
+            'clicks': clicks,
+            'interactions': clicks,
+            'cost_micros': cost_micros,
+            'conversions': round(conversions, 2),
+            'conversions_value': round(conversions_value, 2),
+            'all_conversions': round(conversions, 2),
+            'all_conversions_value': round(conversions_value, 2),
+            'ctr': clicks / impressions if impressions else 0.0,
+            'average_cpc': cost_micros / clicks if clicks else 0.0,
+            'average_cost': cost_micros / clicks if clicks else 0.0,
+            'cost_per_conversion': cost_micros / conversions if conversions else 0.0,
+            'conversions_from_interactions_rate': conversions / clicks if clicks else 0.0,
+            'value_per_conversion': conversions_value / conversions if conversions else 0.0,
+        }
+
+    # ------------------------------------------------------------------------
+    # Mutate
+    # ------------------------------------------------------------------------
+
+    def mutate(self, customer_id: str, operations: List[Tuple[str, Any]], partial_failure: bool = False,
+               validate_only: bool = False, field_name: str = 'mutate_operations'
+               ) -> Tuple[List[Optional[Tuple[str, str]]], Any]:
+        """
+        Aplica operaciones [(campo de MutateOperation, sub-operación), ...]
+
+        Returns:
+            ([(campo de resultado, resource_name) o None por operación],
+             GoogleAdsFailure con los errores parciales o None)
+
+        Raises:
+            GoogleAdsException: sin partial_failure, si alguna operación falla
+        """
+        customer_id = str(customer_id).replace('-', '')
+        self._begin_request(customer_id, 'mutate')
+        if self.latency_per_operation and operations:
+            time.sleep(self.latency_per_operation * len(operations))
+
+        with self._lock:
+            try:
+                account = self._account(customer_id)
+            except _OperationError as e:
+                raise self._request_exception([(None, e)], field_name)
+
+            undo: List[Callable[[], None]] = []
+            temp_names: Dict[str, str] = {}
+            results: List[Optional[Tuple[str, str]]] = []
+            errors: List[Tuple[int, _OperationError]] = []
+
+            for index, (operation_field, sub_operation) in enumerate(operations):
+                try:
+                    results.append(self._apply(account, customer_id, operation_field, sub_operation,
+                                               temp_names, undo))
+                except _OperationError as e:
+                    errors.append((index, e))
+                    results.append(None)
+
+            self._stats['operations'] += len(operations)
+            self._stats['failed_operations'] += len(errors)
+
+            if validate_only or (errors and not partial_failure):
+                for revert in reversed(undo):
+                    revert()
+            if errors and not partial_failure:
+                raise self._request_exception(errors, field_name)
+            if validate_only:
+                results = [None] * len(operations)
+
+            return results, (self._failure(errors, field_name) if errors else None)
+
+    def _apply(self, account: Dict[str, Any], customer_id: str, operation_field: str, sub_operation,
+               temp_names: Dict[str, str], undo: List[Callable[[], None]]) -> Tuple[str, str]:
+        resource = operation_field.replace('_operation', '')
+        if resource not in _COLLECTIONS:
+            raise _OperationError('request_error', 'UNKNOWN', f"Operación no soportada: {operation_field}")
+        result_field = f"{resource}_result"
+        action = type(sub_operation).pb(sub_operation).WhichOneof('operation')
+
+        if action == 'create':
+            create = sub_operation.create
+            fields, parents = self._create_fields(account, resource, create, temp_names)
+            entity = self._new_entity(account, customer_id, resource, fields, parents=parents,
+                                      metrics_base=self._metrics_base(self._rng, 0))
+            resource_name = entity[f"{resource}.resource_name"]
+            if create.resource_name:
+                temp_names[create.resource_name] = resource_name
+            undo.append(lambda: account[resource].pop(resource_name, None))
+            return result_field, resource_name
+
+        if action == 'update':
+            update = sub_operation.update
+            entity = self._find(account, resource, update.resource_name, temp_names)
+            paths = list(sub_operation.update_mask.paths)
+            if not paths:
+                raise _OperationError('field_mask_error', 'FIELD_MASK_MISSING', "update_mask vacío")
+            previous = {f"{resource}.{path}": entity.get(f"{resource}.{path}") for path in paths}
+            for path in paths:
+                entity[f"{resource}.{path}"] = _read_field(update, path)
+            undo.append(lambda: entity.update(previous))
+            return result_field, entity[f"{resource}.resource_name"]
+
+        if action == 'remove':
+            entity = self._find(account, resource, sub_operation.remove, temp_names)
+            previous_status = entity.get(f"{resource}.status")
+            entity[f"{resource}.status"] = 'REMOVED'
+            undo.append(lambda: entity.__setitem__(f"{resource}.status", previous_status))
+            return result_field, entity[f"{resource}.resource_name"]
+
+        raise _OperationError('mutate_error', 'OPERATION_DOES_NOT_SUPPORT_FIELD_MASK' if action else 'UNKNOWN',
+                              f"Operación vacía en {operation_field}")
+
+    def _find(self, account: Dict[str, Any], resource: str, resource_name: str,
+              temp_names: Dict[str, str]) -> Dict[str, Any]:
+        resource_name = temp_names.get(resource_name, resource_name)
+        entity = account.get(resource, {}).get(resource_name)
+        if entity is None:
+            raise _OperationError('mutate_error', 'RESOURCE_NOT_FOUND', f"Recurso no encontrado: {resource_name}")
+        return entity
+
+    def _create_fields(self, account: Dict[str, Any], resource: str, create,
+                       temp_names: Dict[str, str]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """Campos planos y padres de un recurso nuevo, con validaciones básicas"""
+        if resource == 'campaign_budget':
+            if create.amount_micros <= 0:
+                raise _OperationError('campaign_budget_error', 'NON_MULTIPLE_OF_MINIMUM_CURRENCY_UNIT',
+                                      "amount_micros debe ser mayor que 0")
+            return {
+                'name': create.name, 'amount_micros': create.amount_micros,
+                'delivery_method': create.delivery_method.name, 'status': 'ENABLED',
+                'explicitly_shared': create.explicitly_shared,
+            }, {}
+
+        if resource == 'campaign':
+            _require(create.name, 'name')
+            budget = self._find(account, 'campaign_budget', create.campaign_budget, temp_names)
+            bidding = type(create).pb(create).WhichOneof('campaign_bidding_strategy')
+            return {
+                'name': create.name, 'status': create.status.name,
+                'advertising_channel_type': create.advertising_channel_type.name,
+                'bidding_strategy_type': bidding.upper() if bidding else 'UNSPECIFIED',
+                'campaign_budget': budget['campaign_budget.resource_name'],
+                'start_date': create.start_date or self.today.isoformat(), 'end_date': create.end_date,
+            }, {'campaign_budget': budget}
+
+        if resource == 'ad_group':
+            _require(create.name, 'name')
+            campaign = self._find(account, 'campaign', create.campaign, temp_names)
+            return {
+                'name': create.name, 'status': create.status.name, 'type': create.type_.name,
+                'cpc_bid_micros': create.cpc_bid_micros, 'target_cpa_micros': create.target_cpa_micros,
+                'target_roas': create.target_roas,
+            }, {'campaign': campaign}
+
+        if resource == 'ad_group_criterion':
+            ad_group = self._find(account, 'ad_group', create.ad_group, temp_names)
+            text = create.keyword.text
+            _require(text, 'keyword.text')
+            if len(text) > 80:
+                raise _OperationError('string_length_error', 'TOO_LONG', f"Keyword demasiado larga: '{text}'")
+            if len(text.split()) > 10:
+                raise _OperationError('criterion_error', 'KEYWORD_HAS_TOO_MANY_WORDS',
+                                      f"Keyword con más de 10 palabras: '{text}'")
+            return {
+                'type': 'KEYWORD', 'keyword.text': text, 'keyword.match_type': create.keyword.match_type.name,
+                'status': create.status.name, 'negative': create.negative,
+                'cpc_bid_micros': create.cpc_bid_micros, 'quality_info.quality_score': 0,
+            }, {'ad_group': ad_group}
+
+        if resource == 'ad_group_ad':
+            ad_group = self._find(account, 'ad_group', create.ad_group, temp_names)
+            ad = create.ad
+            headlines = [asset.text for asset in ad.responsive_search_ad.headlines]
+            descriptions = [asset.text for asset in ad.responsive_search_ad.descriptions]
+            if len(headlines) < 3 or len(descriptions) < 2:
+                raise _OperationError('ad_error', 'TOO_FEW_HEADLINES' if len(headlines) < 3 else 'TOO_FEW_DESCRIPTIONS',
+                                      "Un RSA necesita al menos 3 títulos y 2 descripciones")
+            for text, limit in [(h, 30) for h in headlines] + [(d, 90) for d in descriptions]:
+                if len(text) > limit:
+                    raise _OperationError('string_length_error', 'TOO_LONG',
+                                          f"Texto de más de {limit} caracteres: '{text}'")
+            if not ad.final_urls:
+                raise _OperationError('ad_error', 'URL_NOT_SPECIFIED', "El anuncio no tiene final_urls")
+            return {
+                'status': create.status.name, 'ad.type': 'RESPONSIVE_SEARCH_AD', 'ad.name': ad.name,
+                'ad.final_urls': list(ad.final_urls),
+                'ad.responsive_search_ad.headlines': [{'text': text} for text in headlines],
+                'ad.responsive_search_ad.descriptions': [{'text': text} for text in descriptions],
+                'ad.responsive_search_ad.path1': ad.responsive_search_ad.path1,
+                'ad.responsive_search_ad.path2': ad.responsive_search_ad.path2,
+                'policy_summary.approval_status': 'APPROVED',
+            }, {'ad_group': ad_group}
+
+        # campaign_criterion
+        campaign = self._find(account, 'campaign', create.campaign, temp_names)
+        criterion = type(create).pb(create).WhichOneof('criterion')
+        return {
+            'type': criterion.upper() if criterion else 'UNSPECIFIED', 'negative': create.negative,
+            'status': 'ENABLED', 'keyword.text': create.keyword.text,
+            'keyword.match_type': create.keyword.match_type.name,
+        }, {'campaign': campaign}
+
+
+# ============================================================================
+# CLIENTE Y SERVICIOS
+# ============================================================================
+
+class _StreamBatch:
+    """Respuesta de search_stream (solo expone results)"""
+
+    def __init__(self, results: List[Any]):
+        self.results = results
+
+
+class _FakeService:
+    """Base de los servicios: delega los helpers de paths al servicio real"""
+
+    def __init__(self, client: 'FakeGoogleAdsClient', name: str):
+        self._client = client
+        self._name = name
+        self._real_service = None
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._real_service is None:
+            self._real_service = self._client.types_client.get_service(self._name)
+        return getattr(self._real_service, name)
+
+
+class _FakeGoogleAdsService(_FakeService):
+    """GoogleAdsService: search, search_stream y mutate"""
+
+    STREAM_BATCH_SIZE = 10_000
+
+    def search(self, request=None, *, customer_id: str = None, query: str = None, **kwargs):
+        customer_id, query = _request_args(request, customer_id=customer_id, query=query)
+        return self._client.backend.search(customer_id, query)
+
+    def search_stream(self, request=None, *, customer_id: str = None, query: str = None, **kwargs):
+        customer_id, query = _request_args(request, customer_id=customer_id, query=query)
+        rows = self._client.backend.search(customer_id, query)
+        for start in range(0, len(rows), self.STREAM_BATCH_SIZE):
+            yield _StreamBatch(rows[start:start + self.STREAM_BATCH_SIZE])
+
+    def mutate(self, request=None, *, customer_id: str = None, mutate_operations=None,
+               partial_failure: bool = False, validate_only: bool = False, **kwargs):
+        customer_id, mutate_operations, partial_failure, validate_only = _request_args(
+            request, customer_id=customer_id, mutate_operations=mutate_operations,
+            partial_failure=partial_failure, validate_only=validate_only
+        )
+        operations = []
+        for operation in mutate_operations or []:
+            which = type(operation).pb(operation).WhichOneof('operation')
+            operations.append((which, getattr(operation, which) if which else None))
+
+        results, failure = self._client.backend.mutate(customer_id, operations, partial_failure, validate_only)
+
+        response = self._client.get_type("MutateGoogleAdsResponse")
+        response_type = type(response)
+        responses = [{result_field: {'resource_name': resource_name}} if result_field else {}
+                     for result_field, resource_name in (result or (None, None) for result in results)]
+        response = response_type({'mutate_operation_responses': responses})
+        if failure is not None:
+            response.partial_failure_error = _partial_failure_status(failure)
+        return response
+
+
+class _FakeResourceService(_FakeService):
+    """CampaignService, AdGroupService, AdGroupCriterionService... (mutate_<recurso>s)"""
+
+    def __init__(self, client: 'FakeGoogleAdsClient', name: str, operation_field: str, response_type: str):
+        super().__init__(client, name)
+        self._operation_field = operation_field
+        self._response_type = response_type
+
+    def mutate(self, request=None, *, customer_id: str = None, operations=None,
+               partial_failure: bool = False, validate_only: bool = False, **kwargs):
+        customer_id, operations, partial_failure, validate_only = _request_args(
+            request, customer_id=customer_id, operations=operations,
+            partial_failure=partial_failure, validate_only=validate_only
+        )
+        results, failure = self._client.backend.mutate(
+            customer_id, [(self._operation_field, operation) for operation in operations or []],
+            partial_failure, validate_only, field_name='operations'
+        )
+        response = type(self._client.get_type(self._response_type))({
+            'results': [{'resource_name': result[1]} if result else {} for result in results]
+        })
+        if failure is not None:
+            response.partial_failure_error = _partial_failure_status(failure)
+        return response
+
+
+class _FakeCustomerService(_FakeService):
+    def list_accessible_customers(self, *args, **kwargs):
+        return _AccessibleCustomers(
+            [f"customers/{customer_id}" for customer_id in self._client.backend.customer_ids]
+        )
+
+
+class _AccessibleCustomers:
+    def __init__(self, resource_names: List[str]):
+        self.resource_names = resource_names
+
+
+class _FakeBatchJobService(LocalBatchJobService):
+    """BatchJobService local que aplica las operaciones sobre el backend"""
+
+    def __init__(self, client: 'FakeGoogleAdsClient'):
+        super().__init__(client)
+        self._fake_client = client
+
+    def _apply(self, customer_id: str, index: int, operation) -> Any:
+        result = self.client.get_type("BatchJobResult")
+        result.operation_index = index
+
+        which = type(operation).pb(operation).WhichOneof('operation')
+        results, failure = self._fake_client.backend.mutate(
+            customer_id, [(which, getattr(operation, which))], partial_failure=True
+        )
+        if failure is not None:
+            result.status = status_pb2.Status(code=3, message=failure.errors[0].message)
+            return result
+
+        result_field, resource_name = results[0]
+        getattr(result.mutate_operation_response, result_field).resource_name = resource_name
+        return result
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._fake_client.types_client.get_service("BatchJobService"), name)
+
+
+# Servicio -> (método mutate, campo de MutateOperation, tipo de respuesta)
+_RESOURCE_SERVICES = {
+    'CampaignBudgetService': ('mutate_campaign_budgets', 'campaign_budget_operation', 'MutateCampaignBudgetsResponse'),
+    'CampaignService': ('mutate_campaigns', 'campaign_operation', 'MutateCampaignsResponse'),
+    'AdGroupService': ('mutate_ad_groups', 'ad_group_operation', 'MutateAdGroupsResponse'),
+    'AdGroupCriterionService': ('mutate_ad_group_criteria', 'ad_group_criterion_operation',
+                                'MutateAdGroupCriteriaResponse'),
+    'AdGroupAdService': ('mutate_ad_group_ads', 'ad_group_ad_operation', 'MutateAdGroupAdsResponse'),
+    'CampaignCriterionService': ('mutate_campaign_criteria', 'campaign_criterion_operation',
+                                 'MutateCampaignCriteriaResponse'),
+}
+
+
+class FakeGoogleAdsClient:
+    """
+    Sustituto de GoogleAdsClient respaldado por FakeGoogleAdsBackend
+
+    get_type y enums son los reales (sin credenciales); get_service devuelve
+    servicios simulados para búsqueda, mutate y batch jobs
+    """
+
+    def __init__(self, backend: FakeGoogleAdsBackend):
+        self.backend = backend
+        self.types_client = backend.types_client
+        self.enums = self.types_client.enums
+        self._services: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get_type(self, name: str, version: Optional[str] = None):
+        return self.types_client.get_type(name)
+
+    def copy_from(self, destination, origin):
+        return self.types_client.copy_from(destination, origin)
+
+    def get_service(self, name: str, version: Optional[str] = None, interceptors=None):
+        service = self._services.get(name)
+        if service is not None:
+            return service
+        with self._lock:
+            if name not in self._services:
+                self._services[name] = self._create_service(name)
+            return self._services[name]
+
+    def _create_service(self, name: str):
+        if name == 'GoogleAdsService':
+            return _FakeGoogleAdsService(self, name)
+        if name == 'BatchJobService':
+            return _FakeBatchJobService(self)
+        if name == 'CustomerService':
+            return _FakeCustomerService(self, name)
+        if name in _RESOURCE_SERVICES:
+            method_name, operation_field, response_type = _RESOURCE_SERVICES[name]
+            service = _FakeResourceService(self, name, operation_field, response_type)
+            setattr(service, method_name, service.mutate)
+            return service
+        raise ValueError(f"Servicio no soportado por el backend simulado: {name}")
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.types_client, name)
+
+
+class FakeGoogleAdsClientWrapper(GoogleAdsClientWrapper):
+    """GoogleAdsClientWrapper sobre el backend simulado (sin config ni OAuth)"""
+
+    def __init__(self, backend: FakeGoogleAdsBackend):
+        # No se llama a super().__init__: no hay archivo de configuración ni autenticación
+        self.config_file = None
+        self.auth = None
+        self.backend = backend
+        # Registrado en el pool como cualquier cliente: get_pooled_service lo resuelve igual
+        self._client = get_client_pool().register_client(backend.create_client())
+        self._customer_ids = list(backend.customer_ids)
+
+    def get_client(self) -> FakeGoogleAdsClient:
+        return self._client
+
+    def load_customer_ids(self) -> List[str]:
+        return list(self._customer_ids)
+
+    def get_customer_ids(self, refresh: bool = False) -> list:
+        return list(self._customer_ids)
+
+    def list_accessible_customers(self) -> List[str]:
+        return list(self._customer_ids)
+
+    def get_account_descriptive_names(self, customer_ids: List[str]) -> Dict[str, str]:
+        return {customer_id: f"Cuenta Sintética {customer_id[-4:]}" for customer_id in customer_ids}
+
+    def __repr__(self):
+        return f"<FakeGoogleAdsClientWrapper(accounts={len(self._customer_ids)})>"
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _keyword_text(index: int) -> str:
+    """Texto de keyword único y legible para un índice"""
+    noun = _NOUNS[index % len(_NOUNS)]
+    place = _PLACES[(index // len(_NOUNS)) % len(_PLACES)]
+    adjective = _ADJECTIVES[(index // (len(_NOUNS) * len(_PLACES))) % len(_ADJECTIVES)]
+    cycle = index // (len(_NOUNS) * len(_PLACES) * len(_ADJECTIVES))
+    text = f"{noun} {adjective} {place}"
+    return f"{text} {cycle}" if cycle else text
+
+
+def _require(value: Any, field_name: str) -> None:
+    if not value:
+        raise _OperationError('field_error', 'REQUIRED', f"Campo requerido: {field_name}")
+
+
+def _read_field(message, path: str) -> Any:
+    """Valor de un campo (ruta con puntos) de un mensaje, enums como nombre"""
+    value = message
+    for part in path.split('.'):
+        value = getattr(value, part if part != 'type' else 'type_')
+    return getattr(value, 'name', value) if hasattr(value, 'name') and isinstance(value, int) else value
+
+
+def _request_args(request, **kwargs) -> Tuple:
+    """Argumentos de un request (dict, proto o keywords)"""
+    if request is None:
+        return tuple(kwargs.values())
+    if isinstance(request, dict):
+        return tuple(request.get(name, default) for name, default in kwargs.items())
+    return tuple(getattr(request, name, default) for name, default in kwargs.items())
+
+
+def _partial_failure_status(failure) -> status_pb2.Status:
+    detail = any_pb2.Any(
+        type_url=f"type.googleapis.com/{type(failure).pb().DESCRIPTOR.full_name}",
+        value=type(failure).serialize(failure)
+    )
+    message = "; ".join(error.message for error in failure.errors)
+    return status_pb2.Status(code=3, message=message, details=[detail])
+
+
+def _parse_where(where: str) -> List[Tuple[str, str, Any]]:
+    """Condiciones (campo, operador, valor) del WHERE"""
+    if not where.strip():
+        return []
+    parts = [' '.join(part.split()) for part in _AND_RE.split(where.strip())]
+    raw_conditions: List[str] = []
+    for part in parts:
+        if raw_conditions and re.search(r"\bBETWEEN\s+\S+$", raw_conditions[-1], re.IGNORECASE):
+            raw_conditions[-1] = f"{raw_conditions[-1]} AND {part}"
+        else:
+            raw_conditions.append(part)
+
+    conditions = []
+    for raw in raw_conditions:
+        match = _CONDITION_RE.match(raw)
+        if not match:
+            raise _OperationError('query_error', 'UNEXPECTED_INPUT', f"Condición no soportada: {raw}")
+        field = match.group('field')
+        op = ' '.join(match.group('op').upper().split())
+        raw_value = match.group('value').strip()
+
+        if op in ('IN', 'NOT IN'):
+            value = [_literal(item) for item in _split_list(raw_value)]
+        elif op == 'BETWEEN':
+            low, high = re.split(r"\s+AND\s+", raw_value, flags=re.IGNORECASE)
+            value = (_literal(low), _literal(high))
+        elif op in ('IS NULL', 'IS NOT NULL'):
+            value = None
+        else:
+            value = _literal(raw_value)
+        conditions.append((field, op, value))
+    return conditions
+
+
+def _parse_order(order: str) -> List[Tuple[str, bool]]:
+    result = []
+    for part in order.split(','):
+        tokens = part.split()
+        if tokens:
+            result.append((tokens[0], len(tokens) > 1 and tokens[1].upper() == 'DESC'))
+    return result
+
+
+def _split_list(raw: str) -> List[str]:
+    inner = raw.strip()
+    if inner.startswith('(') and inner.endswith(')'):
+        inner = inner[1:-1]
+    return [item.strip() for item in re.split(r",(?=(?:[^']*'[^']*')*[^']*$)", inner) if item.strip()]
+
+
+def _literal(raw: str) -> Any:
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in ("'", '"'):
+        return raw[1:-1]
+    try:
+        return int(raw)
+    except ValueError:
+        pass
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+
+def _coerce(value: Any, literal: Any) -> Any:
+    """Convierte el literal al tipo del valor del campo"""
+    if isinstance(value, bool):
+        return str(literal).upper() == 'TRUE' if isinstance(literal, str) else bool(literal)
+    if isinstance(value, (int, float)) and isinstance(literal, str):
+        try:
+            return type(value)(literal)
+        except ValueError:
+            return literal
+    if isinstance(value, str) and not isinstance(literal, str):
+        return str(literal)
+    return literal
+
+
+def _evaluate(value: Any, op: str, literal: Any) -> bool:
+    if op == 'IS NULL':
+        return value in (None, '', 0)
+    if op == 'IS NOT NULL':
+        return value not in (None, '', 0)
+    if op in ('IN', 'NOT IN'):
+        found = any(value == _coerce(value, item) for item in literal)
+        return found if op == 'IN' else not found
+    if op in ('LIKE', 'NOT LIKE'):
+        pattern = '^' + re.escape(str(literal)).replace('%', '.*').replace('_', '.') + '$'
+        matched = value is not None and re.match(pattern, str(value), re.IGNORECASE) is not None
+        return matched if op == 'LIKE' else not matched
+    if op == 'BETWEEN':
+        return value is not None and _coerce(value, literal[0]) <= value <= _coerce(value, literal[1])
+    if op == 'DURING':
+        return True
+
+    literal = _coerce(value, literal)
+    if op == '=':
+        return value == literal
+    if op == '!=':
+        return value != literal
+    if value is None:
+        return False
+    try:
+        if op == '>':
+            return value > literal
+        if op == '>=':
+            return value >= literal
+        if op == '<':
+            return value < literal
+        if op == '<=':
+            return value <= literal
+    except TypeError:
+        return False
+    return False
+
+
+def _nest(flat: Dict[str, Any], paths: List[Tuple[str, List[str]]]) -> Dict[str, Any]:
+    """{'campaign.id': 1} -> {'campaign': {'id': 1}} (solo campos seleccionados)"""
+    nested: Dict[str, Any] = {}
+    for field, parts in paths:
+        value = flat.get(field)
+        if value is None or parts[0] == 'metrics' and parts[1] not in _METRIC_FIELDS:
+            continue
+        node = nested
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return nested
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    return (2, str(value))
+
+
+def _date_span(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
@@ -6,10 +6,13 @@ Provides simplified interface for Google Ads API operations
 import os
 import yaml
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from google.ads.googleads.client import GoogleAdsClient
 from google.ads.googleads.errors import GoogleAdsException
 from modules.auth import GoogleAdsAuth
+from modules.google_ads_client_pool import get_client_pool
+from modules.account_hierarchy import get_account_hierarchy
+from utils.query_partition_cache import get_query_partition_cache, parse_partitioned_query
 import streamlit as st
 
 logger = logging.getLogger(__name__)
@@ -60,8 +63,11 @@ class GoogleAdsClientWrapper:
             return {}
 
     def get_client(self) -> Optional[GoogleAdsClient]:
-        """Get authenticated Google Ads client"""
+        """Get authenticated Google Ads client (shared through the process-wide pool)"""
         if self._client:
+            # Periodic channel health check off the request path; broken
+            # channels are rebuilt lazily on the next get_service
+            get_client_pool().check_health_in_background(self._client)
             return self._client
         
         try:
@@ -89,7 +95,8 @@ class GoogleAdsClientWrapper:
             if config.get('login_customer_id'):
                 client_config['login_customer_id'] = config['login_customer_id']
             
-            self._client = GoogleAdsClient.load_from_dict(client_config)
+            # Warm clients and service stubs are reused across wrappers and reruns
+            self._client = get_client_pool().get_client(client_config)
             self.client = self._client  # Compatibilidad
             
             logger.info("Google Ads client initialized successfully")
@@ -140,139 +147,36 @@ class GoogleAdsClientWrapper:
             
         return self._customer_ids
     
-    def get_customer_ids(self) -> list:
-        """Get accessible customer IDs - Optimizado para cuentas MCC"""
+    def get_customer_ids(self, refresh: bool = False) -> list:
+        """
+        Get accessible customer IDs - Optimizado para cuentas MCC
+        
+        Served from the persisted account hierarchy; only the first run (no
+        hierarchy on disk) crawls synchronously. Stale data is returned right
+        away and refreshed incrementally in a background thread.
+        
+        Args:
+            refresh: Force a synchronous incremental refresh first
+        """
         try:
-            client = self.get_client()
-            if not client:
-                logger.error("❌ Cliente no disponible")
-                return []
+            hierarchy = get_account_hierarchy()
             
-            customer_service = client.get_service("CustomerService")
+            if hierarchy.is_empty or refresh:
+                if not self.get_client():
+                    logger.error("❌ Cliente no disponible")
+                    return []
+                hierarchy.refresh(self)
+            else:
+                hierarchy.refresh_in_background(self)
             
-            # Obtener todas las cuentas accesibles
-            accessible_customers = customer_service.list_accessible_customers()
-            resource_names = accessible_customers.resource_names
-            
-            logger.info(f"📋 Encontradas {len(resource_names)} cuentas totales")
-            
-            # Extraer IDs
-            all_customer_ids = [
-                name.split('/')[-1] 
-                for name in resource_names
-            ]
-            
-            # Verificar si tenemos una cuenta MCC como login_customer_id
-            is_mcc = False
-            mcc_id = self.login_customer_id
-            
-            if mcc_id in all_customer_ids:
-                # Verificar si es MCC
-                try:
-                    ga_service = client.get_service("GoogleAdsService")
-                    query = """
-                        SELECT
-                            customer.manager
-                        FROM customer
-                        LIMIT 1
-                    """
-                    response = ga_service.search(customer_id=mcc_id, query=query)
-                    for row in response:
-                        is_mcc = row.customer.manager
-                        logger.info(f"🔍 Cuenta {mcc_id} - Es MCC: {is_mcc}")
-                        break
-                except Exception as e:
-                    logger.warning(f"⚠️ No se pudo verificar si {mcc_id} es MCC: {e}")
-            
-            if is_mcc:
-                logger.info(f"✅ Cuenta MCC detectada: {mcc_id}")
-                
-                # Para cuentas MCC, obtener todas las sub-cuentas
-                try:
-                    ga_service = client.get_service("GoogleAdsService")
-                    
-                    query = """
-                        SELECT
-                            customer_client.client_customer,
-                            customer_client.descriptive_name,
-                            customer_client.manager,
-                            customer_client.status,
-                            customer_client.hidden
-                        FROM customer_client
-                        WHERE customer_client.status = 'ENABLED'
-                        AND customer_client.hidden = FALSE
-                    """
-                    
-                    response = ga_service.search(customer_id=mcc_id, query=query)
-                    
-                    sub_account_ids = []
-                    for row in response:
-                        client_customer = row.customer_client.client_customer
-                        customer_id = client_customer.split('/')[-1]
-                        is_manager = row.customer_client.manager
-                        name = row.customer_client.descriptive_name
-                        
-                        # Incluir todas las sub-cuentas (tanto normales como sub-MCCs)
-                        sub_account_ids.append(customer_id)
-                        
-                        logger.info(f"✅ Sub-cuenta: {customer_id} - {name} {'(MCC)' if is_manager else ''}")
-                    
-                    # También incluir la MCC principal
-                    sub_account_ids.append(mcc_id)
-                    logger.info(f"✅ Agregada MCC principal: {mcc_id}")
-                    
-                    # Eliminar duplicados y ordenar
-                    unique_ids = sorted(set(sub_account_ids))
-                    
-                    logger.info(f"✅ Total de cuentas accesibles: {len(unique_ids)}")
-                    
-                    return unique_ids
-                    
-                except Exception as e:
-                    logger.error(f"❌ Error obteniendo sub-cuentas de MCC: {e}")
-                    import traceback
-                    logger.error(traceback.format_exc())
-                    
-                    # Fallback: devolver solo las cuentas accesibles directamente
-                    logger.warning("⚠️ Usando fallback: solo cuentas con acceso directo")
-            
-            # Si no es MCC o hubo error, filtrar cuentas con acceso directo
-            valid_customer_ids = []
-            ga_service = client.get_service("GoogleAdsService")
+            customer_ids = hierarchy.get_customer_ids()
             
-            for customer_id in all_customer_ids:
-                try:
-                    query = """
-                        SELECT
-                            customer.id,
-                            customer.descriptive_name
-                        FROM customer
-                        LIMIT 1
-                    """
-                    
-                    response = ga_service.search(customer_id=customer_id, query=query)
-                    
-                    for row in response:
-                        valid_customer_ids.append(customer_id)
-                        logger.info(f"✅ Cuenta accesible: {customer_id} - {row.customer.descriptive_name}")
-                        break
-                        
-                except Exception as e:
-                    error_msg = str(e)
-                    if "PERMISSION_DENIED" in error_msg:
-                        logger.warning(f"⚠️ Sin permisos para {customer_id}")
-                    elif "CUSTOMER_NOT_ENABLED" in error_msg:
-                        logger.warning(f"⚠️ Cuenta deshabilitada {customer_id}")
-                    else:
-                        logger.warning(f"⚠️ Error en {customer_id}: {str(e)[:100]}")
-                    continue
-            
-            if not valid_customer_ids:
+            if not customer_ids:
                 logger.error("❌ No se encontraron cuentas válidas")
             else:
-                logger.info(f"✅ {len(valid_customer_ids)} cuentas válidas")
+                logger.info(f"✅ Total de cuentas accesibles: {len(customer_ids)}")
             
-            return valid_customer_ids
+            return customer_ids
             
         except Exception as e:
             logger.error(f"❌ Error obteniendo customer IDs: {e}")
@@ -280,21 +184,25 @@ class GoogleAdsClientWrapper:
             logger.error(traceback.format_exc())
             return []
     
-    def execute_query(self, customer_id: str, query: str) -> List[Any]:
-        """Execute GAQL query and return results as protobuf objects"""
+    def execute_query(self, customer_id: str, query: str, use_partition_cache: bool = True) -> List[Any]:
+        """
+        Execute GAQL query and return results as protobuf objects
+        
+        Queries segmented by segments.date over a closed date range are
+        answered from per-day partitions; only the missing days are fetched.
+        """
         client = self.get_client()
         if not client:
             return []
             
         try:
-            ga_service = client.get_service("GoogleAdsService")
-            search_request = client.get_type("SearchGoogleAdsRequest")
-            search_request.customer_id = customer_id
-            search_request.query = query
+            plan = parse_partitioned_query(customer_id, query) if use_partition_cache else None
+            if plan:
+                return get_query_partition_cache().execute(
+                    plan, lambda partial_query: self._search(client, customer_id, partial_query)
+                )
             
-            results = list(ga_service.search(request=search_request))
-            logger.info(f"Query executed successfully, returned {len(results)} rows")
-            return results
+            return self._search(client, customer_id, query)
             
         except GoogleAdsException as ex:
             logger.error(f"Google Ads API error: {ex}")
@@ -305,6 +213,49 @@ class GoogleAdsClientWrapper:
             logger.error(f"Unexpected error executing query: {e}")
             return []
     
+    def _search(self, client: GoogleAdsClient, customer_id: str, query: str) -> List[Any]:
+        """Run a single search request; errors propagate to the caller"""
+        ga_service = client.get_service("GoogleAdsService")
+        search_request = client.get_type("SearchGoogleAdsRequest")
+        search_request.customer_id = customer_id
+        search_request.query = query
+        
+        results = list(ga_service.search(request=search_request))
+        logger.info(f"Query executed successfully, returned {len(results)} rows")
+        return results
+    
+    def iter_query(self, customer_id: str, query: str) -> Iterator[Any]:
+        """
+        Stream GAQL query results row by row using search_stream
+        
+        Rows are yielded as each response batch arrives, so large reports
+        never need the whole result list in memory. Unlike execute_query,
+        errors are logged and re-raised so streaming callers can record them
+        (including a missing client, which would otherwise look like an
+        empty result).
+        """
+        client = self.get_client()
+        if not client:
+            logger.error(f"Google Ads client not initialized; cannot stream query for {customer_id}")
+            raise RuntimeError("Google Ads client not initialized")
+        
+        try:
+            ga_service = client.get_service("GoogleAdsService")
+            stream = ga_service.search_stream(customer_id=customer_id, query=query)
+            
+            total_rows = 0
+            for batch in stream:
+                for row in batch.results:
+                    total_rows += 1
+                    yield row
+            logger.info(f"Query streamed successfully, returned {total_rows} rows")
+            
+        except GoogleAdsException as ex:
+            logger.error(f"Google Ads API error: {ex}")
+            for error in ex.failure.errors:
+                logger.error(f"Error: {error.message}")
+            raise
+    
     def get_account_info(self, customer_id: str) -> Dict[str, Any]:
         """Get account information including currency code"""
         try:
@@ -0,0 +1,302 @@
+"""
+🔌 GOOGLE ADS CLIENT POOL - Clientes y stubs compartidos por proceso
+Reutiliza instancias de GoogleAdsClient y los stubs de servicio (cada uno con
+su canal gRPC) entre reruns de Streamlit, servicios y trabajos concurrentes
+Versión: 1.0
+Autor: saltbalente
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.ads.googleads.client import GoogleAdsClient
+
+logger = logging.getLogger(__name__)
+
+# Keep-alive de los canales: detecta conexiones caídas entre reruns
+KEEPALIVE_CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 120000),
+    ('grpc.keepalive_timeout_ms', 20000),
+]
+
+
+def _enable_channel_keepalive() -> None:
+    """Agrega las opciones de keep-alive a los canales que crea la librería"""
+    try:
+        from google.ads.googleads import client as client_module
+
+        options = list(getattr(client_module, '_GRPC_CHANNEL_OPTIONS', []))
+        configured = {name for name, _ in options}
+        missing = [opt for opt in KEEPALIVE_CHANNEL_OPTIONS if opt[0] not in configured]
+        if missing:
+            client_module._GRPC_CHANNEL_OPTIONS = options + missing
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo configurar keep-alive de gRPC: {e}")
+
+
+class GoogleAdsClientPool:
+    """
+    Pool de clientes de Google Ads compartido por todo el proceso
+
+    - Un grupo de hasta pool_size clientes por configuración de credenciales,
+      repartidos en round-robin
+    - get_service de cada cliente del pool devuelve stubs cacheados por
+      (servicio, versión): el canal gRPC se crea una sola vez y se reutiliza
+    - Canales con keep-alive y chequeo de salud periódico en segundo plano;
+      un canal que no responde se descarta y se recrea en el siguiente get_service
+    - Thread-safe: los stubs de gRPC admiten llamadas concurrentes
+    - client_factory y register_client permiten inyectar clientes que no son
+      GoogleAdsClient (p. ej. el backend simulado) con el mismo caché de stubs
+    """
+
+    def __init__(self, pool_size: int = 2, health_check_interval: float = 300.0,
+                 health_check_timeout: float = 5.0,
+                 client_factory: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        """
+        Inicializa el pool
+
+        Args:
+            pool_size: Clientes por configuración de credenciales
+            health_check_interval: Segundos entre chequeos de salud por cliente
+            health_check_timeout: Espera máxima para que un canal esté listo
+            client_factory: Crea un cliente a partir de la configuración
+                            (por defecto GoogleAdsClient.load_from_dict)
+        """
+        self.pool_size = max(1, pool_size)
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.client_factory = client_factory or GoogleAdsClient.load_from_dict
+
+        self._lock = threading.RLock()
+        self._clients: Dict[str, List[Any]] = {}
+        self._next_index: Dict[str, int] = {}
+        # id(cliente) -> (cliente, {(servicio, versión): stub}, get_service original)
+        self._stubs: Dict[int, Tuple[Any, Dict[Tuple[str, str], Any], Callable]] = {}
+        self._last_health_check: Dict[int, float] = {}
+        self._health_threads: Dict[int, threading.Thread] = {}
+
+        self.stats = {'clients_created': 0, 'stubs_created': 0, 'stub_hits': 0, 'unhealthy': 0}
+
+        _enable_channel_keepalive()
+
+    # =========================================================================
+    # CLIENTES
+    # =========================================================================
+
+    def get_client(self, client_config: Dict[str, Any]) -> GoogleAdsClient:
+        """
+        Obtiene un cliente del pool para la configuración dada
+
+        Args:
+            client_config: Diccionario para GoogleAdsClient.load_from_dict
+
+        Returns:
+            Cliente compartido (sus get_service devuelven stubs cacheados)
+        """
+        key = self._config_key(client_config)
+        with self._lock:
+            clients = self._clients.setdefault(key, [])
+            if len(clients) < self.pool_size:
+                client = self.client_factory(dict(client_config))
+                self.register_client(client)
+                clients.append(client)
+                self.stats['clients_created'] += 1
+                logger.info(f"🔌 Cliente de Google Ads #{len(clients)} creado en el pool")
+                return client
+
+            index = self._next_index.get(key, 0) % len(clients)
+            self._next_index[key] = index + 1
+            return clients[index]
+
+    def register_client(self, client: Any) -> Any:
+        """
+        Redirige client.get_service a la caché de stubs del pool
+
+        Los stubs se siguen creando con el get_service original del cliente.
+
+        Returns:
+            El mismo cliente
+        """
+        with self._lock:
+            entry = self._stubs.get(id(client))
+            if entry is None or entry[0] is not client:
+                self._stubs[id(client)] = (client, {}, client.get_service)
+                self._last_health_check[id(client)] = time.monotonic()
+                client.get_service = functools.partial(self.get_service, client)
+        return client
+
+    @staticmethod
+    def _config_key(client_config: Dict[str, Any]) -> str:
+        payload = json.dumps(client_config, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # =========================================================================
+    # STUBS DE SERVICIO
+    # =========================================================================
+
+    def get_service(self, client: Any, name: str,
+                    version: Optional[str] = None, interceptors: Optional[list] = None):
+        """
+        Obtiene el stub de un servicio, creándolo solo la primera vez
+
+        Args:
+            client: Cliente de Google Ads (del pool o externo; se registra)
+            name: Nombre del servicio, p. ej. "GoogleAdsService"
+            version: Versión de la API (None = la del cliente)
+            interceptors: Interceptores extra; con interceptores no se cachea
+
+        Returns:
+            Stub del servicio
+        """
+        with self._lock:
+            entry = self._stubs.get(id(client))
+            if entry is None or entry[0] is not client:
+                self.register_client(client)
+                entry = self._stubs[id(client)]
+        create_service = entry[2]
+
+        if interceptors:
+            return create_service(name, version=version or getattr(client, 'version', None),
+                                  interceptors=interceptors)
+
+        cache_key = (name, version or getattr(client, 'version', None) or 'default')
+        with self._lock:
+            stubs = entry[1]
+            stub = stubs.get(cache_key)
+            if stub is not None:
+                self.stats['stub_hits'] += 1
+                return stub
+
+            if version:
+                stub = create_service(name, version=version)
+            else:
+                stub = create_service(name)
+            stubs[cache_key] = stub
+            self.stats['stubs_created'] += 1
+            return stub
+
+    # =========================================================================
+    # SALUD DE CANALES
+    # =========================================================================
+
+    def check_health_in_background(self, client: Any) -> bool:
+        """
+        Lanza check_health en un hilo daemon si ya toca (fuera del request)
+
+        Returns:
+            True si se inició un chequeo
+        """
+        client_id = id(client)
+        with self._lock:
+            last = self._last_health_check.get(client_id, 0.0)
+            if time.monotonic() - last < self.health_check_interval:
+                return False
+            thread = self._health_threads.get(client_id)
+            if thread is not None and thread.is_alive():
+                return False
+            thread = threading.Thread(
+                target=self.check_health, args=(client,), name="ads-channel-health", daemon=True
+            )
+            self._health_threads[client_id] = thread
+            thread.start()
+        return True
+
+    def check_health(self, client: Any, force: bool = False) -> bool:
+        """
+        Verifica que los canales del cliente sigan conectables
+
+        Se ejecuta como máximo una vez por health_check_interval (salvo force)
+        y espera como mucho health_check_timeout en total. Los stubs cuyo
+        canal no está listo a tiempo se descartan.
+
+        Returns:
+            True si todos los canales comprobados están sanos
+        """
+        client_id = id(client)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_health_check.get(client_id, 0.0)
+            if not force and now - last < self.health_check_interval:
+                return True
+            self._last_health_check[client_id] = now
+            entry = self._stubs.get(client_id)
+            stubs = list(entry[1].items()) if entry else []
+
+        healthy = True
+        deadline = now + self.health_check_timeout
+        for cache_key, stub in stubs:
+            if self._channel_ready(stub, max(0.1, deadline - time.monotonic())):
+                continue
+            healthy = False
+            logger.warning(f"⚠️ Canal de {cache_key[0]} no responde; se recreará")
+            with self._lock:
+                self.stats['unhealthy'] += 1
+                entry = self._stubs.get(client_id)
+                if entry and entry[1].get(cache_key) is stub:
+                    del entry[1][cache_key]
+        return healthy
+
+    @staticmethod
+    def _channel_ready(stub: Any, timeout: float) -> bool:
+        channel = getattr(getattr(stub, 'transport', None), 'grpc_channel', None)
+        if channel is None:
+            return True
+        try:
+            import grpc
+
+            grpc.channel_ready_future(channel).result(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def invalidate(self, client: Optional[Any] = None) -> None:
+        """Descarta los stubs de un cliente (o de todos) para recrear sus canales"""
+        with self._lock:
+            entries = [self._stubs.get(id(client))] if client is not None else list(self._stubs.values())
+            for entry in entries:
+                if entry:
+                    entry[1].clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del pool"""
+        with self._lock:
+            return {
+                **self.stats,
+                'configs': len(self._clients),
+                'clients': sum(len(clients) for clients in self._clients.values()),
+                'cached_stubs': sum(len(entry[1]) for entry in self._stubs.values())
+            }
+
+
+# Instancia global
+_client_pool: Optional[GoogleAdsClientPool] = None
+_client_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> GoogleAdsClientPool:
+    """Obtiene el pool de clientes del proceso"""
+    global _client_pool
+    if _client_pool is None:
+        with _client_pool_lock:
+            if _client_pool is None:
+                _client_pool = GoogleAdsClientPool()
+    return _client_pool
+
+
+def get_pooled_service(client: Any, name: str, version: Optional[str] = None):
+    """
+    Stub cacheado de un servicio para un GoogleAdsClient o GoogleAdsClientWrapper
+
+    Args:
+        client: Cliente real o wrapper (se usa su cliente interno)
+        name: Nombre del servicio
+        version: Versión de la API (None = la del cliente)
+    """
+    if not isinstance(client, GoogleAdsClient) and hasattr(client, 'get_client'):
+        client = client.get_client()
+    return get_client_pool().get_service(client, name, version)
@@ -9,7 +9,10 @@ Autor: saltbalente
 import yaml
 import os
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import itertools
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple, Iterator
 from datetime import datetime
 import random
 from pathlib import Path
@@ -19,6 +22,69 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class CompiledTextRules:
+    """Reglas de validación precompiladas para un tipo de texto"""
+    min_length: int
+    max_length: int
+    forbidden_words: Tuple[str, ...]  # En minúsculas
+    forbidden_original: Tuple[str, ...]
+    
+    @classmethod
+    def from_config(cls, rules: Dict[str, Any], default_min: int, default_max: int) -> 'CompiledTextRules':
+        forbidden = tuple(rules.get('forbidden_words', []))
+        return cls(
+            min_length=rules.get('min_length', default_min),
+            max_length=rules.get('max_length', default_max),
+            forbidden_words=tuple(w.lower() for w in forbidden),
+            forbidden_original=forbidden
+        )
+    
+    def is_valid(self, text: str) -> bool:
+        """Validación rápida sin construir mensajes de error."""
+        if not self.min_length <= len(text) <= self.max_length:
+            return False
+        text_lower = text.lower()
+        return not any(word in text_lower for word in self.forbidden_words)
+    
+    def errors(self, text: str) -> List[str]:
+        """Lista de errores de validación con mensajes descriptivos."""
+        errors = []
+        
+        if len(text) > self.max_length:
+            errors.append(f"Excede longitud máxima ({len(text)}/{self.max_length} caracteres)")
+        
+        if len(text) < self.min_length:
+            errors.append(f"Por debajo de longitud mínima ({len(text)}/{self.min_length} caracteres)")
+        
+        text_lower = text.lower()
+        for forbidden, forbidden_lower in zip(self.forbidden_original, self.forbidden_words):
+            if forbidden_lower in text_lower:
+                errors.append(f"Contiene palabra prohibida: '{forbidden}'")
+        
+        return errors
+
+
+@dataclass
+class CompiledTemplate:
+    """
+    Representación precompilada de un template.
+    
+    Las listas del YAML se convierten una sola vez en tuplas; los pools de
+    titulares y descripciones válidos se construyen de forma perezosa en el
+    primer uso y se reutilizan en cada generación.
+    """
+    key: str
+    name: str
+    keywords: Tuple[str, ...]
+    primary_keywords: Tuple[str, ...]
+    tones: Tuple[str, ...]
+    ctas: Tuple[str, ...]
+    base_descriptions: Tuple[str, ...]
+    headline_pool: Optional[Tuple[str, ...]] = field(default=None, repr=False)
+    description_pool: Optional[Tuple[str, ...]] = field(default=None, repr=False)
+
+
 class TemplateManager:
     """
     Gestor centralizado de plantillas esotéricas para generación de anuncios.
@@ -46,6 +112,11 @@ class TemplateManager:
         self.validation_rules: Dict[str, Any] = {}
         self.export_settings: Dict[str, Any] = {}
         
+        # Representación compilada (se reconstruye en cada carga)
+        self.compiled_templates: Dict[str, CompiledTemplate] = {}
+        self.headline_rules = CompiledTextRules.from_config({}, 10, 30)
+        self.description_rules = CompiledTextRules.from_config({}, 30, 90)
+        
         # Cargar configuración
         self._load_config()
         
@@ -74,6 +145,9 @@ class TemplateManager:
             self.validation_rules = config.get('validation_rules', {})
             self.export_settings = config.get('export_settings', {})
             
+            # Compilar templates y reglas una sola vez por carga
+            self._compile_config()
+            
             logger.info(f"✅ Configuración cargada exitosamente")
             logger.info(f"   - Templates: {len(self.templates)}")
             logger.info(f"   - Variaciones dinámicas: {len(self.dynamic_variations)}")
@@ -82,6 +156,33 @@ class TemplateManager:
             logger.error(f"❌ Error cargando configuración: {e}")
             raise
     
+    def _compile_config(self) -> None:
+        """Precompila reglas de validación y templates cargados."""
+        self.headline_rules = CompiledTextRules.from_config(
+            self.validation_rules.get('headlines', {}), 10, 30
+        )
+        self.description_rules = CompiledTextRules.from_config(
+            self.validation_rules.get('descriptions', {}), 30, 90
+        )
+        
+        compiled = {}
+        for template_name, template in self.templates.items():
+            keywords_sugeridas = template.get('keywords_sugeridas', {})
+            primary = tuple(keywords_sugeridas.get('primarias', []))
+            compiled[template_name] = CompiledTemplate(
+                key=template_name,
+                name=template.get('name', template_name),
+                keywords=primary
+                + tuple(keywords_sugeridas.get('secundarias', []))
+                + tuple(keywords_sugeridas.get('long_tail', [])),
+                primary_keywords=primary,
+                tones=tuple(template.get('tonos_recomendados', [])),
+                ctas=tuple(template.get('ctas_sugeridos', [])),
+                base_descriptions=tuple(template.get('descripciones_base', []))
+            )
+        
+        self.compiled_templates = compiled
+    
     # =========================================================================
     # MÉTODOS DE CONSULTA DE TEMPLATES
     # =========================================================================
@@ -329,9 +430,10 @@ class TemplateManager:
         Returns:
             Diccionario con datos preparados para generación
         """
-        template = self.get_template(template_name)
+        template = self.templates.get(template_name)
+        compiled = self.compiled_templates.get(template_name)
         
-        if not template:
+        if not template or not compiled:
             logger.error(f"❌ No se puede aplicar template '{template_name}': no existe")
             return {}
         
@@ -339,10 +441,10 @@ class TemplateManager:
         if custom_keywords:
             keywords = custom_keywords[:num_keywords]
         else:
-            keywords = self.get_keywords(template_name, max_keywords=num_keywords)
+            keywords = list(compiled.keywords[:num_keywords] if num_keywords else compiled.keywords)
         
         # Obtener tono
-        recommended_tones = self.get_recommended_tones(template_name)
+        recommended_tones = list(compiled.tones)
         if tone and tone in recommended_tones:
             selected_tone = tone
         elif recommended_tones:
@@ -351,8 +453,8 @@ class TemplateManager:
             selected_tone = self.global_settings.get('default_tone', 'profesional')
         
         # Obtener CTAs y descripciones base
-        ctas = self.get_suggested_ctas(template_name)
-        descriptions = self.get_base_descriptions(template_name)
+        ctas = list(compiled.ctas)
+        descriptions = list(compiled.base_descriptions)
         
         # Construir datos de aplicación
         applied_data = {
@@ -403,27 +505,26 @@ class TemplateManager:
         all_tones = []
         
         for template_name in template_names:
-            template = self.get_template(template_name)
+            compiled = self.compiled_templates.get(template_name)
             
-            if not template:
+            if not compiled:
                 logger.warning(f"⚠️ Template '{template_name}' no encontrado, omitiendo")
                 continue
             
             # Combinar keywords
-            keywords = self.get_keywords(template_name, max_keywords=num_keywords_per_template)
-            combined_keywords.extend(keywords)
+            if num_keywords_per_template:
+                combined_keywords.extend(compiled.keywords[:num_keywords_per_template])
+            else:
+                combined_keywords.extend(compiled.keywords)
             
             # Combinar CTAs
-            ctas = self.get_suggested_ctas(template_name, count=3)
-            combined_ctas.extend(ctas)
+            combined_ctas.extend(compiled.ctas[:3])
             
             # Combinar descripciones
-            descriptions = self.get_base_descriptions(template_name)
-            combined_descriptions.extend(descriptions[:2])  # 2 de cada template
+            combined_descriptions.extend(compiled.base_descriptions[:2])  # 2 de cada template
             
             # Combinar tonos
-            tones = self.get_recommended_tones(template_name)
-            all_tones.extend(tones)
+            all_tones.extend(compiled.tones)
         
         # Eliminar duplicados manteniendo orden
         combined_keywords = list(dict.fromkeys(combined_keywords))
@@ -553,39 +654,211 @@ class TemplateManager:
         return variations
     
     # =========================================================================
-    # MÉTODOS DE VALIDACIÓN
+    # GENERACIÓN MASIVA DESDE TEMPLATES COMPILADOS
     # =========================================================================
     
-    def validate_headline(self, headline: str) -> Tuple[bool, List[str]]:
+    def get_headline_pool(self, template_name: str) -> Tuple[str, ...]:
         """
-        Valida un titular contra las reglas definidas.
+        Titulares candidatos ya validados de un template.
+        
+        Combina CTAs, keywords y keywords con modificadores de urgencia y
+        calidad; solo se conservan los que cumplen las reglas de validación.
         
         Args:
-            headline: Titular a validar
+            template_name: Nombre del template
         
         Returns:
-            Tupla (es_válido, lista_de_errores)
+            Tupla de titulares únicos y válidos
         """
-        rules = self.validation_rules.get('headlines', {})
-        errors = []
+        compiled = self.compiled_templates.get(template_name)
+        if not compiled:
+            return ()
         
-        # Validar longitud
-        max_length = rules.get('max_length', 30)
-        min_length = rules.get('min_length', 10)
+        if compiled.headline_pool is None:
+            urgency = self.dynamic_variations.get('urgency_modifiers', [])
+            quality = self.dynamic_variations.get('quality_modifiers', [])
+            
+            def candidates() -> Iterator[str]:
+                yield from compiled.ctas
+                for keyword in compiled.keywords:
+                    base = self._to_headline_case(keyword)
+                    yield base
+                    for modifier in urgency:
+                        yield f"{base} {modifier}"
+                    for modifier in quality:
+                        yield f"{modifier} {base}"
+            
+            compiled.headline_pool = self._unique_valid(candidates(), self.headline_rules)
         
-        if len(headline) > max_length:
-            errors.append(f"Excede longitud máxima ({len(headline)}/{max_length} caracteres)")
+        return compiled.headline_pool
+    
+    def get_description_pool(self, template_name: str) -> Tuple[str, ...]:
+        """
+        Descripciones candidatas ya validadas de un template.
         
-        if len(headline) < min_length:
-            errors.append(f"Por debajo de longitud mínima ({len(headline)}/{min_length} caracteres)")
+        Usa las descripciones base completas y, cuando exceden la longitud,
+        sus frases individuales, pares de frases y frases con modificadores
+        de beneficio.
         
-        # Validar palabras prohibidas
-        forbidden_words = rules.get('forbidden_words', [])
-        headline_lower = headline.lower()
+        Args:
+            template_name: Nombre del template
         
-        for forbidden in forbidden_words:
-            if forbidden.lower() in headline_lower:
-                errors.append(f"Contiene palabra prohibida: '{forbidden}'")
+        Returns:
+            Tupla de descripciones únicas y válidas
+        """
+        compiled = self.compiled_templates.get(template_name)
+        if not compiled:
+            return ()
+        
+        if compiled.description_pool is None:
+            benefits = self.dynamic_variations.get('benefit_modifiers', [])
+            sentences = list(dict.fromkeys(
+                sentence.strip()
+                for description in compiled.base_descriptions
+                for sentence in re.split(r'(?<=[.!?])\s+', description)
+                if sentence.strip()
+            ))
+            
+            def candidates() -> Iterator[str]:
+                yield from compiled.base_descriptions
+                yield from sentences
+                for first, second in itertools.permutations(sentences, 2):
+                    yield f"{first} {second}"
+                for sentence in sentences:
+                    for benefit in benefits:
+                        yield f"{sentence} {benefit}."
+            
+            compiled.description_pool = self._unique_valid(candidates(), self.description_rules)
+        
+        return compiled.description_pool
+    
+    def iter_ad_combinations(
+        self,
+        template_name: str,
+        num_headlines: Optional[int] = None,
+        num_descriptions: Optional[int] = None,
+        limit: Optional[int] = None,
+        mode: str = 'sample',
+        seed: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Genera combinaciones válidas de titulares y descripciones de forma perezosa.
+        
+        Ningún anuncio se materializa hasta que se consume; todos los textos
+        provienen de pools ya validados, así que no hace falta llamar a
+        validate_ad por cada variación.
+        
+        Args:
+            template_name: Nombre del template
+            num_headlines: Titulares por anuncio (default: global_settings)
+            num_descriptions: Descripciones por anuncio (default: global_settings)
+            limit: Máximo de anuncios a generar (None = hasta agotar)
+            mode: 'enumerate' (combinaciones en orden) o 'sample' (aleatorias sin repetir)
+            seed: Semilla para el modo 'sample'
+        
+        Yields:
+            Diccionario con 'headlines', 'descriptions', 'template_name' y 'index'
+        """
+        num_headlines = num_headlines or self.global_settings.get('default_num_headlines', 15)
+        num_descriptions = num_descriptions or self.global_settings.get('default_num_descriptions', 4)
+        
+        headlines = self.get_headline_pool(template_name)
+        descriptions = self.get_description_pool(template_name)
+        
+        if len(headlines) < num_headlines or len(descriptions) < num_descriptions:
+            logger.warning(
+                f"⚠️ Template '{template_name}' sin suficientes textos válidos "
+                f"({len(headlines)} titulares, {len(descriptions)} descripciones)"
+            )
+            return
+        
+        if mode == 'enumerate':
+            # Bucles anidados en lugar de itertools.product, que materializaría
+            # todas las combinaciones de sus argumentos en memoria
+            combos = (
+                (ad_headlines, ad_descriptions)
+                for ad_headlines in itertools.combinations(headlines, num_headlines)
+                for ad_descriptions in itertools.combinations(descriptions, num_descriptions)
+            )
+        elif mode == 'sample':
+            combos = self._sample_combinations(
+                headlines, descriptions, num_headlines, num_descriptions, seed
+            )
+        else:
+            raise ValueError(f"Modo de generación no soportado: {mode}")
+        
+        for index, (ad_headlines, ad_descriptions) in enumerate(itertools.islice(combos, limit)):
+            yield {
+                'template_name': template_name,
+                'index': index,
+                'headlines': list(ad_headlines),
+                'descriptions': list(ad_descriptions)
+            }
+    
+    @staticmethod
+    def _sample_combinations(
+        headlines: Tuple[str, ...],
+        descriptions: Tuple[str, ...],
+        num_headlines: int,
+        num_descriptions: int,
+        seed: Optional[int],
+        max_consecutive_repeats: int = 100
+    ) -> Iterator[Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+        """Muestrea combinaciones aleatorias sin repetir (sin importar el orden)."""
+        rng = random.Random(seed)
+        seen = set()
+        repeats = 0
+        
+        while repeats < max_consecutive_repeats:
+            ad_headlines = tuple(rng.sample(headlines, num_headlines))
+            ad_descriptions = tuple(rng.sample(descriptions, num_descriptions))
+            signature = (frozenset(ad_headlines), frozenset(ad_descriptions))
+            
+            if signature in seen:
+                repeats += 1
+                continue
+            
+            seen.add(signature)
+            repeats = 0
+            yield ad_headlines, ad_descriptions
+    
+    @staticmethod
+    def _unique_valid(candidates: Iterator[str], rules: CompiledTextRules) -> Tuple[str, ...]:
+        """Filtra candidatos válidos eliminando duplicados (sin distinguir mayúsculas)."""
+        seen = set()
+        pool = []
+        for text in candidates:
+            key = text.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            if rules.is_valid(text):
+                pool.append(text)
+        return tuple(pool)
+    
+    @staticmethod
+    def _to_headline_case(text: str) -> str:
+        """Capitaliza palabras significativas para usar keywords como titulares."""
+        return ' '.join(
+            word[:1].upper() + word[1:] if len(word) > 3 or index == 0 else word
+            for index, word in enumerate(text.split())
+        )
+    
+    # =========================================================================
+    # MÉTODOS DE VALIDACIÓN
+    # =========================================================================
+    
+    def validate_headline(self, headline: str) -> Tuple[bool, List[str]]:
+        """
+        Valida un titular contra las reglas definidas.
+        
+        Args:
+            headline: Titular a validar
+        
+        Returns:
+            Tupla (es_válido, lista_de_errores)
+        """
+        errors = self.headline_rules.errors(headline)
         
         is_valid = len(errors) == 0
         
@@ -601,26 +874,7 @@ class TemplateManager:
         Returns:
             Tupla (es_válido, lista_de_errores)
         """
-        rules = self.validation_rules.get('descriptions', {})
-        errors = []
-        
-        # Validar longitud
-        max_length = rules.get('max_length', 90)
-        min_length = rules.get('min_length', 30)
-        
-        if len(description) > max_length:
-            errors.append(f"Excede longitud máxima ({len(description)}/{max_length} caracteres)")
-        
-        if len(description) < min_length:
-            errors.append(f"Por debajo de longitud mínima ({len(description)}/{min_length} caracteres)")
-        
-        # Validar palabras prohibidas
-        forbidden_words = rules.get('forbidden_words', [])
-        description_lower = description.lower()
-        
-        for forbidden in forbidden_words:
-            if forbidden.lower() in description_lower:
-                errors.append(f"Contiene palabra prohibida: '{forbidden}'")
+        errors = self.description_rules.errors(description)
         
         is_valid = len(errors) == 0
         
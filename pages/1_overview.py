@@ -3,10 +3,7 @@ Overview Page - Main dashboard with KPIs and summary metrics
 """
 
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
+from utils.lazy_imports import pd, px, go, subplots
 from datetime import datetime, timedelta
 import logging
 
@@ -176,7 +173,7 @@ def main():
                 })
                 
                 # Create subplots
-                fig = make_subplots(
+                fig = subplots.make_subplots(
                     rows=2, cols=2,
                     subplot_titles=('Daily Spend', 'Daily Clicks', 'Daily Impressions', 'Daily Conversions'),
                     specs=[[{"secondary_y": False}, {"secondary_y": False}],
@@ -4,10 +4,7 @@ Sistema completo de gestión con modales anidados para edición
 """
 
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
+from utils.lazy_imports import pd, px, go, subplots
 from datetime import datetime, timedelta, date
 import logging
 import time
@@ -18,6 +15,7 @@ from modules.auth import require_auth
 from utils.logger import get_logger
 from utils.formatters import format_currency, format_percentage, format_number, format_date
 from services.campaign_actions import CampaignActionsService
+from services.campaign_tree_publisher import CampaignTreePublisher
 from services.report_service import ReportService
 from modules.models import ReportConfig
 
@@ -1374,33 +1372,6 @@ def publish_ad_groups_to_campaign(customer_id: str, campaign_id: str, ad_groups:
         st.write(f"🔍 DEBUG 4: Campaign ID: {campaign_id}")
         st.write(f"🔍 DEBUG 5: Número de grupos a crear: {len(ad_groups)}")
         
-        # Servicios usando el cliente real
-        try:
-            st.write("🔍 DEBUG 6: Obteniendo servicios...")
-            ad_group_service = client.get_service("AdGroupService")
-            st.write("🔍 DEBUG 6.1: AdGroupService obtenido ✅")
-            
-            ad_group_ad_service = client.get_service("AdGroupAdService")
-            st.write("🔍 DEBUG 6.2: AdGroupAdService obtenido ✅")
-            
-            ad_group_criterion_service = client.get_service("AdGroupCriterionService")
-            st.write("🔍 DEBUG 6.3: AdGroupCriterionService obtenido ✅")
-            
-            campaign_service = client.get_service("CampaignService")
-            st.write("🔍 DEBUG 6.4: CampaignService obtenido ✅")
-        except Exception as service_error:
-            error_msg = f"Error obteniendo servicios: {str(service_error)}"
-            st.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg,
-                'ad_groups_created': 0,
-                'ads_created': 0,
-                'keywords_created': 0,
-                'errors': [error_msg],
-                'details': [f"❌ {error_msg}"]
-            }
-        
         results = {
             'success': True,
             'ad_groups_created': 0,
@@ -1410,171 +1381,151 @@ def publish_ad_groups_to_campaign(customer_id: str, campaign_id: str, ad_groups:
             'details': []
         }
         
+        # Todo el árbol (grupos, anuncios y keywords) va en un solo mutate
+        # de GoogleAdsService con IDs temporales; partial_failure conserva lo válido
+        publisher = CampaignTreePublisher(client, atomic=False)
+        campaign_resource_name = f"customers/{customer_id}/campaigns/{campaign_id}"
+        units = []
+        
         for group_idx, group_data in enumerate(ad_groups):
-            st.write(f"🔍 DEBUG 7.{group_idx}: Procesando grupo '{group_data['name']}'...")
+            st.write(f"🔍 DEBUG 7.{group_idx}: Preparando grupo '{group_data['name']}'...")
+            unit = []
             
             try:
-                # ========== 1. CREAR AD GROUP ==========
-                st.write(f"🔍 DEBUG 8.{group_idx}: Creando operación de grupo...")
-                
-                ad_group_operation = client.get_type("AdGroupOperation")
-                ad_group = ad_group_operation.create
+                # ========== 1. AD GROUP ==========
+                ad_group_resource_name = publisher.temp_resource_name(customer_id, 'adGroups')
+                ad_group_operation = publisher.new_operation()
+                ad_group = ad_group_operation.ad_group_operation.create
                 
+                ad_group.resource_name = ad_group_resource_name
                 ad_group.name = group_data['name']
-                ad_group.campaign = campaign_service.campaign_path(customer_id, campaign_id)
+                ad_group.campaign = campaign_resource_name
                 ad_group.status = client.enums.AdGroupStatusEnum[group_data['status']].value
                 ad_group.cpc_bid_micros = group_data['cpc_bid_micros']
                 ad_group.type_ = client.enums.AdGroupTypeEnum.SEARCH_STANDARD.value
+                unit.append((('ad_group', group_idx), ad_group_operation))
                 
-                st.write(f"🔍 DEBUG 9.{group_idx}: Operación configurada, ejecutando mutate...")
-                st.write(f"  - Nombre: {ad_group.name}")
-                st.write(f"  - Campaign path: {ad_group.campaign}")
-                st.write(f"  - Status: {ad_group.status}")
-                st.write(f"  - CPC: {ad_group.cpc_bid_micros}")
-                st.write(f"  - Type: {ad_group.type_}")
-                
-                # Ejecutar creación del grupo
-                ad_group_response = ad_group_service.mutate_ad_groups(
-                    customer_id=customer_id,
-                    operations=[ad_group_operation]
-                )
-                
-                ad_group_resource_name = ad_group_response.results[0].resource_name
-                ad_group_id = ad_group_resource_name.split('/')[-1]
-                
-                st.write(f"🔍 DEBUG 10.{group_idx}: ✅ Grupo creado! ID: {ad_group_id}")
-                
-                results['ad_groups_created'] += 1
-                results['details'].append(f"✅ Grupo '{group_data['name']}' creado (ID: {ad_group_id})")
-                
-                # ========== 2. CREAR ANUNCIOS ==========
-                st.write(f"🔍 DEBUG 11.{group_idx}: Creando {len(group_data['ads'])} anuncios...")
-                
+                # ========== 2. ANUNCIOS ==========
                 for ad_idx, ad_data in enumerate(group_data['ads']):
-                    try:
-                        st.write(f"🔍 DEBUG 12.{group_idx}.{ad_idx}: Configurando anuncio #{ad_idx + 1}...")
-                        
-                        ad_group_ad_operation = client.get_type("AdGroupAdOperation")
-                        ad_group_ad = ad_group_ad_operation.create
-                        
-                        ad_group_ad.ad_group = ad_group_resource_name
-                        ad_group_ad.status = client.enums.AdGroupAdStatusEnum.ENABLED.value
-                        
-                        # Configurar Responsive Search Ad
-                        ad = ad_group_ad.ad
-                        ad.final_urls.append(ad_data['final_url'])
-                        
-                        st.write(f"  - URL: {ad_data['final_url']}")
-                        st.write(f"  - Headlines: {len(ad_data['headlines'])}")
-                        st.write(f"  - Descriptions: {len(ad_data['descriptions'])}")
-                        
-                        # Agregar títulos (Headlines)
-                        for headline_text in ad_data['headlines']:
-                            headline = client.get_type("AdTextAsset")
-                            headline.text = headline_text
-                            ad.responsive_search_ad.headlines.append(headline)
-                        
-                        # Agregar descripciones
-                        for description_text in ad_data['descriptions']:
-                            description = client.get_type("AdTextAsset")
-                            description.text = description_text
-                            ad.responsive_search_ad.descriptions.append(description)
-                        
-                        # Agregar rutas de visualización (paths)
-                        if ad_data.get('path1'):
-                            ad.responsive_search_ad.path1 = ad_data['path1']
-                        if ad_data.get('path2'):
-                            ad.responsive_search_ad.path2 = ad_data['path2']
-                        
-                        st.write(f"🔍 DEBUG 13.{group_idx}.{ad_idx}: Ejecutando mutate de anuncio...")
-                        
-                        # Ejecutar creación del anuncio
-                        ad_response = ad_group_ad_service.mutate_ad_group_ads(
-                            customer_id=customer_id,
-                            operations=[ad_group_ad_operation]
-                        )
-                        
-                        st.write(f"🔍 DEBUG 14.{group_idx}.{ad_idx}: ✅ Anuncio creado!")
-                        
-                        results['ads_created'] += 1
-                        results['details'].append(f"  ✅ Anuncio #{ad_idx + 1} creado en grupo '{group_data['name']}'")
+                    ad_group_ad_operation = publisher.new_operation()
+                    ad_group_ad = ad_group_ad_operation.ad_group_ad_operation.create
                     
-                    except Exception as ad_error:
-                        error_msg = f"  ❌ Error creando anuncio #{ad_idx + 1}: {str(ad_error)}"
-                        st.error(error_msg)
-                        results['errors'].append(error_msg)
-                        results['details'].append(error_msg)
-                        logger.error(error_msg)
-                        
-                        # Mostrar detalles del error si están disponibles
-                        if hasattr(ad_error, 'failure'):
-                            for error in ad_error.failure.errors:
-                                st.error(f"    → {error.message}")
-                
-                # ========== 3. CREAR KEYWORDS ==========
-                st.write(f"🔍 DEBUG 15.{group_idx}: Creando {len(group_data['keywords'])} keywords...")
+                    ad_group_ad.ad_group = ad_group_resource_name
+                    ad_group_ad.status = client.enums.AdGroupAdStatusEnum.ENABLED.value
+                    
+                    # Configurar Responsive Search Ad
+                    ad = ad_group_ad.ad
+                    ad.final_urls.append(ad_data['final_url'])
+                    
+                    # Agregar títulos (Headlines)
+                    for headline_text in ad_data['headlines']:
+                        headline = client.get_type("AdTextAsset")
+                        headline.text = headline_text
+                        ad.responsive_search_ad.headlines.append(headline)
+                    
+                    # Agregar descripciones
+                    for description_text in ad_data['descriptions']:
+                        description = client.get_type("AdTextAsset")
+                        description.text = description_text
+                        ad.responsive_search_ad.descriptions.append(description)
+                    
+                    # Agregar rutas de visualización (paths)
+                    if ad_data.get('path1'):
+                        ad.responsive_search_ad.path1 = ad_data['path1']
+                    if ad_data.get('path2'):
+                        ad.responsive_search_ad.path2 = ad_data['path2']
+                    
+                    unit.append((('ad', group_idx, ad_idx), ad_group_ad_operation))
                 
-                keyword_operations = []
+                # ========== 3. KEYWORDS ==========
                 for kw_idx, keyword_data in enumerate(group_data['keywords']):
                     try:
-                        criterion_operation = client.get_type("AdGroupCriterionOperation")
-                        criterion = criterion_operation.create
+                        criterion_operation = publisher.new_operation()
+                        criterion = criterion_operation.ad_group_criterion_operation.create
                         
                         criterion.ad_group = ad_group_resource_name
                         criterion.status = client.enums.AdGroupCriterionStatusEnum.ENABLED.value
                         criterion.keyword.text = keyword_data['text']
                         criterion.keyword.match_type = client.enums.KeywordMatchTypeEnum[keyword_data['match_type']].value
                         
-                        keyword_operations.append(criterion_operation)
+                        unit.append((('keyword', group_idx, kw_idx), criterion_operation))
                     
                     except Exception as kw_error:
                         error_msg = f"  ❌ Error preparando keyword '{keyword_data['text']}': {str(kw_error)}"
                         st.error(error_msg)
                         results['errors'].append(error_msg)
                         logger.error(error_msg)
-                
-                # Ejecutar creación de keywords en batch
-                if keyword_operations:
-                    try:
-                        st.write(f"🔍 DEBUG 16.{group_idx}: Ejecutando mutate de {len(keyword_operations)} keywords...")
-                        
-                        keyword_response = ad_group_criterion_service.mutate_ad_group_criteria(
-                            customer_id=customer_id,
-                            operations=keyword_operations
-                        )
-                        
-                        st.write(f"🔍 DEBUG 17.{group_idx}: ✅ Keywords creadas!")
-                        
-                        results['keywords_created'] += len(keyword_response.results)
-                        results['details'].append(f"  ✅ {len(keyword_response.results)} palabras clave creadas en grupo '{group_data['name']}'")
-                    
-                    except Exception as kw_batch_error:
-                        error_msg = f"  ❌ Error creando keywords en batch: {str(kw_batch_error)}"
-                        st.error(error_msg)
-                        results['errors'].append(error_msg)
-                        results['details'].append(error_msg)
-                        logger.error(error_msg)
-                        
-                        # Mostrar detalles del error
-                        if hasattr(kw_batch_error, 'failure'):
-                            for error in kw_batch_error.failure.errors:
-                                st.error(f"    → {error.message}")
             
             except Exception as group_error:
-                error_msg = f"❌ Error creando grupo '{group_data['name']}': {str(group_error)}"
+                error_msg = f"❌ Error preparando grupo '{group_data['name']}': {str(group_error)}"
                 st.error(error_msg)
                 results['errors'].append(error_msg)
                 results['details'].append(error_msg)
                 results['success'] = False
                 logger.error(error_msg)
+                continue
+            
+            units.append(unit)
+        
+        st.write(f"🔍 DEBUG 8: Ejecutando mutate de {sum(len(u) for u in units)} operaciones...")
+        publish_result = publisher.publish(customer_id, units)
+        resource_names = publish_result['resource_names']
+        operation_errors = publish_result['errors']
+        st.write(f"🔍 DEBUG 9: ✅ Mutate completado en {publish_result['requests']} request(s)")
+
+        # El árbol cacheado de la campaña ya no refleja los grupos nuevos
+        if 'ad_group_service' in st.session_state:
+            st.session_state.ad_group_service.invalidate_tree_cache(customer_id)
+        
+        for request_error in publish_result['request_errors']:
+            st.error(request_error)
+            results['errors'].append(request_error)
+            results['details'].append(f"❌ {request_error}")
+        
+        for unit in units:
+            group_idx = unit[0][0][1]
+            group_name = ad_groups[group_idx]['name']
+            
+            ad_group_resource_name = resource_names.get(('ad_group', group_idx))
+            if not ad_group_resource_name:
+                error_msg = (f"❌ Error creando grupo '{group_name}': "
+                             f"{operation_errors.get(('ad_group', group_idx), 'sin respuesta')}")
+                st.error(error_msg)
+                results['errors'].append(error_msg)
+                results['details'].append(error_msg)
+                results['success'] = False
+                logger.error(error_msg)
+                continue
+            
+            results['ad_groups_created'] += 1
+            results['details'].append(
+                f"✅ Grupo '{group_name}' creado (ID: {ad_group_resource_name.split('/')[-1]})"
+            )
+            
+            keywords_created = 0
+            for label, _ in unit[1:]:
+                if label in resource_names:
+                    if label[0] == 'ad':
+                        results['ads_created'] += 1
+                        results['details'].append(f"  ✅ Anuncio #{label[2] + 1} creado en grupo '{group_name}'")
+                    else:
+                        keywords_created += 1
+                    continue
                 
-                # Agregar detalles del error si están disponibles
-                if hasattr(group_error, 'failure'):
-                    for error in group_error.failure.errors:
-                        error_detail = f"  → {error.message}"
-                        st.error(error_detail)
-                        results['errors'].append(error_detail)
-                        results['details'].append(error_detail)
+                reason = operation_errors.get(label, 'sin respuesta')
+                if label[0] == 'ad':
+                    error_msg = f"  ❌ Error creando anuncio #{label[2] + 1}: {reason}"
+                else:
+                    keyword_text = ad_groups[group_idx]['keywords'][label[2]]['text']
+                    error_msg = f"  ❌ Error creando keyword '{keyword_text}': {reason}"
+                st.error(error_msg)
+                results['errors'].append(error_msg)
+                results['details'].append(error_msg)
+                logger.error(error_msg)
+            
+            if keywords_created:
+                results['keywords_created'] += keywords_created
+                results['details'].append(f"  ✅ {keywords_created} palabras clave creadas en grupo '{group_name}'")
         
         st.write(f"🔍 DEBUG 18: Publicación completada!")
         st.write(f"  - Grupos creados: {results['ad_groups_created']}")
@@ -1864,6 +1815,8 @@ def render_campaign_edit_modal(campaign):
         with col_refresh:
             if st.button("🔄 Actualizar", use_container_width=True, key="refresh_ad_groups_btn"):
                 st.cache_data.clear()
+                if 'ad_group_service' in st.session_state:
+                    st.session_state.ad_group_service.invalidate_tree_cache()
                 st.rerun()
         
         with col_info:
@@ -1882,12 +1835,13 @@ def render_campaign_edit_modal(campaign):
                 ad_group_service = st.session_state.ad_group_service
                 selected_customer = st.session_state.get('selected_customer')
                 
-                # Obtener grupos existentes
-                existing_groups = ad_group_service.get_ad_groups_by_campaign(
+                # Obtener grupos, anuncios y keywords de la campaña (una query por tipo)
+                campaign_tree = ad_group_service.load_campaign_tree(
                     customer_id=selected_customer,
-                    campaign_id=str(campaign.campaign_id),
+                    campaign_ids=[str(campaign.campaign_id)],
                     include_metrics=True
                 )
+                existing_groups = campaign_tree.get_ad_groups(str(campaign.campaign_id))
                 
                 if existing_groups:
                     # Métricas totales
@@ -1975,10 +1929,7 @@ def render_campaign_edit_modal(campaign):
                             
                             with tab_ads_existing:
                                 with st.spinner("Cargando anuncios..."):
-                                    ads = ad_group_service.get_ads_by_ad_group(
-                                        customer_id=selected_customer,
-                                        ad_group_id=group['id']
-                                    )
+                                    ads = campaign_tree.get_ads(group['id'])
                                     
                                     if ads:
                                         st.success(f"✅ {len(ads)} anuncio(s) encontrado(s)")
@@ -2059,10 +2010,7 @@ def render_campaign_edit_modal(campaign):
                             
                             with tab_keywords_existing:
                                 with st.spinner("Cargando palabras clave..."):
-                                    keywords = ad_group_service.get_keywords_by_ad_group(
-                                        customer_id=selected_customer,
-                                        ad_group_id=group['id']
-                                    )
+                                    keywords = campaign_tree.get_keywords(group['id'])
                                     
                                     if keywords:
                                         st.success(f"✅ {len(keywords)} palabra(s) clave encontrada(s)")
@@ -2125,10 +2073,7 @@ def render_campaign_edit_modal(campaign):
                                 ):
                                     # ✅ SOLO cambiar estados, NO renderizar modal aquí
                                     # Obtener keywords del grupo para usar como base
-                                    keywords = ad_group_service.get_keywords_by_ad_group(
-                                        customer_id=selected_customer,
-                                        ad_group_id=group['id']
-                                    )
+                                    keywords = campaign_tree.get_keywords(group['id'])
                                     keyword_texts = [kw['text'] for kw in keywords]
                                     
                                     # Guardar contexto en session state
@@ -6,7 +6,7 @@ Fecha: 2025-01-13
 """
 
 import streamlit as st
-import pandas as pd
+from utils.lazy_imports import pd
 import json
 import time
 from datetime import datetime, timedelta
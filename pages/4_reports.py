@@ -3,10 +3,7 @@ Reports Page - Custom reporting and data analysis
 """
 
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
+from utils.lazy_imports import pd, px, go, subplots
 from datetime import datetime, timedelta, date
 import json
 import logging
@@ -4,10 +4,7 @@ Sistema de alertas y monitoreo con glassmorphism dark theme en español
 """
 
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
+from utils.lazy_imports import pd, px, go, subplots
 from datetime import datetime, timedelta, date
 import logging
 
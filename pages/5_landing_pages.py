@@ -1,7 +1,7 @@
 # pages/5_landing_pages.py
 
 import streamlit as st
-import pandas as pd
+from utils.lazy_imports import pd
 
 st.set_page_config(page_title="Landing Pages Analyzer and Creator", layout="wide")
 
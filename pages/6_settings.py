@@ -13,10 +13,7 @@ from modules.auth import require_auth
 from utils.logger import get_logger
 from utils.formatters import format_currency, format_percentage, format_number
 from modules.google_ads_client import GoogleAdsClientWrapper
-from services.billing_service import BillingService
-from services.campaign_service import CampaignService
-from services.report_service import ReportService
-from services.alert_service import AlertService
+from utils.service_registry import create_service_registry
 
 logger = get_logger(__name__)
 
@@ -179,12 +176,7 @@ def main():
                                 # Cargar cuentas usando el nuevo método mejorado
                                 st.session_state['customer_ids'] = wrapper.get_customer_ids()
                                 # Inicializar servicios para que las demás páginas puedan usarlos
-                                st.session_state['services'] = {
-                                    'billing': BillingService(wrapper),
-                                    'campaign': CampaignService(wrapper),
-                                    'report': ReportService(wrapper),
-                                    'alert': AlertService(wrapper)
-                                }
+                                st.session_state['services'] = create_service_registry(wrapper)
                                 # Seleccionar cuenta por defecto si no hay una seleccionada
                                 if st.session_state.get('customer_ids') and not st.session_state.get('selected_customer'):
                                     st.session_state['selected_customer'] = st.session_state['customer_ids'][0]
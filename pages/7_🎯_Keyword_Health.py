@@ -4,11 +4,7 @@ Sistema inteligente de optimización con health scores y glassmorphism dark them
 """
 
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
-import numpy as np
+from utils.lazy_imports import pd, np, px, go, subplots
 from datetime import datetime, timedelta
 import logging
 import uuid
@@ -1671,12 +1667,21 @@ def show_automatic_bid_adjustments(df_detailed, selected_customer):
                         
                         if dry_run:
                             st.info(f"🧪 **Simulación completada** - No se hicieron cambios reales")
+                        elif results.get('batch_jobs'):
+                            st.success(
+                                f"📦 **{results['queued']} ajustes enviados en segundo plano** "
+                                f"(batch jobs: {', '.join(results['batch_jobs'])}). "
+                                f"El resultado aparece en la sección Batch Jobs."
+                            )
                         else:
                             st.success(f"✅ **Cambios aplicados exitosamente**")
                         
                         col1, col2, col3, col4 = st.columns(4)
                         with col1:
-                            st.metric("Exitosos", results['successful'])
+                            if results.get('batch_jobs'):
+                                st.metric("En cola", results['queued'])
+                            else:
+                                st.metric("Exitosos", results['successful'])
                         with col2:
                             st.metric("Fallidos", results['failed'])
                         with col3:
@@ -1684,9 +1689,10 @@ def show_automatic_bid_adjustments(df_detailed, selected_customer):
                         with col4:
                             st.metric("Saltadas", len(skipped_auto_bidding))
                         
-                        with st.expander("📋 Ver Detalles de Cambios"):
-                            details_df = pd.DataFrame(results['details'])
-                            st.dataframe(details_df, use_container_width=True)
+                        if results['details']:
+                            with st.expander("📋 Ver Detalles de Cambios"):
+                                details_df = pd.DataFrame(results['details'])
+                                st.dataframe(details_df, use_container_width=True)
                         
                         if results['errors']:
                             with st.expander("⚠️ Ver Errores"):
@@ -1739,6 +1745,66 @@ def show_automatic_bid_adjustments(df_detailed, selected_customer):
     else:
         st.info("📊 No hay datos de keywords para aplicar ajustes automáticos")
 
+    show_batch_jobs(selected_customer)
+
+
+def show_batch_jobs(selected_customer):
+    """Muestra los batch jobs de la cuenta y los resultados escritos en su log"""
+    from services.batch_job_service import get_batch_job_manager
+
+    manager = get_batch_job_manager()
+    client_wrapper = st.session_state.get('google_ads_client')
+    if client_wrapper is not None and hasattr(client_wrapper, 'get_client'):
+        try:
+            # Jobs que un proceso anterior dejó en ejecución en la API
+            manager.resume(client_wrapper.get_client())
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron retomar los batch jobs: {e}")
+
+    jobs = manager.list_jobs(selected_customer)
+    if not jobs:
+        return
+
+    st.markdown("---")
+    st.markdown("### 📦 Batch Jobs")
+    if st.button("🔄 Actualizar estado", key="refresh_batch_jobs"):
+        st.rerun()
+
+    jobs_df = pd.DataFrame([{
+        'Job': job.job_id,
+        'Descripción': job.description,
+        'Estado': job.status,
+        'Operaciones': job.total_operations,
+        'Exitosas': job.succeeded,
+        'Fallidas': job.failed,
+        'Creado': job.created_at[:19],
+        'Terminado': (job.finished_at or '')[:19]
+    } for job in jobs])
+    st.dataframe(jobs_df, use_container_width=True, hide_index=True)
+
+    job_id = st.selectbox("Ver resultados del job", [job.job_id for job in jobs], key="batch_job_results")
+    job = manager.get_job(job_id)
+    if job and job.errors:
+        for error in job.errors:
+            st.error(error)
+
+    records = manager.read_results(job_id)
+    if records:
+        results_df = pd.DataFrame([{
+            'Índice': record['operation_index'],
+            'Etiqueta': ' / '.join(str(part) for part in record['label'])
+                if isinstance(record.get('label'), list) else record.get('label'),
+            'Estado': record['status'],
+            'Resource name': record.get('resource_name'),
+            'Error': record.get('error')
+        } for record in records])
+        only_failed = st.checkbox("Solo fallidas", key="batch_job_only_failed")
+        if only_failed:
+            results_df = results_df[results_df['Estado'] == 'failed']
+        st.dataframe(results_df, use_container_width=True, hide_index=True)
+    elif job and not job.finished:
+        st.info(f"⏳ El job está en estado '{job.status}'; los resultados aparecen al terminar")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
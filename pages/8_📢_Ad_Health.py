@@ -4,10 +4,7 @@ Sistema de salud para anuncios con diseño glassmorphism dark theme
 """
 
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-import numpy as np
+from utils.lazy_imports import pd, np, px, go
 from datetime import datetime, timedelta
 import logging
 from typing import List, Dict
@@ -7,7 +7,7 @@ import streamlit as st
 from utils.user_storage import get_user_storage
 import json
 from datetime import datetime
-import pandas as pd
+from utils.lazy_imports import pd
 
 st.set_page_config(
     page_title="⚙️ Configuración de Usuario",
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga contra el backend simulado de Google Ads
+
+Mide a escala de producción, sin red ni credenciales:
+- Ingesta: execute_query (search) e iter_query (search_stream) de métricas
+  diarias de keywords
+- Health scoring: sync de keywords (ReportService) a un almacén en memoria y
+  cálculo de health scores de la cuenta
+- Publicación: árbol de ad groups + keywords con CampaignTreePublisher y
+  ajuste masivo de pujas con BidAdjustmentService
+
+Uso:
+    python scripts/benchmark_backend.py                                  # cuenta de 20k keywords
+    python scripts/benchmark_backend.py --campaigns 50 --days 90 --latency 0.1
+    python scripts/benchmark_backend.py --only ingestion --quota-error-rate 0.05
+"""
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# ReportService pasa por @cache_google_ads_data: las filas sintéticas van a una
+# caché desechable y no a data/cache (y una segunda corrida no mide aciertos)
+os.environ['CACHE_DIR'] = tempfile.mkdtemp(prefix='benchmark_cache_')
+atexit.register(shutil.rmtree, os.environ['CACHE_DIR'], True)
+
+from modules.fake_google_ads_backend import FakeGoogleAdsBackend, SyntheticAccountSpec  # noqa: E402
+
+BENCHMARK_DIR = PROJECT_ROOT / "data" / "benchmarks"
+STAGES = ['ingestion', 'health', 'publishing']
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+class MemoryKeywordStore:
+    """Almacén en memoria con la interfaz de DatabaseService que usa KeywordHealthService"""
+
+    def __init__(self):
+        self.metrics: List[Any] = []
+
+    def bulk_insert_keyword_metrics(self, metrics: List[Any]) -> bool:
+        self.metrics.extend(metrics)
+        return True
+
+    def get_keyword_metrics(self, customer_id: str, days_back: int = 30) -> List[Any]:
+        since = date.today() - timedelta(days=days_back)
+        return [m for m in self.metrics if m.customer_id == customer_id and m.date >= since]
+
+    def get_account_benchmarks(self, customer_id: str):
+        return None
+
+    def get_default_benchmarks(self):
+        from services.database_service import KeywordBenchmark
+        return KeywordBenchmark(
+            customer_id='default',
+            target_conv_rate=0.02,
+            target_cpa=200000.00,
+            benchmark_ctr=0.03,
+            min_quality_score=5,
+            industry_vertical='general'
+        )
+
+
+def _timed(results: Dict[str, Any], name: str, func: Callable[[], Any],
+           count: Callable[[Any], int] = len) -> Any:
+    start = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - start
+    items = count(value)
+    results[name] = {
+        'seconds': round(elapsed, 3),
+        'items': items,
+        'items_per_second': round(items / elapsed, 1) if elapsed else None
+    }
+    print(f"  {name:<28} {elapsed:>8.2f}s  {items:>9,} items  "
+          f"{results[name]['items_per_second'] or 0:>10,.0f}/s")
+    return value
+
+
+# ============================================================================
+# ETAPAS
+# ============================================================================
+
+def bench_ingestion(wrapper, customer_id: str, days: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    query = f"""
+        SELECT campaign.id, ad_group.id, ad_group_criterion.criterion_id,
+               ad_group_criterion.keyword.text, ad_group_criterion.keyword.match_type,
+               segments.date, metrics.impressions, metrics.clicks, metrics.cost_micros,
+               metrics.conversions
+        FROM keyword_view
+        WHERE segments.date DURING LAST_{days}_DAYS
+    """
+    _timed(results, 'search (execute_query)',
+           lambda: wrapper.execute_query(customer_id, query, use_partition_cache=False))
+    _timed(results, 'search_stream (iter_query)',
+           lambda: sum(1 for _ in wrapper.iter_query(customer_id, query)), count=lambda total: total)
+    return results
+
+
+def bench_health(wrapper, customer_id: str, days: int) -> Dict[str, Any]:
+    from services.keyword_health_service import KeywordHealthService
+    from services.report_service import ReportService
+
+    results: Dict[str, Any] = {}
+    store = MemoryKeywordStore()
+    service = KeywordHealthService(db_service=store, ads_client=wrapper, report_service=ReportService(wrapper))
+
+    _timed(results, 'sync keywords', lambda: service.sync_keyword_data_to_database(customer_id, days_back=days),
+           count=lambda _: len(store.metrics))
+    _timed(results, 'health scores', lambda: service.calculate_health_scores_for_account(customer_id, days))
+    return results
+
+
+def bench_publishing(wrapper, customer_id: str, ad_groups: int, keywords: int) -> Dict[str, Any]:
+    from services.bid_adjustment_service import BidAdjustment, BidAdjustmentService
+    from services.campaign_tree_publisher import CampaignTreePublisher
+
+    results: Dict[str, Any] = {}
+    client = wrapper.get_client()
+    campaign = wrapper.execute_query(customer_id, "SELECT campaign.resource_name FROM campaign LIMIT 1")[0]
+
+    publisher = CampaignTreePublisher(client)
+    units = []
+    for g in range(ad_groups):
+        operation = publisher.new_operation()
+        ad_group = operation.ad_group_operation.create
+        ad_group.resource_name = publisher.temp_resource_name(customer_id, 'adGroups')
+        ad_group.name = f"Benchmark {g + 1}"
+        ad_group.campaign = campaign.campaign.resource_name
+        ad_group.status = client.enums.AdGroupStatusEnum.ENABLED
+        unit = [(('ad_group', g), operation)]
+        for k in range(keywords):
+            operation = publisher.new_operation()
+            criterion = operation.ad_group_criterion_operation.create
+            criterion.ad_group = ad_group.resource_name
+            criterion.keyword.text = f"benchmark {g + 1} keyword {k + 1}"
+            criterion.keyword.match_type = client.enums.KeywordMatchTypeEnum.PHRASE
+            unit.append((('keyword', g, k), operation))
+        units.append(unit)
+
+    _timed(results, 'publish tree (mutate)', lambda: publisher.publish(customer_id, units),
+           count=lambda result: len(result['resource_names']))
+
+    rows = wrapper.execute_query(
+        customer_id,
+        f"SELECT ad_group.id, ad_group_criterion.criterion_id, ad_group_criterion.keyword.text, "
+        f"ad_group_criterion.cpc_bid_micros FROM ad_group_criterion LIMIT {ad_groups * keywords}"
+    )
+    adjustments = [
+        BidAdjustment(
+            customer_id=customer_id,
+            ad_group_id=str(row.ad_group.id),
+            criterion_id=str(row.ad_group_criterion.criterion_id),
+            keyword_text=row.ad_group_criterion.keyword.text,
+            current_bid_micros=row.ad_group_criterion.cpc_bid_micros,
+            new_bid_micros=int(row.ad_group_criterion.cpc_bid_micros * 1.1) + 10_000,
+            adjustment_percent=10.0,
+            reason='benchmark'
+        )
+        for row in rows
+    ]
+    service = BidAdjustmentService(wrapper)
+    _timed(results, 'bulk bid adjustments',
+           lambda: service.bulk_adjust_bids(adjustments, use_batch_job=False),
+           count=lambda result: result['successful'])
+    return results
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    """Escritura atómica del reporte"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de carga contra el backend simulado de Google Ads")
+    parser.add_argument('--only', choices=STAGES, action='append', help="Ejecutar solo estas etapas (repetible)")
+    parser.add_argument('--campaigns', type=int, default=20, help="Campañas de la cuenta sintética")
+    parser.add_argument('--ad-groups', type=int, default=20, help="Ad groups por campaña")
+    parser.add_argument('--keywords', type=int, default=50, help="Keywords por ad group")
+    parser.add_argument('--days', type=int, default=30, help="Días de métricas consultados")
+    parser.add_argument('--latency', type=float, default=0.0, help="Latencia por request (segundos)")
+    parser.add_argument('--latency-per-row', type=float, default=0.0, help="Latencia por fila devuelta")
+    parser.add_argument('--quota-error-rate', type=float, default=0.0, help="Probabilidad de QuotaError")
+    parser.add_argument('--publish-ad-groups', type=int, default=100, help="Ad groups a publicar")
+    parser.add_argument('--publish-keywords', type=int, default=20, help="Keywords por ad group publicado")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', type=Path, help="Archivo JSON de salida")
+    args = parser.parse_args()
+
+    spec = SyntheticAccountSpec(campaigns=args.campaigns, ad_groups_per_campaign=args.ad_groups,
+                                keywords_per_ad_group=args.keywords, days=max(args.days, 30))
+    backend = FakeGoogleAdsBackend(accounts=1, spec=spec, seed=args.seed, latency=args.latency,
+                                   latency_per_row=args.latency_per_row,
+                                   quota_error_rate=args.quota_error_rate)
+    wrapper = backend.create_wrapper()
+    customer_id = backend.customer_ids[0]
+
+    print(f"🚀 Benchmark de backend: {spec.total_keywords:,} keywords, {args.days} días, "
+          f"latencia {args.latency * 1000:.0f} ms")
+    start = time.perf_counter()
+    wrapper.execute_query(customer_id, "SELECT customer.id FROM customer")
+    print(f"  {'generar cuenta sintética':<28} {time.perf_counter() - start:>8.2f}s")
+
+    stages = args.only or STAGES
+    report: Dict[str, Any] = {
+        'generated_at': datetime.now().isoformat(),
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'stages': {}
+    }
+    for stage in stages:
+        print(f"\n📊 {stage}")
+        if stage == 'ingestion':
+            report['stages'][stage] = bench_ingestion(wrapper, customer_id, args.days)
+        elif stage == 'health':
+            report['stages'][stage] = bench_health(wrapper, customer_id, args.days)
+        else:
+            report['stages'][stage] = bench_publishing(wrapper, customer_id, args.publish_ad_groups,
+                                                       args.publish_keywords)
+
+    report['backend'] = backend.get_stats()
+    print(f"\n📈 Backend: {report['backend']}")
+
+    output = args.output or BENCHMARK_DIR / f"backend_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    _write_json(output, report)
+    print(f"💾 Reporte guardado en {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque: tiempo de importación, primer render y memoria
+
+Mide en procesos independientes (arranque en frío):
+- Importación de app.py y de cada módulo de services/ (con los 5 imports
+  transitivos más pesados según -X importtime)
+- Primer render de app.py y de cada página de pages/ con streamlit AppTest,
+  usando un cliente de Google Ads simulado (sin red ni credenciales)
+- Pico de RSS de cada proceso
+
+Uso:
+    python scripts/benchmark_startup.py                       # todo
+    python scripts/benchmark_startup.py --only imports -r 5   # solo imports, mediana de 5
+    python scripts/benchmark_startup.py --save-baseline       # guardar baseline
+    python scripts/benchmark_startup.py --compare --fail-on-regression
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BENCHMARK_DIR = PROJECT_ROOT / "data" / "benchmarks"
+DEFAULT_BASELINE = BENCHMARK_DIR / "startup_baseline.json"
+
+# Una regresión debe superar ambos umbrales (relativo y absoluto)
+DEFAULT_TOLERANCE = 0.25
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA_MB = 10.0
+
+STUB_CUSTOMER_ID = "1234567890"
+
+_TARGET_MARKER = "__BENCHMARK_TARGET__"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# ============================================================================
+# OBJETIVOS
+# ============================================================================
+
+def discover_targets(only: Optional[str] = None) -> Dict[str, List[str]]:
+    """Módulos a importar y páginas a renderizar"""
+    imports = ['app']
+    imports += sorted(
+        f"services.{path.stem}" for path in (PROJECT_ROOT / "services").glob("*.py")
+        if path.stem != "__init__"
+    )
+    pages = ['app.py'] + sorted(
+        str(path.relative_to(PROJECT_ROOT)) for path in (PROJECT_ROOT / "pages").glob("*.py")
+    )
+
+    if only == 'imports':
+        pages = []
+    elif only == 'pages':
+        imports = []
+    return {'imports': imports, 'pages': pages}
+
+
+# ============================================================================
+# WORKER (se ejecuta en un proceso nuevo por medición)
+# ============================================================================
+
+def _peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class StubGoogleAdsClient:
+    """
+    Cliente de Google Ads simulado para renderizar páginas sin API
+
+    Cualquier método no definido devuelve una lista vacía
+    """
+
+    def __init__(self, customer_ids: Optional[List[str]] = None):
+        self._customer_ids = customer_ids or [STUB_CUSTOMER_ID]
+
+    def get_client(self):
+        return None
+
+    def test_connection(self) -> bool:
+        return True
+
+    def get_customer_ids(self) -> List[str]:
+        return list(self._customer_ids)
+
+    def get_account_descriptive_names(self, customer_ids: List[str]) -> Dict[str, str]:
+        return {customer_id: f"Cuenta {customer_id}" for customer_id in customer_ids}
+
+    def execute_query(self, customer_id: str, query: str, *args, **kwargs) -> List[Any]:
+        return []
+
+    def __getattr__(self, name: str):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: []
+
+
+def _run_import_worker(target: str) -> Dict[str, Any]:
+    import importlib
+    import runpy
+
+    rss_before = _peak_rss_mb()
+    # Las líneas de -X importtime posteriores a esta marca son del objetivo
+    sys.stderr.write(_TARGET_MARKER + "\n")
+    sys.stderr.flush()
+    start = time.perf_counter()
+    if target == 'app':
+        # app.py no es importable como módulo: se ejecuta sin llamar a main()
+        runpy.run_path(str(PROJECT_ROOT / "app.py"), run_name="__benchmark__")
+    else:
+        importlib.import_module(target)
+    return {
+        'seconds': time.perf_counter() - start,
+        'rss_before_mb': rss_before,
+        'peak_rss_mb': _peak_rss_mb()
+    }
+
+
+def _run_page_worker(target: str) -> Dict[str, Any]:
+    from streamlit.testing.v1 import AppTest
+    import modules.auth
+    from utils.service_registry import create_service_registry
+
+    # Sesión autenticada con cliente simulado
+    modules.auth.GoogleAdsAuth.is_authenticated = lambda self: True
+    client = StubGoogleAdsClient()
+
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+
+    app_test = AppTest.from_file(str(PROJECT_ROOT / target), default_timeout=300)
+    app_test.session_state['authenticated'] = True
+    app_test.session_state['google_ads_client'] = client
+    app_test.session_state['services'] = create_service_registry(client)
+    app_test.session_state['customer_ids'] = client.get_customer_ids()
+    app_test.session_state['selected_customer'] = STUB_CUSTOMER_ID
+    app_test.run()
+
+    return {
+        'seconds': time.perf_counter() - start,
+        'rss_before_mb': rss_before,
+        'peak_rss_mb': _peak_rss_mb(),
+        'exceptions': len(app_test.exception),
+        'errors': len(app_test.error),
+        'first_exception': app_test.exception[0].message if app_test.exception else None
+    }
+
+
+def run_worker(kind: str, target: str) -> None:
+    """Punto de entrada del proceso hijo: imprime el resultado en JSON"""
+    os.chdir(PROJECT_ROOT)
+    sys.path.insert(0, str(PROJECT_ROOT))
+    try:
+        if kind == 'import':
+            result = _run_import_worker(target)
+        else:
+            result = _run_page_worker(target)
+        result['error'] = None
+    except BaseException as e:
+        result = {'error': f"{type(e).__name__}: {e}"}
+    sys.stdout.write("\n__BENCHMARK__" + json.dumps(result) + "\n")
+    sys.stdout.flush()
+
+
+# ============================================================================
+# ORQUESTADOR
+# ============================================================================
+
+def _parse_importtime(stderr: str, target: str, top: int = 5) -> List[Dict[str, Any]]:
+    """Imports de primer nivel más pesados (acumulado) de -X importtime"""
+    entries = []
+    marker = stderr.find(_TARGET_MARKER)
+    if marker >= 0:
+        stderr = stderr[marker:]
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, module = match.groups()
+        # Solo imports de primer nivel dentro del objetivo (un espacio de sangría)
+        if len(indent) == 1 and module != target and not target.startswith(module + '.'):
+            entries.append({'module': module, 'seconds': int(cumulative) / 1_000_000})
+    entries.sort(key=lambda entry: entry['seconds'], reverse=True)
+    return entries[:top]
+
+
+def measure(kind: str, target: str, timeout: int, importtime: bool = False) -> Dict[str, Any]:
+    """Ejecuta un worker en un proceso nuevo"""
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += [str(Path(__file__).resolve()), '--worker', kind, target]
+
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='0', STREAMLIT_BROWSER_GATHER_USAGE_STATS='false')
+    try:
+        completed = subprocess.run(
+            command, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return {'error': f"timeout ({timeout}s)"}
+
+    marker = completed.stdout.rfind("__BENCHMARK__")
+    if marker < 0:
+        tail = (completed.stderr or completed.stdout).strip().splitlines()[-1:] or ['sin salida']
+        return {'error': f"exit {completed.returncode}: {tail[0]}"}
+
+    result = json.loads(completed.stdout[marker + len("__BENCHMARK__"):].splitlines()[0])
+    if importtime and not result.get('error'):
+        result['heaviest_imports'] = _parse_importtime(completed.stderr, target)
+    return result
+
+
+def _aggregate(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Mediana de las repeticiones válidas"""
+    valid = [sample for sample in samples if not sample.get('error')]
+    if not valid:
+        return {'error': samples[-1].get('error') if samples else 'sin muestras'}
+
+    result: Dict[str, Any] = {'samples': len(valid)}
+    for key in ('seconds', 'rss_before_mb', 'peak_rss_mb', 'exceptions', 'errors'):
+        values = [sample[key] for sample in valid if key in sample]
+        if values:
+            result[key] = round(statistics.median(values), 4)
+    for key in ('heaviest_imports', 'first_exception'):
+        if valid[0].get(key):
+            result[key] = valid[0][key]
+    return result
+
+
+def run_benchmark(targets: Dict[str, List[str]], repeat: int, timeout: int) -> Dict[str, Any]:
+    """Mide todos los objetivos y arma el reporte"""
+    report: Dict[str, Any] = {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'imports': {},
+        'pages': {}
+    }
+
+    for section, kind in (('imports', 'import'), ('pages', 'page')):
+        for target in targets[section]:
+            samples = [
+                # La primera repetición de cada import guarda el desglose de -X importtime
+                measure(kind, target, timeout, importtime=(kind == 'import' and i == 0))
+                for i in range(repeat)
+            ]
+            report[section][target] = _aggregate(samples)
+            _print_row(section, target, report[section][target])
+
+    return report
+
+
+def _print_row(section: str, target: str, result: Dict[str, Any]) -> None:
+    if result.get('error'):
+        print(f"  ❌ {section:<7} {target:<45} {result['error']}")
+        return
+    extra = ""
+    if 'exceptions' in result:
+        extra = f"  excepciones={result['exceptions']:.0f}"
+    heaviest = result.get('heaviest_imports') or []
+    if heaviest:
+        extra += "  (" + ", ".join(f"{item['module']} {item['seconds']:.2f}s" for item in heaviest[:3]) + ")"
+    print(f"  ⏱️ {section:<7} {target:<45} {result['seconds']:7.3f}s  {result['peak_rss_mb']:7.1f} MB{extra}")
+
+
+# ============================================================================
+# BASELINE
+# ============================================================================
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any],
+                    tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    Compara contra un baseline
+
+    Returns:
+        Lista de regresiones (tiempo o memoria por encima de la tolerancia,
+        excepciones o errores nuevos, u objetivos que dejaron de cargar)
+    """
+    regressions = []
+    for section in ('imports', 'pages'):
+        for target, result in current.get(section, {}).items():
+            base = baseline.get(section, {}).get(target)
+            if not base or base.get('error'):
+                continue
+            if result.get('error'):
+                regressions.append({
+                    'section': section,
+                    'target': target,
+                    'metric': 'error',
+                    'baseline': None,
+                    'current': result['error'],
+                    'change_pct': None
+                })
+                continue
+            # Cualquier excepción o st.error más que en el baseline es regresión
+            for metric in ('exceptions', 'errors'):
+                if result.get(metric, 0) > base.get(metric, 0):
+                    regressions.append({
+                        'section': section,
+                        'target': target,
+                        'metric': metric,
+                        'baseline': base.get(metric, 0),
+                        'current': result[metric],
+                        'change_pct': None,
+                        'first_exception': result.get('first_exception')
+                    })
+            for metric, min_delta in (('seconds', MIN_SECONDS_DELTA), ('peak_rss_mb', MIN_RSS_DELTA_MB)):
+                if metric not in result or metric not in base:
+                    continue
+                delta = result[metric] - base[metric]
+                if delta > min_delta and delta > base[metric] * tolerance:
+                    regressions.append({
+                        'section': section,
+                        'target': target,
+                        'metric': metric,
+                        'baseline': base[metric],
+                        'current': result[metric],
+                        'change_pct': round(100 * delta / base[metric], 1) if base[metric] else None
+                    })
+    return regressions
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    """Escritura atómica del reporte"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de importación y arranque en frío")
+    parser.add_argument('--worker', nargs=2, metavar=('KIND', 'TARGET'), help=argparse.SUPPRESS)
+    parser.add_argument('--only', choices=['imports', 'pages'], help="Medir solo imports o solo páginas")
+    parser.add_argument('--target', action='append', default=[], help="Limitar a estos objetivos (repetible)")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Repeticiones por objetivo (mediana)")
+    parser.add_argument('--timeout', type=int, default=300, help="Timeout por proceso (segundos)")
+    parser.add_argument('-o', '--output', type=Path, help="Archivo JSON de salida")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help="Archivo de baseline")
+    parser.add_argument('--save-baseline', action='store_true', help="Guardar el resultado como baseline")
+    parser.add_argument('--compare', action='store_true', help="Comparar contra el baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Aumento relativo permitido (0.25 = 25%%)")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Salir con código 1 si hay regresiones")
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return 0
+
+    targets = discover_targets(args.only)
+    if args.target:
+        targets = {section: [t for t in items if t in args.target] for section, items in targets.items()}
+
+    print(f"🚀 Benchmark de arranque ({args.repeat} repeticiones por objetivo)")
+    report = run_benchmark(targets, args.repeat, args.timeout)
+
+    output = args.output or BENCHMARK_DIR / f"startup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    regressions: List[Dict[str, Any]] = []
+    if args.compare:
+        if args.baseline.exists():
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = compare_reports(report, baseline, args.tolerance)
+            report['baseline'] = {'path': str(args.baseline), 'generated_at': baseline.get('generated_at')}
+            report['regressions'] = regressions
+            if regressions:
+                print(f"\n⚠️ {len(regressions)} regresiones contra {args.baseline}:")
+                for item in regressions:
+                    change = f" (+{item['change_pct']}%)" if item['change_pct'] is not None else ""
+                    print(f"  {item['section']}/{item['target']} {item['metric']}: "
+                          f"{item['baseline']} → {item['current']}{change}")
+            else:
+                print(f"\n✅ Sin regresiones contra {args.baseline}")
+        else:
+            print(f"\n⚠️ No existe baseline en {args.baseline}")
+
+    _write_json(output, report)
+    print(f"\n💾 Reporte guardado en {output}")
+
+    if args.save_baseline:
+        _write_json(args.baseline, report)
+        print(f"💾 Baseline guardado en {args.baseline}")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
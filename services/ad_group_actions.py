@@ -11,6 +11,7 @@ from modules.google_ads_client import GoogleAdsClientWrapper
 from google.ads.googleads.errors import GoogleAdsException
 from utils.logger import get_logger, log_api_call
 from utils.rate_limit import rate_limited
+from utils.query_partition_cache import get_query_partition_cache
 
 logger = get_logger(__name__)
 
@@ -63,6 +64,7 @@ class AdGroupActionsService:
                 customer_id=customer_id,
                 operations=[ad_group_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Ad group {ad_group_id} paused successfully for customer {customer_id}")
             return {
@@ -119,6 +121,7 @@ class AdGroupActionsService:
                 customer_id=customer_id,
                 operations=[ad_group_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Ad group {ad_group_id} resumed successfully for customer {customer_id}")
             return {
@@ -177,6 +180,7 @@ class AdGroupActionsService:
                 customer_id=customer_id,
                 operations=[ad_group_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Ad group {ad_group_id} bid updated to {new_bid_micros} micros for customer {customer_id}")
             return {
@@ -234,6 +238,7 @@ class AdGroupActionsService:
                 customer_id=customer_id,
                 operations=operations
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Bulk paused {len(ad_group_ids)} ad groups for customer {customer_id}")
             return {
@@ -291,6 +296,7 @@ class AdGroupActionsService:
                 customer_id=customer_id,
                 operations=operations
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Bulk resumed {len(ad_group_ids)} ad groups for customer {customer_id}")
             return {
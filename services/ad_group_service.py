@@ -4,14 +4,54 @@ Servicio para gestionar grupos de anuncios en Google Ads
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Iterable, Tuple
 from datetime import date, timedelta
 
+from utils.query_partition_cache import get_query_partition_cache
+
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class AdGroupTree:
+    """
+    Jerarquía campaña -> grupos -> anuncios / keywords armada en memoria
+    
+    Los índices permiten expandir cualquier grupo sin consultar la API
+    """
+    customer_id: str
+    campaign_ids: List[str]
+    ad_groups_by_campaign: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    ad_groups_by_id: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    ads_by_ad_group: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    keywords_by_ad_group: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    queries: int = 0
+    loaded_at: float = field(default_factory=time.time)
+    
+    def get_ad_groups(self, campaign_id: str) -> List[Dict[str, Any]]:
+        return self.ad_groups_by_campaign.get(str(campaign_id), [])
+    
+    def get_ad_group(self, ad_group_id: str) -> Optional[Dict[str, Any]]:
+        return self.ad_groups_by_id.get(str(ad_group_id))
+    
+    def get_ads(self, ad_group_id: str) -> List[Dict[str, Any]]:
+        return self.ads_by_ad_group.get(str(ad_group_id), [])
+    
+    def get_keywords(self, ad_group_id: str) -> List[Dict[str, Any]]:
+        return self.keywords_by_ad_group.get(str(ad_group_id), [])
+
+
 class AdGroupService:
     """Servicio para gestionar grupos de anuncios"""
     
+    # Tiempo de vida del árbol cacheado (segundos)
+    TREE_CACHE_TTL = 300
+    
+    # IDs máximos por cláusula IN (...)
+    MAX_IDS_PER_QUERY = 1000
+    
     def __init__(self, google_ads_client):
         """
         Inicializa el servicio de grupos de anuncios
@@ -21,6 +61,7 @@ class AdGroupService:
         """
         self.client = google_ads_client.get_client()
         self.wrapper = google_ads_client
+        self._tree_cache: Dict[Tuple, AdGroupTree] = {}
     
     def get_ad_groups_by_campaign(
         self, 
@@ -98,48 +139,10 @@ class AdGroupService:
             ga_service = self.client.get_service("GoogleAdsService")
             response = ga_service.search(customer_id=customer_id, query=query)
             
-            # Procesar resultados
-            ad_groups = []
-            ad_groups_dict = {}  # Para agrupar métricas por ad_group_id
-            
+            # Procesar resultados (agrupando métricas por ad_group_id)
+            ad_groups_dict = {}
             for row in response:
-                ad_group_id = str(row.ad_group.id)
-                
-                # Si el grupo ya existe, acumular métricas
-                if ad_group_id in ad_groups_dict:
-                    if include_metrics:
-                        ad_groups_dict[ad_group_id]['metrics']['impressions'] += row.metrics.impressions
-                        ad_groups_dict[ad_group_id]['metrics']['clicks'] += row.metrics.clicks
-                        ad_groups_dict[ad_group_id]['metrics']['cost_micros'] += row.metrics.cost_micros
-                        ad_groups_dict[ad_group_id]['metrics']['conversions'] += row.metrics.conversions
-                        ad_groups_dict[ad_group_id]['metrics']['conversions_value'] += row.metrics.conversions_value
-                else:
-                    # Crear nuevo grupo
-                    ad_group_data = {
-                        'id': ad_group_id,
-                        'name': row.ad_group.name,
-                        'status': row.ad_group.status.name,
-                        'type': row.ad_group.type_.name,
-                        'cpc_bid_micros': row.ad_group.cpc_bid_micros,
-                        'target_cpa_micros': row.ad_group.target_cpa_micros,
-                        'target_roas': row.ad_group.target_roas,
-                        'campaign_id': str(row.campaign.id),
-                        'campaign_name': row.campaign.name
-                    }
-                    
-                    # Agregar métricas si se solicitan
-                    if include_metrics:
-                        ad_group_data['metrics'] = {
-                            'impressions': row.metrics.impressions,
-                            'clicks': row.metrics.clicks,
-                            'cost_micros': row.metrics.cost_micros,
-                            'conversions': row.metrics.conversions,
-                            'conversions_value': row.metrics.conversions_value,
-                            'average_cpc': row.metrics.average_cpc,
-                            'ctr': row.metrics.ctr
-                        }
-                    
-                    ad_groups_dict[ad_group_id] = ad_group_data
+                self._accumulate_ad_group_row(ad_groups_dict, row, include_metrics)
             
             # Convertir dict a lista
             ad_groups = list(ad_groups_dict.values())
@@ -189,40 +192,7 @@ class AdGroupService:
             ga_service = self.client.get_service("GoogleAdsService")
             response = ga_service.search(customer_id=customer_id, query=query)
             
-            ads = []
-            
-            for row in response:
-                ad = row.ad_group_ad.ad
-                
-                # Procesar headlines
-                headlines = []
-                if ad.responsive_search_ad.headlines:
-                    headlines = [h.text for h in ad.responsive_search_ad.headlines]
-                
-                # Procesar descriptions
-                descriptions = []
-                if ad.responsive_search_ad.descriptions:
-                    descriptions = [d.text for d in ad.responsive_search_ad.descriptions]
-                
-                # Procesar URLs
-                final_urls = []
-                if ad.final_urls:
-                    final_urls = list(ad.final_urls)
-                
-                ad_data = {
-                    'id': str(ad.id),
-                    'name': ad.name if ad.name else f"Anuncio {ad.id}",
-                    'status': row.ad_group_ad.status.name,
-                    'type': ad.type_.name,
-                    'final_urls': final_urls,
-                    'headlines': headlines,
-                    'descriptions': descriptions,
-                    'path1': ad.responsive_search_ad.path1,
-                    'path2': ad.responsive_search_ad.path2,
-                    'approval_status': row.ad_group_ad.policy_summary.approval_status.name if row.ad_group_ad.policy_summary else 'UNKNOWN'
-                }
-                
-                ads.append(ad_data)
+            ads = [self._parse_ad_row(row) for row in response]
             
             logger.info(f"✅ {len(ads)} anuncios obtenidos del grupo {ad_group_id}")
             return ads
@@ -266,19 +236,7 @@ class AdGroupService:
             ga_service = self.client.get_service("GoogleAdsService")
             response = ga_service.search(customer_id=customer_id, query=query)
             
-            keywords = []
-            
-            for row in response:
-                keyword_data = {
-                    'id': str(row.ad_group_criterion.criterion_id),
-                    'text': row.ad_group_criterion.keyword.text,
-                    'match_type': row.ad_group_criterion.keyword.match_type.name,
-                    'status': row.ad_group_criterion.status.name,
-                    'quality_score': row.ad_group_criterion.quality_info.quality_score if row.ad_group_criterion.quality_info else None,
-                    'cpc_bid_micros': row.ad_group_criterion.cpc_bid_micros
-                }
-                
-                keywords.append(keyword_data)
+            keywords = [self._parse_keyword_row(row) for row in response]
             
             logger.info(f"✅ {len(keywords)} keywords obtenidas del grupo {ad_group_id}")
             return keywords
@@ -287,6 +245,282 @@ class AdGroupService:
             logger.error(f"❌ Error obteniendo keywords del grupo {ad_group_id}: {e}", exc_info=True)
             return []
     
+    # ========================================================================
+    # ÁRBOL DE CAMPAÑAS (CONSULTAS AGRUPADAS)
+    # ========================================================================
+    
+    def load_campaign_tree(
+        self,
+        customer_id: str,
+        campaign_ids: Iterable[str],
+        include_metrics: bool = True,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        force_refresh: bool = False
+    ) -> AdGroupTree:
+        """
+        Obtiene grupos, anuncios y keywords de varias campañas con una query
+        por tipo de recurso (campaign.id IN (...)) en lugar de una por grupo
+        
+        Args:
+            customer_id: ID del cliente
+            campaign_ids: IDs de las campañas
+            include_metrics: Si incluir métricas de los grupos
+            start_date: Fecha de inicio para métricas (default: últimos 30 días)
+            end_date: Fecha de fin para métricas (default: hoy)
+            force_refresh: Ignorar el árbol cacheado
+        
+        Returns:
+            AdGroupTree con índices por campaña y por grupo
+        """
+        if end_date is None:
+            end_date = date.today()
+        if start_date is None:
+            start_date = end_date - timedelta(days=30)
+        
+        campaign_ids = sorted({str(campaign_id) for campaign_id in campaign_ids})
+        cache_key = (customer_id, tuple(campaign_ids), include_metrics, start_date, end_date)
+        
+        cached = self._tree_cache.get(cache_key)
+        if cached and not force_refresh and time.time() - cached.loaded_at < self.TREE_CACHE_TTL:
+            logger.debug(f"💾 Árbol de campañas desde caché: {campaign_ids}")
+            return cached
+        
+        tree = AdGroupTree(customer_id=customer_id, campaign_ids=campaign_ids)
+        if not campaign_ids:
+            return tree
+        
+        ga_service = self.client.get_service("GoogleAdsService")
+        
+        try:
+            # 1. Grupos de anuncios (con métricas agregadas por grupo)
+            ad_groups_dict: Dict[str, Dict[str, Any]] = {}
+            for ids_clause in self._id_chunks(campaign_ids):
+                query = self._ad_groups_query(include_metrics, start_date, end_date).format(ids=ids_clause)
+                tree.queries += 1
+                for row in ga_service.search(customer_id=customer_id, query=query):
+                    self._accumulate_ad_group_row(ad_groups_dict, row, include_metrics)
+            
+            for ad_group in sorted(ad_groups_dict.values(), key=lambda g: g['name']):
+                tree.ad_groups_by_campaign.setdefault(ad_group['campaign_id'], []).append(ad_group)
+                tree.ad_groups_by_id[ad_group['id']] = ad_group
+            
+            if not tree.ad_groups_by_id:
+                logger.info(f"✅ Sin grupos de anuncios en {len(campaign_ids)} campaña(s)")
+                self._tree_cache[cache_key] = tree
+                return tree
+            
+            # 2. Anuncios
+            for ids_clause in self._id_chunks(campaign_ids):
+                query = self._ADS_TREE_QUERY.format(ids=ids_clause)
+                tree.queries += 1
+                for row in ga_service.search(customer_id=customer_id, query=query):
+                    ad_group_id = str(row.ad_group.id)
+                    if ad_group_id in tree.ad_groups_by_id:
+                        tree.ads_by_ad_group.setdefault(ad_group_id, []).append(self._parse_ad_row(row))
+            
+            # 3. Keywords
+            for ids_clause in self._id_chunks(campaign_ids):
+                query = self._KEYWORDS_TREE_QUERY.format(ids=ids_clause)
+                tree.queries += 1
+                for row in ga_service.search(customer_id=customer_id, query=query):
+                    ad_group_id = str(row.ad_group.id)
+                    if ad_group_id in tree.ad_groups_by_id:
+                        tree.keywords_by_ad_group.setdefault(ad_group_id, []).append(self._parse_keyword_row(row))
+        
+        except Exception as e:
+            logger.error(f"❌ Error cargando árbol de campañas: {e}", exc_info=True)
+            return tree
+        
+        logger.info(
+            f"✅ Árbol de {len(campaign_ids)} campaña(s): {len(tree.ad_groups_by_id)} grupos, "
+            f"{sum(len(ads) for ads in tree.ads_by_ad_group.values())} anuncios, "
+            f"{sum(len(kws) for kws in tree.keywords_by_ad_group.values())} keywords "
+            f"en {tree.queries} queries"
+        )
+        
+        self._tree_cache[cache_key] = tree
+        return tree
+    
+    def invalidate_tree_cache(self, customer_id: Optional[str] = None) -> None:
+        """Descarta los árboles cacheados (de un cliente o todos)"""
+        if customer_id is None:
+            self._tree_cache.clear()
+            return
+        for cache_key in [key for key in self._tree_cache if key[0] == customer_id]:
+            del self._tree_cache[cache_key]
+    
+    _ADS_TREE_QUERY = """
+        SELECT
+            ad_group.id,
+            ad_group_ad.ad.id,
+            ad_group_ad.ad.name,
+            ad_group_ad.status,
+            ad_group_ad.ad.type,
+            ad_group_ad.ad.final_urls,
+            ad_group_ad.ad.responsive_search_ad.headlines,
+            ad_group_ad.ad.responsive_search_ad.descriptions,
+            ad_group_ad.ad.responsive_search_ad.path1,
+            ad_group_ad.ad.responsive_search_ad.path2,
+            ad_group_ad.policy_summary.approval_status
+        FROM ad_group_ad
+        WHERE campaign.id IN ({ids})
+        AND ad_group.status != 'REMOVED'
+        AND ad_group_ad.status != 'REMOVED'
+    """
+    
+    _KEYWORDS_TREE_QUERY = """
+        SELECT
+            ad_group.id,
+            ad_group_criterion.criterion_id,
+            ad_group_criterion.keyword.text,
+            ad_group_criterion.keyword.match_type,
+            ad_group_criterion.status,
+            ad_group_criterion.quality_info.quality_score,
+            ad_group_criterion.cpc_bid_micros
+        FROM ad_group_criterion
+        WHERE campaign.id IN ({ids})
+        AND ad_group.status != 'REMOVED'
+        AND ad_group_criterion.type = 'KEYWORD'
+        AND ad_group_criterion.status != 'REMOVED'
+    """
+    
+    @staticmethod
+    def _ad_groups_query(include_metrics: bool, start_date: date, end_date: date) -> str:
+        """Query de grupos para campaign.id IN ({ids})"""
+        query = """
+            SELECT
+                ad_group.id,
+                ad_group.name,
+                ad_group.status,
+                ad_group.type,
+                ad_group.cpc_bid_micros,
+                ad_group.target_cpa_micros,
+                ad_group.target_roas,
+                campaign.id,
+                campaign.name
+        """
+        if include_metrics:
+            query += """,
+                metrics.impressions,
+                metrics.clicks,
+                metrics.cost_micros,
+                metrics.conversions,
+                metrics.conversions_value,
+                metrics.average_cpc,
+                metrics.ctr
+            """
+        query += """
+            FROM ad_group
+            WHERE campaign.id IN ({ids})
+            AND ad_group.status != 'REMOVED'
+        """
+        if include_metrics:
+            query += (
+                f"    AND segments.date BETWEEN '{start_date.strftime('%Y-%m-%d')}' "
+                f"AND '{end_date.strftime('%Y-%m-%d')}'"
+            )
+        return query
+    
+    def _id_chunks(self, ids: List[str]) -> List[str]:
+        """Listas de IDs para IN (...) sin superar MAX_IDS_PER_QUERY"""
+        return [
+            ", ".join(ids[i:i + self.MAX_IDS_PER_QUERY])
+            for i in range(0, len(ids), self.MAX_IDS_PER_QUERY)
+        ]
+    
+    # ========================================================================
+    # PARSEO DE FILAS
+    # ========================================================================
+    
+    @staticmethod
+    def _accumulate_ad_group_row(ad_groups_dict: Dict[str, Dict[str, Any]], row, include_metrics: bool) -> None:
+        """Agrega una fila de ad_group (una por fecha) al grupo correspondiente"""
+        ad_group_id = str(row.ad_group.id)
+        
+        # Si el grupo ya existe, acumular métricas
+        if ad_group_id in ad_groups_dict:
+            if include_metrics:
+                metrics = ad_groups_dict[ad_group_id]['metrics']
+                metrics['impressions'] += row.metrics.impressions
+                metrics['clicks'] += row.metrics.clicks
+                metrics['cost_micros'] += row.metrics.cost_micros
+                metrics['conversions'] += row.metrics.conversions
+                metrics['conversions_value'] += row.metrics.conversions_value
+            return
+        
+        # Crear nuevo grupo
+        ad_group_data = {
+            'id': ad_group_id,
+            'name': row.ad_group.name,
+            'status': row.ad_group.status.name,
+            'type': row.ad_group.type_.name,
+            'cpc_bid_micros': row.ad_group.cpc_bid_micros,
+            'target_cpa_micros': row.ad_group.target_cpa_micros,
+            'target_roas': row.ad_group.target_roas,
+            'campaign_id': str(row.campaign.id),
+            'campaign_name': row.campaign.name
+        }
+        
+        # Agregar métricas si se solicitan
+        if include_metrics:
+            ad_group_data['metrics'] = {
+                'impressions': row.metrics.impressions,
+                'clicks': row.metrics.clicks,
+                'cost_micros': row.metrics.cost_micros,
+                'conversions': row.metrics.conversions,
+                'conversions_value': row.metrics.conversions_value,
+                'average_cpc': row.metrics.average_cpc,
+                'ctr': row.metrics.ctr
+            }
+        
+        ad_groups_dict[ad_group_id] = ad_group_data
+    
+    @staticmethod
+    def _parse_ad_row(row) -> Dict[str, Any]:
+        """Convierte una fila de ad_group_ad en dict"""
+        ad = row.ad_group_ad.ad
+        
+        # Procesar headlines
+        headlines = []
+        if ad.responsive_search_ad.headlines:
+            headlines = [h.text for h in ad.responsive_search_ad.headlines]
+        
+        # Procesar descriptions
+        descriptions = []
+        if ad.responsive_search_ad.descriptions:
+            descriptions = [d.text for d in ad.responsive_search_ad.descriptions]
+        
+        # Procesar URLs
+        final_urls = []
+        if ad.final_urls:
+            final_urls = list(ad.final_urls)
+        
+        return {
+            'id': str(ad.id),
+            'name': ad.name if ad.name else f"Anuncio {ad.id}",
+            'status': row.ad_group_ad.status.name,
+            'type': ad.type_.name,
+            'final_urls': final_urls,
+            'headlines': headlines,
+            'descriptions': descriptions,
+            'path1': ad.responsive_search_ad.path1,
+            'path2': ad.responsive_search_ad.path2,
+            'approval_status': row.ad_group_ad.policy_summary.approval_status.name if row.ad_group_ad.policy_summary else 'UNKNOWN'
+        }
+    
+    @staticmethod
+    def _parse_keyword_row(row) -> Dict[str, Any]:
+        """Convierte una fila de ad_group_criterion (keyword) en dict"""
+        return {
+            'id': str(row.ad_group_criterion.criterion_id),
+            'text': row.ad_group_criterion.keyword.text,
+            'match_type': row.ad_group_criterion.keyword.match_type.name,
+            'status': row.ad_group_criterion.status.name,
+            'quality_score': row.ad_group_criterion.quality_info.quality_score if row.ad_group_criterion.quality_info else None,
+            'cpc_bid_micros': row.ad_group_criterion.cpc_bid_micros
+        }
+    
     def create_ad_in_ad_group(
         self,
         customer_id: str,
@@ -376,11 +610,13 @@ class AdGroupService:
                 customer_id=customer_id,
                 operations=[ad_group_ad_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             ad_resource_name = response.results[0].resource_name
             ad_id = ad_resource_name.split('/')[-1]
             
             logger.info(f"✅ Anuncio creado exitosamente: {ad_id}")
+            self.invalidate_tree_cache(customer_id)
             
             return {
                 'success': True,
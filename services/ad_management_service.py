@@ -6,6 +6,8 @@ Compatible con Google Ads API v21
 from google.ads.googleads.client import GoogleAdsClient
 from google.ads.googleads.errors import GoogleAdsException
 from google.protobuf import field_mask_pb2
+from modules.google_ads_client_pool import get_pooled_service
+from utils.query_partition_cache import get_query_partition_cache
 from typing import List, Dict, Tuple
 import logging
 from dataclasses import dataclass
@@ -34,8 +36,11 @@ class AdManagementService:
         Args:
             google_ads_client: GoogleAdsClient o GoogleAdsClientWrapper
         """
-        # Detectar si es wrapper y extraer cliente real
-        if hasattr(google_ads_client, 'client'):
+        # Detectar si es wrapper y extraer cliente real (compartido por el pool)
+        if hasattr(google_ads_client, 'get_client'):
+            self.client = google_ads_client.get_client()
+            logger.info("Usando cliente real extraído de GoogleAdsClientWrapper")
+        elif hasattr(google_ads_client, 'client'):
             self.client = google_ads_client.client
             logger.info("Usando cliente real extraído de GoogleAdsClientWrapper")
         else:
@@ -44,8 +49,8 @@ class AdManagementService:
         
         # Inicializar servicios
         try:
-            self.ad_group_ad_service = self.client.get_service("AdGroupAdService")
-            self.googleads_service = self.client.get_service("GoogleAdsService")
+            self.ad_group_ad_service = get_pooled_service(self.client, "AdGroupAdService")
+            self.googleads_service = get_pooled_service(self.client, "GoogleAdsService")
             logger.info("✅ AdManagementService inicializado correctamente")
         except Exception as e:
             logger.error(f"❌ Error inicializando servicios: {e}")
@@ -99,6 +104,7 @@ class AdManagementService:
                 customer_id=customer_id,
                 operations=[ad_group_ad_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"✅ Anuncio pausado: ad_id {ad_id}")
             return True, "Anuncio pausado exitosamente"
@@ -153,6 +159,7 @@ class AdManagementService:
                 customer_id=customer_id,
                 operations=[ad_group_ad_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"✅ Anuncio activado: ad_id {ad_id}")
             return True, "Anuncio activado exitosamente"
@@ -23,6 +23,11 @@ import asyncio
 from collections import defaultdict
 import statistics
 
+from services.metric_store import (
+    MetricSeriesStore, global_zscores, rolling_zscores, ewma_zscores,
+    seasonal_zscores, classify_severity, panel_trends
+)
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -125,8 +130,8 @@ class EsotericAnalyticsService:
         # Configuraciones
         self.config = {}
         
-        # Datos en memoria para análisis
-        self.metrics_data = defaultdict(list)
+        # Datos en memoria para análisis (series por métrica y categoría)
+        self.metric_store: Optional[MetricSeriesStore] = None
         self.historical_data = defaultdict(list)
         self.benchmarks = {}
         
@@ -147,8 +152,22 @@ class EsotericAnalyticsService:
         self._initialize_benchmarks()
         self._setup_anomaly_detection()
         
+        self.metric_store = MetricSeriesStore(
+            retention_days=self.config['analytics']['data_retention_days'],
+            max_points_per_series=self.config['analytics'].get('max_points_per_series')
+        )
+        
         logger.info("Analytics Service inicializado correctamente")
     
+    @property
+    def metrics_data(self) -> Dict[MetricType, List[MetricData]]:
+        """Vista de compatibilidad: registros por métrica en orden de inserción"""
+        oldest, newest = datetime.min, datetime.max
+        return {
+            metric_type: self.metric_store.query(metric_type, oldest, newest)
+            for metric_type in {key[0] for key in self.metric_store.series_keys()}
+        }
+    
     def _get_default_config_path(self) -> str:
         """Obtener ruta por defecto de configuración"""
         return "config/analytics_config.yaml"
@@ -263,20 +282,34 @@ class EsotericAnalyticsService:
         """
         Agregar datos de métrica
         
+        Inserción O(1) amortizada en la serie (métrica, categoría); los datos
+        fuera del período de retención se descartan en el buffer circular.
+        
         Args:
             metric_data: Datos de la métrica
         """
-        key = f"{metric_data.metric_type.value}_{metric_data.timestamp.date()}"
-        self.metrics_data[metric_data.metric_type].append(metric_data)
-        
-        # Mantener solo datos dentro del período de retención
-        retention_days = self.config['analytics']['data_retention_days']
-        cutoff_date = datetime.now() - timedelta(days=retention_days)
+        self.metric_store.append(
+            metric_data.metric_type,
+            metric_data.timestamp,
+            metric_data.value,
+            category=(metric_data.dimensions or {}).get('category'),
+            record=metric_data
+        )
+    
+    def add_metric_data_batch(self, metric_data: List[MetricData]) -> int:
+        """
+        Agregar muchos datos de métricas (p. ej. métricas diarias de todas las campañas)
         
-        self.metrics_data[metric_data.metric_type] = [
-            data for data in self.metrics_data[metric_data.metric_type]
-            if data.timestamp >= cutoff_date
-        ]
+        Returns:
+            Número de puntos almacenados (dentro del período de retención)
+        """
+        return sum(
+            self.metric_store.append(
+                data.metric_type, data.timestamp, data.value,
+                category=(data.dimensions or {}).get('category'), record=data
+            )
+            for data in metric_data
+        )
     
     def get_performance_insights(self, 
                                date_range: Tuple[datetime, datetime],
@@ -537,50 +570,108 @@ class EsotericAnalyticsService:
             forecast=forecast
         )
     
-    def _calculate_trend(self, values: List[float]) -> Tuple[str, float]:
-        """Calcular dirección y fuerza de tendencia"""
-        if len(values) < 3:
-            return "stable", 0.0
+    def get_trend_analysis_batch(self,
+                                 panel: pd.DataFrame,
+                                 id_columns: Union[str, List[str]] = 'campaign_id',
+                                 date_column: str = 'date',
+                                 metrics: Optional[List[str]] = None,
+                                 forecast_periods: int = 7) -> pd.DataFrame:
+        """
+        Análisis de tendencias de muchas series (campañas x métricas x días) a la vez
         
-        # Regresión lineal simple
-        x = np.arange(len(values))
-        y = np.array(values)
+        El panel se agrupa por día y se convierte en una matriz
+        (serie x día); tendencia, comparación de períodos, patrón semanal y
+        pronóstico se calculan en una sola pasada vectorizada.
         
-        # Calcular pendiente
-        slope = np.polyfit(x, y, 1)[0]
+        Args:
+            panel: DataFrame en formato ancho: columnas de id, fecha y una
+                   columna numérica por métrica
+            id_columns: Columna(s) que identifican la serie (p. ej. campaign_id)
+            date_column: Columna de fecha
+            metrics: Métricas a analizar (None = todas las columnas numéricas)
+            forecast_periods: Días a pronosticar
+            
+        Returns:
+            DataFrame con una fila por (id, métrica): points, trend_direction,
+            trend_strength, slope, first_period_avg, second_period_avg,
+            change_percent, best_day, worst_day y forecast
+        """
+        id_columns = [id_columns] if isinstance(id_columns, str) else list(id_columns)
+        result_columns = id_columns + [
+            'metric', 'points', 'trend_direction', 'trend_strength', 'slope',
+            'first_period_avg', 'second_period_avg', 'change_percent',
+            'best_day', 'worst_day', 'forecast'
+        ]
+        if panel.empty:
+            return pd.DataFrame(columns=result_columns)
+        
+        if metrics is None:
+            excluded = set(id_columns) | {date_column}
+            metrics = [
+                column for column in panel.columns
+                if column not in excluded and pd.api.types.is_numeric_dtype(panel[column])
+            ]
         
-        # Calcular correlación para fuerza
-        correlation = np.corrcoef(x, y)[0, 1]
-        trend_strength = abs(correlation)
+        df = panel[id_columns + [date_column] + list(metrics)].copy()
+        df[date_column] = pd.to_datetime(df[date_column]).dt.normalize()
+        
+        # Promedio diario por serie y matriz (id, métrica) x día
+        daily = df.groupby(id_columns + [date_column], sort=False)[list(metrics)].mean()
+        long = daily.melt(ignore_index=False, var_name='metric', value_name='value').reset_index()
+        matrix = long.pivot_table(
+            index=id_columns + ['metric'], columns=date_column, values='value',
+            aggfunc='first', dropna=False
+        ).sort_index(axis=1)
+        
+        trends = panel_trends(
+            matrix.to_numpy(dtype=float),
+            forecast_periods=forecast_periods,
+            weekdays=matrix.columns.dayofweek.to_numpy()
+        )
         
-        # Determinar dirección
-        if slope > 0.1:
-            trend_direction = "up"
-        elif slope < -0.1:
-            trend_direction = "down"
-        else:
-            trend_direction = "stable"
+        confidence = trends['forecast_confidence']
+        forecasts = [
+            [] if np.isnan(row).all() else [
+                {'period': i + 1, 'predicted_value': float(value), 'confidence': float(confidence[i])}
+                for i, value in enumerate(row)
+            ]
+            for row in trends['forecast']
+        ]
+        
+        result = matrix.index.to_frame(index=False)
+        result['points'] = trends['points']
+        result['trend_direction'] = np.where(trends['points'] < 7, 'insufficient_data', trends['trend_direction'])
+        result['trend_strength'] = trends['trend_strength']
+        result['slope'] = trends['slope']
+        result['first_period_avg'] = trends['first_period_avg']
+        result['second_period_avg'] = trends['second_period_avg']
+        result['change_percent'] = trends['change_percent']
+        result['best_day'] = trends['best_day']
+        result['worst_day'] = trends['worst_day']
+        result['forecast'] = forecasts
+        
+        logger.info(f"Tendencias calculadas para {len(result)} series ({len(metrics)} métricas)")
+        return result[result_columns]
+    
+    def _calculate_trend(self, values: List[float]) -> Tuple[str, float]:
+        """Calcular dirección y fuerza de tendencia"""
+        if len(values) < 3:
+            return "stable", 0.0
         
-        return trend_direction, trend_strength
+        trends = panel_trends(np.array([values], dtype=float), forecast_periods=0)
+        return str(trends['trend_direction'][0]), float(trends['trend_strength'][0])
     
     def _calculate_period_comparison(self, values: List[float]) -> Dict[str, float]:
         """Calcular comparación entre períodos"""
         if len(values) < 4:
             return {}
         
-        mid_point = len(values) // 2
-        first_half = values[:mid_point]
-        second_half = values[mid_point:]
-        
-        first_avg = statistics.mean(first_half)
-        second_avg = statistics.mean(second_half)
-        
-        change_percent = ((second_avg - first_avg) / first_avg) * 100 if first_avg != 0 else 0
+        trends = panel_trends(np.array([values], dtype=float), forecast_periods=0)
         
         return {
-            'first_period_avg': first_avg,
-            'second_period_avg': second_avg,
-            'change_percent': change_percent
+            'first_period_avg': float(trends['first_period_avg'][0]),
+            'second_period_avg': float(trends['second_period_avg'][0]),
+            'change_percent': float(trends['change_percent'][0])
         }
     
     def _detect_seasonal_patterns(self, df: pd.DataFrame, 
@@ -621,28 +712,20 @@ class EsotericAnalyticsService:
         return patterns
     
     def _generate_simple_forecast(self, values: List[float], periods: int) -> List[Dict[str, Any]]:
-        """Generar pronóstico simple"""
+        """Generar pronóstico simple (promedio reciente + tendencia)"""
         if len(values) < 3:
             return []
         
-        # Promedio móvil simple
-        window_size = min(7, len(values))
-        recent_avg = statistics.mean(values[-window_size:])
+        trends = panel_trends(np.array([values], dtype=float), forecast_periods=periods)
         
-        # Tendencia
-        trend_slope = (values[-1] - values[0]) / len(values) if len(values) > 1 else 0
-        
-        forecast = []
-        for i in range(1, periods + 1):
-            predicted_value = recent_avg + (trend_slope * i)
-            
-            forecast.append({
-                'period': i,
-                'predicted_value': max(0, predicted_value),  # No valores negativos
-                'confidence': max(0.3, 0.9 - (i * 0.1))  # Confianza decrece con el tiempo
-            })
-        
-        return forecast
+        return [
+            {
+                'period': i + 1,
+                'predicted_value': float(value),  # No valores negativos
+                'confidence': float(trends['forecast_confidence'][i])  # Confianza decrece con el tiempo
+            }
+            for i, value in enumerate(trends['forecast'][0])
+        ]
     
     def detect_anomalies(self, 
                         metric_type: MetricType,
@@ -667,29 +750,22 @@ class EsotericAnalyticsService:
         if len(metric_data) < 10:  # Datos insuficientes
             return anomalies
         
-        values = [data.value for data in metric_data]
+        values = np.array([[data.value for data in metric_data]], dtype=float)
         
-        # Calcular estadísticas base
-        mean_value = statistics.mean(values)
-        std_dev = statistics.stdev(values) if len(values) > 1 else 0
+        # z-score contra media y desviación de todo el período
+        z_scores, expected = global_zscores(values)
+        mean_value = float(expected[0, 0])
         
         # Obtener umbrales
         thresholds = self.anomaly_thresholds.get(metric_type, {})
         min_deviation = thresholds.get('min_deviation', 1.0)
         max_deviation = thresholds.get('max_deviation', 3.0)
         
+        severities = classify_severity(z_scores, [min_deviation], [max_deviation])[0]
+        
         # Detectar anomalías
-        for data in metric_data:
-            z_score = abs(data.value - mean_value) / std_dev if std_dev > 0 else 0
-            
-            if z_score > max_deviation:
-                severity = "critical"
-            elif z_score > min_deviation * 2:
-                severity = "high"
-            elif z_score > min_deviation:
-                severity = "medium"
-            else:
-                continue  # No es anomalía
+        for idx in np.flatnonzero(severities != ''):
+            data = metric_data[idx]
             
             # Generar posibles causas
             possible_causes = self._generate_anomaly_causes(metric_type, data.value, mean_value)
@@ -699,13 +775,100 @@ class EsotericAnalyticsService:
                 metric=metric_type,
                 expected_value=mean_value,
                 actual_value=data.value,
-                deviation_score=z_score,
-                severity=severity,
+                deviation_score=float(z_scores[0, idx]),
+                severity=str(severities[idx]),
                 possible_causes=possible_causes
             ))
         
         return anomalies
     
+    def detect_anomalies_batch(self,
+                               date_range: Tuple[datetime, datetime],
+                               metric_types: Optional[List[MetricType]] = None,
+                               category: Optional[str] = None,
+                               method: str = "rolling",
+                               window: Optional[int] = None,
+                               min_points: int = 10) -> Dict[Tuple[MetricType, Optional[str]], List[AnomalyDetection]]:
+        """
+        Detectar anomalías en todas las series (métrica, categoría) a la vez
+        
+        Las series se apilan en una matriz y el z-score se calcula en una sola
+        pasada vectorizada.
+        
+        Args:
+            date_range: Rango de fechas
+            metric_types: Métricas a analizar (None = todas las que tienen datos)
+            category: Limitar a una categoría
+            method: 'zscore' (media global), 'rolling' (ventana previa),
+                    'ewma' (media exponencial) o 'seasonal' (mismo día de semanas previas)
+            window: Tamaño de ventana para 'rolling' (por defecto el de la métrica)
+            min_points: Puntos mínimos por serie
+            
+        Returns:
+            Anomalías por (métrica, categoría)
+        """
+        wanted = set(metric_types) if metric_types else None
+        keys = [
+            key for key in self.metric_store.series_keys(category=category)
+            if wanted is None or key[0] in wanted
+        ]
+        keys, timestamps, values = self.metric_store.panel(keys, date_range[0], date_range[1])
+        
+        if not keys:
+            return {}
+        
+        if method == "zscore":
+            z_scores, expected = global_zscores(values)
+        elif method == "rolling":
+            if window:
+                z_scores, expected = rolling_zscores(values, window)
+            else:
+                # La ventana depende de la métrica: agrupar filas por ventana
+                z_scores = np.full(values.shape, np.nan)
+                expected = np.full(values.shape, np.nan)
+                windows = np.array([
+                    self.anomaly_thresholds.get(metric, {}).get('window_size', 7)
+                    for metric, _ in keys
+                ])
+                for size in np.unique(windows):
+                    rows = windows == size
+                    z_scores[rows], expected[rows] = rolling_zscores(values[rows], int(size))
+        elif method == "ewma":
+            z_scores, expected = ewma_zscores(values)
+        elif method == "seasonal":
+            z_scores, expected = seasonal_zscores(values)
+        else:
+            raise ValueError(f"Método de detección no soportado: {method}")
+        
+        min_devs = [self.anomaly_thresholds.get(metric, {}).get('min_deviation', 1.0) for metric, _ in keys]
+        max_devs = [self.anomaly_thresholds.get(metric, {}).get('max_deviation', 3.0) for metric, _ in keys]
+        severities = classify_severity(z_scores, min_devs, max_devs)
+        
+        point_counts = np.sum(~np.isnan(values), axis=1)
+        severities[point_counts < min_points] = ''
+        
+        results: Dict[Tuple[MetricType, Optional[str]], List[AnomalyDetection]] = {}
+        rows, cols = np.nonzero(severities != '')
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            metric_type = keys[row][0]
+            actual = float(values[row, col])
+            expected_value = float(expected[row, col])
+            results.setdefault(keys[row], []).append(AnomalyDetection(
+                timestamp=datetime(1970, 1, 1) + timedelta(microseconds=int(timestamps[row, col])),
+                metric=metric_type,
+                expected_value=expected_value,
+                actual_value=actual,
+                deviation_score=float(z_scores[row, col]),
+                severity=str(severities[row, col]),
+                possible_causes=self._generate_anomaly_causes(metric_type, actual, expected_value)
+            ))
+        
+        logger.info(
+            f"Anomalías ({method}): {sum(len(v) for v in results.values())} "
+            f"en {len(results)}/{len(keys)} series"
+        )
+        return results
+    
     def _generate_anomaly_causes(self, metric_type: MetricType, 
                                actual_value: float, expected_value: float) -> List[str]:
         """Generar posibles causas de anomalías"""
@@ -850,22 +1013,7 @@ class EsotericAnalyticsService:
                         date_range: Tuple[datetime, datetime],
                         category: Optional[str] = None) -> List[MetricData]:
         """Obtener datos de métrica filtrados"""
-        data = self.metrics_data.get(metric_type, [])
-        
-        # Filtrar por rango de fechas
-        filtered_data = [
-            d for d in data 
-            if date_range[0] <= d.timestamp <= date_range[1]
-        ]
-        
-        # Filtrar por categoría si se especifica
-        if category:
-            filtered_data = [
-                d for d in filtered_data
-                if d.dimensions.get('category') == category
-            ]
-        
-        return filtered_data
+        return self.metric_store.query(metric_type, date_range[0], date_range[1], category)
     
     def _get_benchmark_value(self, metric_type: MetricType, 
                            category: Optional[str] = None) -> Optional[float]:
@@ -9,6 +9,9 @@ from typing import Dict, List, Any, Optional
 import logging
 from datetime import datetime, timedelta
 
+from services.batch_job_service import get_batch_job_manager
+from services.campaign_tree_publisher import CampaignTreePublisher
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,15 +45,24 @@ class AutopilotPublisher:
         self,
         blueprint: Dict[str, Any],
         customer_id: str,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        atomic: bool = False,
+        validate_only: bool = False
     ) -> Dict[str, Any]:
         """
         Publica una campaña completa a Google Ads
         
+        Todo el árbol (presupuesto, campaña, ad groups, keywords y anuncios)
+        se envía como MutateOperations de GoogleAdsService con IDs temporales,
+        normalmente en un solo request.
+        
         Args:
             blueprint: CampaignBlueprint.__dict__
             customer_id: ID del cliente de Google Ads
             progress_callback: Función para reportar progreso
+            atomic: Si es True, cualquier error revierte el request completo;
+                    si es False (partial failure) se crea todo lo válido
+            validate_only: Solo validar el árbol contra la API, sin crear nada
             
         Returns:
             {
@@ -61,7 +73,9 @@ class AutopilotPublisher:
                 'ad_ids': List[str],
                 'keyword_ids': List[str],
                 'errors': List[str],
-                'warnings': List[str]
+                'warnings': List[str],
+                'resource_map': Dict (blueprint -> resource names),
+                'requests': int
             }
         """
         
@@ -73,183 +87,85 @@ class AutopilotPublisher:
             'ad_ids': [],
             'keyword_ids': [],
             'errors': [],
-            'warnings': []
+            'warnings': [],
+            'resource_map': {'campaign': None, 'ad_groups': []},
+            'requests': 0
         }
         
-        created_resources = []  # Para rollback si falla
-        
         try:
+            publisher = CampaignTreePublisher(self.client, atomic=atomic, validate_only=validate_only)
+            
             # ✅ DETERMINAR SI ES NUEVA CAMPAÑA O EXISTENTE
             is_new_campaign = 'campaign_id' not in blueprint or blueprint.get('campaign_id') is None
             
             logger.info(f"📊 Tipo de publicación: {'NUEVA CAMPAÑA' if is_new_campaign else 'CAMPAÑA EXISTENTE'}")
+            self._update_progress(progress_callback, "Preparando operaciones...", 5)
             
+            root_unit = []
             if is_new_campaign:
-                # ✅ CREAR NUEVA CAMPAÑA
-                logger.info("🆕 Creando nueva campaña...")
-                self._update_progress(progress_callback, "Creando campaña...", 10)
-                
-                campaign_result = self._create_campaign(
+                campaign_resource_name = self._build_campaign_operations(
+                    publisher=publisher,
+                    unit=root_unit,
                     customer_id=customer_id,
                     campaign_name=blueprint['campaign_name'],
                     budget_daily=blueprint['budget_daily'],
                     target_locations=blueprint['target_locations'],
                     languages=blueprint.get('languages', ['es', 'en'])
                 )
-                
-                if campaign_result['error']:
-                    result['errors'].append(f"Error creando campaña: {campaign_result['error']}")
-                    return result
-                
-                result['campaign_id'] = campaign_result['campaign_id']
-                result['campaign_resource_name'] = campaign_result['resource_name']
-                created_resources.append(('campaign', campaign_result['resource_name']))
-                
-                logger.info(f"✅ Campaña creada: {result['campaign_id']}")
-            
             else:
                 # ✅ USAR CAMPAÑA EXISTENTE
                 existing_campaign_id = blueprint['campaign_id']
                 logger.info(f"📂 Usando campaña existente: {existing_campaign_id}")
-                
-                campaign_service = self.client.get_service("CampaignService")
+                campaign_resource_name = f"customers/{customer_id}/campaigns/{existing_campaign_id}"
                 result['campaign_id'] = existing_campaign_id
-                result['campaign_resource_name'] = campaign_service.campaign_path(customer_id, existing_campaign_id)
-                
-                logger.info(f"✅ Campaign resource name: {result['campaign_resource_name']}")
+                result['campaign_resource_name'] = campaign_resource_name
             
-            # PASO 2: Crear ad groups con keywords y anuncios
-            total_groups = len(blueprint['ad_groups'])
+            units = [root_unit]
+            group_plans = []
             
             for idx, ad_group_data in enumerate(blueprint['ad_groups']):
                 group_num = idx + 1
-                progress = 10 + ((group_num / total_groups) * 80)
                 
-                self._update_progress(
-                    progress_callback,
-                    f"Creando grupo {group_num}/{total_groups}: {ad_group_data['name']}...",
-                    progress
-                )
+                # ✅ VALIDACIÓN ESPECÍFICA PARA CADA AD GROUP
+                if not ad_group_data.get('name'):
+                    result['errors'].append(f"Ad group {group_num} no tiene nombre válido")
+                    continue
                 
-                try:
-                    # ✅ VALIDACIÓN ESPECÍFICA PARA CADA AD GROUP
-                    logger.info(f"🔍 Validando ad group {group_num}: {ad_group_data['name']}")
-                    
-                    # Validar estructura del ad group
-                    if not ad_group_data.get('name'):
-                        error_msg = f"Ad group {group_num} no tiene nombre válido"
-                        logger.error(error_msg)
-                        result['errors'].append(error_msg)
-                        continue
-                    
-                    if not ad_group_data.get('keywords'):
-                        error_msg = f"Ad group '{ad_group_data['name']}' no tiene keywords"
-                        logger.error(error_msg)
-                        result['errors'].append(error_msg)
-                        continue
-                    
-                    if not ad_group_data.get('ads'):
-                        error_msg = f"Ad group '{ad_group_data['name']}' no tiene anuncios"
-                        logger.error(error_msg)
-                        result['errors'].append(error_msg)
-                        continue
-                    
-                    # ✅ PASO 2A: Crear ad group con manejo de errores específico
-                    logger.info(f"📝 Creando ad group: {ad_group_data['name']}")
-                    ad_group_result = self._create_ad_group(
-                        customer_id=customer_id,
-                        campaign_resource_name=result['campaign_resource_name'],
-                        ad_group_name=ad_group_data['name'],
-                        max_cpc_bid=ad_group_data.get('max_cpc_bid', 1.0)
-                    )
-                    
-                    if ad_group_result['error']:
-                        error_msg = f"❌ Error creando ad group '{ad_group_data['name']}': {ad_group_result['error']}"
-                        logger.error(error_msg)
-                        result['errors'].append(error_msg)
-                        continue
-                    
-                    ad_group_resource = ad_group_result['resource_name']
-                    result['ad_group_ids'].append(ad_group_result['ad_group_id'])
-                    created_resources.append(('ad_group', ad_group_resource))
-                    logger.info(f"✅ Ad group creado exitosamente: {ad_group_result['ad_group_id']}")
-                    
-                    # ✅ PASO 2B: Agregar keywords con manejo de errores específico
-                    logger.info(f"🔑 Agregando {len(ad_group_data['keywords'])} keywords al ad group")
-                    keyword_results = self._add_keywords(
-                        customer_id=customer_id,
-                        ad_group_resource=ad_group_resource,
-                        keywords=ad_group_data['keywords'],
-                        negative_keywords=ad_group_data.get('negative_keywords', [])
-                    )
-                    
-                    # Procesar resultados de keywords
-                    if keyword_results['keyword_ids']:
-                        result['keyword_ids'].extend(keyword_results['keyword_ids'])
-                        logger.info(f"✅ {len(keyword_results['keyword_ids'])} keywords agregadas exitosamente")
-                    
-                    if keyword_results['errors']:
-                        result['errors'].extend(keyword_results['errors'])
-                        logger.error(f"❌ Errores en keywords: {len(keyword_results['errors'])}")
-                    
-                    if keyword_results['warnings']:
-                        result['warnings'].extend(keyword_results['warnings'])
-                        logger.warning(f"⚠️ Advertencias en keywords: {len(keyword_results['warnings'])}")
-                    
-                    # ✅ PASO 2C: Crear anuncios con manejo de errores específico
-                    logger.info(f"📢 Creando {len(ad_group_data['ads'])} anuncios para el ad group")
-                    ads_created_count = 0
-                    
-                    for ad_idx, ad_data in enumerate(ad_group_data['ads']):
-                        logger.info(f"📝 Creando anuncio {ad_idx+1}/{len(ad_group_data['ads'])}")
-                        
-                        # Validar datos del anuncio
-                        if not ad_data.get('headlines'):
-                            error_msg = f"Anuncio {ad_idx+1} del grupo '{ad_group_data['name']}' no tiene headlines"
-                            logger.error(error_msg)
-                            result['errors'].append(error_msg)
-                            continue
-                        
-                        if not ad_data.get('descriptions'):
-                            error_msg = f"Anuncio {ad_idx+1} del grupo '{ad_group_data['name']}' no tiene descriptions"
-                            logger.error(error_msg)
-                            result['errors'].append(error_msg)
-                            continue
-                        
-                        ad_result = self._create_responsive_search_ad(
-                            customer_id=customer_id,
-                            ad_group_resource=ad_group_resource,
-                            headlines=ad_data.get('headlines', []),
-                            descriptions=ad_data.get('descriptions', []),
-                            final_url=ad_data.get('final_url', blueprint.get('business_url', 'https://example.com'))
-                        )
-                        
-                        if ad_result['error']:
-                            error_msg = f"❌ Error en anuncio {ad_idx+1} del grupo '{ad_group_data['name']}': {ad_result['error']}"
-                            logger.error(error_msg)
-                            result['errors'].append(error_msg)
-                        else:
-                            result['ad_ids'].append(ad_result['ad_id'])
-                            created_resources.append(('ad', ad_result['resource_name']))
-                            ads_created_count += 1
-                            logger.info(f"✅ Anuncio {ad_idx+1} creado exitosamente: {ad_result['ad_id']}")
-                    
-                    logger.info(f"📊 Resumen del grupo '{ad_group_data['name']}': {ads_created_count}/{len(ad_group_data['ads'])} anuncios creados")
-                    logger.info(f"✅ Grupo {group_num}/{total_groups} completado exitosamente")
+                if not ad_group_data.get('keywords'):
+                    result['errors'].append(f"Ad group '{ad_group_data['name']}' no tiene keywords")
+                    continue
                 
-                except Exception as e:
-                    error_msg = f"❌ Error crítico procesando grupo '{ad_group_data['name']}': {str(e)}"
-                    logger.error(error_msg)
-                    
-                    # ✅ TRACEBACK COMPLETO PARA ERRORES EN AD GROUP
-                    import traceback
-                    logger.error(f"Traceback completo del error en ad group:\n{traceback.format_exc()}")
-                    
-                    result['errors'].append(error_msg)
+                if not ad_group_data.get('ads'):
+                    result['errors'].append(f"Ad group '{ad_group_data['name']}' no tiene anuncios")
                     continue
+                
+                unit = []
+                plan = self._build_ad_group_operations(
+                    publisher=publisher,
+                    unit=unit,
+                    customer_id=customer_id,
+                    campaign_resource_name=campaign_resource_name,
+                    group_index=idx,
+                    ad_group_data=ad_group_data,
+                    default_final_url=blueprint.get('business_url', 'https://example.com')
+                )
+                result['errors'].extend(plan['errors'])
+                units.append(unit)
+                group_plans.append(plan)
             
-            # Verificar éxito
-            result['success'] = len(result['errors']) == 0 or len(result['ad_group_ids']) > 0
+            total_operations = sum(len(unit) for unit in units)
+            logger.info(f"📦 {total_operations} operaciones para {len(group_plans)} ad groups")
+            
+            publish_result = publisher.publish(customer_id, units, progress_callback)
+            result['requests'] = publish_result['requests']
+            
+            if validate_only:
+                # validate_only no devuelve resource names: solo hay errores que reportar
+                self._map_validation_result(result, publish_result)
+                result['success'] = len(result['errors']) == 0
+            else:
+                self._map_publish_result(result, publish_result, group_plans, is_new_campaign)
+                result['success'] = len(result['errors']) == 0 or len(result['ad_group_ids']) > 0
             
             self._update_progress(progress_callback, "✅ Publicación completada", 100)
             
@@ -259,53 +175,12 @@ class AutopilotPublisher:
                 f"Ad Groups: {len(result['ad_group_ids'])}, "
                 f"Ads: {len(result['ad_ids'])}, "
                 f"Keywords: {len(result['keyword_ids'])}, "
-                f"Errors: {len(result['errors'])}"
+                f"Errors: {len(result['errors'])}, "
+                f"Requests: {result['requests']}"
             )
             
             return result
         
-        except GoogleAdsException as ex:
-            # ✅ EXTRACCIÓN DETALLADA DE ERRORES DE GOOGLE ADS API - PUBLISH CAMPAIGN
-            error_details = []
-            error_details.append(f"Error Code: {ex.error.code().name}")
-            error_details.append(f"Error Type: {type(ex.error).__name__}")
-            error_details.append(f"Customer ID: {customer_id}")
-            error_details.append(f"Campaign Name: {blueprint.get('campaign_name', 'N/A')}")
-            error_details.append(f"Ad Groups Processed: {len(result.get('ad_group_ids', []))}")
-            
-            # Extraer errores específicos del failure
-            if hasattr(ex, 'failure') and ex.failure:
-                error_details.append(f"Request ID: {getattr(ex.failure, 'request_id', 'N/A')}")
-                
-                if hasattr(ex.failure, 'errors'):
-                    for idx, error in enumerate(ex.failure.errors):
-                        error_details.append(f"Error {idx+1}:")
-                        error_details.append(f"  - Message: {error.message}")
-                        error_details.append(f"  - Error Code: {error.error_code}")
-                        
-                        # Extraer detalles específicos del error
-                        if hasattr(error, 'location'):
-                            error_details.append(f"  - Location: {error.location}")
-                        
-                        if hasattr(error, 'details'):
-                            error_details.append(f"  - Details: {error.details}")
-            
-            error_msg = "Google Ads API Error - Campaign Publication:\n" + "\n".join(error_details)
-            
-            # ✅ LOGGING DETALLADO CON TRACEBACK
-            logger.error(error_msg)
-            import traceback
-            logger.error(f"Traceback completo:\n{traceback.format_exc()}")
-            
-            result['errors'].append(error_msg)
-            
-            # Intentar rollback si es necesario
-            if not result.get('ad_group_ids'):
-                logger.warning("🔄 Iniciando rollback de recursos creados...")
-                self._rollback_resources(customer_id, created_resources)
-            
-            return result
-        
         except Exception as e:
             error_msg = f"❌ Error crítico inesperado en publicación: {str(e)}"
             logger.error(error_msg)
@@ -317,6 +192,240 @@ class AutopilotPublisher:
             result['errors'].append(error_msg)
             return result
     
+    def _build_campaign_operations(
+        self,
+        publisher: CampaignTreePublisher,
+        unit: List[tuple],
+        customer_id: str,
+        campaign_name: str,
+        budget_daily: float,
+        target_locations: List[str],
+        languages: List[str] = None
+    ) -> str:
+        """
+        Agrega las operaciones de presupuesto y campaña (IDs temporales)
+        
+        Returns:
+            Resource name temporal de la campaña
+        """
+        budget_resource_name = publisher.temp_resource_name(customer_id, 'campaignBudgets')
+        budget_operation = publisher.new_operation()
+        budget = budget_operation.campaign_budget_operation.create
+        budget.resource_name = budget_resource_name
+        budget.name = f"Budget for {campaign_name}"
+        budget.amount_micros = int(budget_daily * 1_000_000)
+        budget.delivery_method = self.client.enums.BudgetDeliveryMethodEnum.STANDARD
+        unit.append((('budget',), budget_operation))
+        
+        campaign_resource_name = publisher.temp_resource_name(customer_id, 'campaigns')
+        campaign_operation = publisher.new_operation()
+        campaign = campaign_operation.campaign_operation.create
+        campaign.resource_name = campaign_resource_name
+        self._fill_campaign(campaign, campaign_name, budget_resource_name, target_locations, languages)
+        unit.append((('campaign',), campaign_operation))
+        
+        return campaign_resource_name
+    
+    def _fill_campaign(self, campaign, campaign_name: str, budget_resource_name: str,
+                       target_locations: List[str], languages: List[str] = None):
+        """Configura una campaña de búsqueda nueva"""
+        campaign.name = campaign_name
+        campaign.status = self.client.enums.CampaignStatusEnum.PAUSED  # Crear pausada
+        campaign.advertising_channel_type = self.client.enums.AdvertisingChannelTypeEnum.SEARCH
+        campaign.campaign_budget = budget_resource_name
+        
+        # Estrategia de puja: Maximizar clics
+        campaign.bidding_strategy_type = self.client.enums.BiddingStrategyTypeEnum.MAXIMIZE_CLICKS
+        
+        # Network settings
+        campaign.network_settings.target_google_search = True
+        campaign.network_settings.target_search_network = True
+        campaign.network_settings.target_content_network = False
+        campaign.network_settings.target_partner_search_network = False
+        
+        # Fechas
+        start_date = datetime.now()
+        end_date = start_date + timedelta(days=365)
+        
+        campaign.start_date = start_date.strftime("%Y%m%d")
+        campaign.end_date = end_date.strftime("%Y%m%d")
+        
+        # Geo targeting
+        self._set_geo_targeting(campaign, target_locations)
+        
+        # Language targeting
+        if languages:
+            self._set_language_targeting(campaign, languages)
+    
+    def _build_ad_group_operations(
+        self,
+        publisher: CampaignTreePublisher,
+        unit: List[tuple],
+        customer_id: str,
+        campaign_resource_name: str,
+        group_index: int,
+        ad_group_data: Dict[str, Any],
+        default_final_url: str
+    ) -> Dict[str, Any]:
+        """
+        Agrega un ad group con sus keywords y anuncios como una unidad
+        
+        Returns:
+            Plan del grupo: índice, nombre, keywords y anuncios enviados y
+            errores de validación local
+        """
+        plan = {
+            'index': group_index,
+            'name': ad_group_data['name'],
+            'keywords': [],
+            'negative_keywords': [],
+            'ads': [],
+            'errors': []
+        }
+        
+        ad_group_resource_name = publisher.temp_resource_name(customer_id, 'adGroups')
+        ad_group_operation = publisher.new_operation()
+        ad_group = ad_group_operation.ad_group_operation.create
+        ad_group.resource_name = ad_group_resource_name
+        
+        # ✅ FIX DUPLICATE_ADGROUP_NAME: Agregar timestamp único al nombre
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        ad_group.name = f"{ad_group_data['name']}_{timestamp}_{group_index}"
+        ad_group.campaign = campaign_resource_name
+        ad_group.status = self.client.enums.AdGroupStatusEnum.ENABLED
+        ad_group.type_ = self.client.enums.AdGroupTypeEnum.SEARCH_STANDARD
+        ad_group.cpc_bid_micros = int(ad_group_data.get('max_cpc_bid', 1.0) * 1_000_000)
+        unit.append((('ad_group', group_index), ad_group_operation))
+        
+        # Keywords
+        valid_keywords, valid_negative = self._validate_keywords(
+            ad_group_data['keywords'], ad_group_data.get('negative_keywords', [])
+        )
+        if not valid_keywords:
+            plan['errors'].append("No hay keywords válidas para agregar")
+        
+        for kw_idx, kw in enumerate(valid_keywords):
+            operation = publisher.new_operation()
+            criterion = operation.ad_group_criterion_operation.create
+            criterion.ad_group = ad_group_resource_name
+            criterion.status = self.client.enums.AdGroupCriterionStatusEnum.ENABLED
+            criterion.keyword.text = kw
+            criterion.keyword.match_type = self.client.enums.KeywordMatchTypeEnum.BROAD
+            unit.append((('keyword', group_index, kw_idx), operation))
+            plan['keywords'].append(kw)
+        
+        for neg_idx, neg_kw in enumerate(valid_negative):
+            operation = publisher.new_operation()
+            criterion = operation.ad_group_criterion_operation.create
+            criterion.ad_group = ad_group_resource_name
+            criterion.negative = True
+            criterion.keyword.text = neg_kw
+            criterion.keyword.match_type = self.client.enums.KeywordMatchTypeEnum.BROAD
+            unit.append((('negative_keyword', group_index, neg_idx), operation))
+            plan['negative_keywords'].append(neg_kw)
+        
+        # Anuncios
+        for ad_idx, ad_data in enumerate(ad_group_data['ads']):
+            if not ad_data.get('headlines'):
+                plan['errors'].append(f"Anuncio {ad_idx+1} del grupo '{ad_group_data['name']}' no tiene headlines")
+                continue
+            
+            if not ad_data.get('descriptions'):
+                plan['errors'].append(f"Anuncio {ad_idx+1} del grupo '{ad_group_data['name']}' no tiene descriptions")
+                continue
+            
+            operation = publisher.new_operation()
+            ad_group_ad = operation.ad_group_ad_operation.create
+            ad_group_ad.ad_group = ad_group_resource_name
+            error = self._fill_responsive_search_ad(
+                ad_group_ad,
+                headlines=ad_data.get('headlines', []),
+                descriptions=ad_data.get('descriptions', []),
+                final_url=ad_data.get('final_url', default_final_url)
+            )
+            if error:
+                plan['errors'].append(f"❌ Error en anuncio {ad_idx+1} del grupo '{ad_group_data['name']}': {error}")
+                continue
+            
+            unit.append((('ad', group_index, ad_idx), operation))
+            plan['ads'].append(ad_idx)
+        
+        return plan
+    
+    @staticmethod
+    def _map_validation_result(result: Dict[str, Any], publish_result: Dict[str, Any]):
+        """Traduce los errores de un mutate validate_only al resultado del blueprint"""
+        result['errors'].extend(publish_result['request_errors'])
+        for label, error in publish_result['errors'].items():
+            result['errors'].append(f"Error de validación en {' '.join(str(part) for part in label)}: {error}")
+    
+    def _map_publish_result(
+        self,
+        result: Dict[str, Any],
+        publish_result: Dict[str, Any],
+        group_plans: List[Dict[str, Any]],
+        is_new_campaign: bool
+    ):
+        """Traduce el resultado del mutate al formato de resultado del blueprint"""
+        resource_names = publish_result['resource_names']
+        errors = publish_result['errors']
+        
+        result['errors'].extend(publish_result['request_errors'])
+        
+        if is_new_campaign:
+            campaign_resource_name = resource_names.get(('campaign',))
+            if not campaign_resource_name:
+                reason = errors.get(('campaign',)) or errors.get(('budget',)) or 'sin respuesta'
+                result['errors'].append(f"Error creando campaña: {reason}")
+                return
+            result['campaign_resource_name'] = campaign_resource_name
+            result['campaign_id'] = campaign_resource_name.split('/')[-1]
+            logger.info(f"✅ Campaña creada: {result['campaign_id']}")
+        
+        result['resource_map']['campaign'] = result['campaign_resource_name']
+        
+        for plan in group_plans:
+            idx = plan['index']
+            group_map = {
+                'blueprint_index': idx,
+                'name': plan['name'],
+                'resource_name': resource_names.get(('ad_group', idx)),
+                'keywords': {},
+                'negative_keywords': {},
+                'ads': {}
+            }
+            result['resource_map']['ad_groups'].append(group_map)
+            
+            if not group_map['resource_name']:
+                reason = errors.get(('ad_group', idx), 'sin respuesta')
+                result['errors'].append(f"❌ Error creando ad group '{plan['name']}': {reason}")
+                continue
+            
+            result['ad_group_ids'].append(group_map['resource_name'].split('/')[-1])
+            
+            for kind, texts in (('keyword', plan['keywords']), ('negative_keyword', plan['negative_keywords'])):
+                for kw_idx, kw in enumerate(texts):
+                    resource_name = resource_names.get((kind, idx, kw_idx))
+                    if resource_name:
+                        result['keyword_ids'].append(resource_name.split('/')[-1])
+                        group_map[f"{kind}s"][kw] = resource_name
+                    else:
+                        label = 'negative keyword' if kind == 'negative_keyword' else 'keyword'
+                        result['warnings'].append(
+                            f"Error en {label} '{kw}': {errors.get((kind, idx, kw_idx), 'sin respuesta')}"
+                        )
+            
+            for ad_idx in plan['ads']:
+                resource_name = resource_names.get(('ad', idx, ad_idx))
+                if resource_name:
+                    result['ad_ids'].append(resource_name.split('~')[-1])
+                    group_map['ads'][ad_idx] = resource_name
+                else:
+                    result['errors'].append(
+                        f"❌ Error en anuncio {ad_idx+1} del grupo '{plan['name']}': "
+                        f"{errors.get(('ad', idx, ad_idx), 'sin respuesta')}"
+                    )
+    
     # ========================================================================
     # CREACIÓN DE CAMPAÑA
     # ========================================================================
@@ -365,33 +474,7 @@ class AutopilotPublisher:
             campaign_operation = self.client.get_type("CampaignOperation")
             campaign = campaign_operation.create
             
-            campaign.name = campaign_name
-            campaign.status = self.client.enums.CampaignStatusEnum.PAUSED  # Crear pausada
-            campaign.advertising_channel_type = self.client.enums.AdvertisingChannelTypeEnum.SEARCH
-            campaign.campaign_budget = budget_resource_name
-            
-            # Estrategia de puja: Maximizar clics
-            campaign.bidding_strategy_type = self.client.enums.BiddingStrategyTypeEnum.MAXIMIZE_CLICKS
-            
-            # Network settings
-            campaign.network_settings.target_google_search = True
-            campaign.network_settings.target_search_network = True
-            campaign.network_settings.target_content_network = False
-            campaign.network_settings.target_partner_search_network = False
-            
-            # Fechas
-            start_date = datetime.now()
-            end_date = start_date + timedelta(days=365)
-            
-            campaign.start_date = start_date.strftime("%Y%m%d")
-            campaign.end_date = end_date.strftime("%Y%m%d")
-            
-            # Geo targeting
-            self._set_geo_targeting(campaign, target_locations)
-            
-            # Language targeting
-            if languages:
-                self._set_language_targeting(campaign, languages)
+            self._fill_campaign(campaign, campaign_name, budget_resource_name, target_locations, languages)
             
             # Crear campaña
             campaign_response = campaign_service.mutate_campaigns(
@@ -562,16 +645,61 @@ class AutopilotPublisher:
     # KEYWORDS - FIX PARTIAL_FAILURE
     # ========================================================================
     
+    def _validate_keywords(
+        self,
+        keywords: List[str],
+        negative_keywords: List[str] = None
+    ) -> tuple:
+        """
+        Valida y limpia keywords positivas (máx. 50) y negativas (máx. 25)
+        
+        Returns:
+            (valid_keywords, valid_negative)
+        """
+        valid_keywords = []
+        for kw in keywords[:50]:
+            if not kw or not isinstance(kw, str):
+                continue
+            
+            kw_clean = kw.strip()
+            
+            if len(kw_clean) < 3 or len(kw_clean) > 80:
+                logger.warning(f"⚠️ Keyword inválida por longitud: '{kw_clean}'")
+                continue
+            
+            valid_keywords.append(kw_clean)
+            logger.info(f"   ✅ Keyword válida: '{kw_clean}'")
+        
+        # Validar negative keywords
+        valid_negative = []
+        if negative_keywords:
+            for neg_kw in negative_keywords[:25]:
+                if not neg_kw or not isinstance(neg_kw, str):
+                    continue
+                
+                neg_clean = neg_kw.strip()
+                
+                if len(neg_clean) < 3 or len(neg_clean) > 80:
+                    continue
+                
+                valid_negative.append(neg_clean)
+        
+        return valid_keywords, valid_negative
+    
     def _add_keywords(
         self,
         customer_id: str,
         ad_group_resource: str,
         keywords: List[str],
-        negative_keywords: List[str] = None
+        negative_keywords: List[str] = None,
+        use_batch_job: bool = False
     ) -> Dict[str, Any]:
         """
         Agrega keywords CON MANEJO DE ERRORES INDIVIDUALES
         Si una keyword falla, continúa con las demás
+        
+        Con use_batch_job las keywords se envían como un batch job en segundo
+        plano: se devuelve 'batch_job_id' y los IDs aparecen en el log de acciones
         """
         
         result = {
@@ -586,33 +714,7 @@ class AutopilotPublisher:
             logger.info(f"   - Negativas recibidas: {negative_keywords}")
             
             # ✅ VALIDAR Y LIMPIAR KEYWORDS
-            valid_keywords = []
-            for kw in keywords[:50]:
-                if not kw or not isinstance(kw, str):
-                    continue
-                
-                kw_clean = kw.strip()
-                
-                if len(kw_clean) < 3 or len(kw_clean) > 80:
-                    logger.warning(f"⚠️ Keyword inválida por longitud: '{kw_clean}'")
-                    continue
-                
-                valid_keywords.append(kw_clean)
-                logger.info(f"   ✅ Keyword válida: '{kw_clean}'")
-            
-            # Validar negative keywords
-            valid_negative = []
-            if negative_keywords:
-                for neg_kw in negative_keywords[:25]:
-                    if not neg_kw or not isinstance(neg_kw, str):
-                        continue
-                    
-                    neg_clean = neg_kw.strip()
-                    
-                    if len(neg_clean) < 3 or len(neg_clean) > 80:
-                        continue
-                    
-                    valid_negative.append(neg_clean)
+            valid_keywords, valid_negative = self._validate_keywords(keywords, negative_keywords)
             
             logger.info(f"✅ Keywords válidas finales:")
             logger.info(f"   - Positivas: {len(valid_keywords)}")
@@ -624,6 +726,11 @@ class AutopilotPublisher:
                 result['errors'].append(error_msg)
                 return result
             
+            if use_batch_job:
+                return self._add_keywords_batch_job(
+                    customer_id, ad_group_resource, valid_keywords, valid_negative, result
+                )
+            
             ad_group_criterion_service = self.client.get_service("AdGroupCriterionService")
             
             # ✅ ESTRATEGIA: AGREGAR KEYWORDS UNA POR UNA
@@ -713,6 +820,42 @@ class AutopilotPublisher:
         
         return result
     
+    def _add_keywords_batch_job(
+        self,
+        customer_id: str,
+        ad_group_resource: str,
+        valid_keywords: List[str],
+        valid_negative: List[str],
+        result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Envía las keywords ya validadas como un batch job en segundo plano"""
+        operations = []
+        for kw in valid_keywords:
+            operation = self.client.get_type("MutateOperation")
+            criterion = operation.ad_group_criterion_operation.create
+            criterion.ad_group = ad_group_resource
+            criterion.status = self.client.enums.AdGroupCriterionStatusEnum.ENABLED
+            criterion.keyword.text = kw
+            criterion.keyword.match_type = self.client.enums.KeywordMatchTypeEnum.BROAD
+            operations.append((['keyword', ad_group_resource, kw], operation))
+        
+        for neg_kw in valid_negative:
+            operation = self.client.get_type("MutateOperation")
+            criterion = operation.ad_group_criterion_operation.create
+            criterion.ad_group = ad_group_resource
+            criterion.negative = True
+            criterion.keyword.text = neg_kw
+            criterion.keyword.match_type = self.client.enums.KeywordMatchTypeEnum.BROAD
+            operations.append((['negative_keyword', ad_group_resource, neg_kw], operation))
+        
+        job = get_batch_job_manager().submit(
+            self.client, customer_id, operations,
+            description=f"Keywords para {ad_group_resource}"
+        )
+        result['batch_job_id'] = job.job_id
+        logger.info(f"📦 {len(operations)} keywords enviadas en el batch job {job.job_id}")
+        return result
+    
     # ========================================================================
     # RESPONSIVE SEARCH ADS
     # ========================================================================
@@ -721,6 +864,66 @@ class AutopilotPublisher:
     # RESPONSIVE SEARCH ADS - FIX URL
     # =======================================================================
     
+    def _fill_responsive_search_ad(
+        self,
+        ad_group_ad,
+        headlines: List[str],
+        descriptions: List[str],
+        final_url: str
+    ) -> Optional[str]:
+        """
+        Completa un AdGroupAd con un Responsive Search Ad
+        
+        Returns:
+            Mensaje de error si no cumple los mínimos, None si es válido
+        """
+        ad_group_ad.status = self.client.enums.AdGroupAdStatusEnum.ENABLED
+        
+        # ✅ FIX: Usar final_url del parámetro (que viene de ad_data)
+        ad_group_ad.ad.final_urls.append(final_url)
+        
+        # Responsive Search Ad
+        rsa = ad_group_ad.ad.responsive_search_ad
+        
+        # Headlines (mínimo 3, máximo 15)
+        for headline_text in headlines[:15]:
+            headline = self.client.get_type("AdTextAsset")
+            
+            # ✅ IMPORTANTE: Google Ads acepta {LOCATION(City)} tal cual
+            # NO necesitas modificar el texto, Google lo procesa automáticamente
+            if '{LOCATION(' in headline_text:
+                # Para títulos con inserción, NO limpiar los códigos {LOCATION()}
+                clean_headline = headline_text
+                logger.info(f"   ✅ Título con inserción agregado: {headline_text}")
+            else:
+                # ✅ LIMPIAR SÍMBOLOS PROHIBIDOS solo en títulos normales
+                clean_headline = self._clean_prohibited_symbols(headline_text)
+            
+            headline.text = clean_headline[:30]  # Límite de 30 caracteres
+            
+            # Si tiene inserción, NO fijar posición (dejar que rote)
+            if '{LOCATION(' not in headline_text:
+                headline.pinned_field = self.client.enums.ServedAssetFieldTypeEnum.UNSPECIFIED
+            
+            rsa.headlines.append(headline)
+        
+        # Descriptions (mínimo 2, máximo 4)
+        for description_text in descriptions[:4]:
+            description = self.client.get_type("AdTextAsset")
+            # ✅ LIMPIAR SÍMBOLOS PROHIBIDOS
+            clean_description = self._clean_prohibited_symbols(description_text)
+            description.text = clean_description[:90]  # Límite de 90 caracteres
+            rsa.descriptions.append(description)
+        
+        # Validar mínimos
+        if len(rsa.headlines) < 3:
+            return f"Se necesitan al menos 3 headlines (tienes {len(rsa.headlines)})"
+        
+        if len(rsa.descriptions) < 2:
+            return f"Se necesitan al menos 2 descriptions (tienes {len(rsa.descriptions)})"
+        
+        return None
+    
     def _create_responsive_search_ad(
     self,
     customer_id: str,
@@ -761,58 +964,9 @@ class AutopilotPublisher:
             ad_group_ad = operation.create
             
             ad_group_ad.ad_group = ad_group_resource
-            ad_group_ad.status = self.client.enums.AdGroupAdStatusEnum.ENABLED
-            
-            # ✅ FIX: Usar final_url del parámetro (que viene de ad_data)
-            ad_group_ad.ad.final_urls.append(final_url)
-            
-            # Responsive Search Ad
-            rsa = ad_group_ad.ad.responsive_search_ad
-            
-            # Headlines (mínimo 3, máximo 15)
-            for headline_text in headlines[:15]:
-                headline = self.client.get_type("AdTextAsset")
-                
-                # ✅ IMPORTANTE: Google Ads acepta {LOCATION(City)} tal cual
-                # NO necesitas modificar el texto, Google lo procesa automáticamente
-                if '{LOCATION(' in headline_text:
-                    # Para títulos con inserción, NO limpiar los códigos {LOCATION()}
-                    clean_headline = headline_text
-                    logger.info(f"   ✅ Título con inserción agregado: {headline_text}")
-                else:
-                    # ✅ LIMPIAR SÍMBOLOS PROHIBIDOS solo en títulos normales
-                    clean_headline = self._clean_prohibited_symbols(headline_text)
-                
-                headline.text = clean_headline[:30]  # Límite de 30 caracteres
-                
-                # Si tiene inserción, NO fijar posición (dejar que rote)
-                if '{LOCATION(' not in headline_text:
-                    headline.pinned_field = self.client.enums.ServedAssetFieldTypeEnum.UNSPECIFIED
-                
-                rsa.headlines.append(headline)
-            
-            # Descriptions (mínimo 2, máximo 4)
-            for description_text in descriptions[:4]:
-                description = self.client.get_type("AdTextAsset")
-                # ✅ LIMPIAR SÍMBOLOS PROHIBIDOS
-                clean_description = self._clean_prohibited_symbols(description_text)
-                description.text = clean_description[:90]  # Límite de 90 caracteres
-                rsa.descriptions.append(description)
-            
-            # Validar mínimos
-            if len(rsa.headlines) < 3:
-                return {
-                    'ad_id': None,
-                    'resource_name': None,
-                    'error': f"Se necesitan al menos 3 headlines (tienes {len(rsa.headlines)})"
-                }
-            
-            if len(rsa.descriptions) < 2:
-                return {
-                    'ad_id': None,
-                    'resource_name': None,
-                    'error': f"Se necesitan al menos 2 descriptions (tienes {len(rsa.descriptions)})"
-                }
+            error = self._fill_responsive_search_ad(ad_group_ad, headlines, descriptions, final_url)
+            if error:
+                return {'ad_id': None, 'resource_name': None, 'error': error}
             
             # Crear anuncio
             response = ad_group_ad_service.mutate_ad_group_ads(
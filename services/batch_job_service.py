@@ -0,0 +1,579 @@
+"""
+Batch Job Service - Mutaciones masivas asíncronas con BatchJobService
+Envía decenas de miles de operaciones como un batch job de Google Ads,
+sondea su estado en segundo plano y escribe cada resultado en el log de acciones
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.rpc import status_pb2
+
+from services.campaign_tree_publisher import _response_resource_name, format_google_ads_error
+from utils.logger import get_logger
+from utils.query_partition_cache import get_query_partition_cache
+
+logger = get_logger(__name__)
+
+# A partir de este número de operaciones conviene un batch job en vez de mutate
+BATCH_JOB_THRESHOLD = 5000
+
+# (etiqueta, MutateOperation); la etiqueta identifica la operación en el log
+LabeledOperation = Tuple[Any, Any]
+
+
+@dataclass
+class BatchMutationJob:
+    """Estado de un batch job enviado desde la aplicación"""
+    job_id: str
+    customer_id: str
+    description: str
+    total_operations: int
+    status: str = 'pending'  # pending, submitting, running, fetching, done, failed
+    resource_name: Optional[str] = None
+    succeeded: int = 0
+    failed: int = 0
+    errors: List[str] = field(default_factory=list)
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finished_at: Optional[str] = None
+    log_path: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ============================================================================
+# LOG DE ACCIONES
+# ============================================================================
+
+class BatchActionLog:
+    """
+    Log de acciones de los batch jobs (un archivo JSONL por job)
+
+    Los resultados se agregan por páginas mientras se leen de la API, así la
+    UI puede mostrar el avance con read(job_id, offset) sin esperar al final.
+    """
+
+    def __init__(self, log_dir: str = "data/batch_jobs"):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path_for(self, job_id: str) -> Path:
+        return self.log_dir / f"{job_id}.jsonl"
+
+    def append(self, job_id: str, records: List[Dict[str, Any]]) -> None:
+        """Agrega registros al log del job"""
+        if not records:
+            return
+        lines = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records)
+        with self._lock:
+            with open(self.path_for(job_id), 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+    def read(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Lee registros del log a partir de offset"""
+        path = self.path_for(job_id)
+        if not path.exists():
+            return []
+        records = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for idx, line in enumerate(f):
+                if idx < offset:
+                    continue
+                if limit is not None and len(records) >= limit:
+                    break
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+    def reset(self, job_id: str) -> None:
+        """Borra los registros del job (antes de volver a leer sus resultados)"""
+        with self._lock:
+            self.path_for(job_id).unlink(missing_ok=True)
+
+    def save_labels(self, job_id: str, labels: List[Any]) -> None:
+        """Guarda las etiquetas de las operaciones para reanudar el job"""
+        path = self.log_dir / f"{job_id}.labels.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(labels, f, ensure_ascii=False, default=str)
+
+    def load_labels(self, job_id: str) -> List[Any]:
+        """Etiquetas guardadas del job (vacío si no hay)"""
+        path = self.log_dir / f"{job_id}.labels.json"
+        if not path.exists():
+            return []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron leer las etiquetas del batch job {job_id}: {e}")
+            return []
+
+    def save_jobs(self, jobs: List[BatchMutationJob]) -> None:
+        """Guarda el índice de jobs de forma atómica"""
+        path = self.log_dir / "jobs.json"
+        tmp_path = path.with_suffix('.json.tmp')
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([job.to_dict() for job in jobs], f, indent=2, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+
+    def load_jobs(self) -> List[BatchMutationJob]:
+        """Carga el índice de jobs guardado"""
+        path = self.log_dir / "jobs.json"
+        if not path.exists():
+            return []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return [BatchMutationJob(**data) for data in json.load(f)]
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer el índice de batch jobs: {e}")
+            return []
+
+
+# ============================================================================
+# GESTOR DE BATCH JOBS
+# ============================================================================
+
+class BatchJobManager:
+    """
+    Ejecuta batch jobs de Google Ads en segundo plano
+
+    - submit() devuelve enseguida; crear el job, agregar operaciones,
+      ejecutarlo y sondearlo ocurre en un hilo del gestor
+    - El sondeo usa backoff exponencial entre poll_interval y max_poll_interval
+    - Los resultados se leen por páginas y cada página se escribe en el log
+      de acciones con su etiqueta, resource name o error
+    - batch_job_service permite inyectar un servicio local (LocalBatchJobService)
+    - Los jobs que otro proceso dejó en ejecución se retoman con resume():
+      se sondea el job por su resource_name y se leen sus resultados
+    """
+
+    def __init__(self,
+                 max_concurrent_jobs: int = 2,
+                 poll_interval: float = 5.0,
+                 max_poll_interval: float = 60.0,
+                 job_timeout: float = 6 * 3600,
+                 operations_per_request: int = 5000,
+                 results_page_size: int = 1000,
+                 action_log: Optional[BatchActionLog] = None):
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.job_timeout = job_timeout
+        self.operations_per_request = max(1, operations_per_request)
+        self.results_page_size = max(1, results_page_size)
+        self.action_log = action_log or BatchActionLog()
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrent_jobs),
+                                            thread_name_prefix="batch-job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, BatchMutationJob] = {job.job_id: job for job in self.action_log.load_jobs()}
+        self._futures: Dict[str, Future] = {}
+
+        # Jobs que otro proceso dejó a medias: si ya se ejecutaron siguen corriendo
+        # en la API y se retoman con resume(); si no, nunca se lanzaron
+        for job in self._jobs.values():
+            if job.finished or self._resumable(job):
+                continue
+            job.status = 'failed'
+            job.errors.append("Interrumpido: el proceso terminó antes de ejecutar el job")
+            job.finished_at = datetime.now().isoformat()
+
+    def submit(self,
+               client,
+               customer_id: str,
+               operations: List[LabeledOperation],
+               description: str = "",
+               batch_job_service=None,
+               on_complete: Optional[Callable[[BatchMutationJob], None]] = None) -> BatchMutationJob:
+        """
+        Envía operaciones como un batch job en segundo plano
+
+        Args:
+            client: GoogleAdsClient
+            customer_id: ID del cliente
+            operations: [(etiqueta, MutateOperation), ...]
+            description: Descripción para el log
+            batch_job_service: Servicio a usar (por defecto BatchJobService del cliente)
+            on_complete: Callback con el job al terminar (éxito o fallo)
+
+        Returns:
+            Job en estado 'pending'
+        """
+        job = BatchMutationJob(
+            job_id=uuid.uuid4().hex[:12],
+            customer_id=customer_id,
+            description=description,
+            total_operations=len(operations)
+        )
+        job.log_path = str(self.action_log.path_for(job.job_id))
+        self.action_log.save_labels(job.job_id, [label for label, _ in operations])
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._futures[job.job_id] = self._executor.submit(
+                self._run, job, client, batch_job_service, operations, on_complete
+            )
+        self._save()
+
+        logger.info(f"📦 Batch job {job.job_id} en cola: {len(operations)} operaciones ({description})")
+        return job
+
+    def resume(self,
+               client,
+               batch_job_service=None,
+               on_complete: Optional[Callable[[BatchMutationJob], None]] = None) -> List[BatchMutationJob]:
+        """
+        Retoma el sondeo de los jobs que quedaron en ejecución en otro proceso
+
+        Args:
+            client: GoogleAdsClient
+            batch_job_service: Servicio a usar (por defecto BatchJobService del cliente)
+            on_complete: Callback con cada job al terminar
+
+        Returns:
+            Jobs retomados
+        """
+        resumed = []
+        with self._lock:
+            for job in self._jobs.values():
+                if job.finished or not self._resumable(job) or job.job_id in self._futures:
+                    continue
+                self._futures[job.job_id] = self._executor.submit(
+                    self._resume_run, job, client, batch_job_service, on_complete
+                )
+                resumed.append(job)
+
+        for job in resumed:
+            logger.info(f"📦 Retomando batch job {job.job_id} ({job.resource_name})")
+        return resumed
+
+    def get_job(self, job_id: str) -> Optional[BatchMutationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, customer_id: Optional[str] = None) -> List[BatchMutationJob]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if customer_id:
+            jobs = [job for job in jobs if job.customer_id == customer_id]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[BatchMutationJob]:
+        """Espera a que termine un job de este proceso"""
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout=timeout)
+        return self.get_job(job_id)
+
+    def read_results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Resultados ya escritos en el log de acciones"""
+        return self.action_log.read(job_id, offset, limit)
+
+    # ========================================================================
+    # EJECUCIÓN
+    # ========================================================================
+
+    def _run(self, job: BatchMutationJob, client, service, operations: List[LabeledOperation],
+             on_complete: Optional[Callable[[BatchMutationJob], None]]) -> None:
+        labels = [label for label, _ in operations]
+
+        def execute(service):
+            self._set_status(job, 'submitting')
+            job.resource_name = self._create_job(client, service, job.customer_id)
+            self._add_operations(service, job.resource_name, [operation for _, operation in operations])
+
+            self._set_status(job, 'running')
+            return service.run_batch_job(resource_name=job.resource_name)
+
+        self._execute(job, client, service, labels, execute, on_complete)
+
+    def _resume_run(self, job: BatchMutationJob, client, service,
+                    on_complete: Optional[Callable[[BatchMutationJob], None]]) -> None:
+        labels = self.action_log.load_labels(job.job_id)
+
+        def execute(service):
+            # Los resultados leídos a medias se vuelven a leer completos
+            self.action_log.reset(job.job_id)
+            job.succeeded = job.failed = 0
+            self._set_status(job, 'running')
+            return self._resumed_operation(client, job)
+
+        self._execute(job, client, service, labels, execute, on_complete)
+
+    def _execute(self, job: BatchMutationJob, client, service, labels: List[Any],
+                 execute: Callable[[Any], Any],
+                 on_complete: Optional[Callable[[BatchMutationJob], None]]) -> None:
+        """Lanza o retoma el job con execute(service), lo sondea y lee los resultados"""
+        try:
+            service = service or client.get_service("BatchJobService")
+
+            long_running_operation = execute(service)
+            self._poll(job, long_running_operation)
+
+            self._set_status(job, 'fetching')
+            self._fetch_results(job, service, labels)
+
+            job.status = 'done'
+            logger.info(
+                f"✅ Batch job {job.job_id} terminado: {job.succeeded} exitosas, {job.failed} fallidas"
+            )
+        except Exception as e:
+            message = format_google_ads_error(e) if hasattr(e, 'failure') else str(e)
+            job.status = 'failed'
+            job.errors.append(message)
+            logger.error(f"❌ Batch job {job.job_id} falló: {message}")
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            self._save()
+            # Aunque el job falle pudo haber aplicado operaciones
+            get_query_partition_cache().invalidate(job.customer_id)
+            if on_complete:
+                try:
+                    on_complete(job)
+                except Exception as e:
+                    logger.warning(f"⚠️ Error en callback del batch job {job.job_id}: {e}")
+
+    @staticmethod
+    def _resumable(job: BatchMutationJob) -> bool:
+        """El job ya se ejecutó en la API y se puede seguir sondeando"""
+        return bool(job.resource_name) and job.status in ('running', 'fetching')
+
+    @staticmethod
+    def _resumed_operation(client, job: BatchMutationJob) -> '_BatchJobStatusOperation':
+        """Equivalente a la operación de run_batch_job para un job ya lanzado"""
+        return _BatchJobStatusOperation(client, job.customer_id, job.resource_name)
+
+    @staticmethod
+    def _create_job(client, service, customer_id: str) -> str:
+        operation = client.get_type("BatchJobOperation")
+        client.copy_from(operation.create, client.get_type("BatchJob"))
+        response = service.mutate_batch_job(customer_id=customer_id, operation=operation)
+        return response.result.resource_name
+
+    def _add_operations(self, service, resource_name: str, operations: List[Any]) -> None:
+        """Agrega las operaciones por tandas encadenando el sequence_token"""
+        sequence_token = None
+        for start in range(0, len(operations), self.operations_per_request):
+            request = {
+                'resource_name': resource_name,
+                'mutate_operations': operations[start:start + self.operations_per_request]
+            }
+            if sequence_token:
+                request['sequence_token'] = sequence_token
+            response = service.add_batch_job_operations(request=request)
+            sequence_token = response.next_sequence_token
+
+    def _poll(self, job: BatchMutationJob, long_running_operation) -> None:
+        """Sondea el job con backoff exponencial hasta que termine o expire"""
+        started = time.monotonic()
+        interval = self.poll_interval
+        while not long_running_operation.done():
+            if time.monotonic() - started > self.job_timeout:
+                raise TimeoutError(f"El batch job no terminó en {self.job_timeout:.0f}s")
+            time.sleep(interval)
+            interval = min(interval * 2, self.max_poll_interval)
+
+    def _fetch_results(self, job: BatchMutationJob, service, labels: List[Any]) -> None:
+        """Lee los resultados por páginas y los escribe en el log de acciones"""
+        response = service.list_batch_job_results(
+            request={'resource_name': job.resource_name, 'page_size': self.results_page_size}
+        )
+        page: List[Dict[str, Any]] = []
+        for result in response:
+            index = result.operation_index
+            status = result.status
+            record = {
+                'timestamp': datetime.now().isoformat(),
+                'job_id': job.job_id,
+                'customer_id': job.customer_id,
+                'operation_index': index,
+                'label': labels[index] if 0 <= index < len(labels) else None,
+                'resource_name': None,
+                'error': None
+            }
+            if status is not None and status.code:
+                record['status'] = 'failed'
+                record['error'] = status.message
+                job.failed += 1
+            else:
+                record['status'] = 'success'
+                record['resource_name'] = _response_resource_name(result.mutate_operation_response)
+                job.succeeded += 1
+            page.append(record)
+
+            if len(page) >= self.results_page_size:
+                self.action_log.append(job.job_id, page)
+                page = []
+        self.action_log.append(job.job_id, page)
+
+    def _set_status(self, job: BatchMutationJob, status: str) -> None:
+        job.status = status
+        self._save()
+
+    def _save(self) -> None:
+        try:
+            self.action_log.save_jobs(self.list_jobs())
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar el índice de batch jobs: {e}")
+
+
+class _BatchJobStatusOperation:
+    """Sondea el estado de un batch job con GoogleAdsService (sin la operación original)"""
+
+    def __init__(self, client, customer_id: str, resource_name: str):
+        self._client = client
+        self._customer_id = customer_id
+        self._resource_name = resource_name
+
+    def done(self) -> bool:
+        ga_service = self._client.get_service("GoogleAdsService")
+        query = (f"SELECT batch_job.status FROM batch_job "
+                 f"WHERE batch_job.resource_name = '{self._resource_name}'")
+        for row in ga_service.search(customer_id=self._customer_id, query=query):
+            return row.batch_job.status.name == 'DONE'
+        raise RuntimeError(f"Batch job no encontrado: {self._resource_name}")
+
+
+def wrap_operation(client, operation_field: str, operation) -> Any:
+    """
+    Envuelve una operación de servicio en una MutateOperation
+
+    Args:
+        operation_field: Campo de MutateOperation, p. ej. 'ad_group_criterion_operation'
+        operation: Operación concreta (AdGroupCriterionOperation, ...)
+    """
+    mutate_operation = client.get_type("MutateOperation")
+    client.copy_from(getattr(mutate_operation, operation_field), operation)
+    return mutate_operation
+
+
+# Instancia global
+_batch_job_manager: Optional[BatchJobManager] = None
+_batch_job_manager_lock = threading.Lock()
+
+
+def get_batch_job_manager() -> BatchJobManager:
+    """Obtiene el gestor de batch jobs del proceso"""
+    global _batch_job_manager
+    if _batch_job_manager is None:
+        with _batch_job_manager_lock:
+            if _batch_job_manager is None:
+                _batch_job_manager = BatchJobManager()
+    return _batch_job_manager
+
+
+# ============================================================================
+# SERVICIO LOCAL (SIN API)
+# ============================================================================
+
+# Colección del resource name que devuelve cada tipo de operación al crear
+_CREATE_COLLECTIONS = {
+    'campaign_budget_operation': 'campaignBudgets',
+    'campaign_operation': 'campaigns',
+    'campaign_criterion_operation': 'campaignCriteria',
+    'ad_group_operation': 'adGroups',
+    'ad_group_criterion_operation': 'adGroupCriteria',
+    'ad_group_ad_operation': 'adGroupAds',
+}
+
+
+class LocalBatchJobService:
+    """
+    Sustituto local de BatchJobService para desarrollo y pruebas
+
+    Implementa mutate_batch_job, add_batch_job_operations, run_batch_job y
+    list_batch_job_results sin llamar a la API. Cada operación se "aplica"
+    con fail_predicate (mensaje de error o None) y devuelve un resource name.
+    run_duration simula el tiempo que tarda el job en ejecutarse.
+    """
+
+    def __init__(self, client, run_duration: float = 0.0,
+                 fail_predicate: Optional[Callable[[Any], Optional[str]]] = None):
+        self.client = client
+        self.run_duration = run_duration
+        self.fail_predicate = fail_predicate
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._next_id = 1
+
+    def mutate_batch_job(self, customer_id: str, operation) -> Any:
+        with self._lock:
+            resource_name = f"customers/{customer_id}/batchJobs/{self._next_id}"
+            self._next_id += 1
+            self._jobs[resource_name] = {'customer_id': customer_id, 'operations': [], 'finishes_at': None}
+        response = self.client.get_type("MutateBatchJobResponse")
+        response.result.resource_name = resource_name
+        return response
+
+    def add_batch_job_operations(self, request: Dict[str, Any]) -> Any:
+        job = self._jobs[request['resource_name']]
+        expected_token = str(len(job['operations'])) if job['operations'] else None
+        if request.get('sequence_token') != expected_token:
+            raise ValueError(f"sequence_token inválido: {request.get('sequence_token')}")
+        job['operations'].extend(request['mutate_operations'])
+        response = self.client.get_type("AddBatchJobOperationsResponse")
+        response.total_operations = len(job['operations'])
+        response.next_sequence_token = str(len(job['operations']))
+        return response
+
+    def run_batch_job(self, resource_name: str) -> Any:
+        job = self._jobs[resource_name]
+        job['finishes_at'] = time.monotonic() + self.run_duration
+        return _LocalOperation(job)
+
+    def list_batch_job_results(self, request: Dict[str, Any]):
+        job = self._jobs[request['resource_name']]
+        if job['finishes_at'] is None or time.monotonic() < job['finishes_at']:
+            raise RuntimeError("El batch job todavía no terminó")
+        for index, operation in enumerate(job['operations']):
+            yield self._apply(job['customer_id'], index, operation)
+
+    def _apply(self, customer_id: str, index: int, operation) -> Any:
+        result = self.client.get_type("BatchJobResult")
+        result.operation_index = index
+
+        error = self.fail_predicate(operation) if self.fail_predicate else None
+        if error:
+            result.status = status_pb2.Status(code=3, message=error)
+            return result
+
+        which = type(operation).pb(operation).WhichOneof('operation')
+        sub_operation = getattr(operation, which)
+        sub_which = type(sub_operation).pb(sub_operation).WhichOneof('operation')
+        if sub_which == 'create':
+            collection = _CREATE_COLLECTIONS.get(which, which.replace('_operation', 's'))
+            resource_name = f"customers/{customer_id}/{collection}/{1000 + index}"
+        elif sub_which == 'update':
+            resource_name = sub_operation.update.resource_name
+        else:
+            resource_name = sub_operation.remove
+
+        response_field = which.replace('_operation', '_result')
+        getattr(result.mutate_operation_response, response_field).resource_name = resource_name
+        return result
+
+
+class _LocalOperation:
+    """Operación de larga duración del servicio local"""
+
+    def __init__(self, job: Dict[str, Any]):
+        self._job = job
+
+    def done(self) -> bool:
+        return time.monotonic() >= self._job['finishes_at']
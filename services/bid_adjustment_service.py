@@ -6,6 +6,9 @@ Compatible con múltiples monedas
 from google.ads.googleads.client import GoogleAdsClient
 from google.ads.googleads.errors import GoogleAdsException
 from google.protobuf import field_mask_pb2
+from modules.google_ads_client_pool import get_pooled_service
+from services.batch_job_service import BATCH_JOB_THRESHOLD, get_batch_job_manager, wrap_operation
+from utils.query_partition_cache import get_query_partition_cache
 from typing import List, Dict, Tuple, Optional
 import logging
 from dataclasses import dataclass
@@ -47,8 +50,11 @@ class BidAdjustmentService:
         Args:
             google_ads_client: GoogleAdsClient o GoogleAdsClientWrapper
         """
-        # Detectar si es wrapper y extraer cliente real
-        if hasattr(google_ads_client, 'client'):
+        # Detectar si es wrapper y extraer cliente real (compartido por el pool)
+        if hasattr(google_ads_client, 'get_client'):
+            self.client = google_ads_client.get_client()
+            logger.info("Usando cliente real extraído de GoogleAdsClientWrapper")
+        elif hasattr(google_ads_client, 'client'):
             self.client = google_ads_client.client
             logger.info("Usando cliente real extraído de GoogleAdsClientWrapper")
         else:
@@ -57,8 +63,8 @@ class BidAdjustmentService:
         
         # Inicializar servicios
         try:
-            self.ad_group_criterion_service = self.client.get_service("AdGroupCriterionService")
-            self.googleads_service = self.client.get_service("GoogleAdsService")
+            self.ad_group_criterion_service = get_pooled_service(self.client, "AdGroupCriterionService")
+            self.googleads_service = get_pooled_service(self.client, "GoogleAdsService")
             logger.info("✅ Servicios de Google Ads inicializados correctamente")
         except Exception as e:
             logger.error(f"❌ Error inicializando servicios: {e}")
@@ -220,26 +226,14 @@ class BidAdjustmentService:
                 logger.info(f"[DRY RUN] Cambiaría puja de criterion {criterion_id} a {new_bid_micros/1_000_000:,.2f} {currency}")
                 return True, f"[DRY RUN] Puja cambiaría a {new_bid_micros/1_000_000:,.2f} {currency}"
             
-            # ✅ SINTAXIS CORRECTA PARA API v21
-            # Crear operación de actualización
-            ad_group_criterion_operation = self.client.get_type("AdGroupCriterionOperation")
-            ad_group_criterion = ad_group_criterion_operation.update
-            
-            # Establecer resource name
-            ad_group_criterion.resource_name = criterion_resource_name
-            
-            # Establecer nueva puja
-            ad_group_criterion.cpc_bid_micros = new_bid_micros
-            
-            # ✅ CORRECCIÓN: FieldMask en v21
-            field_mask = field_mask_pb2.FieldMask(paths=["cpc_bid_micros"])
-            ad_group_criterion_operation.update_mask.CopyFrom(field_mask)
+            ad_group_criterion_operation = self._build_bid_operation(criterion_resource_name, new_bid_micros)
             
             # Ejecutar cambio real
             response = self.ad_group_criterion_service.mutate_ad_group_criteria(
                 customer_id=customer_id,
                 operations=[ad_group_criterion_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"✅ Puja actualizada: criterion {criterion_id} → {new_bid_micros/1_000_000:,.2f} {currency}")
             return True, f"Puja actualizada a {new_bid_micros/1_000_000:,.2f} {currency}"
@@ -253,6 +247,24 @@ class BidAdjustmentService:
             logger.error(f"❌ {error_msg}", exc_info=True)
             return False, error_msg
     
+    def _build_bid_operation(self, criterion_resource_name: str, new_bid_micros: int):
+        """Operación de actualización de cpc_bid_micros para un criterion"""
+        # ✅ SINTAXIS CORRECTA PARA API v21
+        # Crear operación de actualización
+        ad_group_criterion_operation = self.client.get_type("AdGroupCriterionOperation")
+        ad_group_criterion = ad_group_criterion_operation.update
+        
+        # Establecer resource name
+        ad_group_criterion.resource_name = criterion_resource_name
+        
+        # Establecer nueva puja
+        ad_group_criterion.cpc_bid_micros = new_bid_micros
+        
+        # ✅ CORRECCIÓN: FieldMask en v21
+        field_mask = field_mask_pb2.FieldMask(paths=["cpc_bid_micros"])
+        ad_group_criterion_operation.update_mask.CopyFrom(field_mask)
+        return ad_group_criterion_operation
+    
     def pause_keyword(
         self,
         customer_id: str,
@@ -301,6 +313,7 @@ class BidAdjustmentService:
                 customer_id=customer_id,
                 operations=[ad_group_criterion_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"✅ Keyword pausada: criterion {criterion_id}")
             return True, "Keyword pausada exitosamente"
@@ -317,7 +330,8 @@ class BidAdjustmentService:
     def bulk_adjust_bids(
         self,
         adjustments: List[BidAdjustment],
-        dry_run: bool = False
+        dry_run: bool = False,
+        use_batch_job: Optional[bool] = None
     ) -> Dict[str, any]:
         """
         Ajusta múltiples pujas en lote con soporte multi-moneda
@@ -325,6 +339,8 @@ class BidAdjustmentService:
         Args:
             adjustments: Lista de BidAdjustment
             dry_run: Si es True, solo simula
+            use_batch_job: Enviar los cambios como batch jobs en segundo plano
+                (None = solo si superan BATCH_JOB_THRESHOLD)
             
         Returns:
             Diccionario con resultados
@@ -337,6 +353,11 @@ class BidAdjustmentService:
             'currencies_detected': set()  # ✅ NUEVO: Rastrear monedas detectadas
         }
         
+        if use_batch_job is None:
+            use_batch_job = len(adjustments) > BATCH_JOB_THRESHOLD
+        if use_batch_job and not dry_run:
+            return self._bulk_adjust_bids_batch_job(adjustments, results)
+        
         for adj in adjustments:
             # ✅ NUEVO: Detectar moneda para cada ajuste
             currency = self.get_account_currency(adj.customer_id)
@@ -376,4 +397,54 @@ class BidAdjustmentService:
         
         logger.info(f"📊 Ajustes completados: {results['successful']} exitosos, {results['failed']} fallidos")
         logger.info(f"💰 Monedas detectadas: {', '.join(results['currencies_detected'])}")
-        return results
\ No newline at end of file
+        return results
+    
+    def _bulk_adjust_bids_batch_job(self, adjustments: List[BidAdjustment], results: Dict[str, any]) -> Dict[str, any]:
+        """
+        Envía los ajustes como un batch job por cuenta
+        
+        Las pujas bajo el mínimo de la moneda se descartan antes de enviar;
+        el resultado de cada keyword se escribe en el log de acciones del job.
+        """
+        operations_by_customer: Dict[str, List[tuple]] = {}
+        
+        for adj in adjustments:
+            currency = self.get_account_currency(adj.customer_id)
+            results['currencies_detected'].add(currency)
+            min_bid = self.get_min_bid_for_currency(currency)
+            
+            if adj.new_bid_micros < min_bid:
+                message = (f"Puja {adj.new_bid_micros/1_000_000:,.2f} {currency} es menor al mínimo "
+                           f"{min_bid/1_000_000:,.2f} {currency}")
+                results['failed'] += 1
+                results['errors'].append({'keyword': adj.keyword_text, 'error': message})
+                continue
+            
+            criterion_resource_name = self.ad_group_criterion_service.ad_group_criterion_path(
+                adj.customer_id, adj.ad_group_id, adj.criterion_id
+            )
+            operation = wrap_operation(
+                self.client, 'ad_group_criterion_operation',
+                self._build_bid_operation(criterion_resource_name, adj.new_bid_micros)
+            )
+            label = ['adjust_bid', adj.ad_group_id, adj.criterion_id, adj.keyword_text]
+            operations_by_customer.setdefault(adj.customer_id, []).append((label, operation))
+        
+        results['queued'] = 0
+        results['batch_jobs'] = []
+        manager = get_batch_job_manager()
+        for customer_id, operations in operations_by_customer.items():
+            job = manager.submit(
+                self.client, customer_id, operations,
+                description=f"Ajuste de {len(operations)} pujas"
+            )
+            results['queued'] += len(operations)
+            results['batch_jobs'].append(job.job_id)
+        
+        results['currencies_detected'] = list(results['currencies_detected'])
+        
+        logger.info(
+            f"📦 {results['queued']} ajustes enviados en {len(results['batch_jobs'])} batch jobs, "
+            f"{results['failed']} descartados"
+        )
+        return results
@@ -3,10 +3,15 @@ Billing Service for Google Ads Dashboard
 Handles billing data retrieval, budget tracking, and spend analysis
 """
 
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Any
 from datetime import datetime, date, timedelta
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
+import time
+
+import pandas as pd
 
 from modules.google_ads_client import GoogleAdsClientWrapper
 from modules.models import BillingRecord, BillingSummary, Account
@@ -20,15 +25,22 @@ logger = logging.getLogger(__name__)
 class BillingService:
     """Service for managing billing and budget data"""
     
-    def __init__(self, google_ads_client: GoogleAdsClientWrapper):
+    # Account name/currency rarely change; cache them per customer
+    ACCOUNT_INFO_TTL = 6 * 3600
+    
+    def __init__(self, google_ads_client: GoogleAdsClientWrapper, max_workers: int = 8):
         """
         Initialize billing service
         
         Args:
             google_ads_client: Google Ads API client wrapper
+            max_workers: Maximum accounts queried concurrently
         """
         self.client = google_ads_client
         self.budgets_config = {}  # Will be loaded from config file
+        self.max_workers = max_workers
+        self._account_info: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._account_info_lock = threading.Lock()
 
     @rate_limited('search', tokens=2)
     @cache_google_ads_data("", "billing_summary", ttl=1800)  # 30 minutes
@@ -54,29 +66,13 @@ class BillingService:
                 start_date = today.replace(day=1)  # First day of current month
                 end_date = today
             
-            # Get account currency from customer resource
-            account_info = self.client.get_account_info(customer_id)
-            currency_code = account_info.get('currency_code', 'USD') if account_info else 'USD'
-            
             logger.info(f"Getting billing summary for {customer_id} from {start_date} to {end_date}")
             
-            # Query campaign metrics for spend data - this is the correct approach for getting spend
-            query = f"""
-                SELECT
-                    customer.id,
-                    customer.currency_code,
-                    segments.date,
-                    metrics.cost_micros
-                FROM campaign
-                WHERE segments.date >= '{start_date}'
-                AND segments.date <= '{end_date}'
-            """
-            
-            results = self.client.execute_query(customer_id, query)
-            
-            logger.info(f"Billing query returned {len(results) if results else 0} rows for customer {customer_id}")
+            # Customer-level daily spend (one row per day) also carries the currency
+            spend = self._fetch_customer_daily_spend(customer_id, start_date, end_date)
+            currency_code = spend['currency_code']
             
-            if not results or len(results) == 0:
+            if not spend['daily_micros']:
                 logger.warning(f"No billing data found for {customer_id} between {start_date} and {end_date}")
                 return BillingSummary(
                     customer_id=customer_id,
@@ -85,11 +81,10 @@ class BillingService:
                     currency_code=currency_code
                 )
             
-            # Calculate total spend from campaign metrics
-            total_spend_micros = sum(row.metrics.cost_micros for row in results)
-            total_spend = total_spend_micros / 1_000_000
+            # Calculate total spend from customer metrics
+            total_spend = sum(spend['daily_micros'].values()) / 1_000_000
             
-            logger.info(f"Total spend for {customer_id}: ${total_spend:.2f} ({len(results)} records)")
+            logger.info(f"Total spend for {customer_id}: ${total_spend:.2f} ({len(spend['daily_micros'])} days)")
             
             # Get monthly budget (from account_budget resource or config)
             monthly_budget = self._get_account_budget(customer_id) or self._get_monthly_budget(customer_id)
@@ -249,62 +244,23 @@ class BillingService:
             end_date = date.today()
             start_date = end_date - timedelta(days=30)
         try:
-            # Get account currency
-            account_info = self.client.get_account_info(customer_id)
-            currency_code = account_info.get('currency_code', 'USD') if account_info else 'USD'
-            
-            logger.info(f"Getting daily spend for {customer_id} from {start_date} to {end_date}, currency: {currency_code}")
-            
-            # Query for daily spend using campaign metrics - this is the correct approach
-            query = f"""
-                SELECT
-                    customer.id,
-                    customer.currency_code,
-                    customer.descriptive_name,
-                    customer.test_account,
-                    segments.date,
-                    metrics.cost_micros,
-                    campaign.id,
-                    campaign.name,
-                    campaign.status
-                FROM campaign
-                WHERE segments.date >= '{start_date}'
-                AND segments.date <= '{end_date}'
-                ORDER BY segments.date DESC
-            """
+            logger.info(f"Getting daily spend for {customer_id} from {start_date} to {end_date}")
             
-            results = self.client.execute_query(customer_id, query)
+            # One customer-level query aggregates spend per day on the API side
+            spend = self._fetch_customer_daily_spend(customer_id, start_date, end_date)
+            daily_spend = spend['daily_micros']
             
-            logger.info(f"Daily spend query returned {len(results) if results else 0} rows for customer {customer_id}")
-            
-            if not results or len(results) == 0:
+            if not daily_spend:
                 logger.warning(f"No daily spend data for {customer_id} from {start_date} to {end_date}")
                 return []
             
-            # Check if this is a test account and log account details
-            first_row = results[0]
-            is_test_account = getattr(first_row.customer, 'test_account', False)
-            account_name = getattr(first_row.customer, 'descriptive_name', 'Unknown')
-            api_currency = getattr(first_row.customer, 'currency_code', 'USD')
+            is_test_account = spend['test_account']
+            account_name = spend['account_name']
+            api_currency = spend['currency_code']
             
             logger.info(f"Account details - Name: {account_name}, Test Account: {is_test_account}, API Currency: {api_currency}")
             
-            # Group by date and sum costs
-            daily_spend = {}
-            total_cost_micros = 0
-            
-            for row in results:
-                date_str = row.segments.date
-                cost_micros = row.metrics.cost_micros
-                
-                # Log individual campaign costs for debugging
-                campaign_cost_usd = cost_micros / 1_000_000
-                logger.debug(f"Campaign {row.campaign.name} on {date_str}: {cost_micros} micros = ${campaign_cost_usd:.2f} USD")
-                
-                if date_str not in daily_spend:
-                    daily_spend[date_str] = 0
-                daily_spend[date_str] += cost_micros
-                total_cost_micros += cost_micros
+            total_cost_micros = sum(daily_spend.values())
             
             total_cost_usd = total_cost_micros / 1_000_000
             logger.info(f"Total cost across all days: {total_cost_micros} micros = ${total_cost_usd:.2f} USD")
@@ -371,7 +327,7 @@ class BillingService:
 
     def get_multi_account_summary(self, customer_ids) -> Dict[str, BillingSummary]:
         """
-        Get billing summaries for multiple accounts
+        Get billing summaries for multiple accounts (queried concurrently)
         
         Args:
             customer_ids: Single customer ID (str) or list of customer IDs
@@ -385,15 +341,11 @@ class BillingService:
         
         summaries = {}
         
-        for customer_id in customer_ids:
-            try:
-                summary = self.get_billing_summary(customer_id)
-                if summary:
-                    summaries[customer_id] = summary
-                else:
-                    logger.warning(f"Could not get billing summary for {customer_id}")
-            except Exception as e:
-                logger.error(f"Error getting billing summary for {customer_id}: {e}")
+        for customer_id, summary in zip(customer_ids, self._map_accounts(self.get_billing_summary, customer_ids)):
+            if summary:
+                summaries[customer_id] = summary
+            else:
+                logger.warning(f"Could not get billing summary for {customer_id}")
         
         return summaries
     
@@ -414,32 +366,216 @@ class BillingService:
             customer_ids = [customer_ids]
         
         alerts = []
+        summaries = self.get_multi_account_summary(customer_ids)
         
         for customer_id in customer_ids:
+            summary = summaries.get(customer_id)
+            if not summary:
+                continue
+            
+            utilization = summary.budget_utilization
+            
+            if utilization >= threshold:
+                alert = {
+                    'customer_id': customer_id,
+                    'type': 'budget_threshold',
+                    'severity': 'high' if utilization >= 1.0 else 'medium',
+                    'message': f"Budget utilization at {format_percentage(utilization)}",
+                    'current_spend': summary.current_spend,
+                    'monthly_budget': summary.monthly_budget,
+                    'utilization': utilization,
+                    'currency_code': summary.currency_code
+                }
+                alerts.append(alert)
+        
+        return alerts
+    
+    def get_multi_account_frame(self, customer_ids,
+                                start_date: Optional[date] = None,
+                                end_date: Optional[date] = None) -> pd.DataFrame:
+        """
+        Get one billing row per account as a DataFrame
+        
+        Args:
+            customer_ids: Single customer ID (str) or list of customer IDs
+            start_date: Start date (defaults to current month)
+            end_date: End date (defaults to today)
+            
+        Returns:
+            DataFrame with customer_id, account_name, currency_code,
+            current_spend, monthly_budget, projected_spend, days_remaining
+            and budget_utilization
+        """
+        if isinstance(customer_ids, str):
+            customer_ids = [customer_ids]
+        
+        def load_account(customer_id: str):
+            # The name lookup runs in the pool too: a cached summary skips the
+            # spend query that would have filled the account info cache
+            summary = self.get_billing_summary(customer_id, start_date, end_date)
+            if not summary:
+                return None
+            return summary, self._get_account_info(customer_id).get('name')
+        
+        loaded = self._map_accounts(load_account, customer_ids)
+        
+        rows = []
+        for customer_id, account in zip(customer_ids, loaded):
+            if not account:
+                continue
+            summary, account_name = account
+            rows.append({
+                'customer_id': customer_id,
+                'account_name': account_name,
+                'currency_code': summary.currency_code,
+                'current_spend': summary.current_spend,
+                'monthly_budget': summary.monthly_budget,
+                'projected_spend': summary.projected_spend,
+                'days_remaining': summary.days_remaining,
+                'budget_utilization': summary.budget_utilization
+            })
+        
+        return pd.DataFrame(rows, columns=[
+            'customer_id', 'account_name', 'currency_code', 'current_spend',
+            'monthly_budget', 'projected_spend', 'days_remaining', 'budget_utilization'
+        ])
+    
+    def get_spend_frame(self, customer_ids,
+                        start_date: Optional[date] = None,
+                        end_date: Optional[date] = None) -> pd.DataFrame:
+        """
+        Get daily spend for many accounts as one combined DataFrame
+        
+        Each account runs a single customer-level segments.date query;
+        accounts are queried concurrently.
+        
+        Args:
+            customer_ids: Single customer ID (str) or list of customer IDs
+            start_date: Start date (defaults to 30 days ago)
+            end_date: End date (defaults to today)
+            
+        Returns:
+            DataFrame with customer_id, account_name, currency_code, date,
+            cost_micros and cost, sorted by customer and date
+        """
+        if isinstance(customer_ids, str):
+            customer_ids = [customer_ids]
+        
+        end_date = end_date or date.today()
+        start_date = start_date or end_date - timedelta(days=30)
+        
+        def fetch(customer_id: str) -> Optional[Dict[str, Any]]:
             try:
-                summary = self.get_billing_summary(customer_id)
-                if not summary:
-                    continue
-                
-                utilization = summary.budget_utilization
-                
-                if utilization >= threshold:
-                    alert = {
-                        'customer_id': customer_id,
-                        'type': 'budget_threshold',
-                        'severity': 'high' if utilization >= 1.0 else 'medium',
-                        'message': f"Budget utilization at {format_percentage(utilization)}",
-                        'current_spend': summary.current_spend,
-                        'monthly_budget': summary.monthly_budget,
-                        'utilization': utilization,
-                        'currency_code': summary.currency_code
-                    }
-                    alerts.append(alert)
-                    
+                return self._fetch_customer_daily_spend(customer_id, start_date, end_date)
             except Exception as e:
-                logger.error(f"Error checking budget alerts for {customer_id}: {e}")
+                logger.error(f"Error getting spend for {customer_id}: {e}")
+                return None
         
-        return alerts
+        rows = []
+        for customer_id, spend in zip(customer_ids, self._map_accounts(fetch, customer_ids)):
+            if not spend:
+                continue
+            for date_str, cost_micros in spend['daily_micros'].items():
+                rows.append((customer_id, spend['account_name'], spend['currency_code'],
+                             date_str, cost_micros))
+        
+        frame = pd.DataFrame(rows, columns=['customer_id', 'account_name', 'currency_code', 'date', 'cost_micros'])
+        frame['date'] = pd.to_datetime(frame['date']).dt.date
+        frame['cost'] = frame['cost_micros'] / 1_000_000
+        return frame.sort_values(['customer_id', 'date'], ignore_index=True)
+    
+    def _map_accounts(self, func, customer_ids: List[str]) -> List[Any]:
+        """Run func for each account concurrently, preserving order"""
+        if not customer_ids:
+            return []
+        
+        def safe(customer_id: str):
+            try:
+                return func(customer_id)
+            except Exception as e:
+                logger.error(f"Error processing account {customer_id}: {e}")
+                return None
+        
+        workers = max(1, min(self.max_workers, len(customer_ids)))
+        if workers == 1:
+            return [safe(customer_id) for customer_id in customer_ids]
+        
+        # Initialize the shared client before fanning out to worker threads
+        if hasattr(self.client, 'get_client'):
+            self.client.get_client()
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="billing") as executor:
+            return list(executor.map(safe, customer_ids))
+    
+    def _fetch_customer_daily_spend(self, customer_id: str,
+                                    start_date: date, end_date: date) -> Dict[str, Any]:
+        """
+        Query daily spend aggregated at the customer level
+        
+        FROM customer with segments.date returns one row per day, so no
+        per-campaign rows have to be summed client side. Account name,
+        currency and test flag from the rows refresh the account info cache.
+        
+        Returns:
+            Dictionary with daily_micros ({'YYYY-MM-DD': micros}),
+            currency_code, account_name and test_account
+        """
+        query = f"""
+            SELECT
+                customer.id,
+                customer.currency_code,
+                customer.descriptive_name,
+                customer.test_account,
+                segments.date,
+                metrics.cost_micros
+            FROM customer
+            WHERE segments.date >= '{start_date}'
+            AND segments.date <= '{end_date}'
+        """
+        
+        results = self.client.execute_query(customer_id, query)
+        logger.info(f"Customer spend query returned {len(results) if results else 0} rows for customer {customer_id}")
+        
+        daily_micros: Dict[str, int] = {}
+        for row in results or []:
+            date_str = row.segments.date
+            daily_micros[date_str] = daily_micros.get(date_str, 0) + row.metrics.cost_micros
+        
+        if results:
+            customer = results[0].customer
+            info = {
+                'currency_code': getattr(customer, 'currency_code', None) or 'USD',
+                'name': getattr(customer, 'descriptive_name', None) or 'Unknown',
+                'test_account': bool(getattr(customer, 'test_account', False))
+            }
+            self._store_account_info(customer_id, info)
+        else:
+            info = self._get_account_info(customer_id)
+        
+        return {
+            'daily_micros': daily_micros,
+            'currency_code': info.get('currency_code', 'USD'),
+            'account_name': info.get('name', 'Unknown'),
+            'test_account': info.get('test_account', False)
+        }
+    
+    def _get_account_info(self, customer_id: str) -> Dict[str, Any]:
+        """Get account info (currency, name) once per customer, cached with a TTL"""
+        with self._account_info_lock:
+            cached = self._account_info.get(customer_id)
+        if cached and time.monotonic() - cached[0] < self.ACCOUNT_INFO_TTL:
+            return cached[1]
+        
+        info = self.client.get_account_info(customer_id) or {}
+        info.setdefault('currency_code', 'USD')
+        self._store_account_info(customer_id, info)
+        return info
+    
+    def _store_account_info(self, customer_id: str, info: Dict[str, Any]) -> None:
+        with self._account_info_lock:
+            cached = self._account_info.get(customer_id)
+            merged = {**cached[1], **info} if cached else dict(info)
+            self._account_info[customer_id] = (time.monotonic(), merged)
     
     def get_spend_trends(self, customer_id: str, days: int = 30) -> Dict:
         """
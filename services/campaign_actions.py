@@ -11,6 +11,7 @@ from modules.google_ads_client import GoogleAdsClientWrapper
 from google.ads.googleads.errors import GoogleAdsException
 from utils.logger import get_logger, log_api_call
 from utils.rate_limit import rate_limited
+from utils.query_partition_cache import get_query_partition_cache
 
 logger = get_logger(__name__)
 
@@ -63,6 +64,7 @@ class CampaignActionsService:
                 customer_id=customer_id,
                 operations=[campaign_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Campaign {campaign_id} paused successfully for customer {customer_id}")
             return {
@@ -119,6 +121,7 @@ class CampaignActionsService:
                 customer_id=customer_id,
                 operations=[campaign_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Campaign {campaign_id} resumed successfully for customer {customer_id}")
             return {
@@ -201,6 +204,7 @@ class CampaignActionsService:
                 customer_id=customer_id,
                 operations=[budget_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Campaign {campaign_id} budget updated to {new_budget_micros} micros for customer {customer_id}")
             return {
@@ -258,6 +262,7 @@ class CampaignActionsService:
                 customer_id=customer_id,
                 operations=operations
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Bulk paused {len(campaign_ids)} campaigns for customer {customer_id}")
             return {
@@ -315,6 +320,7 @@ class CampaignActionsService:
                 customer_id=customer_id,
                 operations=operations
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Bulk resumed {len(campaign_ids)} campaigns for customer {customer_id}")
             return {
@@ -0,0 +1,301 @@
+"""
+Campaign Tree Publisher - Publicación de árboles de campaña en un solo mutate
+Construye presupuesto, campaña, ad groups, keywords y anuncios como
+MutateOperations de GoogleAdsService con IDs temporales negativos
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from google.ads.googleads.errors import GoogleAdsException
+
+from utils.query_partition_cache import get_query_partition_cache
+
+logger = logging.getLogger(__name__)
+
+# Etiqueta que identifica cada operación dentro del blueprint,
+# p. ej. ('campaign',), ('ad_group', 2), ('keyword', 2, 5), ('ad', 2, 0)
+OperationLabel = Tuple[Any, ...]
+
+# Campos que referencian otros recursos del mismo árbol (se reescriben cuando
+# un recurso temporal ya fue creado en un request anterior)
+_REFERENCE_FIELDS = {
+    'campaign_operation': ['campaign_budget'],
+    'ad_group_operation': ['campaign'],
+    'campaign_criterion_operation': ['campaign'],
+    'ad_group_criterion_operation': ['ad_group'],
+    'ad_group_ad_operation': ['ad_group'],
+}
+
+
+class CampaignTreePublisher:
+    """
+    Publica un árbol de recursos con GoogleAdsService.mutate
+
+    - Los recursos nuevos usan resource names temporales (IDs negativos) para
+      que los hijos los referencien dentro del mismo request
+    - Las operaciones se agrupan en unidades (p. ej. un ad group con sus
+      keywords y anuncios) que nunca se separan entre requests
+    - atomic=True: cada request se aplica completo o no se aplica; si uno
+      falla no se envían los siguientes
+    - atomic=False: partial_failure, las operaciones válidas se aplican y los
+      errores se asocian a su etiqueta
+    - Resultado: mapa etiqueta -> resource name real y etiqueta -> error
+    """
+
+    # El límite de la API es 10.000 operaciones por request
+    MAX_OPERATIONS_PER_REQUEST = 5000
+
+    def __init__(self, client, atomic: bool = False, validate_only: bool = False,
+                 max_operations_per_request: int = MAX_OPERATIONS_PER_REQUEST):
+        """
+        Args:
+            client: GoogleAdsClient
+            atomic: Todo o nada por request (si no, partial_failure)
+            validate_only: Solo validar, sin crear recursos
+            max_operations_per_request: Operaciones máximas por request
+        """
+        self.client = client
+        self.atomic = atomic
+        self.validate_only = validate_only
+        self.max_operations_per_request = max_operations_per_request
+        self._next_temp_id = -1
+
+    # ========================================================================
+    # CONSTRUCCIÓN
+    # ========================================================================
+
+    def temp_resource_name(self, customer_id: str, collection: str) -> str:
+        """
+        Resource name temporal para un recurso nuevo
+
+        Args:
+            collection: Colección de la API ('campaignBudgets', 'campaigns', 'adGroups')
+        """
+        temp_id = self._next_temp_id
+        self._next_temp_id -= 1
+        return f"customers/{customer_id}/{collection}/{temp_id}"
+
+    def new_operation(self):
+        """MutateOperation vacía para completar con una operación concreta"""
+        return self.client.get_type("MutateOperation")
+
+    # ========================================================================
+    # ENVÍO
+    # ========================================================================
+
+    def publish(
+        self,
+        customer_id: str,
+        units: List[List[Tuple[OperationLabel, Any]]],
+        progress_callback: Optional[callable] = None
+    ) -> Dict[str, Any]:
+        """
+        Envía las unidades en el menor número de requests posible
+
+        Args:
+            customer_id: ID del cliente
+            units: Unidades de operaciones [(etiqueta, MutateOperation), ...];
+                   la primera unidad debería contener los recursos raíz
+            progress_callback: callback(mensaje, porcentaje)
+
+        Returns:
+            {
+                'resource_names': {etiqueta: resource_name},
+                'errors': {etiqueta: mensaje},
+                'request_errors': List[str],
+                'requests': int,
+                'operations': int
+            }
+        """
+        result = {
+            'resource_names': {},
+            'errors': {},
+            'request_errors': [],
+            'requests': 0,
+            'operations': sum(len(unit) for unit in units)
+        }
+        resolved: Dict[str, str] = {}
+        ga_service = self.client.get_service("GoogleAdsService")
+
+        chunks = self._chunk_units(units)
+        for chunk_idx, chunk in enumerate(chunks):
+            if progress_callback:
+                progress_callback(
+                    f"Enviando request {chunk_idx + 1}/{len(chunks)} ({len(chunk)} operaciones)...",
+                    10 + 80 * chunk_idx / max(1, len(chunks))
+                )
+
+            labels = [label for label, _ in chunk]
+            operations = [self._resolve_references(operation, resolved) for _, operation in chunk]
+
+            try:
+                response = ga_service.mutate(
+                    request={
+                        'customer_id': customer_id,
+                        'mutate_operations': operations,
+                        'partial_failure': not self.atomic,
+                        'validate_only': self.validate_only
+                    }
+                )
+                result['requests'] += 1
+                if not self.validate_only:
+                    get_query_partition_cache().invalidate(customer_id)
+            except GoogleAdsException as ex:
+                result['requests'] += 1
+                self._record_failure(ex.failure, labels, result['errors'])
+                message = f"Request {chunk_idx + 1} rechazado: {format_google_ads_error(ex)}"
+                logger.error(f"❌ {message}")
+                result['request_errors'].append(message)
+                if self.atomic:
+                    for label in labels[:]:
+                        result['errors'].setdefault(label, "No aplicado: el request atómico falló")
+                    self._mark_skipped(chunks[chunk_idx + 1:], result['errors'])
+                    break
+                continue
+            except Exception as e:
+                message = f"Request {chunk_idx + 1} falló: {e}"
+                logger.error(f"❌ {message}")
+                result['request_errors'].append(message)
+                for label in labels:
+                    result['errors'].setdefault(label, str(e))
+                self._mark_skipped(chunks[chunk_idx + 1:], result['errors'])
+                break
+
+            # Errores parciales por índice de operación
+            if getattr(response, 'partial_failure_error', None) and response.partial_failure_error.code:
+                self._record_partial_failure(response.partial_failure_error, labels, result['errors'])
+
+            for idx, op_response in enumerate(response.mutate_operation_responses):
+                if idx >= len(labels):
+                    break
+                resource_name = _response_resource_name(op_response)
+                if not resource_name:
+                    continue
+                result['resource_names'][labels[idx]] = resource_name
+                temp_name = _created_resource_name(chunk[idx][1])
+                if temp_name:
+                    resolved[temp_name] = resource_name
+
+            # Si la raíz del árbol falló, los requests siguientes no tienen padre
+            if chunk_idx == 0 and chunks[1:] and labels and labels[0] not in result['resource_names'] \
+                    and not self.validate_only:
+                logger.error(f"❌ No se creó {labels[0]}; se omiten {len(chunks) - 1} requests")
+                self._mark_skipped(chunks[1:], result['errors'])
+                break
+
+        logger.info(
+            f"📦 Mutate de árbol: {result['operations']} operaciones en {result['requests']} requests, "
+            f"{len(result['resource_names'])} creadas, {len(result['errors'])} con error"
+        )
+        return result
+
+    def _chunk_units(self, units: List[List[Tuple[OperationLabel, Any]]]) -> List[List[Tuple[OperationLabel, Any]]]:
+        """Agrupa unidades completas sin superar el máximo por request"""
+        chunks: List[List[Tuple[OperationLabel, Any]]] = []
+        current: List[Tuple[OperationLabel, Any]] = []
+        for unit in units:
+            if not unit:
+                continue
+            if current and len(current) + len(unit) > self.max_operations_per_request:
+                chunks.append(current)
+                current = []
+            current.extend(unit)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def _resolve_references(operation, resolved: Dict[str, str]):
+        """Reemplaza referencias temporales ya creadas en requests anteriores"""
+        if not resolved:
+            return operation
+        for operation_field, reference_fields in _REFERENCE_FIELDS.items():
+            if not _has_field(operation, operation_field):
+                continue
+            create = getattr(getattr(operation, operation_field), 'create')
+            for reference_field in reference_fields:
+                value = getattr(create, reference_field, '')
+                if value in resolved:
+                    setattr(create, reference_field, resolved[value])
+        return operation
+
+    @staticmethod
+    def _mark_skipped(chunks: List[List[Tuple[OperationLabel, Any]]], errors: Dict[OperationLabel, str]):
+        for chunk in chunks:
+            for label, _ in chunk:
+                errors.setdefault(label, "No enviado: falló un request anterior")
+
+    def _record_partial_failure(self, status, labels: List[OperationLabel],
+                                errors: Dict[OperationLabel, str]) -> None:
+        """Asocia los errores de partial_failure_error a su operación"""
+        failure_type = type(self.client.get_type("GoogleAdsFailure"))
+        for detail in status.details:
+            try:
+                failure = failure_type.deserialize(detail.value)
+            except Exception:
+                continue
+            self._record_failure(failure, labels, errors)
+
+    @staticmethod
+    def _record_failure(failure, labels: List[OperationLabel], errors: Dict[OperationLabel, str]) -> None:
+        for error in getattr(failure, 'errors', None) or []:
+            index = _operation_index(error)
+            if index is not None and index < len(labels):
+                errors[labels[index]] = error.message
+
+
+def _has_field(message, field_name: str) -> bool:
+    try:
+        return type(message).pb(message).HasField(field_name)
+    except Exception:
+        return False
+
+
+def _response_resource_name(op_response) -> Optional[str]:
+    """resource_name del resultado de un MutateOperationResponse"""
+    try:
+        which = type(op_response).pb(op_response).WhichOneof('response')
+    except Exception:
+        return None
+    if not which:
+        return None
+    return getattr(getattr(op_response, which), 'resource_name', None) or None
+
+
+def _created_resource_name(operation) -> Optional[str]:
+    """resource_name (temporal) del recurso que crea una operación"""
+    try:
+        which = type(operation).pb(operation).WhichOneof('operation')
+    except Exception:
+        return None
+    if not which:
+        return None
+    sub_operation = getattr(operation, which)
+    if type(sub_operation).pb(sub_operation).WhichOneof('operation') != 'create':
+        return None
+    return sub_operation.create.resource_name or None
+
+
+def _operation_index(error) -> Optional[int]:
+    """Índice de la operación en mutate_operations a la que apunta un error"""
+    location = getattr(error, 'location', None)
+    for element in getattr(location, 'field_path_elements', None) or []:
+        if element.field_name == 'mutate_operations':
+            return element.index
+    return None
+
+
+def format_google_ads_error(ex: GoogleAdsException) -> str:
+    """Resumen legible de un GoogleAdsException"""
+    details = []
+    try:
+        details.append(f"Error Code: {ex.error.code().name}")
+    except Exception:
+        pass
+    failure = getattr(ex, 'failure', None)
+    if failure:
+        details.append(f"Request ID: {getattr(ex, 'request_id', None) or 'N/A'}")
+        for error in getattr(failure, 'errors', None) or []:
+            details.append(f"- {error.message}")
+    return "\n".join(details) or str(ex)
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+============================================================================
+CHART RENDERER PARA GENERADOR IA 2.0
+Renderizado de gráficos con backend Agg orientado a objetos, caché por
+contenido y renderizado paralelo en procesos
+Versión: 1.0
+============================================================================
+"""
+
+import atexit
+import base64
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# Importaciones para generación de gráficos (sin pyplot)
+try:
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    import matplotlib.style as mpl_style
+    PLOTTING_AVAILABLE = True
+except ImportError:
+    PLOTTING_AVAILABLE = False
+
+# DPI por nivel de calidad ('chart_quality' en la configuración de reporting);
+# 'high' conserva los 300 DPI con los que siempre se generaron los reportes
+CHART_QUALITY_DPI = {
+    'low': 72,
+    'medium': 150,
+    'high': 300
+}
+
+CHART_MIME_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+# Tamaño de figura por tipo de gráfico (pulgadas)
+DEFAULT_FIGSIZES = {
+    'bar': (10, 6),
+    'line': (12, 6)
+}
+
+CHART_STYLE = 'seaborn-v0_8'
+
+# Escrituras en disco entre dos podas de la caché
+DISK_PRUNE_INTERVAL = 50
+
+
+def render_chart_bytes(spec: Dict[str, Any], dpi: int, image_format: str) -> bytes:
+    """
+    Renderizar un gráfico a bytes con el backend Agg.
+
+    Función de módulo para poder ejecutarse en un ProcessPoolExecutor.
+    Cada llamada crea su propia Figure, sin estado global de pyplot.
+
+    Args:
+        spec: Especificación del gráfico (ver ChartRenderer.bar_spec/line_spec)
+        dpi: Resolución de salida
+        image_format: 'png' o 'svg'
+
+    Returns:
+        Contenido de la imagen
+    """
+    style = CHART_STYLE if CHART_STYLE in mpl_style.available else 'default'
+    with mpl_style.context(style):
+        fig = Figure(figsize=tuple(spec.get('figsize') or DEFAULT_FIGSIZES.get(spec['chart_type'], (10, 6))))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(1, 1, 1)
+
+        if spec['chart_type'] == 'bar':
+            ax.bar(spec['x'], spec['y'], color=spec.get('color'))
+        elif spec['chart_type'] == 'line':
+            ax.plot(spec['x'], spec['y'], color=spec.get('color'), linewidth=2, marker='o')
+            ax.grid(True, alpha=0.3)
+        else:
+            raise ValueError(f"Tipo de gráfico no soportado: {spec['chart_type']}")
+
+        ax.set_title(spec.get('title', ''), fontsize=16, fontweight='bold')
+        ax.set_xlabel(spec.get('x_label', ''))
+        ax.set_ylabel(spec.get('y_label', ''))
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+
+        buffer = BytesIO()
+        fig.savefig(buffer, format=image_format, dpi=dpi, bbox_inches='tight')
+        return buffer.getvalue()
+
+
+class ChartRenderer:
+    """
+    Subsistema de renderizado de gráficos para reportes
+
+    - Figure + FigureCanvasAgg (sin la máquina de estados de pyplot)
+    - DPI y formato (PNG o SVG vectorial) configurables
+    - Caché por hash del contenido en memoria (LRU) y opcionalmente en disco
+      (LRU por fecha de último uso, con tamaño y antigüedad máximos)
+    - Renderizado de lotes en un pool de procesos reutilizable
+    """
+
+    def __init__(
+        self,
+        dpi: int = CHART_QUALITY_DPI['high'],
+        image_format: str = 'png',
+        cache_dir: Optional[str] = None,
+        max_cache_entries: int = 256,
+        max_workers: Optional[int] = None,
+        max_disk_cache_mb: float = 256,
+        disk_cache_max_age_days: float = 30
+    ):
+        """
+        Inicializar el renderizador
+
+        Args:
+            dpi: Resolución de salida
+            image_format: 'png' o 'svg'
+            cache_dir: Directorio de caché en disco (None = solo memoria)
+            max_cache_entries: Gráficos guardados en la caché en memoria
+            max_workers: Procesos para lotes (None = según CPUs, 0/1 = sin pool)
+            max_disk_cache_mb: Tamaño máximo de la caché en disco
+            disk_cache_max_age_days: Días sin uso tras los que se borra un gráfico en disco
+        """
+        image_format = image_format.lower()
+        if image_format not in CHART_MIME_TYPES:
+            raise ValueError(f"Formato de gráfico no soportado: {image_format}")
+
+        self.dpi = int(dpi)
+        self.image_format = image_format
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_cache_entries = max_cache_entries
+        self.max_disk_cache_bytes = int(max_disk_cache_mb * 1024 * 1024)
+        self.disk_cache_max_age = disk_cache_max_age_days * 86400
+        self.max_workers = min(4, os.cpu_count() or 1) if max_workers is None else max_workers
+
+        self._memory_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._disk_writes = 0
+
+        self.stats = {'rendered': 0, 'cache_hits': 0, 'parallel_batches': 0, 'disk_evictions': 0}
+
+        if self.cache_dir:
+            self.prune_disk_cache()
+
+    @property
+    def mime_type(self) -> str:
+        """Tipo MIME de las imágenes generadas"""
+        return CHART_MIME_TYPES[self.image_format]
+
+    # =========================================================================
+    # ESPECIFICACIONES
+    # =========================================================================
+
+    @staticmethod
+    def bar_spec(data: Dict[str, Any], title: str, x_axis: str, y_axis: str,
+                 color: Optional[str] = None) -> Dict[str, Any]:
+        """Especificación de gráfico de barras"""
+        return ChartRenderer._spec('bar', data, title, x_axis, y_axis, color)
+
+    @staticmethod
+    def line_spec(data: Dict[str, Any], title: str, x_axis: str, y_axis: str,
+                  color: Optional[str] = None) -> Dict[str, Any]:
+        """Especificación de gráfico de líneas"""
+        return ChartRenderer._spec('line', data, title, x_axis, y_axis, color)
+
+    @staticmethod
+    def _spec(chart_type: str, data: Dict[str, Any], title: str,
+              x_axis: str, y_axis: str, color: Optional[str]) -> Dict[str, Any]:
+        return {
+            'chart_type': chart_type,
+            'title': title,
+            'x': [_plain(v) for v in data[x_axis]],
+            'y': [_plain(v) for v in data[y_axis]],
+            'x_label': x_axis.replace('_', ' ').title(),
+            'y_label': y_axis.replace('_', ' ').title(),
+            'color': color,
+            'figsize': DEFAULT_FIGSIZES.get(chart_type)
+        }
+
+    def cache_key(self, spec: Dict[str, Any]) -> str:
+        """Hash del contenido del gráfico junto con DPI y formato"""
+        payload = json.dumps(
+            {'spec': spec, 'dpi': self.dpi, 'format': self.image_format},
+            sort_keys=True, default=str, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # =========================================================================
+    # RENDERIZADO
+    # =========================================================================
+
+    def render(self, spec: Dict[str, Any]) -> Optional[str]:
+        """
+        Renderizar un gráfico (o tomarlo de la caché)
+
+        Returns:
+            Imagen codificada en base64, o None si falla
+        """
+        return self.render_many([spec])[0]
+
+    def render_many(self, specs: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Renderizar varios gráficos, en paralelo cuando hay más de un fallo de caché
+
+        Args:
+            specs: Especificaciones de gráficos
+
+        Returns:
+            Imágenes en base64 en el mismo orden (None para las que fallaron)
+        """
+        if not PLOTTING_AVAILABLE:
+            return [None] * len(specs)
+
+        keys = [self.cache_key(spec) for spec in specs]
+        images: Dict[str, Optional[str]] = {}
+        missing: Dict[str, Dict[str, Any]] = {}
+
+        for key, spec in zip(keys, specs):
+            if key in images or key in missing:
+                continue
+            cached = self._cache_get(key)
+            if cached is not None:
+                images[key] = cached
+                self.stats['cache_hits'] += 1
+            else:
+                missing[key] = spec
+
+        if missing:
+            for key, content in self._render_missing(missing).items():
+                if content is None:
+                    images[key] = None
+                    continue
+                encoded = base64.b64encode(content).decode()
+                images[key] = encoded
+                self._cache_put(key, encoded, content)
+                self.stats['rendered'] += 1
+
+        return [images.get(key) for key in keys]
+
+    def _render_missing(self, missing: Dict[str, Dict[str, Any]]) -> Dict[str, Optional[bytes]]:
+        """Renderizar los gráficos que no están en caché"""
+        if len(missing) > 1 and self.max_workers > 1:
+            try:
+                pool = self._get_pool()
+                futures = {
+                    key: pool.submit(render_chart_bytes, spec, self.dpi, self.image_format)
+                    for key, spec in missing.items()
+                }
+                self.stats['parallel_batches'] += 1
+                results = {}
+                for key, future in futures.items():
+                    try:
+                        results[key] = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Error renderizando gráfico '{missing[key].get('title')}': {e}")
+                        results[key] = None
+                return results
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning(f"Pool de gráficos no disponible, renderizando en proceso: {e}")
+                self._shutdown_pool()
+
+        results = {}
+        for key, spec in missing.items():
+            try:
+                results[key] = render_chart_bytes(spec, self.dpi, self.image_format)
+            except Exception as e:
+                logger.error(f"Error renderizando gráfico '{spec.get('title')}': {e}")
+                results[key] = None
+        return results
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: los workers no heredan hilos ni locks del proceso (Streamlit, APScheduler)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                atexit.register(self.close)
+            return self._pool
+
+    def _shutdown_pool(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                atexit.unregister(self.close)
+
+    def close(self) -> None:
+        """Liberar el pool de procesos"""
+        self._shutdown_pool()
+
+    # =========================================================================
+    # CACHÉ
+    # =========================================================================
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory_cache:
+                self._memory_cache.move_to_end(key)
+                return self._memory_cache[key]
+
+        if self.cache_dir:
+            path = self.cache_dir / f"{key}.{self.image_format}"
+            if path.exists():
+                try:
+                    encoded = base64.b64encode(path.read_bytes()).decode()
+                    # La fecha de modificación marca el último uso para la poda LRU
+                    os.utime(path)
+                    self._memory_put(key, encoded)
+                    return encoded
+                except OSError as e:
+                    logger.warning(f"No se pudo leer gráfico en caché {path.name}: {e}")
+        return None
+
+    def _cache_put(self, key: str, encoded: str, content: bytes) -> None:
+        self._memory_put(key, encoded)
+        if self.cache_dir:
+            path = self.cache_dir / f"{key}.{self.image_format}"
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            try:
+                tmp_path.write_bytes(content)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"No se pudo guardar gráfico en caché {path.name}: {e}")
+                return
+
+            with self._lock:
+                self._disk_writes += 1
+                due = self._disk_writes % DISK_PRUNE_INTERVAL == 0
+            if due:
+                self.prune_disk_cache()
+
+    def _memory_put(self, key: str, encoded: str) -> None:
+        with self._lock:
+            self._memory_cache[key] = encoded
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.max_cache_entries:
+                self._memory_cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        """Vaciar la caché en memoria (la de disco se conserva)"""
+        with self._lock:
+            self._memory_cache.clear()
+
+    def prune_disk_cache(self) -> int:
+        """
+        Borrar de la caché en disco los gráficos vencidos y, si sigue
+        excediendo el tamaño máximo, los de uso menos reciente
+
+        Returns:
+            Número de archivos borrados
+        """
+        if not self.cache_dir:
+            return 0
+
+        entries = []
+        for path in self.cache_dir.iterdir():
+            if path.suffix.lstrip('.') not in CHART_MIME_TYPES:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort(key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - self.disk_cache_max_age
+
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= self.max_disk_cache_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.warning(f"No se pudo borrar gráfico en caché {path.name}: {e}")
+                continue
+            total -= size
+            removed += 1
+
+        if removed:
+            self.stats['disk_evictions'] += removed
+            logger.info(f"🗑️ Caché de gráficos: {removed} archivos borrados")
+        return removed
+
+
+def _plain(value: Any) -> Any:
+    """Convertir escalares numpy a tipos nativos (hash estable y pickling barato)"""
+    return value.item() if hasattr(value, 'item') else value
@@ -18,6 +18,7 @@ from modules.models import Campaign, CampaignStatus
 from utils.logger import get_logger
 from modules.ai_ad_generator import AIAdGenerator
 from modules.ad_prompt_generator import build_enhanced_prompt
+from utils.keyword_clustering import KeywordClusterEngine
 
 logger = get_logger(__name__)
 
@@ -278,7 +279,7 @@ class IntelligentAutopilot:
                 # ✅ CREAR ESTRUCTURA COMPLETA DEL GRUPO
                 ad_group = {
                     'name': group_name,
-                    'theme': self._extract_theme(keywords),
+                    'theme': group_config.get('theme') or self._extract_theme(keywords),
                     'keywords': keywords,
                     'negative_keywords': self._generate_negative_keywords(business_description),
                     'ads': ads_result,
@@ -296,6 +297,9 @@ class IntelligentAutopilot:
                     'score': 85.0 + (i * 2)
                 }
                 
+                if group_config.get('cluster_id'):
+                    ad_group['cluster_id'] = group_config['cluster_id']
+                
                 generated_groups.append(ad_group)
                 
                 logger.info(f"✅ Grupo '{group_name}' completado exitosamente")
@@ -317,6 +321,46 @@ class IntelligentAutopilot:
         
         return generated_groups
 
+    def build_ad_groups_config_from_keywords(
+        self,
+        keywords: List[str],
+        final_url: str,
+        max_keywords_per_group: int = 20,
+        max_groups: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Construye la configuración de grupos para generate_ad_groups_from_config
+        a partir de una lista grande de keywords semilla.
+        
+        Las keywords se agrupan por similitud en tiempo casi lineal; cada grupo
+        conserva el id estable de su cluster para poder re-sincronizarlo.
+        """
+        clusters = KeywordClusterEngine().cluster(
+            keywords,
+            max_cluster_size=max_keywords_per_group
+        )
+        
+        if max_groups:
+            clusters = clusters[:max_groups]
+        
+        ad_groups_config = []
+        for i, cluster in enumerate(clusters):
+            ad_groups_config.append({
+                'name': self._generate_intelligent_group_name(
+                    keywords=[cluster['name']],
+                    business_description='',
+                    group_index=i
+                ),
+                'cluster_id': cluster['cluster_id'],
+                'theme': cluster['theme'],
+                'keywords': cluster['keywords'],
+                'url': final_url
+            })
+        
+        logger.info(f"🧩 {len(ad_groups_config)} grupos construidos desde {len(keywords)} keywords")
+        
+        return ad_groups_config
+
     def generate_ad_groups_for_business(
         self,
         business_description: str,
@@ -670,18 +714,9 @@ class IntelligentAutopilot:
             logger.info(f"📦 Distribución (1 kw/grupo): {[len(g) for g in result]}")
             return result
         
-        # Dividir equitativamente
-        keywords_per_group = len(clean_keywords) // num_groups
-        remainder = len(clean_keywords) % num_groups
-        
-        groups = []
-        start_idx = 0
-        
-        for i in range(num_groups):
-            group_size = keywords_per_group + (1 if i < remainder else 0)
-            end_idx = start_idx + group_size
-            groups.append(clean_keywords[start_idx:end_idx])
-            start_idx = end_idx
+        # Dividir por similitud (MinHash + LSH), manteniendo juntas las
+        # keywords del mismo tema y con tamaños equilibrados
+        groups = KeywordClusterEngine().split_into_groups(clean_keywords, num_groups)
         
         logger.info(f"📦 Distribución final: {[len(g) for g in groups]}")
         for idx, group in enumerate(groups):
@@ -9,8 +9,11 @@ import logging
 
 from modules.google_ads_client import GoogleAdsClientWrapper
 from google.ads.googleads.errors import GoogleAdsException
+from google.protobuf import field_mask_pb2
 from utils.logger import get_logger, log_api_call
 from utils.rate_limit import rate_limited
+from utils.query_partition_cache import get_query_partition_cache
+from services.batch_job_service import BATCH_JOB_THRESHOLD, get_batch_job_manager, wrap_operation
 
 logger = get_logger(__name__)
 
@@ -57,7 +60,7 @@ class KeywordActionsService:
             # Set field mask
             client.copy_from(
                 criterion_operation.update_mask,
-                client.field_mask.FieldMask(paths=["status"])
+                field_mask_pb2.FieldMask(paths=["status"])
             )
             
             # Execute the operation
@@ -65,6 +68,7 @@ class KeywordActionsService:
                 customer_id=customer_id,
                 operations=[criterion_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Keyword {ad_group_criterion_id} paused successfully for customer {customer_id}")
             return {
@@ -115,7 +119,7 @@ class KeywordActionsService:
             # Set field mask
             client.copy_from(
                 criterion_operation.update_mask,
-                client.field_mask.FieldMask(paths=["status"])
+                field_mask_pb2.FieldMask(paths=["status"])
             )
             
             # Execute the operation
@@ -123,6 +127,7 @@ class KeywordActionsService:
                 customer_id=customer_id,
                 operations=[criterion_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Keyword {ad_group_criterion_id} resumed successfully for customer {customer_id}")
             return {
@@ -175,7 +180,7 @@ class KeywordActionsService:
             # Set field mask
             client.copy_from(
                 criterion_operation.update_mask,
-                client.field_mask.FieldMask(paths=["cpc_bid_micros"])
+                field_mask_pb2.FieldMask(paths=["cpc_bid_micros"])
             )
             
             # Execute the operation
@@ -183,6 +188,7 @@ class KeywordActionsService:
                 customer_id=customer_id,
                 operations=[criterion_operation]
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Keyword {ad_group_criterion_id} bid updated to {new_bid_micros} micros for customer {customer_id}")
             return {
@@ -204,13 +210,16 @@ class KeywordActionsService:
     
     @rate_limited('mutate', tokens=3)
     @log_api_call("", "bulk_pause_keywords")
-    def bulk_pause_keywords(self, customer_id: str, ad_group_criterion_ids: List[str]) -> Dict[str, Any]:
+    def bulk_pause_keywords(self, customer_id: str, ad_group_criterion_ids: List[str],
+                            use_batch_job: Optional[bool] = None) -> Dict[str, Any]:
         """
         Pause multiple keywords in bulk
         
         Args:
             customer_id: Google Ads customer ID
             ad_group_criterion_ids: List of ad group criterion IDs (keyword IDs) to pause
+            use_batch_job: Submit through BatchJobService and return immediately with
+                the job ID (None = only above BATCH_JOB_THRESHOLD keywords)
             
         Returns:
             Result dictionary with success status and details
@@ -233,15 +242,26 @@ class KeywordActionsService:
                 
                 client.copy_from(
                     criterion_operation.update_mask,
-                    client.field_mask.FieldMask(paths=["status"])
+                    field_mask_pb2.FieldMask(paths=["status"])
                 )
                 operations.append(criterion_operation)
             
+            if use_batch_job is None:
+                use_batch_job = len(operations) > BATCH_JOB_THRESHOLD
+            if use_batch_job:
+                return self._submit_batch_job(
+                    client, customer_id,
+                    [(['pause_keyword', criterion_id], operation)
+                     for criterion_id, operation in zip(ad_group_criterion_ids, operations)],
+                    f"Pause {len(operations)} keywords"
+                )
+            
             # Execute bulk operation
             response = ad_group_criterion_service.mutate_ad_group_criteria(
                 customer_id=customer_id,
                 operations=operations
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Bulk paused {len(ad_group_criterion_ids)} keywords for customer {customer_id}")
             return {
@@ -292,7 +312,7 @@ class KeywordActionsService:
                 
                 client.copy_from(
                     criterion_operation.update_mask,
-                    client.field_mask.FieldMask(paths=["status"])
+                    field_mask_pb2.FieldMask(paths=["status"])
                 )
                 operations.append(criterion_operation)
             
@@ -301,6 +321,7 @@ class KeywordActionsService:
                 customer_id=customer_id,
                 operations=operations
             )
+            get_query_partition_cache().invalidate(customer_id)
             
             logger.info(f"Bulk resumed {len(ad_group_criterion_ids)} keywords for customer {customer_id}")
             return {
@@ -382,4 +403,24 @@ class KeywordActionsService:
         except Exception as e:
             error_msg = f"Unexpected error getting keyword status: {e}"
             logger.error(error_msg)
-            return {"success": False, "message": error_msg}
\ No newline at end of file
+            return {"success": False, "message": error_msg}
+    
+    def _submit_batch_job(self, client, customer_id: str, labeled_operations: List[tuple],
+                          description: str) -> Dict[str, Any]:
+        """
+        Submit AdGroupCriterionOperations as a background batch job
+        
+        Results are written to the batch job action log as they are fetched.
+        """
+        operations = [
+            (label, wrap_operation(client, 'ad_group_criterion_operation', operation))
+            for label, operation in labeled_operations
+        ]
+        job = get_batch_job_manager().submit(client, customer_id, operations, description=description)
+        logger.info(f"{description} submitted as batch job {job.job_id} for customer {customer_id}")
+        return {
+            "success": True,
+            "async": True,
+            "job_id": job.job_id,
+            "message": f"{description}: batch job {job.job_id} submitted, results will appear in the action log"
+        }
@@ -3,12 +3,17 @@ KeywordHealthService para el cálculo de health scores
 Implementa el algoritmo de 5 componentes con pesos específicos
 """
 
+import hashlib
+import json
 import logging
+import os
+import threading
 import numpy as np
 import pandas as pd
 from typing import List, Dict, Optional, Tuple, Any
 from datetime import datetime, date, timedelta
 from dataclasses import dataclass
+from pathlib import Path
 from services.database_service import DatabaseService, KeywordMetric, KeywordBenchmark, KeywordHealthScore
 from utils.logger import get_logger
 from modules.google_ads_client import GoogleAdsClientWrapper
@@ -44,6 +49,127 @@ class KeywordAnalytics:
     data_confidence: float
     days_active: int
 
+class KeywordSyncState:
+    """
+    Estado del sync incremental de keywords (un archivo JSON por cuenta)
+    
+    - high_water_mark: último día incluido en un sync exitoso
+    - row_hashes: hash de cada fila (keyword + fecha) dentro de la ventana de
+      reexpresión, para hacer upsert solo de las filas que cambiaron
+    - El estado se guarda solo cuando el upsert fue exitoso (tmp + os.replace)
+    """
+    
+    HASH_FIELDS = (
+        'campaign_name', 'ad_group_name', 'status', 'quality_score',
+        'impressions', 'clicks', 'cost_micros', 'conversions',
+        'conversions_value', 'ctr', 'average_cpc'
+    )
+    
+    def __init__(self, state_dir: str = "data/keyword_sync_state"):
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def _state_file(self, customer_id: str) -> Path:
+        return self.state_dir / f"{customer_id}.json"
+    
+    def load(self, customer_id: str) -> Dict[str, Any]:
+        """Estado guardado de la cuenta (vacío si no hay sync previo)"""
+        state_file = self._state_file(customer_id)
+        if not state_file.exists():
+            return {}
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Estado de sync corrupto para {customer_id}, se hará sync completo: {e}")
+            return {}
+    
+    def get_start_date(self, customer_id: str, today: date, days_back: int,
+                       restatement_days: int) -> Optional[date]:
+        """
+        Primer día a pedir: high-water mark menos la ventana de reexpresión
+        
+        Returns:
+            None si no hay sync previo (usar days_back completo)
+        """
+        high_water_mark = self.load(customer_id).get('high_water_mark')
+        if not high_water_mark:
+            return None
+        try:
+            hwm = date.fromisoformat(high_water_mark)
+        except ValueError:
+            return None
+        # El día del último sync pudo quedar incompleto: siempre se repide
+        start_date = hwm - timedelta(days=max(1, restatement_days) - 1)
+        return min(max(start_date, today - timedelta(days=days_back)), today)
+    
+    @staticmethod
+    def row_key(metric: KeywordMetric) -> str:
+        return "|".join([
+            metric.date.isoformat(), metric.campaign_id, metric.ad_group_id,
+            metric.keyword_text, str(metric.match_type)
+        ])
+    
+    @classmethod
+    def row_hash(cls, metric: KeywordMetric) -> str:
+        values = [str(getattr(metric, field)) for field in cls.HASH_FIELDS]
+        return hashlib.sha1("|".join(values).encode('utf-8')).hexdigest()
+    
+    def diff(self, customer_id: str,
+             metrics: List[KeywordMetric]) -> Tuple[List[KeywordMetric], Dict[str, str]]:
+        """
+        Filtra las filas que no cambiaron desde el último sync
+        
+        Returns:
+            (métricas nuevas o modificadas, hashes de todas las filas recibidas)
+        """
+        stored_hashes = self.load(customer_id).get('row_hashes', {})
+        changed: Dict[str, KeywordMetric] = {}
+        row_hashes: Dict[str, str] = {}
+        for metric in metrics:
+            key = self.row_key(metric)
+            row_hashes[key] = self.row_hash(metric)
+            if stored_hashes.get(key) != row_hashes[key]:
+                changed[key] = metric
+            else:
+                changed.pop(key, None)
+        
+        logger.info(
+            f"🔍 Diff de keywords {customer_id}: {len(changed)}/{len(row_hashes)} filas nuevas o modificadas"
+        )
+        return list(changed.values()), row_hashes
+    
+    def commit(self, customer_id: str, synced_until: date, row_hashes: Dict[str, str],
+               restatement_days: int) -> None:
+        """Guarda el nuevo high-water mark y los hashes dentro de la ventana"""
+        with self._lock:
+            state = self.load(customer_id)
+            hashes = state.get('row_hashes', {})
+            hashes.update(row_hashes)
+            
+            # Las filas anteriores a la ventana ya no se vuelven a pedir
+            cutoff = (synced_until - timedelta(days=max(1, restatement_days))).isoformat()
+            hashes = {key: value for key, value in hashes.items() if key[:10] >= cutoff}
+            
+            state.update({
+                'high_water_mark': synced_until.isoformat(),
+                'updated_at': datetime.now().isoformat(),
+                'row_hashes': hashes
+            })
+            
+            state_file = self._state_file(customer_id)
+            tmp_file = state_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_file, state_file)
+    
+    def reset(self, customer_id: str) -> None:
+        """Olvida el estado de la cuenta (el próximo sync será completo)"""
+        with self._lock:
+            self._state_file(customer_id).unlink(missing_ok=True)
+
+
 class KeywordHealthService:
     """Servicio para calcular health scores de keywords usando algoritmo de 5 componentes"""
     
@@ -663,19 +789,27 @@ class KeywordHealthService:
             logger.error(f"Error convirtiendo métricas de base de datos: {e}")
             return []
 
-    def fetch_real_keyword_data(self, customer_id: str, days_back: int = 30) -> List[Dict[str, Any]]:
+    def fetch_real_keyword_data(self, customer_id: str, days_back: int = 30,
+                                start_date: Optional[date] = None,
+                                fallback_to_db: bool = True) -> List[Dict[str, Any]]:
         """
         Obtener datos reales de keywords desde Google Ads API usando la misma lógica que campaigns
         
         Args:
             customer_id: ID del cliente de Google Ads
             days_back: Días hacia atrás para obtener datos
+            start_date: Fecha inicial explícita (tiene prioridad sobre days_back)
+            fallback_to_db: Si la API falla, devolver las métricas guardadas
+                            en la base de datos (False = lista vacía)
             
         Returns:
             Lista de métricas de keywords
         """
         try:
             if not self.ads_client:
+                if not fallback_to_db:
+                    logger.warning("GoogleAdsClient no disponible")
+                    return []
                 logger.warning("GoogleAdsClient no disponible, usando datos de base de datos")
                 return self._convert_db_metrics_to_dict(customer_id, days_back)
             
@@ -686,7 +820,8 @@ class KeywordHealthService:
                 
                 # Calcular fechas
                 end_date = date.today()
-                start_date = end_date - timedelta(days=days_back)
+                if start_date is None:
+                    start_date = end_date - timedelta(days=days_back)
                 
                 # Configurar reporte de keywords (igual que en campaigns)
                 report_config = ReportConfig(
@@ -747,25 +882,34 @@ class KeywordHealthService:
                     logger.warning(f"No se obtuvieron datos de keywords desde API para cuenta {customer_id}: {report_result.get('error', 'Sin datos')}")
             
             # Fallback: usar query directo si ReportService no está disponible
-            return self._fetch_keywords_direct_query(customer_id, days_back)
+            return self._fetch_keywords_direct_query(customer_id, days_back, start_date)
             
         except Exception as e:
             logger.error(f"Error obteniendo datos reales de keywords: {e}")
+            if not fallback_to_db:
+                return []
             # Fallback a datos de base de datos
             return self._convert_db_metrics_to_dict(customer_id, days_back)
     
-    def _fetch_keywords_direct_query(self, customer_id: str, days_back: int) -> List[Dict[str, Any]]:
+    def _fetch_keywords_direct_query(self, customer_id: str, days_back: int,
+                                     start_date: Optional[date] = None) -> List[Dict[str, Any]]:
         """
         Obtener datos de keywords usando query directo a Google Ads API
         
         Args:
             customer_id: ID del cliente
             days_back: Días hacia atrás
+            start_date: Fecha inicial explícita (rango hasta hoy)
             
         Returns:
             Lista de métricas de keywords
         """
         try:
+            if start_date is not None:
+                date_filter = f"segments.date BETWEEN '{start_date.isoformat()}' AND '{date.today().isoformat()}'"
+            else:
+                date_filter = f"segments.date DURING LAST_{days_back}_DAYS"
+            
             # Query GAQL para obtener datos de keywords (usando la misma lógica que campaigns)
             query = f"""
                 SELECT
@@ -784,7 +928,7 @@ class KeywordHealthService:
                     metrics.ctr,
                     metrics.average_cpc
                 FROM keyword_view
-                WHERE segments.date DURING LAST_{days_back}_DAYS
+                WHERE {date_filter}
                     AND ad_group_criterion.status = 'ENABLED'
                     AND ad_group.status = 'ENABLED'
                     AND campaign.status = 'ENABLED'
@@ -824,13 +968,21 @@ class KeywordHealthService:
             logger.error(f"Error en query directo de keywords: {e}")
             return []
     
-    def sync_keyword_data_to_database(self, customer_id: str, days_back: int = 30) -> bool:
+    def sync_keyword_data_to_database(self, customer_id: str, days_back: int = 30,
+                                      incremental: bool = False,
+                                      restatement_days: int = 3) -> bool:
         """
         Sincronizar datos de keywords reales a la base de datos
         
+        En modo incremental solo se piden los días posteriores al último sync
+        (high-water mark) más una ventana de reexpresión para conversiones
+        tardías, y solo se hace upsert de las filas cuyo hash cambió
+        
         Args:
             customer_id: ID del cliente de Google Ads
-            days_back: Días hacia atrás para obtener datos
+            days_back: Días hacia atrás para obtener datos (sync completo o primer sync)
+            incremental: Usar high-water mark y diff por hash
+            restatement_days: Días ya sincronizados que se vuelven a pedir
             
         Returns:
             True si la sincronización fue exitosa
@@ -838,8 +990,21 @@ class KeywordHealthService:
         try:
             logger.info(f"Sincronizando datos de keywords para cuenta {customer_id}")
             
-            # Obtener datos reales de keywords
-            keyword_data = self.fetch_real_keyword_data(customer_id, days_back)
+            today = date.today()
+            start_date = None
+            sync_state = None
+            if incremental:
+                sync_state = get_keyword_sync_state()
+                start_date = sync_state.get_start_date(customer_id, today, days_back, restatement_days)
+                if start_date is not None:
+                    logger.info(f"🔄 Sync incremental de {customer_id} desde {start_date.isoformat()}")
+            
+            # Obtener datos reales de keywords. En modo incremental solo sirven filas
+            # de la API: las de la base de datos avanzarían el high-water mark sin datos nuevos
+            keyword_data = self.fetch_real_keyword_data(
+                customer_id, days_back, start_date=start_date,
+                fallback_to_db=sync_state is None
+            )
             
             if not keyword_data:
                 logger.warning(f"No se obtuvieron datos de keywords para sincronizar en cuenta {customer_id}")
@@ -853,38 +1018,28 @@ class KeywordHealthService:
                 if not data.get('keyword_text') or not data.get('campaign_id'):
                     continue
                 
-                # Crear objeto KeywordMetric con valores por defecto
-                metric = KeywordMetric(
-                    customer_id=customer_id,
-                    campaign_id=str(data.get('campaign_id', '')),
-                    campaign_name=data.get('campaign_name', ''),
-                    ad_group_id=str(data.get('ad_group_id', '')),
-                    ad_group_name=data.get('ad_group_name', ''),
-                    keyword_text=data.get('keyword_text', ''),
-                    match_type=data.get('match_type', 'UNKNOWN'),
-                    status=data.get('status', 'UNKNOWN'),
-                    quality_score=data.get('quality_score'),
-                    impressions=int(data.get('impressions', 0)),
-                    clicks=int(data.get('clicks', 0)),
-                    cost_micros=int(data.get('cost_micros', 0)),
-                    conversions=float(data.get('conversions', 0)),
-                    conversions_value=float(data.get('conversion_value', 0)),
-                    ctr=float(data.get('ctr', 0)) / 100 if data.get('ctr') else 0,  # Convertir de porcentaje a decimal
-                    average_cpc=float(data.get('average_cpc', 0)) * 1_000_000 if data.get('average_cpc') else 0,  # Convertir a micros
-                    date=datetime.strptime(data.get('date', date.today().isoformat()), '%Y-%m-%d').date(),
-                    extracted_at=datetime.now()
-                )
-                keyword_metrics.append(metric)
+                keyword_metrics.append(self._build_keyword_metric(customer_id, data))
             
             if not keyword_metrics:
                 logger.warning(f"No se generaron métricas válidas para cuenta {customer_id}")
                 # Intentar obtener keywords sin métricas
                 return self._sync_keywords_without_metrics(customer_id)
             
+            # Diff por hash: solo filas nuevas o modificadas
+            row_hashes = {}
+            if sync_state is not None:
+                keyword_metrics, row_hashes = sync_state.diff(customer_id, keyword_metrics)
+                if not keyword_metrics:
+                    sync_state.commit(customer_id, today, row_hashes, restatement_days)
+                    logger.info(f"Sin cambios en keywords para cuenta {customer_id}")
+                    return True
+            
             # Insertar en base de datos
             success = self.db_service.bulk_insert_keyword_metrics(keyword_metrics)
             
             if success:
+                if sync_state is not None:
+                    sync_state.commit(customer_id, today, row_hashes, restatement_days)
                 logger.info(f"Sincronizados {len(keyword_metrics)} registros de keywords para cuenta {customer_id}")
                 return True
             else:
@@ -895,6 +1050,30 @@ class KeywordHealthService:
             logger.error(f"Error sincronizando datos de keywords: {e}")
             return False
     
+    @staticmethod
+    def _build_keyword_metric(customer_id: str, data: Dict[str, Any]) -> KeywordMetric:
+        """Crear objeto KeywordMetric con valores por defecto"""
+        return KeywordMetric(
+            customer_id=customer_id,
+            campaign_id=str(data.get('campaign_id', '')),
+            campaign_name=data.get('campaign_name', ''),
+            ad_group_id=str(data.get('ad_group_id', '')),
+            ad_group_name=data.get('ad_group_name', ''),
+            keyword_text=data.get('keyword_text', ''),
+            match_type=data.get('match_type', 'UNKNOWN'),
+            status=data.get('status', 'UNKNOWN'),
+            quality_score=data.get('quality_score'),
+            impressions=int(data.get('impressions', 0)),
+            clicks=int(data.get('clicks', 0)),
+            cost_micros=int(data.get('cost_micros', 0)),
+            conversions=float(data.get('conversions', 0)),
+            conversions_value=float(data.get('conversion_value', 0)),
+            ctr=float(data.get('ctr', 0)) / 100 if data.get('ctr') else 0,  # Convertir de porcentaje a decimal
+            average_cpc=float(data.get('average_cpc', 0)) * 1_000_000 if data.get('average_cpc') else 0,  # Convertir a micros
+            date=datetime.strptime(data.get('date', date.today().isoformat()), '%Y-%m-%d').date(),
+            extracted_at=datetime.now()
+        )
+    
     def _sync_keywords_without_metrics(self, customer_id: str) -> bool:
         """
         Sincronizar keywords sin métricas (solo estructura) para cuentas con keywords inactivas
@@ -986,4 +1165,19 @@ class KeywordHealthService:
                 
         except Exception as e:
             logger.error(f"Error obteniendo moneda de cuenta: {e}")
-            return 'USD'
\ No newline at end of file
+            return 'USD'
+
+
+# Instancia global
+_keyword_sync_state = None
+_keyword_sync_state_lock = threading.Lock()
+
+
+def get_keyword_sync_state() -> KeywordSyncState:
+    """Obtener instancia global del estado de sync incremental"""
+    global _keyword_sync_state
+    if _keyword_sync_state is None:
+        with _keyword_sync_state_lock:
+            if _keyword_sync_state is None:
+                _keyword_sync_state = KeywordSyncState()
+    return _keyword_sync_state
@@ -8,6 +8,7 @@ from typing import List, Dict, Optional, Tuple, Any, Set
 from datetime import datetime, timedelta
 from services.database_service import DatabaseService, MCCAccount, KeywordBenchmark
 from modules.google_ads_client import GoogleAdsClientWrapper
+from modules.account_hierarchy import get_account_hierarchy
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -32,16 +33,25 @@ class MCCManagementService:
                 'new_accounts': []
             }
             
-            # Obtener cuentas existentes en la base de datos
-            existing_accounts = {acc.customer_id for acc in self.db_service.get_all_accounts(active_only=False)}
+            # Cuentas ya sincronizadas, para comparar campo a campo
+            existing_accounts = {acc.customer_id: acc for acc in self.db_service.get_all_accounts(active_only=False)}
             
-            # Descubrir cuentas desde Google Ads API
-            discovered_accounts = self._discover_accounts_from_api(manager_customer_id)
+            # Refresco incremental de la jerarquía persistida (sin recorrer todo el árbol).
+            # El diff se calcula contra la base de datos y no contra el resultado del
+            # refresco: otro refresco (p. ej. en segundo plano) puede haberlo consumido
+            hierarchy = get_account_hierarchy()
+            hierarchy.refresh(self.ads_client)
+            discovered_accounts = self._discover_accounts_from_hierarchy(manager_customer_id)
             
             for account_info in discovered_accounts:
                 try:
                     customer_id = account_info['customer_id']
                     
+                    # Cuentas ya sincronizadas que no cambiaron no se reescriben
+                    existing = existing_accounts.get(customer_id)
+                    if existing is not None and not self._account_changed(existing, account_info):
+                        continue
+                    
                     # Crear objeto MCCAccount
                     account = MCCAccount(
                         customer_id=customer_id,
@@ -51,12 +61,12 @@ class MCCManagementService:
                         is_active=account_info.get('is_active', True),
                         account_type=account_info.get('account_type', 'child'),
                         parent_customer_id=account_info.get('parent_customer_id'),
-                        discovered_at=datetime.now() if customer_id not in existing_accounts else None
+                        discovered_at=datetime.now() if existing is None else existing.discovered_at
                     )
                     
                     # Insertar o actualizar cuenta
                     if self.db_service.upsert_account(account):
-                        if customer_id not in existing_accounts:
+                        if existing is None:
                             results['discovered'] += 1
                             results['new_accounts'].append(customer_id)
                             logger.info(f"Nueva cuenta descubierta: {customer_id}")
@@ -77,99 +87,43 @@ class MCCManagementService:
             logger.error(f"Error en descubrimiento de cuentas: {e}")
             return {'discovered': 0, 'updated': 0, 'errors': 1, 'new_accounts': []}
 
-    def _discover_accounts_from_api(self, manager_customer_id: str = None) -> List[Dict]:
-        """Descubrir cuentas desde Google Ads API"""
-        try:
-            discovered_accounts = []
-            
-            # Si no se especifica manager, usar todas las cuentas accesibles
-            if not manager_customer_id:
-                accessible_customers = self.ads_client.get_accessible_customers()
-                customer_ids = [customer.id for customer in accessible_customers]
-            else:
-                # Obtener cuentas hijas del manager específico
-                customer_ids = self._get_child_accounts(manager_customer_id)
-            
-            for customer_id in customer_ids:
-                try:
-                    # Obtener información detallada de la cuenta
-                    account_info = self._get_account_details(customer_id)
-                    if account_info:
-                        discovered_accounts.append(account_info)
-                        
-                except Exception as e:
-                    logger.warning(f"No se pudo obtener información de la cuenta {customer_id}: {e}")
-                    continue
-            
-            logger.info(f"Descubiertas {len(discovered_accounts)} cuentas desde API")
-            return discovered_accounts
-            
-        except Exception as e:
-            logger.error(f"Error descubriendo cuentas desde API: {e}")
-            return []
-
-    def _get_child_accounts(self, manager_customer_id: str) -> List[str]:
-        """Obtener cuentas hijas de un manager account"""
-        try:
-            query = """
-                SELECT 
-                    customer_client.id,
-                    customer_client.descriptive_name,
-                    customer_client.currency_code,
-                    customer_client.time_zone,
-                    customer_client.status
-                FROM customer_client
-                WHERE customer_client.manager = FALSE
-            """
-            
-            response = self.ads_client.search(manager_customer_id, query)
-            child_accounts = []
-            
-            for row in response:
-                customer_client = row.customer_client
-                if customer_client.status.name == 'ENABLED':
-                    child_accounts.append(str(customer_client.id))
-            
-            logger.info(f"Encontradas {len(child_accounts)} cuentas hijas para manager {manager_customer_id}")
-            return child_accounts
-            
-        except Exception as e:
-            logger.error(f"Error obteniendo cuentas hijas para {manager_customer_id}: {e}")
-            return []
+    def _discover_accounts_from_hierarchy(self, manager_customer_id: str = None) -> List[Dict]:
+        """Cuentas de la jerarquía persistida (todas o las de un manager)"""
+        hierarchy = get_account_hierarchy()
+        
+        if manager_customer_id:
+            nodes = hierarchy.get_descendants(str(manager_customer_id).replace('-', ''))
+        else:
+            nodes = [hierarchy.get_account(cid) for cid in sorted(hierarchy.accounts)]
+        
+        discovered_accounts = []
+        for node in nodes:
+            if node is None or node.status == 'UNAVAILABLE':
+                continue
+            discovered_accounts.append({
+                'customer_id': node.customer_id,
+                'account_name': node.name or f'Account {node.customer_id}',
+                'currency_code': node.currency_code or 'USD',
+                'time_zone': node.time_zone or 'America/New_York',
+                'is_active': node.status == 'ENABLED',
+                'account_type': 'manager' if node.manager else 'child',
+                'parent_customer_id': node.parent_id
+            })
+        
+        logger.info(f"Descubiertas {len(discovered_accounts)} cuentas desde la jerarquía")
+        return discovered_accounts
 
-    def _get_account_details(self, customer_id: str) -> Optional[Dict]:
-        """Obtener detalles de una cuenta específica"""
-        try:
-            query = """
-                SELECT 
-                    customer.id,
-                    customer.descriptive_name,
-                    customer.currency_code,
-                    customer.time_zone,
-                    customer.status,
-                    customer.manager
-                FROM customer
-                LIMIT 1
-            """
-            
-            response = self.ads_client.search(customer_id, query)
-            
-            for row in response:
-                customer = row.customer
-                return {
-                    'customer_id': str(customer.id),
-                    'account_name': customer.descriptive_name or f'Account {customer.id}',
-                    'currency_code': customer.currency_code or 'USD',
-                    'time_zone': customer.time_zone or 'America/New_York',
-                    'is_active': customer.status.name == 'ENABLED',
-                    'account_type': 'manager' if customer.manager else 'child'
-                }
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error obteniendo detalles de cuenta {customer_id}: {e}")
-            return None
+    @staticmethod
+    def _account_changed(existing: MCCAccount, account_info: Dict) -> bool:
+        """Indica si la cuenta descubierta difiere de la fila guardada"""
+        return (
+            existing.account_name != account_info.get('account_name')
+            or existing.currency_code != account_info.get('currency_code')
+            or existing.time_zone != account_info.get('time_zone')
+            or existing.is_active != account_info.get('is_active', True)
+            or existing.account_type != account_info.get('account_type', 'child')
+            or existing.parent_customer_id != account_info.get('parent_customer_id')
+        )
 
     def _create_default_benchmarks(self, customer_id: str, account_info: Dict):
         """Crear benchmarks por defecto para una nueva cuenta"""
@@ -496,182 +450,3 @@ class MCCManagementService:
         except Exception as e:
             logger.warning(f"No se pudo validar acceso a cuenta {customer_id}: {e}")
             return False
-
-    def discover_and_sync_accounts(self) -> Dict[str, Any]:
-        """
-        Descubrir y sincronizar cuentas MCC desde Google Ads API
-        
-        Returns:
-            Resultado de la sincronización con estadísticas
-        """
-        try:
-            logger.info("Iniciando descubrimiento y sincronización de cuentas MCC")
-            
-            # Obtener cliente de Google Ads
-            client = self.ads_client.get_client()
-            if not client:
-                logger.error("No se pudo obtener cliente de Google Ads")
-                return {
-                    'success': False,
-                    'error': 'No se pudo conectar a Google Ads API',
-                    'accounts_discovered': 0,
-                    'accounts_synced': 0
-                }
-            
-            # Cargar customer IDs desde configuración
-            customer_ids = self.ads_client.load_customer_ids()
-            
-            if not customer_ids:
-                logger.warning("No se encontraron customer IDs en la configuración")
-                return {
-                    'success': True,
-                    'message': 'No hay customer IDs configurados',
-                    'accounts_discovered': 0,
-                    'accounts_synced': 0
-                }
-            
-            accounts_discovered = 0
-            accounts_synced = 0
-            errors = []
-            
-            # Procesar cada customer ID
-            for customer_id in customer_ids:
-                try:
-                    # Obtener información de la cuenta
-                    account_info = self.ads_client.get_account_info(customer_id)
-                    
-                    if account_info:
-                        accounts_discovered += 1
-                        
-                        # Crear objeto MCCAccount
-                        mcc_account = MCCAccount(
-                            customer_id=customer_id,
-                            account_name=account_info.get('descriptive_name', f'Account {customer_id}'),
-                            currency_code=account_info.get('currency_code', 'USD'),
-                            time_zone=account_info.get('time_zone', 'America/New_York'),
-                            is_active=True,
-                            account_type='child',
-                            last_sync=datetime.now()
-                        )
-                        
-                        # Verificar si la cuenta ya existe
-                        existing_account = self.db_service.get_mcc_account(customer_id)
-                        
-                        if existing_account:
-                            # Actualizar cuenta existente
-                            if self.db_service.update_mcc_account(mcc_account):
-                                accounts_synced += 1
-                                logger.info(f"Cuenta actualizada: {mcc_account.account_name} ({customer_id})")
-                            else:
-                                logger.warning(f"No se pudo actualizar cuenta: {customer_id}")
-                        else:
-                            # Insertar nueva cuenta
-                            if self.db_service.insert_mcc_account(mcc_account):
-                                accounts_synced += 1
-                                logger.info(f"Nueva cuenta sincronizada: {mcc_account.account_name} ({customer_id})")
-                                
-                                # Crear benchmarks por defecto para nueva cuenta
-                                self._create_default_benchmarks_for_account(mcc_account)
-                            else:
-                                logger.warning(f"No se pudo insertar nueva cuenta: {customer_id}")
-                    else:
-                        logger.warning(f"No se pudo obtener información para customer ID: {customer_id}")
-                        
-                except Exception as e:
-                    error_msg = f"Error procesando customer ID {customer_id}: {e}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-            
-            result = {
-                'success': True,
-                'accounts_discovered': accounts_discovered,
-                'accounts_synced': accounts_synced,
-                'total_customer_ids': len(customer_ids),
-                'errors': errors,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            logger.info(f"Sincronización completada: {accounts_synced}/{accounts_discovered} cuentas sincronizadas")
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error en descubrimiento y sincronización de cuentas: {e}")
-            return {
-                'success': False,
-                'error': str(e),
-                'accounts_discovered': 0,
-                'accounts_synced': 0
-            }
-    
-    def _detect_industry_vertical(self, account_info: Dict[str, Any]) -> str:
-        """
-        Detectar vertical de industria basado en información de la cuenta
-        
-        Args:
-            account_info: Información de la cuenta de Google Ads
-            
-        Returns:
-            Vertical de industria detectado
-        """
-        try:
-            account_name = account_info.get('descriptive_name', '').lower()
-            
-            # Mapeo de palabras clave a verticales
-            industry_keywords = {
-                'retail': ['store', 'shop', 'retail', 'ecommerce', 'fashion', 'clothing', 'shoes'],
-                'technology': ['tech', 'software', 'saas', 'app', 'digital', 'cloud', 'ai'],
-                'services': ['service', 'consulting', 'agency', 'professional', 'legal', 'medical'],
-                'finance': ['bank', 'finance', 'insurance', 'loan', 'credit', 'investment'],
-                'healthcare': ['health', 'medical', 'clinic', 'hospital', 'dental', 'pharmacy'],
-                'education': ['school', 'university', 'education', 'learning', 'course', 'training'],
-                'travel': ['travel', 'hotel', 'tourism', 'vacation', 'flight', 'booking'],
-                'automotive': ['car', 'auto', 'vehicle', 'dealership', 'automotive', 'garage'],
-                'real_estate': ['real estate', 'property', 'home', 'house', 'apartment', 'realty']
-            }
-            
-            # Buscar coincidencias
-            for vertical, keywords in industry_keywords.items():
-                if any(keyword in account_name for keyword in keywords):
-                    return vertical
-            
-            # Por defecto, asignar 'retail'
-            return 'retail'
-            
-        except Exception as e:
-            logger.error(f"Error detectando vertical de industria: {e}")
-            return 'retail'
-    
-    def _create_default_benchmarks_for_account(self, account: MCCAccount):
-        """
-        Crear benchmarks por defecto para una nueva cuenta
-        
-        Args:
-            account: Cuenta MCC para la cual crear benchmarks
-        """
-        try:
-            # Obtener benchmarks por defecto para la industria
-            default_benchmarks = self.get_default_benchmarks_by_industry(
-                account.industry_vertical, 
-                account.currency
-            )
-            
-            # Crear benchmark en la base de datos
-            benchmark = KeywordBenchmark(
-                customer_id=account.customer_id,
-                benchmark_name=f"{account.industry_vertical.title()} Industry Standard",
-                target_ctr=default_benchmarks['target_ctr'],
-                target_conversion_rate=default_benchmarks['target_conversion_rate'],
-                max_cpa=default_benchmarks['max_cpa'],
-                min_quality_score=default_benchmarks['min_quality_score'],
-                target_impression_share=default_benchmarks['target_impression_share'],
-                is_default=True,
-                created_at=datetime.now()
-            )
-            
-            if self.db_service.insert_keyword_benchmark(benchmark):
-                logger.info(f"Benchmarks por defecto creados para {account.account_name}")
-            else:
-                logger.warning(f"No se pudieron crear benchmarks para {account.account_name}")
-                
-        except Exception as e:
-            logger.error(f"Error creando benchmarks por defecto para {account.account_name}: {e}")
\ No newline at end of file
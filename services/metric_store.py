@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+============================================================================
+METRIC STORE PARA GENERADOR IA 2.0
+Series temporales en buffers circulares NumPy por (métrica, categoría)
+y análisis vectorizado (anomalías y tendencias) de todas las series a la vez
+Versión: 1.0
+============================================================================
+"""
+
+import itertools
+import logging
+import warnings
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_us(timestamp: datetime) -> int:
+    """Convertir datetime (naive, hora local) a microsegundos desde epoch"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+class MetricSeries:
+    """
+    Buffer circular de una serie (timestamps, valores, secuencia y registro)
+
+    append y la retención son O(1) amortizado: los puntos antiguos se
+    descartan desde la cabeza y el buffer solo crece (x2) cuando se llena.
+    Si llegan puntos fuera de orden la retención filtra todo el buffer
+    (solo cuando el timestamp mínimo queda antes del corte).
+    """
+
+    __slots__ = ('_ts', '_values', '_seq', '_records', '_head', '_size', '_min_ts', '_in_order')
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(1, capacity)
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._seq = np.empty(capacity, dtype=np.int64)
+        self._records = np.empty(capacity, dtype=object)
+        self._head = 0
+        self._size = 0
+        self._min_ts = 0
+        self._in_order = True
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._ts)
+
+    def append(self, ts_us: int, value: float, seq: int, record: Any) -> None:
+        """Agregar un punto al final"""
+        if self._size == self.capacity:
+            self._grow()
+        if not self._size:
+            self._min_ts = ts_us
+            self._in_order = True
+        else:
+            if ts_us < self._ts[(self._head + self._size - 1) % self.capacity]:
+                self._in_order = False
+            self._min_ts = min(self._min_ts, ts_us)
+        idx = (self._head + self._size) % self.capacity
+        self._ts[idx] = ts_us
+        self._values[idx] = value
+        self._seq[idx] = seq
+        self._records[idx] = record
+        self._size += 1
+
+    def evict_before(self, cutoff_us: int) -> int:
+        """Descartar los puntos anteriores al corte"""
+        if not self._size or self._min_ts >= cutoff_us:
+            return 0
+        if not self._in_order:
+            return self._compact(self._ordered(self._ts) >= cutoff_us)
+
+        evicted = 0
+        capacity = self.capacity
+        while self._size and self._ts[self._head] < cutoff_us:
+            self._records[self._head] = None
+            self._head = (self._head + 1) % capacity
+            self._size -= 1
+            evicted += 1
+        if self._size:
+            self._min_ts = self._ts[self._head]
+        return evicted
+
+    def evict_oldest(self, count: int) -> None:
+        """Descartar los count puntos más antiguos (límite de puntos)"""
+        for _ in range(min(count, self._size)):
+            self._records[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+            self._size -= 1
+
+    def _compact(self, keep: np.ndarray) -> int:
+        """Conservar solo los puntos marcados (en orden de inserción)"""
+        kept = int(keep.sum())
+        for name in ('_ts', '_values', '_seq', '_records'):
+            old = getattr(self, name)
+            new = np.empty(self.capacity, dtype=old.dtype)
+            new[:kept] = self._ordered(old)[keep]
+            setattr(self, name, new)
+        evicted = self._size - kept
+        self._head = 0
+        self._size = kept
+        if kept:
+            ts = self._ts[:kept]
+            self._min_ts = ts.min()
+            self._in_order = bool(np.all(ts[1:] >= ts[:-1]))
+        return evicted
+
+    def _grow(self) -> None:
+        new_capacity = self.capacity * 2
+        for name in ('_ts', '_values', '_seq', '_records'):
+            old = getattr(self, name)
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[:self._size] = self._ordered(old)
+            setattr(self, name, new)
+        self._head = 0
+
+    def _ordered(self, array: np.ndarray) -> np.ndarray:
+        """Vista (o copia si da la vuelta) en orden de inserción"""
+        end = self._head + self._size
+        if end <= len(array):
+            return array[self._head:end]
+        return np.concatenate((array[self._head:], array[:end - len(array)]))
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._ordered(self._ts)
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._ordered(self._values)
+
+    @property
+    def sequence(self) -> np.ndarray:
+        return self._ordered(self._seq)
+
+    @property
+    def records(self) -> np.ndarray:
+        return self._ordered(self._records)
+
+
+class MetricSeriesStore:
+    """
+    Almacén de series por (métrica, categoría) con retención por antigüedad
+
+    - Los puntos más viejos que retention_days al insertar se descartan
+      (igual que la retención original de add_metric_data)
+    - Las consultas filtran con máscaras NumPy y mantienen el orden de
+      inserción aun combinando varias categorías (número de secuencia global)
+    """
+
+    def __init__(self, retention_days: int = 365, max_points_per_series: Optional[int] = None):
+        self.retention_days = retention_days
+        self.max_points_per_series = max_points_per_series
+        self._series: Dict[Tuple[Hashable, Optional[str]], MetricSeries] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(len(series) for series in self._series.values())
+
+    def append(self, metric_type: Hashable, timestamp: datetime, value: float,
+               category: Optional[str] = None, record: Any = None) -> bool:
+        """
+        Agregar un punto en O(1) amortizado
+
+        Returns:
+            False si el punto ya estaba fuera del período de retención
+        """
+        cutoff_us = to_epoch_us(datetime.now() - timedelta(days=self.retention_days))
+        ts_us = to_epoch_us(timestamp)
+
+        key = (metric_type, category)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = MetricSeries()
+
+        series.evict_before(cutoff_us)
+        if ts_us < cutoff_us:
+            return False
+
+        series.append(ts_us, float(value), next(self._counter), record)
+        if self.max_points_per_series and len(series) > self.max_points_per_series:
+            series.evict_oldest(len(series) - self.max_points_per_series)
+        return True
+
+    def series_keys(self, metric_type: Optional[Hashable] = None,
+                    category: Optional[str] = None) -> List[Tuple[Hashable, Optional[str]]]:
+        """Claves (métrica, categoría) con datos, opcionalmente filtradas"""
+        return [
+            key for key, series in self._series.items()
+            if len(series)
+            and (metric_type is None or key[0] == metric_type)
+            and (category is None or key[1] == category)
+        ]
+
+    def query(self, metric_type: Hashable, start: datetime, end: datetime,
+              category: Optional[str] = None) -> List[Any]:
+        """Registros en [start, end] en orden de inserción"""
+        _, _, records = self._select(metric_type, start, end, category, with_records=True)
+        return records.tolist()
+
+    def arrays(self, metric_type: Hashable, start: datetime, end: datetime,
+               category: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps en µs, valores) en [start, end] en orden de inserción"""
+        timestamps, values, _ = self._select(metric_type, start, end, category)
+        return timestamps, values
+
+    def panel(self, keys: Iterable[Tuple[Hashable, Optional[str]]],
+              start: datetime, end: datetime) -> Tuple[List[Tuple[Hashable, Optional[str]]], np.ndarray, np.ndarray]:
+        """
+        Matriz de puntos (series x posición) alineada a la izquierda con NaN
+
+        Returns:
+            Tuple de (claves, timestamps int64 con -1 de relleno, valores float)
+        """
+        keys = list(keys)
+        selected = [self.arrays(metric, start, end, category) for metric, category in keys]
+        width = max((len(values) for _, values in selected), default=0)
+
+        timestamps = np.full((len(keys), width), -1, dtype=np.int64)
+        values = np.full((len(keys), width), np.nan, dtype=np.float64)
+        for row, (ts, vals) in enumerate(selected):
+            timestamps[row, :len(ts)] = ts
+            values[row, :len(vals)] = vals
+        return keys, timestamps, values
+
+    def _select(self, metric_type: Hashable, start: datetime, end: datetime,
+                category: Optional[str], with_records: bool = False):
+        start_us, end_us = to_epoch_us(start), to_epoch_us(end)
+        keys = [(metric_type, category)] if category is not None else self.series_keys(metric_type)
+
+        parts = []
+        for key in keys:
+            series = self._series.get(key)
+            if not series:
+                continue
+            ts = series.timestamps
+            mask = (ts >= start_us) & (ts <= end_us)
+            if not mask.any():
+                continue
+            parts.append((
+                ts[mask], series.values[mask], series.sequence[mask],
+                series.records[mask] if with_records else None
+            ))
+
+        if not parts:
+            empty_records = np.empty(0, dtype=object)
+            return np.empty(0, dtype=np.int64), np.empty(0), empty_records
+
+        if len(parts) == 1:
+            ts, values, _, records = parts[0]
+        else:
+            order = np.argsort(np.concatenate([p[2] for p in parts]), kind='stable')
+            ts = np.concatenate([p[0] for p in parts])[order]
+            values = np.concatenate([p[1] for p in parts])[order]
+            records = np.concatenate([p[3] for p in parts])[order] if with_records else None
+        return ts, values, records
+
+
+# =============================================================================
+# DETECCIÓN VECTORIZADA (filas = series, columnas = puntos; NaN = sin dato)
+# =============================================================================
+
+def global_zscores(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """z-score contra media y desviación (ddof=1) de toda la serie"""
+    counts = np.sum(~np.isnan(values), axis=1, keepdims=True)
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        mean = np.nanmean(values, axis=1, keepdims=True)
+        std = np.nanstd(values, axis=1, ddof=1, keepdims=True)
+        z = np.where((counts > 1) & (std > 0), np.abs(values - mean) / std, 0.0)
+    expected = np.broadcast_to(mean, values.shape)
+    return np.where(np.isnan(values), np.nan, z), expected
+
+
+def rolling_zscores(values: np.ndarray, window: int,
+                    min_periods: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """z-score de cada punto contra la ventana de los window puntos previos"""
+    min_periods = min_periods or max(3, window // 2)
+    n_series, width = values.shape
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+
+    zeros = np.zeros((n_series, 1))
+    cs = np.hstack((zeros, np.cumsum(filled, axis=1)))
+    cs2 = np.hstack((zeros, np.cumsum(filled * filled, axis=1)))
+    cn = np.hstack((zeros, np.cumsum(valid, axis=1)))
+
+    end = np.arange(width)
+    begin = np.maximum(end - window, 0)
+    total = cs[:, end] - cs[:, begin]
+    total_sq = cs2[:, end] - cs2[:, begin]
+    count = cn[:, end] - cn[:, begin]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        var = (total_sq - total * mean) / (count - 1)
+        std = np.sqrt(np.maximum(var, 0.0))
+        z = np.abs(values - mean) / std
+    usable = valid & (count >= min_periods) & (std > 0)
+    return np.where(usable, z, np.nan), mean
+
+
+def ewma_zscores(values: np.ndarray, alpha: float = 0.3,
+                 warmup: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """z-score contra media/varianza exponencial previas (vectorizado por serie)"""
+    n_series, width = values.shape
+    z = np.full(values.shape, np.nan)
+    expected = np.full(values.shape, np.nan)
+
+    mean = np.full(n_series, np.nan)
+    var = np.zeros(n_series)
+    seen = np.zeros(n_series, dtype=np.int64)
+
+    for t in range(width):
+        x = values[:, t]
+        valid = ~np.isnan(x)
+        started = valid & ~np.isnan(mean)
+
+        expected[:, t] = mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(var)
+            score = np.abs(x - mean) / std
+        z[:, t] = np.where(started & (seen >= warmup) & (std > 0), score, np.nan)
+
+        diff = np.where(started, x - mean, 0.0)
+        increment = alpha * diff
+        mean = np.where(started, mean + increment, np.where(valid, x, mean))
+        var = np.where(started, (1 - alpha) * (var + diff * increment), var)
+        seen += valid
+    return z, expected
+
+
+def seasonal_zscores(values: np.ndarray, period: int = 7,
+                     seasons: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+    """z-score del residuo contra la media de los mismos puntos de temporadas previas"""
+    n_series, width = values.shape
+    lagged = np.full((seasons, n_series, width), np.nan)
+    for k in range(1, seasons + 1):
+        lag = k * period
+        if lag < width:
+            lagged[k - 1, :, lag:] = values[:, :-lag]
+
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        baseline = np.nanmean(lagged, axis=0)
+        residual = values - baseline
+        counts = np.sum(~np.isnan(residual), axis=1, keepdims=True)
+        std = np.nanstd(residual, axis=1, ddof=1, keepdims=True)
+        z = np.abs(residual) / std
+    usable = ~np.isnan(residual) & (counts > 1) & (std > 0)
+    return np.where(usable, z, np.nan), baseline
+
+
+def classify_severity(z: np.ndarray, min_deviation: np.ndarray,
+                      max_deviation: np.ndarray) -> np.ndarray:
+    """Severidad por punto ('' = no es anomalía) con los umbrales por serie"""
+    min_dev = np.asarray(min_deviation, dtype=float).reshape(-1, 1)
+    max_dev = np.asarray(max_deviation, dtype=float).reshape(-1, 1)
+    z = np.nan_to_num(z, nan=0.0)
+    return np.select(
+        [z > max_dev, z > min_dev * 2, z > min_dev],
+        ['critical', 'high', 'medium'],
+        default=''
+    )
+
+
+# =============================================================================
+# TENDENCIAS VECTORIZADAS (filas = series, columnas = periodos; NaN = sin dato)
+# =============================================================================
+
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def panel_trends(values: np.ndarray,
+                 forecast_periods: int = 7,
+                 weekdays: Optional[np.ndarray] = None,
+                 slope_threshold: float = 0.1,
+                 forecast_window: int = 7) -> Dict[str, np.ndarray]:
+    """
+    Tendencia, comparación de mitades y pronóstico de todas las series a la vez
+
+    Los periodos sin dato (NaN) se omiten: cada serie se evalúa sobre sus
+    puntos válidos en orden, igual que el análisis de una sola serie.
+
+    Args:
+        values: Matriz (series x periodos)
+        forecast_periods: Periodos a pronosticar
+        weekdays: Día de la semana (0=lunes) de cada columna para el patrón semanal
+        slope_threshold: Pendiente mínima para considerar la tendencia up/down
+        forecast_window: Puntos recientes promediados para el pronóstico
+
+    Returns:
+        Diccionario de arrays por serie: points, slope, trend_direction,
+        trend_strength, first_period_avg, second_period_avg, change_percent,
+        forecast (series x forecast_periods), forecast_confidence,
+        best_day y worst_day (None si hay 14 puntos o menos)
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values.reshape(1, -1)
+    n_series = values.shape[0]
+
+    valid = ~np.isnan(values)
+    points = valid.sum(axis=1)
+    rank = np.cumsum(valid, axis=1) - 1
+    y = np.where(valid, values, 0.0)
+
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+
+        # Regresión lineal sobre la posición de cada punto válido
+        x = np.where(valid, rank, 0.0)
+        mean_x = np.where(points > 0, (points - 1) / 2.0, 0.0)
+        mean_y = y.sum(axis=1) / points
+        dx = np.where(valid, x - mean_x[:, None], 0.0)
+        dy = np.where(valid, values - mean_y[:, None], 0.0)
+        sxy = (dx * dy).sum(axis=1)
+        sxx = (dx * dx).sum(axis=1)
+        syy = (dy * dy).sum(axis=1)
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+        strength = np.where((sxx > 0) & (syy > 0), np.abs(sxy / np.sqrt(sxx * syy)), 0.0)
+
+        enough_for_trend = points >= 3
+        slope = np.where(enough_for_trend, slope, 0.0)
+        strength = np.where(enough_for_trend, strength, 0.0)
+        direction = np.select(
+            [slope > slope_threshold, slope < -slope_threshold],
+            ['up', 'down'],
+            default='stable'
+        ).astype(object)
+
+        # Comparación primera mitad vs segunda mitad
+        mid = points // 2
+        in_first = valid & (rank < mid[:, None])
+        first_sum = np.where(in_first, values, 0.0).sum(axis=1)
+        first_avg = first_sum / mid
+        second_avg = (y.sum(axis=1) - first_sum) / (points - mid)
+        change = np.where(first_avg != 0, (second_avg - first_avg) / first_avg * 100, 0.0)
+        comparable = points >= 4
+        first_avg = np.where(comparable, first_avg, np.nan)
+        second_avg = np.where(comparable, second_avg, np.nan)
+        change = np.where(comparable, change, np.nan)
+
+        # Pronóstico: promedio reciente + pendiente entre extremos
+        window = np.minimum(forecast_window, points)
+        in_recent = valid & (rank >= (points - window)[:, None])
+        recent_avg = np.where(in_recent, values, 0.0).sum(axis=1) / window
+        first_value = np.where(valid & (rank == 0), values, 0.0).sum(axis=1)
+        last_value = np.where(valid & (rank == (points - 1)[:, None]), values, 0.0).sum(axis=1)
+        step = np.where(points > 1, (last_value - first_value) / points, 0.0)
+        horizon = np.arange(1, forecast_periods + 1)
+        forecast = np.maximum(0.0, recent_avg[:, None] + step[:, None] * horizon)
+        forecast[points < 3] = np.nan
+        confidence = np.maximum(0.3, 0.9 - horizon * 0.1)
+
+        # Patrón semanal (mejor y peor día)
+        best_day = np.full(n_series, None, dtype=object)
+        worst_day = np.full(n_series, None, dtype=object)
+        if weekdays is not None:
+            weekdays = np.asarray(weekdays)
+            day_means = np.stack([
+                np.nanmean(values[:, weekdays == day], axis=1) if np.any(weekdays == day)
+                else np.full(n_series, np.nan)
+                for day in range(7)
+            ], axis=1)
+            has_pattern = (points > 14) & ~np.all(np.isnan(day_means), axis=1)
+            filled_max = np.where(np.isnan(day_means), -np.inf, day_means)
+            filled_min = np.where(np.isnan(day_means), np.inf, day_means)
+            names = np.array(WEEKDAY_NAMES, dtype=object)
+            best_day[has_pattern] = names[np.argmax(filled_max, axis=1)][has_pattern]
+            worst_day[has_pattern] = names[np.argmin(filled_min, axis=1)][has_pattern]
+
+    return {
+        'points': points,
+        'slope': slope,
+        'trend_direction': direction,
+        'trend_strength': strength,
+        'first_period_avg': first_avg,
+        'second_period_avg': second_avg,
+        'change_percent': change,
+        'forecast': forecast,
+        'forecast_confidence': confidence,
+        'best_day': best_day,
+        'worst_day': worst_day
+    }
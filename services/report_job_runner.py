@@ -0,0 +1,241 @@
+"""
+Report Job Runner para repartir la generación de reportes por cuenta
+Cada cuenta es una tarea independiente en un pool acotado con timeout,
+reintentos, control de memoria y un manifiesto de resultados
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ReportTaskResult:
+    """Resultado de una tarea de reporte (una cuenta)"""
+    task_id: str
+    status: str = 'pending'  # success, empty, failed, timeout, skipped
+    attempts: int = 0
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    duration_seconds: float = 0.0
+    error: Optional[str] = None
+    output_path: Optional[str] = None
+
+
+class ReportJobRunner:
+    """
+    Ejecuta una tarea de reporte por cuenta en un pool de hilos acotado
+
+    - max_workers tareas simultáneas; una cuenta lenta solo ocupa su hilo
+    - Timeout por intento: la tarea se da por perdida y se reintenta o falla
+      (el hilo colgado no se puede matar y libera su lugar al terminar)
+    - Reintentos con backoff exponencial para errores y timeouts
+    - max_memory_mb es un control de admisión sobre el RSS de todo el proceso:
+      antes de lanzar cada intento se mide el RSS y, si supera el límite, no se
+      lanzan tareas nuevas hasta que terminen las que están en curso. No es un
+      límite por tarea: una tarea que ya está corriendo puede superarlo
+    - deadline opcional: las tareas que no empezaron a tiempo quedan 'skipped'
+    - Cada reporte y el manifiesto se escriben en output_dir/<job>/<fecha>/
+    """
+
+    def __init__(self,
+                 max_workers: int = 8,
+                 task_timeout: float = 300.0,
+                 max_retries: int = 2,
+                 retry_backoff: float = 5.0,
+                 max_memory_mb: Optional[float] = None,
+                 output_dir: str = "reports"):
+        self.max_workers = max(1, max_workers)
+        self.task_timeout = task_timeout
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self.max_memory_mb = max_memory_mb
+        self.output_dir = Path(output_dir)
+
+    def run(self,
+            job_name: str,
+            tasks: Dict[str, Callable[[], Optional[Dict[str, Any]]]],
+            deadline: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Ejecutar todas las tareas y escribir el manifiesto
+
+        Args:
+            job_name: Nombre del trabajo (carpeta de salida)
+            tasks: task_id (p. ej. customer_id) -> función que genera el reporte;
+                   debe lanzar excepción para que se reintente
+            deadline: Hora límite para iniciar intentos nuevos
+
+        Returns:
+            Manifiesto con el resultado de cada tarea y totales
+        """
+        started = datetime.now()
+        run_dir = self.output_dir / job_name / started.strftime('%Y-%m-%d_%H%M%S')
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+        results = {task_id: ReportTaskResult(task_id=task_id) for task_id in tasks}
+        # (task_id, no antes de este instante monotónico)
+        queue = deque((task_id, 0.0) for task_id in tasks)
+        running: Dict[Any, tuple] = {}
+        abandoned: List[Any] = []
+        abandoned_attempts = 0
+
+        # Hilos extra para que los intentos colgados no bloqueen los reintentos
+        pool_size = self.max_workers * 2
+        executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix=f"{job_name}")
+        try:
+            while queue or running:
+                now = time.monotonic()
+
+                if deadline and datetime.now() >= deadline:
+                    for task_id, _ in queue:
+                        result = results[task_id]
+                        result.status = 'skipped'
+                        result.error = (f"deadline reached before retry: {result.error}"
+                                        if result.attempts else "deadline reached before start")
+                    queue.clear()
+
+                # Lanzar tareas mientras haya hilos libres y memoria disponible
+                deferred = deque()
+                abandoned = [f for f in abandoned if not f.done()]
+                while (queue and len(running) < self.max_workers
+                       and len(running) + len(abandoned) < pool_size):
+                    task_id, not_before = queue.popleft()
+                    if not_before > now:
+                        deferred.append((task_id, not_before))
+                        continue
+                    if running and self._memory_exceeded():
+                        deferred.append((task_id, not_before))
+                        break
+
+                    result = results[task_id]
+                    result.attempts += 1
+                    result.started_at = result.started_at or datetime.now().isoformat()
+                    future = executor.submit(tasks[task_id])
+                    running[future] = (task_id, time.monotonic())
+                queue.extendleft(reversed(deferred))
+
+                if not running:
+                    if queue:
+                        time.sleep(min(1.0, max(0.05, min(nb for _, nb in queue) - time.monotonic())))
+                    continue
+
+                nearest_timeout = min(start for _, start in running.values()) + self.task_timeout
+                done, _ = wait(
+                    list(running.keys()),
+                    timeout=max(0.05, min(1.0, nearest_timeout - time.monotonic())),
+                    return_when=FIRST_COMPLETED
+                )
+
+                for future in done:
+                    task_id, attempt_start = running.pop(future)
+                    result = results[task_id]
+                    result.duration_seconds += time.monotonic() - attempt_start
+                    try:
+                        report = future.result()
+                    except Exception as e:
+                        self._retry_or_fail(queue, result, 'failed', str(e))
+                        continue
+
+                    if report:
+                        result.output_path = self._write_json(run_dir / f"{task_id}.json", report)
+                        result.status = 'success'
+                    else:
+                        result.status = 'empty'
+                    result.error = None
+                    result.finished_at = datetime.now().isoformat()
+
+                # Intentos que superaron el timeout
+                now = time.monotonic()
+                for future, (task_id, attempt_start) in list(running.items()):
+                    if now - attempt_start < self.task_timeout:
+                        continue
+                    running.pop(future)
+                    future.cancel()
+                    abandoned.append(future)
+                    abandoned_attempts += 1
+                    result = results[task_id]
+                    result.duration_seconds += now - attempt_start
+                    self._retry_or_fail(queue, result, 'timeout',
+                                        f"timeout after {self.task_timeout:.0f}s")
+        finally:
+            # No esperar a hilos colgados; terminarán por su cuenta
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        manifest = self._build_manifest(job_name, started, results, abandoned_attempts)
+        manifest['manifest_path'] = self._write_json(run_dir / "manifest.json", manifest)
+
+        logger.info(
+            f"Job {job_name}: {manifest['totals']['success']}/{len(tasks)} tareas exitosas "
+            f"en {manifest['duration_seconds']:.1f}s"
+        )
+        return manifest
+
+    def _retry_or_fail(self, queue: deque, result: ReportTaskResult, status: str, error: str) -> None:
+        """Reencolar con backoff o marcar como fallida"""
+        result.error = error
+        if result.attempts <= self.max_retries:
+            delay = self.retry_backoff * (2 ** (result.attempts - 1))
+            logger.warning(f"Tarea {result.task_id} intento {result.attempts} {status}: {error}; reintento en {delay:.1f}s")
+            queue.append((result.task_id, time.monotonic() + delay))
+        else:
+            logger.error(f"Tarea {result.task_id} {status} tras {result.attempts} intentos: {error}")
+            result.status = status
+            result.finished_at = datetime.now().isoformat()
+
+    def _memory_exceeded(self) -> bool:
+        """Indica si el RSS actual supera el límite configurado"""
+        if not self.max_memory_mb:
+            return False
+        rss_mb = self._current_rss_mb()
+        return rss_mb is not None and rss_mb > self.max_memory_mb
+
+    @staticmethod
+    def _current_rss_mb() -> Optional[float]:
+        """RSS del proceso en MB (Linux /proc; None si no está disponible)"""
+        try:
+            with open('/proc/self/statm', 'r') as f:
+                resident_pages = int(f.read().split()[1])
+            return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+        except (OSError, ValueError, IndexError, AttributeError):
+            return None
+
+    def _build_manifest(self, job_name: str, started: datetime,
+                        results: Dict[str, ReportTaskResult], abandoned: int) -> Dict[str, Any]:
+        totals: Dict[str, int] = {'success': 0, 'empty': 0, 'failed': 0, 'timeout': 0, 'skipped': 0}
+        for result in results.values():
+            totals[result.status] = totals.get(result.status, 0) + 1
+
+        return {
+            'job_name': job_name,
+            'started_at': started.isoformat(),
+            'finished_at': datetime.now().isoformat(),
+            'duration_seconds': (datetime.now() - started).total_seconds(),
+            'settings': {
+                'max_workers': self.max_workers,
+                'task_timeout': self.task_timeout,
+                'max_retries': self.max_retries,
+                'max_memory_mb': self.max_memory_mb
+            },
+            'totals': totals,
+            'abandoned_attempts': abandoned,
+            'tasks': [asdict(result) for result in results.values()]
+        }
+
+    @staticmethod
+    def _write_json(path: Path, data: Dict[str, Any]) -> str:
+        """Escribir JSON de forma atómica"""
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+        return str(path)
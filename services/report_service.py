@@ -3,35 +3,86 @@ Report Service for Google Ads Dashboard
 Handles custom report generation, data export, and scheduled reporting
 """
 
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Dict, Optional, Any, Union, Callable, Tuple, Iterator, IO
 from datetime import datetime, date, timedelta
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from operator import attrgetter
 import csv
+import io
 import json
 import logging
 from io import StringIO
+from pathlib import Path
 
 from modules.google_ads_client import GoogleAdsClientWrapper
 from modules.models import ReportConfig, CampaignMetrics, BillingRecord
 from utils.cache import cache_google_ads_data
-from utils.rate_limit import rate_limited
+from utils.rate_limit import rate_limited, get_rate_limiter, get_retry_after, get_quota_scope
 from utils.logger import log_api_call
 from utils.formatters import format_currency, format_percentage, format_number, format_date
 
 logger = logging.getLogger(__name__)
 
+# Values of these types are returned as-is by compiled field extractors
+_PLAIN_VALUE_TYPES = frozenset({str, int, float, bool, bytes, type(None)})
+
+# Count metrics stored as int64 in Parquet exports (other metrics are doubles)
+_INTEGER_METRICS = frozenset({
+    'impressions', 'clicks', 'interactions', 'engagements', 'video_views',
+    'gmail_forwards', 'gmail_saves', 'gmail_secondary_clicks'
+})
+
+
+def compile_field_extractor(field_path: str) -> Callable[[Any], Any]:
+    """
+    Compile a dotted GAQL field path into a fast row extractor
+    
+    The path is resolved with operator.attrgetter once, instead of splitting
+    and walking hasattr/getattr for every row. Enum values are returned by
+    name and wrapped values by their value, matching _extract_field_value.
+    
+    Args:
+        field_path: Dot-separated field path (e.g., 'campaign.name')
+        
+    Returns:
+        Callable that takes an API row and returns the field value or None
+    """
+    getter = attrgetter(field_path)
+    
+    def extract(row: Any) -> Any:
+        try:
+            value = getter(row)
+        except Exception:
+            return None
+        
+        if type(value) in _PLAIN_VALUE_TYPES:
+            return value
+        if hasattr(value, 'name'):  # Enum values
+            return value.name
+        if hasattr(value, 'value'):  # Some wrapped values
+            return value.value
+        return value
+    
+    return extract
+
+
 class ReportService:
     """Service for generating custom reports and data exports"""
     
-    def __init__(self, google_ads_client: GoogleAdsClientWrapper):
+    def __init__(self, google_ads_client: GoogleAdsClientWrapper, max_workers: int = 8):
         """
         Initialize report service
         
         Args:
             google_ads_client: Google Ads API client wrapper
+            max_workers: Maximum customers queried concurrently per report
         """
         self.client = google_ads_client
+        self.max_workers = max_workers
         self.predefined_reports = self._initialize_predefined_reports()
+        self._field_extractors: Dict[str, Callable[[Any], Any]] = {}
     
     def _initialize_predefined_reports(self) -> Dict[str, ReportConfig]:
         """Initialize predefined report configurations"""
@@ -127,37 +178,14 @@ class ReportService:
             Dictionary with report data and metadata
         """
         try:
-            report_data = []
-            errors = []
+            columns, errors = self._fetch_report_columns(report_config)
             
-            for customer_id in report_config.customer_ids:
-                try:
-                    # Generate GAQL query
-                    query = report_config.to_gaql_query()
-                    logger.info(f"Executing report query for {customer_id}: {query}")
-                    
-                    # Execute query
-                    results = self.client.execute_query(customer_id, query)
-                    
-                    if results:
-                        # Process results
-                        for row in results:
-                            row_data = {'customer_id': customer_id}
-                            
-                            # Extract dimensions
-                            for dimension in report_config.dimensions:
-                                row_data[dimension] = self._extract_field_value(row, dimension)
-                            
-                            # Extract metrics
-                            for metric in report_config.metrics:
-                                row_data[metric] = self._extract_field_value(row, metric)
-                            
-                            report_data.append(row_data)
-                    
-                except Exception as e:
-                    error_msg = f"Error generating report for customer {customer_id}: {e}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
+            # Build row dicts from the columnar batch
+            field_names = list(columns.keys())
+            report_data = [
+                dict(zip(field_names, values))
+                for values in zip(*columns.values())
+            ]
             
             return {
                 'report_name': report_config.report_name,
@@ -179,6 +207,106 @@ class ReportService:
                 'success': False
             }
     
+    @rate_limited('reports', tokens=1)
+    @log_api_call("", "generate_report_frame")
+    def generate_report_frame(self, report_config: ReportConfig) -> Dict[str, Any]:
+        """
+        Generate a custom report as a pandas DataFrame
+        
+        Same query and fan-out as generate_custom_report, but rows are kept
+        in columnar form and never materialized as per-row dicts.
+        
+        Args:
+            report_config: Report configuration
+            
+        Returns:
+            Dictionary with 'frame' (DataFrame), errors and metadata
+        """
+        import pandas as pd
+        
+        columns, errors = self._fetch_report_columns(report_config)
+        frame = pd.DataFrame(columns)
+        
+        return {
+            'report_name': report_config.report_name,
+            'generated_at': datetime.now().isoformat(),
+            'customer_ids': report_config.customer_ids,
+            'date_range': report_config.date_range,
+            'total_rows': len(frame),
+            'frame': frame,
+            'errors': errors,
+            'success': len(errors) == 0
+        }
+    
+    def _fetch_report_columns(self, report_config: ReportConfig) -> Tuple[Dict[str, List[Any]], List[str]]:
+        """
+        Run the report query for every customer concurrently
+        
+        The GAQL query and field extractors are compiled once per report;
+        each customer's rows are extracted column by column and the batches
+        are concatenated in the order of report_config.customer_ids.
+        
+        Args:
+            report_config: Report configuration
+            
+        Returns:
+            Tuple of (columns by field name, error messages)
+        """
+        query = report_config.to_gaql_query()
+        fields = list(report_config.dimensions) + list(report_config.metrics)
+        extractors = [(field, self._get_field_extractor(field)) for field in fields]
+        
+        columns: Dict[str, List[Any]] = {'customer_id': []}
+        for field in fields:
+            columns[field] = []
+        
+        errors: List[str] = []
+        customer_ids = list(report_config.customer_ids)
+        
+        if not customer_ids:
+            return columns, errors
+        
+        # Initialize the shared client before fanning out to worker threads
+        if hasattr(self.client, 'get_client'):
+            self.client.get_client()
+        
+        def fetch(customer_id: str) -> Tuple[str, Optional[Dict[str, List[Any]]], Optional[str]]:
+            try:
+                logger.info(f"Executing report query for {customer_id}: {query}")
+                results = self.client.execute_query(customer_id, query) or []
+                batch = {'customer_id': [customer_id] * len(results)}
+                for field, extract in extractors:
+                    batch[field] = [extract(row) for row in results]
+                return customer_id, batch, None
+            except Exception as e:
+                error_msg = f"Error generating report for customer {customer_id}: {e}"
+                logger.error(error_msg)
+                return customer_id, None, error_msg
+        
+        workers = max(1, min(self.max_workers, len(customer_ids)))
+        if workers == 1:
+            outcomes = [fetch(customer_id) for customer_id in customer_ids]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report") as executor:
+                outcomes = list(executor.map(fetch, customer_ids))
+        
+        for _, batch, error in outcomes:
+            if error:
+                errors.append(error)
+                continue
+            for field, values in batch.items():
+                columns[field].extend(values)
+        
+        return columns, errors
+    
+    def _get_field_extractor(self, field_path: str) -> Callable[[Any], Any]:
+        """Get (or compile and cache) the extractor for a field path"""
+        extractor = self._field_extractors.get(field_path)
+        if extractor is None:
+            extractor = compile_field_extractor(field_path)
+            self._field_extractors[field_path] = extractor
+        return extractor
+    
     def generate_predefined_report(self, report_type: str, 
                                  customer_ids: List[str],
                                  date_range: Optional[str] = None) -> Dict[str, Any]:
@@ -232,18 +360,10 @@ class ReportService:
         
         # Write data rows with formatting
         for row in report_data['data']:
-            formatted_row = {}
-            for key, value in row.items():
-                # Format specific field types
-                if 'cost_micros' in key and isinstance(value, (int, float)):
-                    formatted_row[key] = value / 1_000_000  # Convert to currency units
-                elif 'ctr' in key and isinstance(value, (int, float)):
-                    formatted_row[key] = f"{value * 100:.2f}%"
-                elif 'date' in key and value:
-                    formatted_row[key] = format_date(value)
-                else:
-                    formatted_row[key] = value
-            
+            formatted_row = {
+                key: self._format_export_value(key, value)
+                for key, value in row.items()
+            }
             writer.writerow(formatted_row)
         
         return output.getvalue()
@@ -264,6 +384,257 @@ class ReportService:
         else:
             return json.dumps(report_data, default=str)
     
+    def iter_report_batches(self, report_config: ReportConfig,
+                            batch_size: int = 10_000) -> Iterator[Tuple[str, List[Tuple[Any, ...]]]]:
+        """
+        Stream report rows in bounded batches, one customer at a time
+        
+        Rows are read from the query stream and converted with the compiled
+        field extractors; at most batch_size rows are held at once.
+        Column order is ['customer_id'] + dimensions + metrics.
+        
+        Args:
+            report_config: Report configuration
+            batch_size: Maximum rows per yielded batch
+            
+        Yields:
+            Tuples of (customer_id, list of row value tuples)
+        """
+        query = report_config.to_gaql_query()
+        fields = list(report_config.dimensions) + list(report_config.metrics)
+        extractors = [self._get_field_extractor(field) for field in fields]
+        
+        for customer_id in report_config.customer_ids:
+            for batch in self._iter_customer_batches(customer_id, query, extractors, batch_size):
+                yield customer_id, batch
+    
+    def _iter_customer_batches(self, customer_id: str, query: str,
+                               extractors: List[Callable[[Any], Any]],
+                               batch_size: int) -> Iterator[List[Tuple[Any, ...]]]:
+        """
+        Stream one customer's rows as batches of value tuples
+        
+        Each customer's query takes a 'reports' token for that customer, and
+        quota errors raised while streaming pause the limiter buckets.
+        """
+        rate_limiter = get_rate_limiter()
+        if not rate_limiter.acquire('reports', 1, customer_id=customer_id):
+            raise Exception("Rate limit exceeded for reports operation")
+        
+        try:
+            if hasattr(self.client, 'iter_query'):
+                rows = self.client.iter_query(customer_id, query)
+            else:
+                rows = iter(self.client.execute_query(customer_id, query) or [])
+            
+            batch: List[Tuple[Any, ...]] = []
+            for row in rows:
+                batch.append((customer_id, *[extract(row) for extract in extractors]))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        except Exception as e:
+            retry_after = get_retry_after(e)
+            if retry_after is not None:
+                rate_limiter.apply_retry_after(retry_after, get_quota_scope(e),
+                                               customer_id=customer_id, operation_type='reports')
+            raise
+    
+    def stream_report(self, report_config: ReportConfig,
+                      destination: Union[str, Path, IO],
+                      export_format: str = 'csv',
+                      progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      batch_size: int = 10_000) -> Dict[str, Any]:
+        """
+        Write a report incrementally to a file or download buffer
+        
+        Rows go straight from the query stream to the output in batches, so
+        large keyword-level reports are never held in memory as a whole.
+        A failing customer is recorded in 'errors' and the export continues.
+        Rows written before a customer failed mid-stream stay in the output;
+        'failed_customers' maps each failed customer to that row count so
+        consumers can drop its partial rows.
+        
+        Args:
+            report_config: Report configuration
+            destination: File path, or an open text/binary file object
+                (e.g. io.BytesIO for st.download_button)
+            export_format: 'csv', 'ndjson' or 'parquet' (requires pyarrow)
+            progress_callback: Called after each batch with a dict of
+                rows_written, customers_done, total_customers and customer_id
+            batch_size: Maximum rows held in memory at once
+            
+        Returns:
+            Summary dictionary with rows_written, errors, failed_customers
+            and success
+        """
+        export_format = export_format.lower()
+        writers = {
+            'csv': self._write_csv_batches,
+            'ndjson': self._write_ndjson_batches,
+            'parquet': self._write_parquet_batches,
+        }
+        if export_format not in writers:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        
+        query = report_config.to_gaql_query()
+        fields = list(report_config.dimensions) + list(report_config.metrics)
+        extractors = [self._get_field_extractor(field) for field in fields]
+        columns = ['customer_id'] + fields
+        
+        errors: List[str] = []
+        failed_customers: Dict[str, int] = {}
+        progress = {
+            'rows_written': 0,
+            'customers_done': 0,
+            'total_customers': len(report_config.customer_ids),
+            'customer_id': None,
+        }
+        
+        def batches() -> Iterator[List[Tuple[Any, ...]]]:
+            # A failing customer is skipped without aborting the export
+            for customer_id in report_config.customer_ids:
+                progress['customer_id'] = customer_id
+                customer_rows = 0
+                try:
+                    for batch in self._iter_customer_batches(customer_id, query, extractors, batch_size):
+                        yield batch
+                        customer_rows += len(batch)
+                        progress['rows_written'] += len(batch)
+                        if progress_callback:
+                            progress_callback(dict(progress))
+                except Exception as e:
+                    error_msg = f"Error streaming report for customer {customer_id}: {e}"
+                    if customer_rows:
+                        error_msg += f" ({customer_rows} partial rows were written)"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
+                    failed_customers[customer_id] = customer_rows
+                progress['customers_done'] += 1
+                if progress_callback:
+                    progress_callback(dict(progress))
+        
+        binary = export_format == 'parquet'
+        schema = self._parquet_schema(columns) if binary else None
+        with self._open_destination(destination, binary) as output:
+            if binary:
+                self._write_parquet_batches(output, columns, batches(), schema)
+            else:
+                writers[export_format](output, columns, batches())
+        
+        logger.info(
+            f"Streamed {progress['rows_written']} rows of '{report_config.report_name}' as {export_format}"
+        )
+        return {
+            'report_name': report_config.report_name,
+            'generated_at': datetime.now().isoformat(),
+            'format': export_format,
+            'rows_written': progress['rows_written'],
+            'errors': errors,
+            'failed_customers': failed_customers,
+            'success': len(errors) == 0
+        }
+    
+    def _write_csv_batches(self, output: IO, columns: List[str],
+                           batches: Iterator[List[Tuple[Any, ...]]]) -> None:
+        """Write batches as CSV using the same formatting as export_to_csv"""
+        writer = csv.writer(output)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(
+                [self._format_export_value(key, value) for key, value in zip(columns, row)]
+                for row in batch
+            )
+    
+    def _write_ndjson_batches(self, output: IO, columns: List[str],
+                              batches: Iterator[List[Tuple[Any, ...]]]) -> None:
+        """Write batches as newline-delimited JSON (one object per row)"""
+        for batch in batches:
+            output.write(''.join(
+                json.dumps(dict(zip(columns, row)), default=str) + '\n'
+                for row in batch
+            ))
+    
+    def _write_parquet_batches(self, output: IO, columns: List[str],
+                               batches: Iterator[List[Tuple[Any, ...]]], schema: Any) -> None:
+        """Write batches as Parquet row groups with a schema fixed up front"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        with pq.ParquetWriter(output, schema) as writer:
+            for batch in batches:
+                table = pa.Table.from_pydict(
+                    {name: list(values) for name, values in zip(columns, zip(*batch))},
+                    schema=schema
+                )
+                writer.write_table(table)
+    
+    @staticmethod
+    def _parquet_schema(columns: List[str]) -> Any:
+        """
+        Parquet schema derived from the GAQL field names
+        
+        Types come from the field list instead of the first batch, so a batch
+        whose values infer differently (or are all null) cannot break the file.
+        IDs, *_micros fields, quality scores and count metrics are int64, other
+        metrics are doubles and everything else (enums, dates, text) is a string.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from e
+        
+        fields = []
+        for column in columns:
+            resource, _, name = column.rpartition('.')
+            if column == 'customer_id':
+                arrow_type = pa.string()
+            elif name == 'id' or name.endswith('_id') or name.endswith('_micros') or name == 'quality_score':
+                arrow_type = pa.int64()
+            elif resource == 'metrics':
+                arrow_type = pa.int64() if name in _INTEGER_METRICS else pa.float64()
+            else:
+                arrow_type = pa.string()
+            fields.append(pa.field(column, arrow_type))
+        return pa.schema(fields)
+    
+    @staticmethod
+    @contextmanager
+    def _open_destination(destination: Union[str, Path, IO], binary: bool) -> Iterator[IO]:
+        """
+        Open a path, or adapt a file object, for streaming output
+        
+        Binary file objects are wrapped in a UTF-8 text layer for text formats
+        and detached afterwards so the caller's buffer stays open.
+        """
+        if isinstance(destination, (str, Path)):
+            mode = 'wb' if binary else 'w'
+            kwargs = {} if binary else {'encoding': 'utf-8', 'newline': ''}
+            with open(destination, mode, **kwargs) as f:
+                yield f
+        elif binary or isinstance(destination, io.TextIOBase):
+            yield destination
+        else:
+            wrapper = io.TextIOWrapper(destination, encoding='utf-8', newline='')
+            try:
+                yield wrapper
+            finally:
+                wrapper.flush()
+                wrapper.detach()
+    
+    @staticmethod
+    def _format_export_value(key: str, value: Any) -> Any:
+        """Format a value for CSV export based on its field name"""
+        if 'cost_micros' in key and isinstance(value, (int, float)):
+            return value / 1_000_000  # Convert to currency units
+        if 'ctr' in key and isinstance(value, (int, float)):
+            return f"{value * 100:.2f}%"
+        if 'date' in key and value:
+            return format_date(value)
+        return value
+    
     def get_performance_insights(self, customer_id: str, days: int = 30) -> Dict[str, Any]:
         """
         Generate performance insights report
@@ -425,28 +796,7 @@ class ReportService:
         Returns:
             Field value or None if not found
         """
-        try:
-            # Split field path and traverse
-            parts = field_path.split('.')
-            value = row
-            
-            for part in parts:
-                if hasattr(value, part):
-                    value = getattr(value, part)
-                else:
-                    return None
-            
-            # Handle special cases
-            if hasattr(value, 'name'):  # Enum values
-                return value.name
-            elif hasattr(value, 'value'):  # Some wrapped values
-                return value.value
-            else:
-                return value
-                
-        except Exception as e:
-            logger.debug(f"Error extracting field {field_path}: {e}")
-            return None
+        return self._get_field_extractor(field_path)(row)
     
     def _analyze_performance_data(self, data: List[Dict]) -> List[Dict[str, Any]]:
         """
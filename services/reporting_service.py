@@ -20,18 +20,14 @@ from pathlib import Path
 from dataclasses import dataclass, asdict
 from enum import Enum
 import asyncio
+import threading
 from collections import defaultdict
-import base64
-from io import BytesIO
 
-# Importaciones para generación de gráficos
-try:
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-    PLOTTING_AVAILABLE = True
-except ImportError:
-    PLOTTING_AVAILABLE = False
-    logging.warning("Matplotlib/Seaborn no disponibles. Gráficos deshabilitados.")
+# Renderizado de gráficos (backend Agg orientado a objetos, sin pyplot)
+from services.chart_renderer import ChartRenderer, CHART_QUALITY_DPI, PLOTTING_AVAILABLE
+
+if not PLOTTING_AVAILABLE:
+    logging.warning("Matplotlib no disponible. Gráficos deshabilitados.")
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -142,15 +138,14 @@ class EsotericReportingService:
             'reports': {}
         }
         
-        # Configurar matplotlib si está disponible
-        if PLOTTING_AVAILABLE:
-            plt.style.use('seaborn-v0_8')
-            sns.set_palette("husl")
-        
         # Cargar configuraciones
         self._load_config()
         self._load_templates()
         
+        # Renderizador de gráficos y lote de gráficos pendientes por hilo
+        self.chart_renderer = self._create_chart_renderer()
+        self._chart_batch = threading.local()
+        
         logger.info("Reporting Service inicializado correctamente")
     
     def _get_default_config_path(self) -> str:
@@ -179,6 +174,12 @@ class EsotericReportingService:
                 'default_format': 'html',
                 'include_charts': True,
                 'chart_quality': 'high',
+                'chart_dpi': None,  # Sobrescribe chart_quality si se define
+                'chart_format': 'png',  # png o svg
+                'chart_workers': None,  # Procesos de renderizado (None = según CPUs)
+                'chart_disk_cache': True,
+                'chart_disk_cache_mb': 256,
+                'chart_disk_cache_days': 30,
                 'max_data_points': 1000,
                 'cache_duration_hours': 24
             },
@@ -219,6 +220,23 @@ class EsotericReportingService:
             }
         }
     
+    def _create_chart_renderer(self) -> ChartRenderer:
+        """Crear el renderizador de gráficos según la configuración"""
+        reporting = self.config.get('reporting', {})
+        dpi = reporting.get('chart_dpi') or CHART_QUALITY_DPI.get(
+            reporting.get('chart_quality', 'high'), CHART_QUALITY_DPI['high']
+        )
+        cache_dir = self.output_dir / '.chart_cache' if reporting.get('chart_disk_cache', True) else None
+        
+        return ChartRenderer(
+            dpi=dpi,
+            image_format=reporting.get('chart_format', 'png'),
+            cache_dir=cache_dir,
+            max_workers=reporting.get('chart_workers'),
+            max_disk_cache_mb=reporting.get('chart_disk_cache_mb', 256),
+            disk_cache_max_age_days=reporting.get('chart_disk_cache_days', 30)
+        )
+    
     def _load_templates(self) -> None:
         """Cargar templates de reportes"""
         self.report_templates = {
@@ -282,12 +300,17 @@ class EsotericReportingService:
         template = self.report_templates.get(config.report_type, {})
         title = template.get('title', f'Reporte {config.report_type.value}')
         
-        # Generar secciones
+        # Generar secciones; los gráficos se encolan y se renderizan juntos
         sections = []
-        for section_name in template.get('sections', []):
-            section = self._generate_section(section_name, config)
-            if section:
-                sections.append(section)
+        self._chart_batch.pending = {}
+        try:
+            for section_name in template.get('sections', []):
+                section = self._generate_section(section_name, config)
+                if section:
+                    sections.append(section)
+            self._render_pending_charts(sections)
+        finally:
+            self._chart_batch.pending = None
         
         # Generar resumen
         summary = self._generate_summary(sections, config)
@@ -803,27 +826,11 @@ class EsotericReportingService:
     def _create_bar_chart(self, data: Dict[str, Any], title: str, 
                          x_axis: str, y_axis: str) -> Optional[str]:
         """Crear gráfico de barras"""
-        if not PLOTTING_AVAILABLE:
-            return None
-        
         try:
-            plt.figure(figsize=(10, 6))
-            plt.bar(data[x_axis], data[y_axis], color=self.config['styling']['primary_color'])
-            plt.title(title, fontsize=16, fontweight='bold')
-            plt.xlabel(x_axis.replace('_', ' ').title())
-            plt.ylabel(y_axis.replace('_', ' ').title())
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            
-            # Convertir a base64
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-            buffer.seek(0)
-            chart_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return chart_base64
-            
+            spec = ChartRenderer.bar_spec(
+                data, title, x_axis, y_axis, color=self.config['styling']['primary_color']
+            )
+            return self._submit_chart(spec)
         except Exception as e:
             logger.error(f"Error creando gráfico de barras: {e}")
             return None
@@ -831,34 +838,63 @@ class EsotericReportingService:
     def _create_line_chart(self, data: Dict[str, Any], title: str, 
                           x_axis: str, y_axis: str) -> Optional[str]:
         """Crear gráfico de líneas"""
-        if not PLOTTING_AVAILABLE:
-            return None
-        
         try:
-            plt.figure(figsize=(12, 6))
-            plt.plot(data[x_axis], data[y_axis], 
-                    color=self.config['styling']['primary_color'], 
-                    linewidth=2, marker='o')
-            plt.title(title, fontsize=16, fontweight='bold')
-            plt.xlabel(x_axis.replace('_', ' ').title())
-            plt.ylabel(y_axis.replace('_', ' ').title())
-            plt.xticks(rotation=45)
-            plt.grid(True, alpha=0.3)
-            plt.tight_layout()
-            
-            # Convertir a base64
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-            buffer.seek(0)
-            chart_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            return chart_base64
-            
+            spec = ChartRenderer.line_spec(
+                data, title, x_axis, y_axis, color=self.config['styling']['primary_color']
+            )
+            return self._submit_chart(spec)
         except Exception as e:
             logger.error(f"Error creando gráfico de líneas: {e}")
             return None
     
+    # Prefijo de los gráficos encolados hasta que se renderiza el lote
+    _PENDING_CHART_PREFIX = "pending-chart:"
+    
+    def _submit_chart(self, spec: Dict[str, Any]) -> Optional[str]:
+        """
+        Renderizar un gráfico o encolarlo si hay un reporte en curso
+        
+        Durante generate_report devuelve un marcador que se reemplaza por la
+        imagen en _render_pending_charts; fuera de él renderiza directamente.
+        """
+        if not PLOTTING_AVAILABLE:
+            return None
+        
+        pending = getattr(self._chart_batch, 'pending', None)
+        if pending is None:
+            return self.chart_renderer.render(spec)
+        
+        key = self.chart_renderer.cache_key(spec)
+        pending[key] = spec
+        return f"{self._PENDING_CHART_PREFIX}{key}"
+    
+    def _render_pending_charts(self, sections: List[ReportSection]) -> None:
+        """Renderizar en un solo lote (paralelo) los gráficos de todas las secciones"""
+        pending = getattr(self._chart_batch, 'pending', None)
+        if not pending:
+            return
+        
+        keys = list(pending.keys())
+        images = dict(zip(keys, self.chart_renderer.render_many([pending[k] for k in keys])))
+        
+        prefix = self._PENDING_CHART_PREFIX
+        for section in sections:
+            if not section.charts:
+                continue
+            resolved = []
+            for chart in section.charts:
+                if isinstance(chart, str) and chart.startswith(prefix):
+                    chart = images.get(chart[len(prefix):])
+                if chart:
+                    resolved.append(chart)
+            section.charts = resolved
+        
+        logger.info(
+            f"Gráficos del reporte: {len(keys)} "
+            f"(renderizados: {self.chart_renderer.stats['rendered']}, "
+            f"caché: {self.chart_renderer.stats['cache_hits']})"
+        )
+    
     def _export_report(self, report: GeneratedReport, format: ReportFormat) -> str:
         """Exportar reporte en formato específico"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -927,7 +963,7 @@ class EsotericReportingService:
             # Agregar gráficos
             if section.charts:
                 for chart in section.charts:
-                    html_content += f'<div class="chart-container"><img src="data:image/png;base64,{chart}" alt="Gráfico"></div>'
+                    html_content += f'<div class="chart-container"><img src="data:{self.chart_renderer.mime_type};base64,{chart}" alt="Gráfico"></div>'
             
             html_content += '</div>'
         
@@ -17,6 +17,7 @@ from services.keyword_health_service import KeywordHealthService
 from services.mcc_management_service import MCCManagementService
 from services.action_execution_service import ActionExecutionService
 from services.report_service import ReportService
+from services.report_job_runner import ReportJobRunner
 from modules.google_ads_client import GoogleAdsClientWrapper
 from utils.logger import get_logger
 
@@ -33,6 +34,18 @@ class SchedulerService:
         self.report_service = ReportService(google_ads_client)
         self.health_service = KeywordHealthService(db_service=self.db_service, ads_client=google_ads_client, report_service=self.report_service)
         
+        # Reportes semanales: una tarea por cuenta en un pool acotado
+        # (max_memory_mb limita el RSS del proceso al lanzar tareas, no cada tarea)
+        self.report_runner = ReportJobRunner(
+            max_workers=8,
+            task_timeout=300,
+            max_retries=2,
+            max_memory_mb=1024,
+            output_dir="reports"
+        )
+        # Los reportes del lunes deben terminar antes del horario laboral (9:00)
+        self.weekly_report_deadline = {'hour': 9, 'minute': 0}
+        
         # Configurar listeners de eventos
         self.scheduler.add_listener(self._job_executed_listener, EVENT_JOB_EXECUTED)
         self.scheduler.add_listener(self._job_error_listener, EVENT_JOB_ERROR)
@@ -136,9 +149,8 @@ class SchedulerService:
             start_time = datetime.now()
             logger.info("Iniciando ingesta diaria de datos")
             
-            # Obtener todas las cuentas activas
-            accounts = self.db_service.get_all_mcc_accounts()
-            active_accounts = [acc for acc in accounts if acc.get('status') == 'active']
+            # Obtener todas las cuentas activas (MCCAccount)
+            active_accounts = self.db_service.get_all_accounts(active_only=True)
             
             results = {
                 'total_accounts': len(active_accounts),
@@ -151,7 +163,7 @@ class SchedulerService:
             # Procesar cada cuenta
             for account in active_accounts:
                 try:
-                    customer_id = account['customer_id']
+                    customer_id = account.customer_id
                     logger.info(f"Procesando cuenta: {customer_id}")
                     
                     # Obtener datos de los últimos 30 días
@@ -159,7 +171,10 @@ class SchedulerService:
                     start_date = end_date - timedelta(days=30)
                     
                     # Sincronizar datos reales de keywords usando KeywordHealthService
-                    success = self.health_service.sync_keyword_data_to_database(customer_id, days_back=30)
+                    # (incremental: solo días nuevos + ventana de reexpresión)
+                    success = self.health_service.sync_keyword_data_to_database(
+                        customer_id, days_back=30, incremental=True
+                    )
                     
                     if success:
                         results['successful'] += 1
@@ -168,10 +183,10 @@ class SchedulerService:
                         logger.warning(f"No se obtuvieron datos para cuenta {customer_id}")
                         
                 except Exception as e:
-                    logger.error(f"Error procesando cuenta {account.get('customer_id')}: {e}")
+                    logger.error(f"Error procesando cuenta {account.customer_id}: {e}")
                     results['failed'] += 1
                     results['errors'].append({
-                        'customer_id': account.get('customer_id'),
+                        'customer_id': account.customer_id,
                         'error': str(e)
                     })
             
@@ -272,12 +287,12 @@ class SchedulerService:
             
             self._log_job_result('discover_new_accounts', {
                 'duration_seconds': duration,
-                'new_accounts': discovery_result.get('new_accounts', 0),
-                'updated_accounts': discovery_result.get('updated_accounts', 0),
-                'errors': discovery_result.get('errors', [])
+                'new_accounts': discovery_result.get('discovered', 0),
+                'updated_accounts': discovery_result.get('updated', 0),
+                'errors': discovery_result.get('errors', 0)
             })
             
-            logger.info(f"Descubrimiento completado en {duration:.1f}s: {discovery_result.get('new_accounts', 0)} nuevas cuentas")
+            logger.info(f"Descubrimiento completado en {duration:.1f}s: {discovery_result.get('discovered', 0)} nuevas cuentas")
             
         except Exception as e:
             logger.error(f"Error en descubrimiento de cuentas: {e}")
@@ -327,37 +342,32 @@ class SchedulerService:
             self._log_job_result('cleanup_old_data', {'error': str(e)})
 
     def generate_weekly_reports(self):
-        """Generar reportes semanales de performance"""
+        """Generar reportes semanales de performance (una tarea por cuenta)"""
         try:
             start_time = datetime.now()
             logger.info("Iniciando generación de reportes semanales")
             
-            # Obtener todas las cuentas activas
-            accounts = self.db_service.get_all_mcc_accounts()
-            active_accounts = [acc for acc in accounts if acc.get('status') == 'active']
+            # Obtener todas las cuentas activas (MCCAccount)
+            active_accounts = self.db_service.get_all_accounts(active_only=True)
             
-            reports_generated = 0
-            errors = []
+            tasks = {
+                account.customer_id: (lambda cid=account.customer_id: self._build_account_weekly_report(cid))
+                for account in active_accounts
+            }
             
-            # Generar reporte por cuenta
-            for account in active_accounts:
-                try:
-                    customer_id = account['customer_id']
-                    
-                    # Generar reporte semanal
-                    report_data = self._generate_account_weekly_report(customer_id)
-                    
-                    if report_data:
-                        # Guardar reporte (en implementación real, enviar por email o guardar en storage)
-                        logger.info(f"Reporte semanal generado para cuenta {customer_id}")
-                        reports_generated += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error generando reporte para cuenta {account.get('customer_id')}: {e}")
-                    errors.append({
-                        'customer_id': account.get('customer_id'),
-                        'error': str(e)
-                    })
+            deadline = start_time.replace(second=0, microsecond=0, **self.weekly_report_deadline)
+            manifest = self.report_runner.run(
+                'weekly_reports',
+                tasks,
+                deadline=deadline if deadline > start_time else None
+            )
+            
+            errors = [
+                {'customer_id': task['task_id'], 'status': task['status'], 'error': task['error']}
+                for task in manifest['tasks']
+                if task['status'] in ('failed', 'timeout', 'skipped')
+            ]
+            reports_generated = manifest['totals']['success']
             
             # Registrar resultado
             duration = (datetime.now() - start_time).total_seconds()
@@ -365,6 +375,8 @@ class SchedulerService:
             self._log_job_result('generate_weekly_reports', {
                 'duration_seconds': duration,
                 'reports_generated': reports_generated,
+                'manifest_path': manifest.get('manifest_path'),
+                'totals': manifest['totals'],
                 'errors': errors
             })
             
@@ -449,31 +461,42 @@ class SchedulerService:
     def _generate_account_weekly_report(self, customer_id: str) -> Optional[Dict]:
         """Generar reporte semanal para una cuenta"""
         try:
-            # Obtener métricas de la semana pasada
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=7)
-            
-            # Obtener health scores y métricas
-            health_scores = self.db_service.get_health_scores(customer_id, days_back=7)
-            metrics = self.db_service.get_keyword_metrics(customer_id, days_back=7)
-            
-            # Calcular estadísticas del reporte
-            report_data = {
-                'customer_id': customer_id,
-                'period': f"{start_date} to {end_date}",
-                'total_keywords': len(set(m.get('keyword_text') for m in metrics)),
-                'avg_health_score': sum(h.get('health_score', 0) for h in health_scores) / len(health_scores) if health_scores else 0,
-                'total_cost': sum(m.get('cost', 0) for m in metrics),
-                'total_conversions': sum(m.get('conversions', 0) for m in metrics),
-                'generated_at': datetime.now().isoformat()
-            }
-            
-            return report_data
-            
+            return self._build_account_weekly_report(customer_id)
         except Exception as e:
             logger.error(f"Error generando reporte semanal para {customer_id}: {e}")
             return None
 
+    def _build_account_weekly_report(self, customer_id: str) -> Dict:
+        """Construir el reporte semanal de una cuenta (lanza excepción para reintentar)"""
+        # Obtener métricas de la semana pasada
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=7)
+        
+        # Obtener health scores y métricas
+        health_scores = self.db_service.get_health_scores(customer_id, days_back=7)
+        metrics = self.db_service.get_keyword_metrics(customer_id, days_back=7)
+        
+        # get_keyword_metrics devuelve KeywordMetric (costo en micros)
+        def metric_value(metric, field: str):
+            if isinstance(metric, dict):
+                return metric.get(field, 0)
+            if field == 'cost':
+                return getattr(metric, 'cost_micros', 0) / 1_000_000
+            return getattr(metric, field, 0)
+        
+        # Calcular estadísticas del reporte
+        report_data = {
+            'customer_id': customer_id,
+            'period': f"{start_date} to {end_date}",
+            'total_keywords': len(set(metric_value(m, 'keyword_text') for m in metrics)),
+            'avg_health_score': sum(h.get('health_score', 0) for h in health_scores) / len(health_scores) if health_scores else 0,
+            'total_cost': sum(metric_value(m, 'cost') for m in metrics),
+            'total_conversions': sum(metric_value(m, 'conversions') for m in metrics),
+            'generated_at': datetime.now().isoformat()
+        }
+        
+        return report_data
+
     def _log_job_result(self, job_id: str, result_data: Dict):
         """Registrar resultado de trabajo programado"""
         try:
@@ -5,6 +5,7 @@ import unittest
 from unittest.mock import Mock, patch
 import sys
 import os
+import tempfile
 
 # Agregar el directorio raíz al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -28,5 +29,49 @@ class TestABTestingEngine(unittest.TestCase):
         """Test para determinar ganador"""
         pass
 
+
+class TestABTestStore(unittest.TestCase):
+    """Tests para el repositorio indexado de tests A/B"""
+    
+    def setUp(self):
+        """Motor con repositorio SQLite en directorio temporal"""
+        from modules.ab_testing_engine import ABTestingEngine
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.engine = ABTestingEngine(results_dir=self.tmp_dir.name)
+    
+    def tearDown(self):
+        self.engine.store.close()
+        self.tmp_dir.cleanup()
+    
+    def test_list_tests_filters(self):
+        """Test para filtrar por estado y tono sobre el índice"""
+        test = self.engine.create_tone_based_test(['amarres de amor'], tones=['urgente'])
+        self.assertEqual(len(self.engine.list_tests(tone='urgente')), 1)
+        self.assertEqual(len(self.engine.list_tests(tone='emocional')), 0)
+        self.assertEqual(len(self.engine.list_tests(status='draft')), 1)
+        self.assertEqual(self.engine.list_tests()[0]['test_id'], test['test_id'])
+    
+    def test_update_status_partial(self):
+        """Test para actualizar estado sin reescribir el documento"""
+        test = self.engine.create_tone_based_test(['amarres de amor'])
+        self.assertTrue(self.engine.update_test_status(test['test_id'], 'running', {'clicks': 10}))
+        stored = self.engine.store.get(test['test_id'])
+        self.assertEqual(stored['status'], 'running')
+        self.assertEqual(stored['results'], {'clicks': 10})
+        self.assertEqual(self.engine.list_tests(status='running')[0]['test_id'], test['test_id'])
+
+    def test_pagination_with_offset_only(self):
+        """Test para aplicar offset sin limit igual que el backend JSON"""
+        for index in range(5):
+            self.engine.store.save({
+                'test_id': f'test_{index}', 'status': 'draft',
+                'created_at': f'2026-10-0{index + 1}T00:00:00', 'variations': []
+            })
+        ids = [t['test_id'] for t in self.engine.store.query()]
+        self.assertEqual(ids, ['test_4', 'test_3', 'test_2', 'test_1', 'test_0'])
+        self.assertEqual([t['test_id'] for t in self.engine.store.query(offset=2)], ids[2:])
+        self.assertEqual([t['test_id'] for t in self.engine.store.query(limit=2, offset=1)], ids[1:3])
+        self.assertEqual([t['test_id'] for t in self.engine.list_tests(offset=3)], ids[3:])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
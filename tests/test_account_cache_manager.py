@@ -0,0 +1,94 @@
+# Tests para account_cache_manager.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.account_cache_manager import _AccountNameStore
+
+
+class TestAccountNameStore(unittest.TestCase):
+    """Tests para el mapa de nombres con escritura diferida"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache_file = Path(self.tmp_dir.name) / 'account_names_cache.json'
+
+    def store(self, flush_delay=60.0):
+        store = _AccountNameStore(self.cache_file, flush_delay=flush_delay)
+        self.addCleanup(store.clear)
+        return store
+
+    def read_accounts(self):
+        with open(self.cache_file, encoding='utf-8') as f:
+            return json.load(f)['accounts']
+
+    def write_as_other_process(self, accounts):
+        """Escribe el archivo con un mtime distinto, como lo haría otro proceso"""
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'accounts': accounts, 'last_updated': '2026-10-01T00:00:00'}, f)
+        stamp = time.time_ns() + 1_000_000_000
+        os.utime(self.cache_file, ns=(stamp, stamp))
+
+    def test_write_behind_timer_batches_updates(self):
+        """Test para agrupar varios cambios en un solo guardado diferido"""
+        store = self.store(flush_delay=0.1)
+        store.update({'111': 'Tarot'})
+        store.update({'222': 'Amarres'})
+        self.assertFalse(self.cache_file.exists())
+
+        deadline = time.monotonic() + 5
+        while not self.cache_file.exists() and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        self.assertEqual(self.read_accounts(), {'111': 'Tarot', '222': 'Amarres'})
+        self.assertIsNone(store._timer)
+        self.assertEqual(store._pending, {})
+
+    def test_flush_merges_other_process_writes(self):
+        """Test para no pisar las cuentas que otro proceso guardó entre medias"""
+        store = self.store()
+        store.update({'111': 'Tarot'})
+        self.write_as_other_process({'333': 'Rituales', '111': 'Nombre viejo'})
+
+        store.flush()
+
+        self.assertEqual(self.read_accounts(), {'111': 'Tarot', '333': 'Rituales'})
+        self.assertEqual(store.snapshot()['accounts'], {'111': 'Tarot', '333': 'Rituales'})
+
+    def test_snapshot_reloads_only_on_mtime_change(self):
+        """Test para releer el archivo solo cuando cambia su mtime"""
+        self.write_as_other_process({'111': 'Tarot'})
+        store = self.store()
+        first = store.snapshot()
+        self.assertIs(store.snapshot(), first)
+
+        self.write_as_other_process({'111': 'Tarot', '222': 'Amarres'})
+
+        self.assertEqual(store.snapshot()['accounts'], {'111': 'Tarot', '222': 'Amarres'})
+
+    def test_clear_cancels_pending_write(self):
+        """Test para que clear() descarte el guardado programado"""
+        store = self.store(flush_delay=0.1)
+        store.update({'111': 'Tarot'})
+        timer = store._timer
+
+        store.clear()
+        timer.join(1)
+        store.flush()
+
+        self.assertFalse(timer.is_alive())
+        self.assertFalse(self.cache_file.exists())
+        self.assertEqual(store.snapshot(), {})
+
+if __name__ == '__main__':
+    unittest.main()
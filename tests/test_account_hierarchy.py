@@ -0,0 +1,168 @@
+# Tests para account_hierarchy.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+import tempfile
+from types import SimpleNamespace
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.account_hierarchy import AccountHierarchy
+
+
+def account(customer_id, level, manager=False, name=None, status='ENABLED'):
+    return SimpleNamespace(
+        id=int(customer_id), descriptive_name=name or f"Cuenta {customer_id}", currency_code='MXN',
+        time_zone='America/Mexico_City', status=SimpleNamespace(name=status), manager=manager,
+        hidden=False, test_account=False, level=level
+    )
+
+
+class StubGoogleAdsService:
+    """
+    MCC 100 -> 201, sub-MCC 300 -> (301, sub-MCC 400 -> 401)
+
+    customer_client del MCC raíz trae todos los niveles; el de un sub-MCC
+    con level = 1 trae solo sus hijos directos
+    """
+
+    def __init__(self):
+        self.tree = {'100': ['201', '300'], '300': ['301', '400'], '400': ['401']}
+        self.accounts = {
+            '100': account('100', 0, manager=True), '201': account('201', 1),
+            '300': account('300', 1, manager=True), '301': account('301', 2),
+            '400': account('400', 2, manager=True), '401': account('401', 3),
+            '900': account('900', 0)
+        }
+        self.failing = {'950': 'PERMISSION_DENIED'}
+        self.searches = []
+
+    def search(self, customer_id, query):
+        self.searches.append((customer_id, 'level = 1' in query, 'FROM customer_client' in query))
+        if customer_id in self.failing:
+            raise RuntimeError(self.failing[customer_id])
+        if 'FROM customer_client' not in query:
+            return [SimpleNamespace(customer=self.accounts[customer_id])]
+        if 'level = 1' in query:
+            return [SimpleNamespace(customer_client=self.accounts[cid]) for cid in self.tree.get(customer_id, [])]
+        return [SimpleNamespace(customer_client=self.accounts[cid]) for cid in self.descendants(customer_id)]
+
+    def descendants(self, customer_id):
+        result = [customer_id]
+        for child in self.tree.get(customer_id, []):
+            result.extend(self.descendants(child))
+        return result
+
+    def move(self, customer_id, new_parent):
+        for children in self.tree.values():
+            if customer_id in children:
+                children.remove(customer_id)
+        self.tree.setdefault(new_parent, []).append(customer_id)
+
+
+class StubClient:
+    def __init__(self, ga_service, accessible):
+        self.login_customer_id = '100'
+        self.ga_service = ga_service
+        self.customer_service = SimpleNamespace(list_accessible_customers=lambda: SimpleNamespace(
+            resource_names=[f"customers/{cid}" for cid in accessible]
+        ))
+
+    def get_service(self, name):
+        return self.ga_service if name == "GoogleAdsService" else self.customer_service
+
+
+class TestAccountHierarchy(unittest.TestCase):
+    """Tests para el refresco completo e incremental del árbol MCC"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, 'hierarchy.json')
+        self.ga_service = StubGoogleAdsService()
+        self.client = StubClient(self.ga_service, ['100', '900', '950'])
+        self.hierarchy = AccountHierarchy(storage_path=self.path)
+        self.changes = []
+        self.hierarchy.add_listener(self.changes.append)
+
+    def parents(self):
+        return {cid: node.parent_id for cid, node in self.hierarchy.accounts.items()}
+
+    def test_full_refresh_resolves_parents_through_sub_mccs(self):
+        """Test para asignar el padre directo de las cuentas de nivel > 1"""
+        self.hierarchy.refresh(self.client, full=True)
+
+        self.assertEqual(self.parents(), {
+            '100': None, '201': '100', '300': '100', '301': '300',
+            '400': '300', '401': '400', '900': None, '950': None
+        })
+        self.assertEqual(self.hierarchy.get_account('300').children, ['301', '400'])
+        self.assertEqual(sorted(n.customer_id for n in self.hierarchy.get_descendants('300')), ['301', '400', '401'])
+        self.assertEqual(sorted(self.hierarchy.root_ids), ['100', '900', '950'])
+        self.assertEqual(self.changes[0]['added'], ['100', '201', '300', '301', '400', '401', '900', '950'])
+
+    def test_unavailable_accounts_are_probed_and_excluded(self):
+        """Test para marcar UNAVAILABLE la cuenta directa sin permisos"""
+        self.hierarchy.refresh(self.client, full=True)
+
+        self.assertEqual(self.hierarchy.get_account('950').status, 'UNAVAILABLE')
+        self.assertNotIn('950', self.hierarchy.get_customer_ids())
+        self.assertEqual(self.hierarchy.get_customer_ids(include_managers=False), ['201', '301', '401', '900'])
+
+    def test_incremental_refresh_reuses_known_nodes(self):
+        """Test para no volver a sondear cuentas ni sub-MCCs ya conocidos"""
+        self.hierarchy.refresh(self.client, full=True)
+        self.ga_service.searches.clear()
+
+        changes = self.hierarchy.refresh(self.client, full=False)
+
+        # Solo la consulta customer_client del MCC raíz
+        self.assertEqual(self.ga_service.searches, [('100', False, True)])
+        self.assertEqual(changes, {'added': [], 'removed': [], 'changed': []})
+        self.assertEqual(len(self.changes), 1)
+        self.assertEqual(self.parents()['401'], '400')
+
+    def test_incremental_refresh_diffs_changes(self):
+        """Test para detectar altas, bajas, cambios y movimientos entre sub-MCCs"""
+        self.hierarchy.refresh(self.client, full=True)
+        self.ga_service.accounts['201'] = account('201', 1, name='Tarot Renombrado')
+        self.ga_service.tree['300'].remove('301')
+        self.ga_service.accounts['302'] = account('302', 2)
+        self.ga_service.tree['300'].append('302')
+        self.ga_service.accounts['401'] = account('401', 2)
+        self.ga_service.move('401', '300')
+        self.ga_service.searches.clear()
+
+        changes = self.hierarchy.refresh(self.client, full=False)
+
+        self.assertEqual(changes['added'], ['302'])
+        self.assertEqual(changes['removed'], ['301'])
+        self.assertEqual(changes['changed'], ['201', '300', '400', '401'])
+        self.assertEqual(self.parents()['302'], '300')
+        self.assertEqual(self.parents()['401'], '300')
+        self.assertIn(('300', True, True), self.ga_service.searches)
+        self.assertEqual(self.changes[-1], changes)
+
+    def test_unreadable_sub_mcc_falls_back_to_root(self):
+        """Test para colgar del MCC raíz las cuentas cuyo sub-MCC no se puede leer"""
+        self.ga_service.failing['400'] = 'PERMISSION_DENIED'
+        self.hierarchy.refresh(self.client, full=True)
+
+        self.assertEqual(self.parents()['301'], '300')
+        self.assertEqual(self.parents()['401'], '100')
+
+    def test_tree_persisted_and_reloaded(self):
+        """Test para cargar el árbol desde disco sin llamar a la API"""
+        self.hierarchy.refresh(self.client, full=True)
+
+        reloaded = AccountHierarchy(storage_path=self.path)
+
+        self.assertEqual({cid: n.parent_id for cid, n in reloaded.accounts.items()}, self.parents())
+        self.assertFalse(reloaded.is_stale)
+        self.assertEqual(reloaded.get_account('100').children, ['201', '300'])
+
+if __name__ == '__main__':
+    unittest.main()
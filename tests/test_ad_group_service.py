@@ -0,0 +1,166 @@
+# Tests para ad_group_service.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import re
+from datetime import date
+from types import SimpleNamespace
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ad_group_service import AdGroupService
+
+START, END = date(2026, 9, 1), date(2026, 9, 30)
+
+
+def enum(name):
+    return SimpleNamespace(name=name)
+
+
+def ad_group_row(ad_group_id, campaign_id, name, clicks=0):
+    return SimpleNamespace(
+        ad_group=SimpleNamespace(
+            id=int(ad_group_id), name=name, status=enum('ENABLED'), type_=enum('SEARCH_STANDARD'),
+            cpc_bid_micros=1_000_000, target_cpa_micros=0, target_roas=0.0
+        ),
+        campaign=SimpleNamespace(id=int(campaign_id), name=f"Campaña {campaign_id}"),
+        metrics=SimpleNamespace(
+            impressions=clicks * 10, clicks=clicks, cost_micros=clicks * 500_000, conversions=0.0,
+            conversions_value=0.0, average_cpc=500_000, ctr=0.1
+        )
+    )
+
+
+def ad_row(ad_group_id, ad_id):
+    ad = SimpleNamespace(
+        id=int(ad_id), name='', type_=enum('RESPONSIVE_SEARCH_AD'), final_urls=['https://example.com'],
+        responsive_search_ad=SimpleNamespace(
+            headlines=[SimpleNamespace(text='Tarot Hoy')], descriptions=[SimpleNamespace(text='Lectura de tarot.')],
+            path1='tarot', path2=''
+        )
+    )
+    return SimpleNamespace(
+        ad_group=SimpleNamespace(id=int(ad_group_id)),
+        ad_group_ad=SimpleNamespace(
+            ad=ad, status=enum('ENABLED'), policy_summary=SimpleNamespace(approval_status=enum('APPROVED'))
+        )
+    )
+
+
+def keyword_row(ad_group_id, criterion_id, text):
+    return SimpleNamespace(
+        ad_group=SimpleNamespace(id=int(ad_group_id)),
+        ad_group_criterion=SimpleNamespace(
+            criterion_id=int(criterion_id), keyword=SimpleNamespace(text=text, match_type=enum('PHRASE')),
+            status=enum('ENABLED'), quality_info=SimpleNamespace(quality_score=7), cpc_bid_micros=0
+        )
+    )
+
+
+class StubGoogleAdsService:
+    """Responde según el recurso del FROM y los IDs de campaign.id IN (...)"""
+
+    def __init__(self):
+        # Dos filas (dos fechas) para el grupo 10 y un grupo en la última campaña
+        self.rows = {
+            'ad_group': [
+                ad_group_row('10', '1', 'Tarot', clicks=3), ad_group_row('10', '1', 'Tarot', clicks=4),
+                ad_group_row('11', '1', 'Amarres'), ad_group_row('20', '2500', 'Rituales')
+            ],
+            'ad_group_ad': [ad_row('10', '100'), ad_row('20', '200'), ad_row('99', '999')],
+            'ad_group_criterion': [keyword_row('10', '1000', 'tarot del amor'), keyword_row('11', '1100', 'amarres')]
+        }
+        self.campaign_of = {'10': '1', '11': '1', '20': '2500', '99': '1'}
+        self.queries = []
+        self.fail_on = None
+
+    def search(self, customer_id, query):
+        resource = re.search(r"FROM (\w+)", query).group(1)
+        ids = re.search(r"campaign\.id IN \(([^)]*)\)", query).group(1).split(", ")
+        self.queries.append((resource, ids))
+        if resource == self.fail_on:
+            raise RuntimeError("INTERNAL_ERROR")
+        return [row for row in self.rows[resource] if self.campaign_of[str(row.ad_group.id)] in ids]
+
+
+class TestLoadCampaignTree(unittest.TestCase):
+    """Tests para load_campaign_tree"""
+
+    def setUp(self):
+        self.ga_service = StubGoogleAdsService()
+        client = SimpleNamespace(get_service=lambda name: self.ga_service)
+        self.service = AdGroupService(SimpleNamespace(get_client=lambda: client))
+
+    def load(self, campaign_ids, **kwargs):
+        return self.service.load_campaign_tree('111', campaign_ids, start_date=START, end_date=END, **kwargs)
+
+    def test_ids_chunked_per_query(self):
+        """Test para no superar MAX_IDS_PER_QUERY IDs en cada IN (...)"""
+        campaign_ids = [str(i) for i in range(1, 2501)]
+
+        tree = self.load(campaign_ids)
+
+        self.assertEqual(tree.queries, 9)
+        for resource in ('ad_group', 'ad_group_ad', 'ad_group_criterion'):
+            chunks = [ids for name, ids in self.ga_service.queries if name == resource]
+            self.assertEqual([len(ids) for ids in chunks], [1000, 1000, 500])
+            self.assertEqual(sorted(sum(chunks, []), key=int), campaign_ids)
+        self.assertEqual(tree.get_ad_group('20')['campaign_id'], '2500')
+
+    def test_indexes_assembled(self):
+        """Test para indexar grupos, anuncios y keywords por campaña y grupo"""
+        tree = self.load(['1', '2500', '1'])
+
+        self.assertEqual(tree.campaign_ids, ['1', '2500'])
+        self.assertEqual([g['name'] for g in tree.get_ad_groups('1')], ['Amarres', 'Tarot'])
+        self.assertEqual(tree.get_ad_group('10')['metrics']['clicks'], 7)
+        self.assertEqual([ad['id'] for ad in tree.get_ads('10')], ['100'])
+        self.assertEqual(tree.get_ads('10')[0]['headlines'], ['Tarot Hoy'])
+        self.assertEqual([kw['text'] for kw in tree.get_keywords('11')], ['amarres'])
+        # Filas de grupos que no están en el árbol se descartan
+        self.assertEqual(tree.get_ads('99'), [])
+        self.assertEqual(tree.get_keywords('20'), [])
+
+    def test_tree_reused_within_ttl(self):
+        """Test para reutilizar el árbol cacheado mientras no venza el TTL"""
+        first = self.load(['1'])
+        self.assertIs(self.load(['1']), first)
+        self.assertEqual(len(self.ga_service.queries), 3)
+
+        self.assertIsNot(self.load(['1'], force_refresh=True), first)
+        self.assertEqual(len(self.ga_service.queries), 6)
+
+        with patch('services.ad_group_service.time.time', return_value=first.loaded_at + AdGroupService.TREE_CACHE_TTL + 1):
+            self.load(['1'], force_refresh=False)
+        self.assertEqual(len(self.ga_service.queries), 9)
+
+    def test_invalidate_tree_cache(self):
+        """Test para descartar los árboles de un cliente o todos"""
+        self.load(['1'])
+        self.service.load_campaign_tree('222', ['1'], start_date=START, end_date=END)
+
+        self.service.invalidate_tree_cache('111')
+        self.assertEqual({key[0] for key in self.service._tree_cache}, {'222'})
+
+        self.service.invalidate_tree_cache()
+        self.assertEqual(self.service._tree_cache, {})
+
+    def test_partial_tree_not_cached_after_error(self):
+        """Test para no cachear el árbol incompleto si falla una query"""
+        self.ga_service.fail_on = 'ad_group_criterion'
+
+        tree = self.load(['1'])
+
+        self.assertEqual(len(tree.ad_groups_by_id), 2)
+        self.assertEqual(tree.keywords_by_ad_group, {})
+        self.assertEqual(self.service._tree_cache, {})
+
+        self.ga_service.fail_on = None
+        self.assertEqual(self.load(['1']).get_keywords('10')[0]['text'], 'tarot del amor')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# Tests para analytics_service.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.analytics_service import EsotericAnalyticsService, MetricData, MetricType
+
+START = datetime(2026, 9, 1)
+
+
+class TestTrendAnalysisBatch(unittest.TestCase):
+    """Tests para get_trend_analysis_batch"""
+
+    def setUp(self):
+        self.service = EsotericAnalyticsService()
+        rng = np.random.default_rng(3)
+        rows = []
+        for campaign_id, base, step in (('c1', 100.0, 4.0), ('c2', 300.0, -6.0)):
+            for day in range(21):
+                rows.append({
+                    'campaign_id': campaign_id,
+                    'date': START + timedelta(days=day, hours=9),
+                    'clicks': base + step * day + rng.normal(0, 3),
+                    'cost': 50.0 + (day % 7) * 2,
+                    'label': 'texto'
+                })
+        self.panel = pd.DataFrame(rows)
+
+    def single_series_trend(self, values):
+        """Análisis de una sola serie con AnalyticsService.get_trend_analysis"""
+        service = EsotericAnalyticsService()
+        for day, value in enumerate(values):
+            service.add_metric_data(MetricData(
+                metric_type=MetricType.CLICKS, value=value,
+                timestamp=datetime.now() - timedelta(days=len(values) - day), dimensions={}
+            ))
+        return service.get_trend_analysis(
+            MetricType.CLICKS, (datetime.now() - timedelta(days=60), datetime.now())
+        )
+
+    def test_one_row_per_series_and_metric(self):
+        """Test para una fila por (campaña, métrica numérica)"""
+        result = self.service.get_trend_analysis_batch(self.panel)
+
+        self.assertEqual(
+            sorted(zip(result['campaign_id'], result['metric'])),
+            [('c1', 'clicks'), ('c1', 'cost'), ('c2', 'clicks'), ('c2', 'cost')]
+        )
+        rows = result.set_index(['campaign_id', 'metric'])
+        self.assertEqual(rows.loc[('c1', 'clicks'), 'trend_direction'], 'up')
+        self.assertEqual(rows.loc[('c2', 'clicks'), 'trend_direction'], 'down')
+        self.assertEqual(rows.loc[('c1', 'clicks'), 'points'], 21)
+        self.assertEqual(len(rows.loc[('c1', 'clicks'), 'forecast']), 7)
+        self.assertEqual(rows.loc[('c1', 'cost'), 'best_day'], pd.Timestamp(START + timedelta(days=6)).day_name())
+
+    def test_matches_single_series_analysis(self):
+        """Test para coincidir con get_trend_analysis de cada serie"""
+        result = self.service.get_trend_analysis_batch(self.panel, metrics=['clicks'])
+        row = result[result['campaign_id'] == 'c2'].iloc[0]
+
+        values = self.panel[self.panel['campaign_id'] == 'c2']['clicks'].tolist()
+        single = self.single_series_trend(values)
+
+        self.assertEqual(row['trend_direction'], single.trend_direction)
+        self.assertAlmostEqual(row['trend_strength'], single.trend_strength, places=9)
+        self.assertAlmostEqual(row['change_percent'], single.period_comparison['change_percent'], places=9)
+        self.assertEqual(row['forecast'], single.forecast)
+
+    def test_daily_mean_and_missing_days(self):
+        """Test para promediar varias filas del mismo día y omitir días sin dato"""
+        panel = self.panel[self.panel['campaign_id'] == 'c1']
+        later = panel.assign(date=panel['date'] + timedelta(hours=5), clicks=panel['clicks'] + 2)
+        # Dos filas por día (promedio = clicks + 1) y sin filas los días 2 y 10
+        sparse = pd.concat([panel, later]).drop(index=panel.index[[2, 10]])
+
+        result = self.service.get_trend_analysis_batch(sparse, metrics=['clicks'])
+        expected = self.service.get_trend_analysis_batch(
+            panel.assign(clicks=panel['clicks'] + 1).drop(index=panel.index[[2, 10]]), metrics=['clicks']
+        )
+
+        self.assertEqual(result['points'].tolist(), [19])
+        for column in ('slope', 'trend_strength', 'change_percent'):
+            self.assertAlmostEqual(result[column].iloc[0], expected[column].iloc[0], places=9)
+        self.assertEqual(result['forecast'].iloc[0], expected['forecast'].iloc[0])
+
+    def test_short_series_and_empty_panel(self):
+        """Test para marcar series cortas y aceptar un panel vacío"""
+        result = self.service.get_trend_analysis_batch(self.panel.groupby('campaign_id').head(5), metrics=['clicks'])
+        self.assertEqual(set(result['trend_direction']), {'insufficient_data'})
+
+        empty = self.service.get_trend_analysis_batch(self.panel.iloc[0:0], id_columns=['campaign_id'])
+        self.assertTrue(empty.empty)
+        self.assertIn('forecast', empty.columns)
+
+if __name__ == '__main__':
+    unittest.main()
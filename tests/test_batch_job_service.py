@@ -0,0 +1,209 @@
+# Tests para batch_job_service.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import tempfile
+from datetime import date
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.fake_google_ads_backend import FakeGoogleAdsBackend, SyntheticAccountSpec
+from services.batch_job_service import (
+    BatchActionLog, BatchJobManager, BatchMutationJob, LocalBatchJobService, _LocalOperation, wrap_operation
+)
+
+TODAY = date(2026, 10, 18)
+
+
+class RecordingBatchJobService(LocalBatchJobService):
+    """LocalBatchJobService que guarda los requests de add_batch_job_operations"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.add_requests = []
+
+    def add_batch_job_operations(self, request):
+        self.add_requests.append(request)
+        return super().add_batch_job_operations(request)
+
+
+class BatchJobTestCase(unittest.TestCase):
+    """Backend simulado, log de acciones temporal y operaciones de puja"""
+
+    def setUp(self):
+        spec = SyntheticAccountSpec(campaigns=1, ad_groups_per_campaign=2, keywords_per_ad_group=4, days=7)
+        self.backend = FakeGoogleAdsBackend(accounts=1, spec=spec, today=TODAY)
+        self.wrapper = self.backend.create_wrapper()
+        self.client = self.wrapper.get_client()
+        self.customer_id = self.backend.customer_ids[0]
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.action_log = BatchActionLog(log_dir=self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def manager(self, **kwargs):
+        kwargs.setdefault('poll_interval', 0.01)
+        kwargs.setdefault('max_poll_interval', 0.02)
+        return BatchJobManager(action_log=self.action_log, **kwargs)
+
+    def keywords(self):
+        """[(ad_group_id, criterion_id), ...] de las keywords de la cuenta"""
+        rows = self.backend.search(self.customer_id,
+                                   "SELECT ad_group.id, ad_group_criterion.criterion_id FROM keyword_view")
+        return [(str(row.ad_group.id), str(row.ad_group_criterion.criterion_id)) for row in rows]
+
+    def bid_operations(self, count):
+        operations = []
+        for ad_group_id, criterion_id in self.keywords()[:count]:
+            operation = self.client.get_type("AdGroupCriterionOperation")
+            operation.update.resource_name = (
+                f"customers/{self.customer_id}/adGroupCriteria/{ad_group_id}~{criterion_id}"
+            )
+            operation.update.cpc_bid_micros = 1_000_000
+            operation.update_mask.paths.append('cpc_bid_micros')
+            label = ['adjust_bid', ad_group_id, criterion_id]
+            operations.append((label, wrap_operation(self.client, 'ad_group_criterion_operation', operation)))
+        return operations
+
+
+class TestBatchJobManager(BatchJobTestCase):
+    """Tests para envío, sondeo y lectura de resultados"""
+
+    def test_operations_chain_sequence_token(self):
+        """Test para agregar por tandas encadenando el sequence_token"""
+        service = RecordingBatchJobService(self.client)
+        manager = self.manager(operations_per_request=3)
+
+        job = manager.submit(self.client, self.customer_id, self.bid_operations(8), batch_job_service=service)
+        job = manager.wait(job.job_id, timeout=5)
+
+        self.assertEqual(job.status, 'done', job.errors)
+        self.assertEqual([len(r['mutate_operations']) for r in service.add_requests], [3, 3, 2])
+        self.assertEqual([r.get('sequence_token') for r in service.add_requests], [None, '3', '6'])
+        self.assertEqual(job.succeeded, 8)
+
+    def test_poll_timeout_fails_job(self):
+        """Test para marcar fallido el job que no termina en job_timeout"""
+        service = LocalBatchJobService(self.client, run_duration=60)
+        manager = self.manager(job_timeout=0.05)
+
+        job = manager.submit(self.client, self.customer_id, self.bid_operations(2), batch_job_service=service)
+        job = manager.wait(job.job_id, timeout=5)
+
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('no terminó', job.errors[0])
+        self.assertEqual(manager.read_results(job.job_id), [])
+
+    def test_operation_failures_written_to_log(self):
+        """Test para registrar en el JSONL el error de cada operación fallida"""
+        failing = {self.keywords()[1][1]}
+
+        def fail_predicate(operation):
+            resource_name = operation.ad_group_criterion_operation.update.resource_name
+            return "Puja inválida" if resource_name.split('~')[-1] in failing else None
+
+        service = LocalBatchJobService(self.client, fail_predicate=fail_predicate)
+        manager = self.manager(results_page_size=2)
+
+        job = manager.submit(self.client, self.customer_id, self.bid_operations(5), batch_job_service=service)
+        job = manager.wait(job.job_id, timeout=5)
+
+        records = manager.read_results(job.job_id)
+        self.assertEqual((job.succeeded, job.failed), (4, 1))
+        self.assertEqual([r['operation_index'] for r in records], list(range(5)))
+        failed = [r for r in records if r['status'] == 'failed']
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(failed[0]['error'], "Puja inválida")
+        self.assertEqual(failed[0]['label'][2], self.keywords()[1][1])
+        self.assertIsNone(failed[0]['resource_name'])
+        self.assertTrue(all(r['resource_name'] for r in records if r['status'] == 'success'))
+
+    def test_restart_resumes_running_jobs(self):
+        """Test para retomar tras reiniciar los jobs que ya se estaban ejecutando"""
+        service = LocalBatchJobService(self.client)
+        operations = self.bid_operations(3)
+
+        # Estado que deja un proceso que murió mientras sondeaba
+        manager = self.manager()
+        resource_name = manager._create_job(self.client, service, self.customer_id)
+        manager._add_operations(service, resource_name, [operation for _, operation in operations])
+        service.run_batch_job(resource_name=resource_name)
+        running = BatchMutationJob(job_id='running1', customer_id=self.customer_id, description='',
+                                   total_operations=3, status='running', resource_name=resource_name)
+        pending = BatchMutationJob(job_id='pending1', customer_id=self.customer_id, description='',
+                                   total_operations=3, status='submitting')
+        self.action_log.save_jobs([running, pending])
+        self.action_log.save_labels('running1', [label for label, _ in operations])
+        self.action_log.append('running1', [{'operation_index': 0, 'status': 'success'}])
+
+        restarted = self.manager()
+        self.assertEqual(restarted.get_job('pending1').status, 'failed')
+        self.assertEqual(restarted.get_job('running1').status, 'running')
+
+        with patch.object(BatchJobManager, '_resumed_operation',
+                          side_effect=lambda client, job: _LocalOperation(service._jobs[job.resource_name])):
+            resumed = restarted.resume(self.client, batch_job_service=service)
+            self.assertEqual([job.job_id for job in resumed], ['running1'])
+            self.assertEqual(restarted.resume(self.client, batch_job_service=service), [])
+            job = restarted.wait('running1', timeout=5)
+
+        self.assertEqual((job.status, job.succeeded), ('done', 3))
+        records = restarted.read_results('running1')
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[2]['label'], operations[2][0])
+        self.assertEqual(self.manager().get_job('running1').status, 'done')
+
+
+class TestBulkActionsUseBatchJobs(BatchJobTestCase):
+    """Tests para pasar a batch job por encima de BATCH_JOB_THRESHOLD"""
+
+    def test_bulk_adjust_bids_above_threshold(self):
+        """Test para enviar los ajustes como batch job al superar el umbral"""
+        from services.bid_adjustment_service import BidAdjustment, BidAdjustmentService
+        service = BidAdjustmentService(self.wrapper)
+        adjustments = [
+            BidAdjustment(self.customer_id, ad_group_id, criterion_id, f'kw {criterion_id}',
+                          1_000_000, 1_200_000, 20.0, 'test')
+            for ad_group_id, criterion_id in self.keywords()[:4]
+        ]
+        manager = self.manager()
+
+        with patch('services.bid_adjustment_service.BATCH_JOB_THRESHOLD', 3), \
+                patch('services.bid_adjustment_service.get_batch_job_manager', return_value=manager):
+            below = service.bulk_adjust_bids(adjustments[:3])
+            above = service.bulk_adjust_bids(adjustments)
+
+        self.assertNotIn('batch_jobs', below)
+        self.assertEqual(below['successful'], 3)
+        self.assertEqual(above['queued'], 4)
+        self.assertEqual(len(above['batch_jobs']), 1)
+        job = manager.wait(above['batch_jobs'][0], timeout=5)
+        self.assertEqual((job.status, job.succeeded), ('done', 4))
+
+    def test_bulk_pause_keywords_above_threshold(self):
+        """Test para pausar como batch job al superar el umbral"""
+        from services.keyword_actions import KeywordActionsService
+        service = KeywordActionsService(self.wrapper)
+        criterion_ids = [f"{ad_group_id}~{criterion_id}" for ad_group_id, criterion_id in self.keywords()[:4]]
+        manager = self.manager()
+
+        with patch('services.keyword_actions.BATCH_JOB_THRESHOLD', 3), \
+                patch('services.keyword_actions.get_batch_job_manager', return_value=manager):
+            below = service.bulk_pause_keywords(self.customer_id, criterion_ids[:3])
+            above = service.bulk_pause_keywords(self.customer_id, criterion_ids)
+
+        self.assertTrue(below['success'])
+        self.assertNotIn('async', below)
+        self.assertTrue(above['async'])
+        job = manager.wait(above['job_id'], timeout=5)
+        self.assertEqual((job.status, job.succeeded), ('done', 4))
+        self.assertEqual(manager.read_results(job.job_id)[0]['label'], ['pause_keyword', criterion_ids[0]])
+
+if __name__ == '__main__':
+    unittest.main()
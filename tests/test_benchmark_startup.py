@@ -0,0 +1,105 @@
+# Tests para benchmark_startup.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+
+# Agregar el directorio raíz y scripts/ al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from benchmark_startup import compare_reports, DEFAULT_TOLERANCE, MIN_SECONDS_DELTA, MIN_RSS_DELTA_MB
+
+
+def report(imports=None, pages=None):
+    return {'imports': imports or {}, 'pages': pages or {}}
+
+
+def result(seconds=1.0, peak_rss_mb=100.0, exceptions=0, errors=0, **extra):
+    return dict(seconds=seconds, peak_rss_mb=peak_rss_mb, exceptions=exceptions, errors=errors, **extra)
+
+
+class TestCompareReports(unittest.TestCase):
+    """Tests para compare_reports"""
+
+    def test_identical_reports_have_no_regressions(self):
+        """Test para no reportar nada si no cambió ninguna métrica"""
+        baseline = report({'app': result()}, {'app.py': result()})
+        self.assertEqual(compare_reports(baseline, baseline), [])
+
+    def test_new_exceptions_and_errors(self):
+        """Test para reportar cualquier excepción o st.error nuevo"""
+        baseline = report(pages={'pages/1.py': result(exceptions=1), 'pages/2.py': result()})
+        current = report(pages={
+            'pages/1.py': result(exceptions=2, first_exception='KeyError: x'),
+            'pages/2.py': result(errors=1)
+        })
+
+        regressions = compare_reports(current, baseline)
+
+        self.assertEqual(
+            [(r['target'], r['metric'], r['baseline'], r['current']) for r in regressions],
+            [('pages/1.py', 'exceptions', 1, 2), ('pages/2.py', 'errors', 0, 1)]
+        )
+        self.assertEqual(regressions[0]['first_exception'], 'KeyError: x')
+        # Menos excepciones que el baseline no es regresión
+        self.assertEqual(compare_reports(baseline, report(pages={'pages/1.py': result(exceptions=3)})), [])
+
+    def test_failed_targets(self):
+        """Test para reportar objetivos que dejaron de cargar"""
+        baseline = report({'app': result(), 'services.roto': {'error': 'ImportError'}})
+        current = report({
+            'app': {'error': 'ModuleNotFoundError: x'},
+            'services.roto': {'error': 'ImportError'},
+            'services.nuevo': {'error': 'ImportError'}
+        })
+
+        regressions = compare_reports(current, baseline)
+
+        # Solo cuenta si en el baseline sí cargaba
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0]['target'], 'app')
+        self.assertEqual(regressions[0]['metric'], 'error')
+        self.assertEqual(regressions[0]['current'], 'ModuleNotFoundError: x')
+
+    def test_seconds_need_relative_and_absolute_threshold(self):
+        """Test para exigir los umbrales relativo y absoluto en el tiempo"""
+        base_seconds = 0.1
+        baseline = report({'app': result(seconds=base_seconds)})
+        # +100 % pero por debajo de MIN_SECONDS_DELTA
+        small = base_seconds + MIN_SECONDS_DELTA * 0.8
+        self.assertEqual(compare_reports(report({'app': result(seconds=small)}), baseline), [])
+
+        regressions = compare_reports(report({'app': result(seconds=0.2)}), baseline)
+        self.assertEqual([(r['metric'], r['change_pct']) for r in regressions], [('seconds', 100.0)])
+
+        # Por encima de MIN_SECONDS_DELTA pero dentro de la tolerancia relativa
+        baseline = report({'app': result(seconds=10.0)})
+        within = 10.0 * (1 + DEFAULT_TOLERANCE * 0.8)
+        self.assertEqual(compare_reports(report({'app': result(seconds=within)}), baseline), [])
+        self.assertEqual(len(compare_reports(report({'app': result(seconds=within)}), baseline, tolerance=0.1)), 1)
+
+    def test_rss_needs_relative_and_absolute_threshold(self):
+        """Test para exigir los umbrales relativo y absoluto en la memoria"""
+        baseline = report(pages={'app.py': result(peak_rss_mb=20.0)})
+        # +40 % pero por debajo de MIN_RSS_DELTA_MB
+        below = 20.0 + MIN_RSS_DELTA_MB * 0.8
+        self.assertEqual(compare_reports(report(pages={'app.py': result(peak_rss_mb=below)}), baseline), [])
+
+        above = 20.0 + MIN_RSS_DELTA_MB * 1.5
+        regressions = compare_reports(report(pages={'app.py': result(peak_rss_mb=above)}), baseline)
+        self.assertEqual([(r['section'], r['metric'], r['baseline']) for r in regressions], [('pages', 'peak_rss_mb', 20.0)])
+
+        # +15 MB sobre 200 MB queda dentro de la tolerancia
+        baseline = report(pages={'app.py': result(peak_rss_mb=200.0)})
+        self.assertEqual(compare_reports(report(pages={'app.py': result(peak_rss_mb=215.0)}), baseline), [])
+
+    def test_targets_missing_from_baseline_ignored(self):
+        """Test para ignorar objetivos nuevos o métricas ausentes"""
+        baseline = report({'app': {'exceptions': 0}})
+        current = report({'app': result(seconds=99.0), 'services.nuevo': result(seconds=99.0)})
+        self.assertEqual(compare_reports(current, baseline), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# Tests para billing_service.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import Mock, patch
+from types import SimpleNamespace
+import sys
+import os
+import threading
+from datetime import date
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.billing_service import BillingService
+
+START, END = date(2026, 10, 1), date(2026, 10, 18)
+
+
+class StubAdsClient:
+    """Cliente con gasto diario por cuenta; registra el hilo de cada llamada"""
+
+    def __init__(self, names):
+        self.names = names
+        self.account_info_threads = []
+
+    def execute_query(self, customer_id, query):
+        if 'FROM customer' not in query:
+            return []
+        customer = SimpleNamespace(currency_code='MXN', descriptive_name=self.names[customer_id], test_account=False)
+        return [
+            SimpleNamespace(customer=customer, segments=SimpleNamespace(date=f'2026-10-0{day}'),
+                            metrics=SimpleNamespace(cost_micros=1_000_000))
+            for day in (1, 2)
+        ]
+
+    def get_account_info(self, customer_id):
+        self.account_info_threads.append(threading.current_thread().name)
+        return {'name': self.names[customer_id], 'currency_code': 'MXN'}
+
+
+class TestMultiAccountFrame(unittest.TestCase):
+    """Tests para get_multi_account_frame"""
+
+    def setUp(self):
+        self.cached = {}
+        cache_manager = Mock()
+        cache_manager.get.side_effect = lambda key: self.cached.get(key)
+        cache_manager.set.side_effect = lambda key, value, ttl: self.cached.__setitem__(key, value)
+        patcher = patch('utils.cache.get_cache_manager', return_value=cache_manager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = StubAdsClient({'111': 'Tarot Centro', '222': 'Videncia Norte', '333': 'Amarres Sur'})
+        self.service = BillingService(self.client, max_workers=3)
+
+    def test_one_row_per_account_in_order(self):
+        """Test para armar una fila por cuenta con su nombre"""
+        frame = self.service.get_multi_account_frame(['111', '222', '333'], START, END)
+
+        self.assertEqual(frame['customer_id'].tolist(), ['111', '222', '333'])
+        self.assertEqual(frame['account_name'].tolist(), ['Tarot Centro', 'Videncia Norte', 'Amarres Sur'])
+        self.assertEqual(frame['current_spend'].tolist(), [2.0, 2.0, 2.0])
+        self.assertEqual(set(frame['currency_code']), {'MXN'})
+        # El nombre viene de la consulta de gasto, sin llamadas extra
+        self.assertEqual(self.client.account_info_threads, [])
+
+    def test_cached_summaries_look_up_names_in_the_pool(self):
+        """Test para buscar el nombre en los hilos del pool si el resumen viene de caché"""
+        self.service.get_multi_account_frame(['111', '222', '333'], START, END)
+        self.assertEqual(len(self.cached), 3)
+
+        # Sin la info en memoria, los resúmenes salen de caché sin consultar el gasto
+        self.service._account_info.clear()
+        frame = self.service.get_multi_account_frame(['111', '222', '333'], START, END)
+
+        self.assertEqual(frame['account_name'].tolist(), ['Tarot Centro', 'Videncia Norte', 'Amarres Sur'])
+        self.assertEqual(len(self.client.account_info_threads), 3)
+        self.assertTrue(all(name.startswith('billing') for name in self.client.account_info_threads))
+
+    def test_failed_account_is_skipped(self):
+        """Test para omitir la cuenta cuyo resumen falla"""
+        original = self.service.get_billing_summary
+
+        def summary(customer_id, start_date=None, end_date=None):
+            if customer_id == '222':
+                return None
+            return original(customer_id, start_date, end_date)
+
+        with patch.object(self.service, 'get_billing_summary', side_effect=summary):
+            frame = self.service.get_multi_account_frame(['111', '222', '333'], START, END)
+
+        self.assertEqual(frame['customer_id'].tolist(), ['111', '333'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+# Tests para campaign_tree_publisher.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+from datetime import date
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.fake_google_ads_backend import FakeGoogleAdsBackend, SyntheticAccountSpec
+from services.campaign_tree_publisher import CampaignTreePublisher
+
+TODAY = date(2026, 10, 18)
+
+
+class RecordingGoogleAdsService:
+    """GoogleAdsService que guarda una copia de cada request antes de enviarlo"""
+
+    def __init__(self, service):
+        self.service = service
+        self.requests = []
+
+    def mutate(self, request):
+        self.requests.append({
+            'mutate_operations': [type(op)(op) for op in request['mutate_operations']],
+            'partial_failure': request['partial_failure']
+        })
+        return self.service.mutate(request=request)
+
+
+class StubClient:
+    """Cliente con tipos reales y GoogleAdsService del backend simulado"""
+
+    def __init__(self, backend):
+        self.fake_client = backend.create_client()
+        self.enums = self.fake_client.enums
+        self.ga_service = RecordingGoogleAdsService(self.fake_client.get_service("GoogleAdsService"))
+
+    def get_type(self, name):
+        return self.fake_client.get_type(name)
+
+    def get_service(self, name):
+        assert name == "GoogleAdsService"
+        return self.ga_service
+
+
+class TestCampaignTreePublisher(unittest.TestCase):
+    """Tests para chunking, referencias temporales y partial failure"""
+
+    def setUp(self):
+        spec = SyntheticAccountSpec(campaigns=1, ad_groups_per_campaign=1, keywords_per_ad_group=1, days=7)
+        self.backend = FakeGoogleAdsBackend(accounts=1, spec=spec, today=TODAY)
+        self.customer_id = self.backend.customer_ids[0]
+        self.client = StubClient(self.backend)
+
+    def publisher(self, **kwargs):
+        return CampaignTreePublisher(self.client, **kwargs)
+
+    def root_unit(self, publisher):
+        budget_name = publisher.temp_resource_name(self.customer_id, 'campaignBudgets')
+        budget_op = publisher.new_operation()
+        budget_op.campaign_budget_operation.create.resource_name = budget_name
+        budget_op.campaign_budget_operation.create.name = "Presupuesto"
+        budget_op.campaign_budget_operation.create.amount_micros = 10_000_000
+
+        campaign_name = publisher.temp_resource_name(self.customer_id, 'campaigns')
+        campaign_op = publisher.new_operation()
+        campaign = campaign_op.campaign_operation.create
+        campaign.resource_name = campaign_name
+        campaign.name = "Campaña"
+        campaign.campaign_budget = budget_name
+        return campaign_name, [(('budget',), budget_op), (('campaign',), campaign_op)]
+
+    def group_unit(self, publisher, campaign_name, group_index, keywords):
+        ad_group_name = publisher.temp_resource_name(self.customer_id, 'adGroups')
+        ad_group_op = publisher.new_operation()
+        ad_group_op.ad_group_operation.create.resource_name = ad_group_name
+        ad_group_op.ad_group_operation.create.name = f"Grupo {group_index}"
+        ad_group_op.ad_group_operation.create.campaign = campaign_name
+        unit = [(('ad_group', group_index), ad_group_op)]
+        for kw_idx, text in enumerate(keywords):
+            keyword_op = publisher.new_operation()
+            criterion = keyword_op.ad_group_criterion_operation.create
+            criterion.ad_group = ad_group_name
+            criterion.keyword.text = text
+            criterion.keyword.match_type = self.client.enums.KeywordMatchTypeEnum.EXACT
+            unit.append((('keyword', group_index, kw_idx), keyword_op))
+        return unit
+
+    def test_units_are_never_split(self):
+        """Test para agrupar unidades completas sin superar el máximo"""
+        publisher = self.publisher(max_operations_per_request=4)
+        campaign_name, root = self.root_unit(publisher)
+        units = [root,
+                 self.group_unit(publisher, campaign_name, 0, ['tarot']),
+                 self.group_unit(publisher, campaign_name, 1, ['videncia', 'astrología', 'horóscopo', 'runas'])]
+
+        chunks = publisher._chunk_units(units + [[]])
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 5])
+        self.assertEqual([label for label, _ in chunks[1]][0], ('ad_group', 1))
+
+        result = publisher.publish(self.customer_id, units)
+        self.assertEqual(result['requests'], 2)
+        self.assertEqual(result['errors'], {})
+        self.assertEqual(len(result['resource_names']), 9)
+
+    def test_references_rewritten_across_requests(self):
+        """Test para reemplazar IDs temporales creados en un request anterior"""
+        publisher = self.publisher(max_operations_per_request=2)
+        campaign_name, root = self.root_unit(publisher)
+        units = [root, self.group_unit(publisher, campaign_name, 0, ['tarot'])]
+
+        result = publisher.publish(self.customer_id, units)
+
+        second = self.client.ga_service.requests[1]['mutate_operations']
+        created_campaign = result['resource_names'][('campaign',)]
+        self.assertNotIn('/-', created_campaign)
+        self.assertEqual(second[0].ad_group_operation.create.campaign, created_campaign)
+        # La keyword apunta al ad group temporal del mismo request
+        self.assertTrue(second[1].ad_group_criterion_operation.create.ad_group.endswith('/-3'))
+        self.assertIn(('keyword', 0, 0), result['resource_names'])
+
+    def test_partial_failure_maps_operation_index_to_label(self):
+        """Test para asociar cada error parcial a la etiqueta de su operación"""
+        publisher = self.publisher(max_operations_per_request=3)
+        campaign_name, root = self.root_unit(publisher)
+        units = [root, self.group_unit(publisher, campaign_name, 0, ['tarot', 'palabra ' * 11, 'videncia'])]
+
+        result = publisher.publish(self.customer_id, units)
+
+        self.assertEqual(list(result['errors']), [('keyword', 0, 1)])
+        self.assertNotIn(('keyword', 0, 1), result['resource_names'])
+        self.assertIn(('keyword', 0, 0), result['resource_names'])
+        self.assertIn(('keyword', 0, 2), result['resource_names'])
+        self.assertTrue(all(request['partial_failure'] for request in self.client.ga_service.requests))
+
+    def test_atomic_failure_skips_remaining_requests(self):
+        """Test para no enviar más requests tras un fallo atómico"""
+        publisher = self.publisher(atomic=True, max_operations_per_request=3)
+        campaign_name, root = self.root_unit(publisher)
+        units = [root,
+                 self.group_unit(publisher, campaign_name, 0, ['tarot', 'palabra ' * 11]),
+                 self.group_unit(publisher, campaign_name, 1, ['videncia'])]
+
+        result = publisher.publish(self.customer_id, units)
+
+        self.assertEqual(result['requests'], 2)
+        self.assertNotEqual(result['errors'][('keyword', 0, 1)], "No aplicado: el request atómico falló")
+        self.assertEqual(result['errors'][('keyword', 0, 0)], "No aplicado: el request atómico falló")
+        self.assertEqual(result['errors'][('ad_group', 1)], "No enviado: falló un request anterior")
+        self.assertEqual(len(result['request_errors']), 1)
+
+
+class TestAutopilotValidateOnly(unittest.TestCase):
+    """Tests para publicar un blueprint con validate_only"""
+
+    def test_validate_only_reports_no_missing_resources(self):
+        """Test para no reportar recursos 'sin respuesta' al solo validar"""
+        from services.autopilot_publisher import AutopilotPublisher
+        spec = SyntheticAccountSpec(campaigns=1, ad_groups_per_campaign=1, keywords_per_ad_group=1, days=7)
+        backend = FakeGoogleAdsBackend(accounts=1, spec=spec, today=TODAY)
+        customer_id = backend.customer_ids[0]
+        campaign_id = backend.search(customer_id, "SELECT campaign.id FROM campaign")[0].campaign.id
+        blueprint = {
+            'campaign_id': str(campaign_id),
+            'ad_groups': [{
+                'name': 'Tarot',
+                'keywords': ['tarot gratis', 'videncia'],
+                'ads': [{
+                    'headlines': ['Tarot Online Hoy', 'Lectura de Tarot', 'Consulta Ahora'],
+                    'descriptions': ['Consulta tu tarot hoy mismo.', 'Lecturas personalizadas 24 horas.'],
+                    'final_url': 'https://example.com'
+                }]
+            }]
+        }
+        before = len(backend.search(customer_id, "SELECT ad_group.id FROM ad_group"))
+
+        result = AutopilotPublisher(backend.create_wrapper()).publish_complete_campaign(
+            blueprint, customer_id, validate_only=True
+        )
+
+        self.assertTrue(result['success'], result['errors'])
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(result['ad_group_ids'], [])
+        self.assertEqual(len(backend.search(customer_id, "SELECT ad_group.id FROM ad_group")), before)
+
+if __name__ == '__main__':
+    unittest.main()
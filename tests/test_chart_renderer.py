@@ -0,0 +1,134 @@
+# Tests para chart_renderer.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.chart_renderer import ChartRenderer, CHART_QUALITY_DPI, PLOTTING_AVAILABLE
+
+DATA = {'day': ['lun', 'mar', 'mié'], 'clicks': [10, 25, 17]}
+
+
+def spec(title='Clicks'):
+    return ChartRenderer.bar_spec(DATA, title, 'day', 'clicks')
+
+
+class TestChartCacheKey(unittest.TestCase):
+    """Tests para la clave de caché por contenido"""
+
+    def test_default_quality_keeps_300_dpi(self):
+        """Test para conservar los 300 DPI de los reportes por defecto"""
+        self.assertEqual(ChartRenderer(max_workers=0).dpi, 300)
+        self.assertEqual(CHART_QUALITY_DPI['high'], 300)
+
+    def test_key_depends_on_content_dpi_and_format(self):
+        """Test para cambiar la clave con el contenido, el DPI o el formato"""
+        renderer = ChartRenderer(max_workers=0)
+        self.assertEqual(renderer.cache_key(spec()), renderer.cache_key(spec()))
+        self.assertNotEqual(renderer.cache_key(spec()), renderer.cache_key(spec('Otro título')))
+        self.assertNotEqual(renderer.cache_key(spec()), ChartRenderer(dpi=72, max_workers=0).cache_key(spec()))
+        self.assertNotEqual(renderer.cache_key(spec()), ChartRenderer(image_format='svg', max_workers=0).cache_key(spec()))
+
+    def test_numpy_scalars_hash_like_native_values(self):
+        """Test para que los escalares numpy den la misma clave"""
+        renderer = ChartRenderer(max_workers=0)
+        numpy_data = {'day': DATA['day'], 'clicks': list(np.array(DATA['clicks']))}
+        self.assertEqual(
+            renderer.cache_key(ChartRenderer.bar_spec(numpy_data, 'Clicks', 'day', 'clicks')),
+            renderer.cache_key(spec())
+        )
+
+
+@unittest.skipUnless(PLOTTING_AVAILABLE, "matplotlib no instalado")
+class TestChartCache(unittest.TestCase):
+    """Tests para los aciertos y la poda de la caché"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_dir = Path(self.tmp.name) / '.chart_cache'
+
+    def renderer(self, **kwargs):
+        kwargs.setdefault('dpi', 50)
+        renderer = ChartRenderer(cache_dir=str(self.cache_dir), max_workers=0, **kwargs)
+        self.addCleanup(renderer.close)
+        return renderer
+
+    def test_memory_and_disk_hits(self):
+        """Test para no volver a renderizar un gráfico en caché"""
+        renderer = self.renderer()
+        first = renderer.render(spec())
+        self.assertEqual(renderer.render(spec()), first)
+        self.assertEqual(renderer.stats['rendered'], 1)
+        self.assertEqual(renderer.stats['cache_hits'], 1)
+
+        # Otro proceso (nueva instancia) lo toma del disco
+        other = self.renderer()
+        with patch('services.chart_renderer.render_chart_bytes') as render:
+            self.assertEqual(other.render(spec()), first)
+        render.assert_not_called()
+
+    def test_memory_cache_is_lru(self):
+        """Test para descartar de memoria el gráfico usado hace más tiempo"""
+        renderer = ChartRenderer(dpi=50, max_cache_entries=2, max_workers=0)
+        keys = [renderer.cache_key(spec(title)) for title in ('a', 'b', 'c')]
+        renderer.render(spec('a'))
+        renderer.render(spec('b'))
+        renderer.render(spec('a'))
+        renderer.render(spec('c'))
+        self.assertEqual(list(renderer._memory_cache), [keys[0], keys[2]])
+
+    def test_disk_cache_pruned_by_age(self):
+        """Test para borrar los gráficos sin uso por más de la antigüedad máxima"""
+        renderer = self.renderer(disk_cache_max_age_days=1)
+        renderer.render(spec('viejo'))
+        renderer.render(spec('nuevo'))
+        old_path = self.cache_dir / f"{renderer.cache_key(spec('viejo'))}.png"
+        two_days_ago = time.time() - 2 * 86400
+        os.utime(old_path, (two_days_ago, two_days_ago))
+
+        self.assertEqual(renderer.prune_disk_cache(), 1)
+        self.assertFalse(old_path.exists())
+        self.assertEqual(len(list(self.cache_dir.glob('*.png'))), 1)
+
+    def test_disk_cache_pruned_least_recently_used_first(self):
+        """Test para respetar el tamaño máximo borrando los de uso menos reciente"""
+        renderer = self.renderer()
+        for index, title in enumerate(('a', 'b', 'c')):
+            renderer.render(spec(title))
+            path = self.cache_dir / f"{renderer.cache_key(spec(title))}.png"
+            stamp = time.time() - 100 + index
+            os.utime(path, (stamp, stamp))
+
+        # Leer 'a' desde disco lo marca como usado recientemente
+        renderer.clear_cache()
+        renderer.render(spec('a'))
+
+        sizes = {title: (self.cache_dir / f"{renderer.cache_key(spec(title))}.png").stat().st_size
+                 for title in ('a', 'b', 'c')}
+        renderer.max_disk_cache_bytes = sizes['a'] + sizes['c']
+        self.assertEqual(renderer.prune_disk_cache(), 1)
+        remaining = {path.name for path in self.cache_dir.glob('*.png')}
+        self.assertEqual(remaining, {f"{renderer.cache_key(spec(title))}.png" for title in ('a', 'c')})
+
+    def test_prune_runs_periodically_on_writes(self):
+        """Test para podar la caché en disco cada DISK_PRUNE_INTERVAL escrituras"""
+        with patch('services.chart_renderer.DISK_PRUNE_INTERVAL', 2):
+            renderer = self.renderer()
+            with patch.object(renderer, 'prune_disk_cache') as prune:
+                for title in ('a', 'b', 'c', 'd'):
+                    renderer.render(spec(title))
+        self.assertEqual(prune.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
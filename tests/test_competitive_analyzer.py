@@ -0,0 +1,86 @@
+# Tests para competitive_analyzer.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import tempfile
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.competitive_analyzer import CompetitiveAnalyzer
+
+KEYWORD_SETS = {
+    'amarres': ['amarres de amor', 'amarres efectivos', 'tarot del amor'],
+    'tarot': ['tarot del amor', 'videncia tarot'],
+    'rituales': ['rituales de dinero', 'brujería blanca'],
+    'vacio': []
+}
+
+
+class TestCompetitiveAnalyzerBatch(unittest.TestCase):
+    """Tests para analyze_batch y los perfiles persistidos"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def analyzer(self):
+        return CompetitiveAnalyzer(cache_dir=self.tmp_dir.name)
+
+    def test_batch_estimates_each_keyword_once(self):
+        """Test para estimar una sola vez las keywords compartidas entre conjuntos"""
+        result = self.analyzer().analyze_batch(KEYWORD_SETS)
+
+        self.assertEqual(result['total_sets'], 3)
+        self.assertEqual(result['unique_keywords'], 6)
+        self.assertEqual(result['cache']['misses'], 6)
+        self.assertEqual(result['cache']['stored_profiles'], 6)
+        self.assertEqual({row['set_name'] for row in result['summary']}, {'amarres', 'tarot', 'rituales'})
+        potentials = [row['top_gap_potential'] for row in result['summary']]
+        self.assertEqual(potentials, sorted(potentials, reverse=True))
+
+        names = {c['name'] for c in result['results']['rituales']['competitor_analysis']['competitors']}
+        self.assertEqual(names, {'Competidor C'})
+
+    def test_profiles_reloaded_from_disk(self):
+        """Test para reutilizar en otra instancia los perfiles guardados"""
+        first = self.analyzer().analyze_batch(KEYWORD_SETS)
+
+        second = self.analyzer().analyze_batch(KEYWORD_SETS)
+
+        self.assertEqual(second['cache']['misses'], 0)
+        self.assertEqual(
+            second['results']['amarres']['competitor_analysis']['competitors'],
+            first['results']['amarres']['competitor_analysis']['competitors']
+        )
+        with open(os.path.join(self.tmp_dir.name, CompetitiveAnalyzer.PROFILE_CACHE_FILE), encoding='utf-8') as f:
+            stored = json.load(f)
+        self.assertEqual(stored['profiles']['amarres de amor']['competitors'], ['Competidor A'])
+
+    def test_edited_competitor_list_invalidates_profiles(self):
+        """Test para no apuntar a competidores equivocados tras editar la lista"""
+        self.analyzer().analyze_batch(KEYWORD_SETS)
+
+        reordered = list(reversed(CompetitiveAnalyzer.KNOWN_COMPETITORS))
+        with patch.object(CompetitiveAnalyzer, 'KNOWN_COMPETITORS', reordered):
+            analyzer = self.analyzer()
+            self.assertEqual(analyzer.keyword_profiles, {})
+            result = analyzer.analyze_batch(KEYWORD_SETS)
+
+        self.assertEqual(result['cache']['misses'], 6)
+        names = {c['name'] for c in result['results']['rituales']['competitor_analysis']['competitors']}
+        self.assertEqual(names, {'Competidor C'})
+
+    def test_old_cache_version_is_ignored(self):
+        """Test para descartar perfiles guardados con índices (versión 1)"""
+        with open(os.path.join(self.tmp_dir.name, CompetitiveAnalyzer.PROFILE_CACHE_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'profiles': {'amarres de amor': {'competitors': [2]}}}, f)
+
+        self.assertEqual(self.analyzer().keyword_profiles, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+# Tests para fake_google_ads_backend.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+from datetime import date
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.ads.googleads.errors import GoogleAdsException
+
+from modules.fake_google_ads_backend import FakeGoogleAdsBackend, SyntheticAccountSpec
+from modules.google_ads_client_pool import get_pooled_service
+
+TODAY = date(2026, 10, 18)
+
+
+class TestFakeBackendQueries(unittest.TestCase):
+    """Tests para el evaluador GAQL del backend simulado"""
+
+    @classmethod
+    def setUpClass(cls):
+        spec = SyntheticAccountSpec(campaigns=3, ad_groups_per_campaign=2, keywords_per_ad_group=5, days=30)
+        cls.backend = FakeGoogleAdsBackend(accounts=1, spec=spec, today=TODAY)
+        cls.wrapper = cls.backend.create_wrapper()
+        cls.customer_id = cls.backend.customer_ids[0]
+
+    def search(self, query):
+        return self.backend.search(self.customer_id, query)
+
+    def test_where_filters(self):
+        """Test para filtrar por campo de entidad, IN y métricas"""
+        paused = self.search("SELECT ad_group_criterion.criterion_id, ad_group_criterion.status "
+                             "FROM keyword_view WHERE ad_group_criterion.status = 'PAUSED'")
+        enabled = self.search("SELECT ad_group_criterion.criterion_id FROM keyword_view "
+                              "WHERE ad_group_criterion.status IN ('ENABLED')")
+        self.assertEqual(len(paused) + len(enabled), 30)
+        self.assertTrue(all(row.ad_group_criterion.status.name == 'PAUSED' for row in paused))
+
+        rows = self.search("SELECT campaign.id, metrics.clicks FROM campaign "
+                           "WHERE segments.date DURING LAST_7_DAYS AND metrics.clicks > 0")
+        self.assertTrue(all(row.metrics.clicks > 0 for row in rows))
+
+    def test_order_by_and_limit(self):
+        """Test para ordenar y limitar las filas"""
+        rows = self.search("SELECT ad_group_criterion.criterion_id, metrics.impressions FROM keyword_view "
+                           "WHERE segments.date DURING LAST_30_DAYS "
+                           "ORDER BY metrics.impressions DESC LIMIT 4")
+        impressions = [row.metrics.impressions for row in rows]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(impressions, sorted(impressions, reverse=True))
+
+    def test_during_and_between(self):
+        """Test para resolver DURING y BETWEEN a los mismos días"""
+        during = self.search("SELECT campaign.id, segments.date, metrics.clicks FROM campaign "
+                             "WHERE segments.date DURING LAST_7_DAYS")
+        between = self.search("SELECT campaign.id, segments.date, metrics.clicks FROM campaign "
+                              "WHERE segments.date BETWEEN '2026-10-11' AND '2026-10-17'")
+        days = {row.segments.date for row in during}
+        self.assertTrue(days <= {f"2026-10-{day}" for day in range(11, 18)})
+        self.assertIn('2026-10-17', days)
+        self.assertEqual(
+            [(row.campaign.id, row.segments.date, row.metrics.clicks) for row in during],
+            [(row.campaign.id, row.segments.date, row.metrics.clicks) for row in between]
+        )
+
+    def test_unknown_customer(self):
+        """Test para rechazar cuentas fuera del backend"""
+        with self.assertRaises(GoogleAdsException):
+            self.backend.search('999', "SELECT customer.id FROM customer")
+
+    def test_client_goes_through_pool(self):
+        """Test para resolver servicios del cliente simulado vía el pool"""
+        service = get_pooled_service(self.wrapper, "GoogleAdsService")
+        self.assertIs(get_pooled_service(self.wrapper, "GoogleAdsService"), service)
+        self.assertIs(self.wrapper.get_client().get_service("GoogleAdsService"), service)
+
+
+class TestFakeBackendMutate(unittest.TestCase):
+    """Tests para mutate con IDs temporales y partial_failure"""
+
+    def setUp(self):
+        spec = SyntheticAccountSpec(campaigns=1, ad_groups_per_campaign=1, keywords_per_ad_group=1, days=7)
+        self.backend = FakeGoogleAdsBackend(accounts=1, spec=spec, today=TODAY)
+        self.client = self.backend.create_client()
+        self.customer_id = self.backend.customer_ids[0]
+        self.ga_service = self.client.get_service("GoogleAdsService")
+
+    def operations(self, keyword_texts):
+        """Presupuesto, campaña, grupo y keywords enlazados con IDs temporales"""
+        client, customer_id = self.client, self.customer_id
+        budget_name = f"customers/{customer_id}/campaignBudgets/-1"
+        campaign_name = f"customers/{customer_id}/campaigns/-2"
+        ad_group_name = f"customers/{customer_id}/adGroups/-3"
+
+        budget_op = client.get_type("MutateOperation")
+        budget = budget_op.campaign_budget_operation.create
+        budget.resource_name = budget_name
+        budget.name = "Presupuesto test"
+        budget.amount_micros = 10_000_000
+
+        campaign_op = client.get_type("MutateOperation")
+        campaign = campaign_op.campaign_operation.create
+        campaign.resource_name = campaign_name
+        campaign.name = "Campaña test"
+        campaign.campaign_budget = budget_name
+        campaign.status = client.enums.CampaignStatusEnum.PAUSED
+
+        ad_group_op = client.get_type("MutateOperation")
+        ad_group = ad_group_op.ad_group_operation.create
+        ad_group.resource_name = ad_group_name
+        ad_group.name = "Grupo test"
+        ad_group.campaign = campaign_name
+
+        keyword_ops = []
+        for text in keyword_texts:
+            keyword_op = client.get_type("MutateOperation")
+            criterion = keyword_op.ad_group_criterion_operation.create
+            criterion.ad_group = ad_group_name
+            criterion.keyword.text = text
+            criterion.keyword.match_type = client.enums.KeywordMatchTypeEnum.EXACT
+            keyword_ops.append(keyword_op)
+        return [budget_op, campaign_op, ad_group_op] + keyword_ops
+
+    def names(self, response):
+        names = []
+        for op_response in response.mutate_operation_responses:
+            which = type(op_response).pb(op_response).WhichOneof('response')
+            names.append(getattr(op_response, which).resource_name if which else None)
+        return names
+
+    def test_temporary_ids_are_resolved(self):
+        """Test para enlazar hijos con recursos creados en el mismo request"""
+        response = self.ga_service.mutate(customer_id=self.customer_id,
+                                          mutate_operations=self.operations(['tarot gratis']))
+        names = self.names(response)
+        self.assertTrue(all(name and '/-' not in name for name in names))
+
+        ad_group_id = names[2].split('/')[-1]
+        rows = self.backend.search(self.customer_id,
+                                   f"SELECT ad_group_criterion.keyword.text, campaign.name FROM ad_group_criterion "
+                                   f"WHERE ad_group.id = {ad_group_id}")
+        self.assertEqual([(r.ad_group_criterion.keyword.text, r.campaign.name) for r in rows],
+                         [('tarot gratis', 'Campaña test')])
+
+    def test_partial_failure_reports_operation_index(self):
+        """Test para aplicar las válidas y reportar el índice de las fallidas"""
+        too_long = 'palabra ' * 11
+        response = self.ga_service.mutate(customer_id=self.customer_id,
+                                          mutate_operations=self.operations(['tarot', too_long, 'videncia']),
+                                          partial_failure=True)
+        names = self.names(response)
+        self.assertIsNone(names[4])
+        self.assertTrue(all(names[i] for i in (0, 1, 2, 3, 5)))
+        self.assertTrue(response.partial_failure_error.code)
+        self.assertEqual(self.backend.get_stats()['failed_operations'], 1)
+
+    def test_atomic_failure_rolls_back(self):
+        """Test para deshacer todo el request si falla sin partial_failure"""
+        before = len(self.backend.search(self.customer_id, "SELECT campaign.id FROM campaign"))
+        with self.assertRaises(GoogleAdsException) as ctx:
+            self.ga_service.mutate(customer_id=self.customer_id,
+                                   mutate_operations=self.operations(['tarot', 'palabra ' * 11]))
+        error = ctx.exception.failure.errors[0]
+        self.assertEqual(error.location.field_path_elements[0].index, 4)
+        self.assertEqual(len(self.backend.search(self.customer_id, "SELECT campaign.id FROM campaign")), before)
+
+    def test_validate_only_does_not_change_state(self):
+        """Test para validar sin crear recursos"""
+        response = self.ga_service.mutate(customer_id=self.customer_id,
+                                          mutate_operations=self.operations(['tarot']), validate_only=True)
+        self.assertEqual(self.names(response), [None] * 4)
+        self.assertEqual(len(self.backend.search(self.customer_id, "SELECT campaign.id FROM campaign")), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# Tests para google_ads_client_pool.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import time
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.ads.googleads.client import GoogleAdsClient
+
+from modules.google_ads_client_pool import GoogleAdsClientPool
+
+
+class StubClient(GoogleAdsClient):
+    """Cliente sin credenciales que crea un objeto nuevo por cada get_service"""
+
+    def __init__(self, version=None):
+        self.version = version
+        self.created = []
+
+    def get_service(self, name, version=None, interceptors=None):
+        stub = (name, version, len(self.created))
+        self.created.append(stub)
+        return stub
+
+
+class TestGoogleAdsClientPool(unittest.TestCase):
+    """Tests para el pool de clientes y stubs"""
+
+    def setUp(self):
+        self.pool = GoogleAdsClientPool(pool_size=2, health_check_interval=60,
+                                        client_factory=lambda config: StubClient())
+
+    def test_clients_round_robin_per_config(self):
+        """Test para crear pool_size clientes y repartirlos en round-robin"""
+        config = {'developer_token': 'x'}
+        clients = [self.pool.get_client(config) for _ in range(4)]
+        self.assertIsNot(clients[0], clients[1])
+        self.assertEqual(clients[2:], clients[:2])
+        self.assertIsNot(self.pool.get_client({'developer_token': 'y'}), clients[0])
+        self.assertEqual(self.pool.get_stats()['clients'], 3)
+
+    def test_stub_cached_per_service_and_version(self):
+        """Test para reutilizar el stub y respetar la versión pedida"""
+        client = self.pool.register_client(StubClient(version='v20'))
+        first = client.get_service('GoogleAdsService')
+        self.assertIs(client.get_service('GoogleAdsService'), first)
+        self.assertEqual(first[1], None)
+
+        explicit = client.get_service('GoogleAdsService', version='v21')
+        self.assertIsNot(explicit, first)
+        self.assertEqual(explicit[1], 'v21')
+        self.assertIs(client.get_service('GoogleAdsService', version='v21'), explicit)
+        self.assertIs(client.get_service('GoogleAdsService', version='v20'), first)
+
+        stats = self.pool.get_stats()
+        self.assertEqual((stats['stubs_created'], stats['stub_hits']), (2, 3))
+
+    def test_interceptors_are_not_cached(self):
+        """Test para crear siempre un stub nuevo con interceptores"""
+        client = self.pool.register_client(StubClient())
+        client.get_service('GoogleAdsService', interceptors=[object()])
+        client.get_service('GoogleAdsService', interceptors=[object()])
+        self.assertEqual(len(client.created), 2)
+        self.assertEqual(self.pool.get_stats()['cached_stubs'], 0)
+
+    def test_unhealthy_stub_is_evicted(self):
+        """Test para descartar el stub cuyo canal no responde y recrearlo"""
+        client = self.pool.register_client(StubClient())
+        ads = client.get_service('GoogleAdsService')
+        budgets = client.get_service('CampaignBudgetService')
+
+        ready = {ads: False, budgets: True}
+        with patch.object(GoogleAdsClientPool, '_channel_ready', side_effect=lambda stub, timeout: ready[stub]):
+            self.assertFalse(self.pool.check_health(client, force=True))
+
+        self.assertIs(client.get_service('CampaignBudgetService'), budgets)
+        self.assertIsNot(client.get_service('GoogleAdsService'), ads)
+        self.assertEqual(self.pool.stats['unhealthy'], 1)
+
+    def test_health_check_interval(self):
+        """Test para no chequear antes de health_check_interval"""
+        client = self.pool.register_client(StubClient())
+        client.get_service('GoogleAdsService')
+        with patch.object(GoogleAdsClientPool, '_channel_ready', return_value=False) as ready:
+            self.assertTrue(self.pool.check_health(client))
+            self.assertFalse(self.pool.check_health_in_background(client))
+            ready.assert_not_called()
+
+    def test_health_check_runs_in_background(self):
+        """Test para chequear en un hilo sin bloquear al llamador"""
+        client = self.pool.register_client(StubClient())
+        client.get_service('GoogleAdsService')
+        self.pool._last_health_check[id(client)] = time.monotonic() - 120
+
+        def slow_ready(stub, timeout):
+            time.sleep(0.2)
+            return False
+
+        with patch.object(GoogleAdsClientPool, '_channel_ready', side_effect=slow_ready):
+            started = time.monotonic()
+            self.assertTrue(self.pool.check_health_in_background(client))
+            self.assertLess(time.monotonic() - started, 0.1)
+            self.assertFalse(self.pool.check_health_in_background(client))
+            self.pool._health_threads[id(client)].join()
+        self.assertEqual(self.pool.get_stats()['cached_stubs'], 0)
+
+    def test_invalidate(self):
+        """Test para descartar todos los stubs de un cliente"""
+        client = self.pool.register_client(StubClient())
+        stub = client.get_service('GoogleAdsService')
+        self.pool.invalidate(client)
+        self.assertIsNot(client.get_service('GoogleAdsService'), stub)
+
+if __name__ == '__main__':
+    unittest.main()
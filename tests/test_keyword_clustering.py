@@ -0,0 +1,76 @@
+# Tests para keyword_clustering.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.keyword_clustering import KeywordClusterEngine
+
+KEYWORDS = [
+    'amarres de amor efectivos', 'amarres de amor en bogota', 'amarres de amor gratis',
+    'tarot del amor online', 'tarot del amor gratis', 'lectura de tarot del amor',
+    'limpieza espiritual de casa', 'limpieza espiritual con huevo'
+]
+
+
+class TestKeywordClusterEngine(unittest.TestCase):
+    """Tests para el clustering MinHash + LSH"""
+
+    def setUp(self):
+        self.engine = KeywordClusterEngine()
+
+    def cluster_of(self, clusters, keyword):
+        return next(c for c in clusters if keyword in c['keywords'])
+
+    def test_similar_keywords_grouped(self):
+        """Test para agrupar keywords del mismo tema"""
+        clusters = self.engine.cluster(KEYWORDS)
+        amarres = self.cluster_of(clusters, 'amarres de amor efectivos')
+        self.assertIn('amarres de amor en bogota', amarres['keywords'])
+        self.assertNotIn('limpieza espiritual de casa', amarres['keywords'])
+        self.assertEqual(sum(c['size'] for c in clusters), len(KEYWORDS))
+
+    def test_cluster_id_stable_when_keywords_are_added(self):
+        """Test para conservar el id al agregar una keyword más corta al final"""
+        before = self.cluster_of(self.engine.cluster(KEYWORDS), 'amarres de amor efectivos')
+        after = self.cluster_of(self.engine.cluster(KEYWORDS + ['amarres de amor']), 'amarres de amor efectivos')
+
+        self.assertIn('amarres de amor', after['keywords'])
+        self.assertEqual(after['name'], 'amarres de amor')
+        self.assertEqual(after['cluster_id'], before['cluster_id'])
+        self.assertEqual(after['id_keyword'], 'amarres de amor efectivos')
+        self.assertEqual(after['cluster_id'], KeywordClusterEngine.cluster_id_for(after['id_keyword']))
+
+    def test_split_keeps_case_variants(self):
+        """Test para no descartar variantes de mayúsculas al repartir"""
+        keywords = KEYWORDS + ['Tarot del Amor Online', 'amarres de amor gratis']
+        groups = self.engine.split_into_groups(keywords, 3)
+
+        self.assertEqual(sorted(kw for group in groups for kw in group), sorted(keywords))
+        group = next(g for g in groups if 'tarot del amor online' in g)
+        self.assertIn('Tarot del Amor Online', group)
+        self.assertTrue(all(groups))
+
+
+class TestSplitUserKeywords(unittest.TestCase):
+    """Tests para IntelligentAutopilot._split_user_keywords"""
+
+    def test_case_variants_are_kept(self):
+        """Test para repartir todas las keywords del usuario"""
+        from services.intelligent_autopilot import IntelligentAutopilot
+        autopilot = IntelligentAutopilot.__new__(IntelligentAutopilot)
+        text = "Tarot Gratis, tarot gratis\nvidencia online, Videncia Online, amarres de amor"
+
+        groups = autopilot._split_user_keywords(text, 2)
+
+        self.assertEqual(len(groups), 2)
+        self.assertEqual(sorted(kw for group in groups for kw in group), sorted([
+            'Tarot Gratis', 'tarot gratis', 'videncia online', 'Videncia Online', 'amarres de amor'
+        ]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# Tests para keyword_extractor.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.keyword_extractor import KeywordExtractor
+
+DOCUMENTS = [
+    'Lectura de tarot del amor gratis y videncia online',
+    'Amarres de amor efectivos con brujería blanca',
+    'Limpieza espiritual de casa con hierbas y velas',
+]
+
+
+class TestCorpusCaches(unittest.TestCase):
+    """Tests para el vocabulario, los vectores y el memo de dominio"""
+
+    def test_clear_cache_resets_corpus_state(self):
+        """Test para limpiar vocabulario y memo junto con los vectores"""
+        extractor = KeywordExtractor()
+        extractor.extract_corpus(DOCUMENTS)
+        self.assertTrue(extractor.vocabulary)
+        self.assertTrue(extractor._domain_match_cache)
+
+        self.assertEqual(extractor.clear_cache(), len(DOCUMENTS))
+        self.assertEqual(extractor.vocabulary, {})
+        self.assertEqual(extractor.document_vectors, {})
+        self.assertEqual(extractor._domain_match_cache, {})
+
+        # Tras limpiar, el corpus se vuelve a vectorizar con ids consistentes
+        result = extractor.extract_corpus(DOCUMENTS)
+        self.assertEqual(result['vocabulary_size'], len(extractor.vocabulary))
+        self.assertTrue(result['keywords'])
+
+    def test_corpus_state_reset_at_document_limit(self):
+        """Test para reiniciar vectores y vocabulario al superar el límite de documentos"""
+        extractor = KeywordExtractor(max_cached_documents=2)
+        extractor.extract_corpus(DOCUMENTS[:2])
+        self.assertIn('amarres', extractor.vocabulary)
+
+        result = extractor.extract_corpus(DOCUMENTS[2:])
+
+        self.assertEqual(len(extractor.document_vectors), 1)
+        self.assertNotIn('amarres', extractor.vocabulary)
+        keywords = {kw['keyword'] for kw in result['keywords']}
+        self.assertIn('limpieza espiritual', keywords)
+        self.assertNotIn('amarres', keywords)
+
+    def test_corpus_state_reset_at_vocabulary_limit(self):
+        """Test para reiniciar al superar el tamaño máximo del vocabulario"""
+        extractor = KeywordExtractor(max_vocabulary_size=10)
+        extractor.extract_corpus(DOCUMENTS[:1])
+        self.assertGreaterEqual(len(extractor.vocabulary), 10)
+
+        extractor.extract_corpus(DOCUMENTS[1:2])
+
+        self.assertEqual(len(extractor.document_vectors), 1)
+        self.assertNotIn('tarot', extractor.vocabulary)
+        self.assertEqual(sorted(extractor.vocabulary.values()), list(range(len(extractor.vocabulary))))
+
+    def test_domain_match_cache_is_bounded(self):
+        """Test para vaciar el memo de dominio al llegar al máximo"""
+        extractor = KeywordExtractor()
+        extractor.DOMAIN_MATCH_CACHE_SIZE = 5
+        for index in range(12):
+            extractor._contains_domain_keyword(f'texto {index}')
+            self.assertLessEqual(len(extractor._domain_match_cache), 5)
+        self.assertTrue(extractor._contains_domain_keyword('lectura de tarot'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+# Tests para keyword_health_service.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+import tempfile
+from datetime import date
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_metric(day: date, keyword: str = 'tarot', clicks: int = 10):
+    """Fila de métricas mínima para el diff"""
+    from services.database_service import KeywordMetric
+    return KeywordMetric(
+        customer_id='111', campaign_id='1', campaign_name='Campaña', ad_group_id='2',
+        ad_group_name='Grupo', keyword_text=keyword, match_type='EXACT', status='ENABLED',
+        quality_score=7, impressions=100, clicks=clicks, cost_micros=1_000_000,
+        conversions=1.0, conversions_value=10.0, ctr=0.1, average_cpc=100_000, date=day
+    )
+
+
+class TestKeywordSyncState(unittest.TestCase):
+    """Tests para el estado del sync incremental (high-water mark y hashes)"""
+
+    def setUp(self):
+        from services.keyword_health_service import KeywordSyncState
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.state = KeywordSyncState(state_dir=self.tmp_dir.name)
+        self.today = date(2026, 10, 18)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_start_date_without_previous_sync(self):
+        """Test para pedir el rango completo si no hay high-water mark"""
+        self.assertIsNone(self.state.get_start_date('111', self.today, 30, 3))
+
+    def test_start_date_uses_restatement_window(self):
+        """Test para repedir la ventana de reexpresión desde el high-water mark"""
+        self.state.commit('111', date(2026, 10, 15), {}, restatement_days=3)
+        self.assertEqual(self.state.get_start_date('111', self.today, 30, 3), date(2026, 10, 13))
+        # El día del último sync siempre se repide aunque la ventana sea 0
+        self.assertEqual(self.state.get_start_date('111', self.today, 30, 0), date(2026, 10, 15))
+
+    def test_start_date_clamped_to_days_back(self):
+        """Test para no pedir más atrás que days_back tras un sync antiguo"""
+        self.state.commit('111', date(2026, 1, 1), {}, restatement_days=3)
+        self.assertEqual(self.state.get_start_date('111', self.today, 30, 3), date(2026, 9, 18))
+
+    def test_diff_returns_only_changed_rows(self):
+        """Test para hacer upsert solo de filas nuevas o modificadas"""
+        rows = [make_metric(date(2026, 10, 17)), make_metric(date(2026, 10, 17), keyword='videncia')]
+        changed, hashes = self.state.diff('111', rows)
+        self.assertEqual(len(changed), 2)
+        self.state.commit('111', self.today, hashes, restatement_days=3)
+
+        rows[1] = make_metric(date(2026, 10, 17), keyword='videncia', clicks=11)
+        changed, hashes = self.state.diff('111', rows)
+        self.assertEqual([m.keyword_text for m in changed], ['videncia'])
+        self.assertEqual(len(hashes), 2)
+
+    def test_commit_prunes_hashes_outside_window(self):
+        """Test para descartar hashes anteriores a la ventana"""
+        old = make_metric(date(2026, 10, 1))
+        recent = make_metric(date(2026, 10, 16))
+        _, hashes = self.state.diff('111', [old, recent])
+        self.state.commit('111', self.today, hashes, restatement_days=3)
+
+        stored = self.state.load('111')
+        self.assertEqual(stored['high_water_mark'], '2026-10-18')
+        self.assertEqual(list(stored['row_hashes']), [self.state.row_key(recent)])
+
+
+class TestIncrementalSync(unittest.TestCase):
+    """Tests para el sync incremental de KeywordHealthService"""
+
+    def setUp(self):
+        from services.keyword_health_service import KeywordHealthService, KeywordSyncState
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.state = KeywordSyncState(state_dir=self.tmp_dir.name)
+        self.db = Mock()
+        self.db.bulk_insert_keyword_metrics.return_value = True
+        self.service = KeywordHealthService.__new__(KeywordHealthService)
+        self.service.db_service = self.db
+        self.service.ads_client = Mock()
+        self.service.report_service = Mock()
+        self.service._sync_keywords_without_metrics = Mock(return_value=False)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_api_failure_does_not_advance_high_water_mark(self):
+        """Test para no guardar estado con filas de la base de datos"""
+        self.service.report_service.generate_custom_report.side_effect = RuntimeError('API caída')
+        self.service._convert_db_metrics_to_dict = Mock(return_value=[{
+            'campaign_id': '1', 'keyword_text': 'tarot', 'date': '2026-10-10'
+        }])
+
+        with patch('services.keyword_health_service.get_keyword_sync_state', return_value=self.state):
+            self.service.sync_keyword_data_to_database('111', incremental=True)
+
+        self.service._convert_db_metrics_to_dict.assert_not_called()
+        self.db.bulk_insert_keyword_metrics.assert_not_called()
+        self.assertEqual(self.state.load('111'), {})
+
+if __name__ == '__main__':
+    unittest.main()
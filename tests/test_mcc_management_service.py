@@ -0,0 +1,59 @@
+# Tests para mcc_management_service.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestDiscoverAndSyncAccounts(unittest.TestCase):
+    """Tests para la sincronización de la jerarquía con la base de datos"""
+
+    def setUp(self):
+        """Jerarquía en memoria y base de datos simulada"""
+        from modules.account_hierarchy import AccountNode
+        from services.database_service import MCCAccount
+        from services.mcc_management_service import MCCManagementService
+
+        self.hierarchy = Mock()
+        # El refresco no informa cambios (p. ej. ya los consumió otro refresco)
+        self.hierarchy.refresh.return_value = {'added': [], 'removed': [], 'changed': []}
+        self.hierarchy.accounts = {
+            '111': AccountNode('111', name='Tarot Nuevo', currency_code='USD', time_zone='UTC'),
+            '222': AccountNode('222', name='Amarres', currency_code='USD', time_zone='UTC', status='SUSPENDED'),
+            '333': AccountNode('333', name='Videncia', currency_code='USD', time_zone='UTC'),
+            '444': AccountNode('444', name='Nueva', currency_code='MXN', time_zone='UTC'),
+        }
+        self.hierarchy.get_account.side_effect = self.hierarchy.accounts.get
+
+        self.db = Mock()
+        self.db.get_all_accounts.return_value = [
+            MCCAccount('111', 'Tarot', 'USD', 'UTC'),
+            MCCAccount('222', 'Amarres', 'USD', 'UTC', is_active=True),
+            MCCAccount('333', 'Videncia', 'USD', 'UTC'),
+        ]
+        self.db.upsert_account.return_value = True
+
+        self.service = MCCManagementService(db_service=self.db, ads_client=Mock())
+        self.service._create_default_benchmarks = Mock()
+
+    def test_syncs_renamed_status_changed_and_new_accounts(self):
+        """Test para escribir solo las cuentas que difieren de la base de datos"""
+        with patch('services.mcc_management_service.get_account_hierarchy', return_value=self.hierarchy):
+            result = self.service.discover_and_sync_accounts()
+
+        upserted = {call.args[0].customer_id: call.args[0] for call in self.db.upsert_account.call_args_list}
+        self.assertEqual(set(upserted), {'111', '222', '444'})
+        self.assertEqual(upserted['111'].account_name, 'Tarot Nuevo')
+        self.assertFalse(upserted['222'].is_active)
+        self.assertEqual(result['discovered'], 1)
+        self.assertEqual(result['updated'], 2)
+        self.assertEqual(result['new_accounts'], ['444'])
+        self.service._create_default_benchmarks.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+# Tests para metric_store.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+import statistics
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.metric_store import MetricSeries, MetricSeriesStore, panel_trends
+
+
+class TestMetricSeries(unittest.TestCase):
+    """Tests para el buffer circular de una serie"""
+
+    def fill(self, series, timestamps):
+        for seq, ts in enumerate(timestamps):
+            series.append(ts, float(ts), seq, f"r{ts}")
+
+    def test_evict_in_order_from_head(self):
+        """Test para descartar desde la cabeza cuando llegan en orden"""
+        series = MetricSeries(capacity=4)
+        self.fill(series, [10, 20, 30, 40, 50])
+        self.assertEqual(series.evict_before(35), 3)
+        self.assertEqual(series.timestamps.tolist(), [40, 50])
+        self.assertEqual(series.evict_before(35), 0)
+
+    def test_evict_out_of_order_points(self):
+        """Test para descartar puntos viejos que llegaron detrás de otros más nuevos"""
+        series = MetricSeries(capacity=4)
+        self.fill(series, [50, 10, 60, 20, 70])
+        self.assertEqual(series.evict_before(30), 2)
+        self.assertEqual(series.timestamps.tolist(), [50, 60, 70])
+        self.assertEqual(series.records.tolist(), ['r50', 'r60', 'r70'])
+        self.assertEqual(series.sequence.tolist(), [0, 2, 4])
+
+        # Tras compactar en orden vuelve al camino rápido por la cabeza
+        self.fill(series, [80])
+        self.assertEqual(series.evict_before(55), 1)
+        self.assertEqual(series.timestamps.tolist(), [60, 70, 80])
+
+    def test_evict_wrapped_buffer(self):
+        """Test para filtrar un buffer que da la vuelta"""
+        series = MetricSeries(capacity=4)
+        self.fill(series, [10, 20, 30])
+        series.evict_oldest(2)
+        self.fill(series, [5, 40, 50])
+        self.assertEqual(series.timestamps.tolist(), [30, 5, 40, 50])
+        self.assertEqual(series.evict_before(35), 2)
+        self.assertEqual(series.timestamps.tolist(), [40, 50])
+
+
+class TestMetricSeriesStore(unittest.TestCase):
+    """Tests para la retención del almacén"""
+
+    def test_retention_applies_to_out_of_order_points(self):
+        """Test para que un punto atrasado no escape a la retención"""
+        store = MetricSeriesStore(retention_days=30)
+        now = datetime.now()
+        store.append('ctr', now - timedelta(days=1), 1.0)
+        store.append('ctr', now - timedelta(days=20), 2.0)
+        store.append('ctr', now, 3.0)
+
+        # Con una retención menor el punto atrasado vence aunque no esté en la cabeza
+        store.retention_days = 10
+        store.append('ctr', now, 4.0)
+        _, values = store.arrays('ctr', now - timedelta(days=60), now + timedelta(days=1))
+        self.assertEqual(values.tolist(), [1.0, 3.0, 4.0])
+
+    def test_rejects_points_before_retention(self):
+        """Test para rechazar puntos ya vencidos al insertar"""
+        store = MetricSeriesStore(retention_days=30)
+        self.assertFalse(store.append('ctr', datetime.now() - timedelta(days=31), 1.0))
+        self.assertEqual(len(store), 0)
+
+    def test_select_empty_category(self):
+        """Test para consultar la categoría '' sin mezclar las demás"""
+        store = MetricSeriesStore()
+        now = datetime.now()
+        store.append('ctr', now, 1.0, category='')
+        store.append('ctr', now, 2.0, category='tarot')
+        store.append('ctr', now, 3.0)
+
+        start, end = now - timedelta(days=1), now + timedelta(days=1)
+        self.assertEqual(store.arrays('ctr', start, end, category='')[1].tolist(), [1.0])
+        self.assertEqual(store.arrays('ctr', start, end)[1].tolist(), [1.0, 2.0, 3.0])
+
+
+def reference_trend(values, periods=7):
+    """Cálculo serie por serie (fórmulas previas a la versión vectorizada)"""
+    x = np.arange(len(values))
+    slope = np.polyfit(x, values, 1)[0]
+    mid = len(values) // 2
+    first_avg, second_avg = statistics.mean(values[:mid]), statistics.mean(values[mid:])
+    recent_avg = statistics.mean(values[-min(7, len(values)):])
+    step = (values[-1] - values[0]) / len(values)
+    return {
+        'slope': slope,
+        'trend_strength': abs(np.corrcoef(x, values)[0, 1]),
+        'trend_direction': 'up' if slope > 0.1 else 'down' if slope < -0.1 else 'stable',
+        'first_period_avg': first_avg,
+        'second_period_avg': second_avg,
+        'change_percent': (second_avg - first_avg) / first_avg * 100,
+        'forecast': [max(0, recent_avg + step * i) for i in range(1, periods + 1)]
+    }
+
+
+class TestPanelTrends(unittest.TestCase):
+    """Tests para las tendencias vectorizadas por serie"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.series = [
+            list(10 + 0.8 * np.arange(20) + rng.normal(0, 1, 20)),
+            list(50 - 1.5 * np.arange(20) + rng.normal(0, 2, 20)),
+            list(5 + rng.normal(0, 0.01, 20)),
+        ]
+
+    def test_matches_single_series_formulas(self):
+        """Test para coincidir con el cálculo serie por serie"""
+        trends = panel_trends(np.array(self.series))
+
+        for row, values in enumerate(self.series):
+            expected = reference_trend(values)
+            for key in ('slope', 'trend_strength', 'first_period_avg', 'second_period_avg', 'change_percent'):
+                self.assertAlmostEqual(trends[key][row], expected[key], places=9, msg=key)
+            self.assertEqual(trends['trend_direction'][row], expected['trend_direction'])
+            np.testing.assert_allclose(trends['forecast'][row], expected['forecast'])
+        self.assertEqual(list(trends['trend_direction']), ['up', 'down', 'stable'])
+        self.assertEqual(trends['points'].tolist(), [20, 20, 20])
+
+    def test_missing_periods_are_skipped(self):
+        """Test para evaluar cada serie solo sobre sus puntos válidos"""
+        values = np.array(self.series)
+        values[0, [3, 8, 15]] = np.nan
+        trends = panel_trends(values)
+
+        compact = [v for i, v in enumerate(self.series[0]) if i not in (3, 8, 15)]
+        expected = reference_trend(compact)
+        self.assertEqual(trends['points'][0], 17)
+        self.assertAlmostEqual(trends['slope'][0], expected['slope'], places=9)
+        self.assertAlmostEqual(trends['change_percent'][0], expected['change_percent'], places=9)
+        np.testing.assert_allclose(trends['forecast'][0], expected['forecast'])
+
+    def test_short_series_have_no_trend_or_forecast(self):
+        """Test para no calcular tendencia con menos de 3 puntos ni mitades con menos de 4"""
+        values = np.full((2, 5), np.nan)
+        values[0, :2] = [1.0, 9.0]
+        values[1, :3] = [1.0, 2.0, 3.0]
+        trends = panel_trends(values, forecast_periods=3)
+
+        self.assertEqual(trends['slope'][0], 0.0)
+        self.assertEqual(trends['trend_direction'][0], 'stable')
+        self.assertTrue(np.isnan(trends['forecast'][0]).all())
+        self.assertEqual(trends['trend_direction'][1], 'up')
+        self.assertTrue(np.isnan(trends['change_percent'][1]))
+        self.assertEqual(trends['forecast'].shape, (2, 3))
+
+    def test_weekly_pattern_needs_more_than_14_points(self):
+        """Test para el mejor y peor día de la semana"""
+        weekdays = np.arange(21) % 7
+        values = np.tile([5.0, 5.0, 9.0, 5.0, 5.0, 1.0, 5.0], 3).reshape(1, -1)
+        trends = panel_trends(values, weekdays=weekdays)
+        self.assertEqual(trends['best_day'][0], 'Wednesday')
+        self.assertEqual(trends['worst_day'][0], 'Saturday')
+
+        short = panel_trends(values[:, :14], weekdays=weekdays[:14])
+        self.assertIsNone(short['best_day'][0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+# Tests para query_partition_cache.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+import sys
+import os
+from datetime import date, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.query_partition_cache import (
+    QueryPartitionCache, parse_partitioned_query, resolve_during, _contiguous_ranges
+)
+
+TODAY = date(2026, 10, 18)
+
+
+class FakeFetch:
+    """Ejecuta GAQL devolviendo una fila por día del rango pedido"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        plan = parse_partitioned_query('111', query)
+        return [SimpleNamespace(segments=SimpleNamespace(date=day.isoformat())) for day in plan.days()]
+
+
+class TestParsePartitionedQuery(unittest.TestCase):
+    """Tests para el análisis de consultas particionables"""
+
+    def test_between_and_filters(self):
+        """Test para separar filtros y rango de fechas"""
+        plan = parse_partitioned_query('111', """
+            SELECT campaign.id, segments.date, metrics.clicks FROM campaign
+            WHERE campaign.status != 'REMOVED' AND segments.date BETWEEN '2026-10-01' AND '2026-10-07'
+        """)
+        self.assertEqual(plan.resource, 'campaign')
+        self.assertEqual(plan.filters, ("campaign.status != 'REMOVED'",))
+        self.assertEqual((plan.start, plan.end), (date(2026, 10, 1), date(2026, 10, 7)))
+        self.assertEqual(len(plan.days()), 7)
+
+    def test_comparisons_are_intersected(self):
+        """Test para combinar >= y < en un rango cerrado"""
+        plan = parse_partitioned_query(
+            '111', "SELECT segments.date, metrics.clicks FROM customer "
+                   "WHERE segments.date >= '2026-10-01' AND segments.date < '2026-10-05'"
+        )
+        self.assertEqual((plan.start, plan.end), (date(2026, 10, 1), date(2026, 10, 4)))
+
+    def test_during_literals(self):
+        """Test para traducir DURING a fechas explícitas"""
+        self.assertEqual(resolve_during('LAST_7_DAYS', TODAY), (date(2026, 10, 11), date(2026, 10, 17)))
+        self.assertEqual(resolve_during('LAST_MONTH', TODAY), (date(2026, 9, 1), date(2026, 9, 30)))
+        plan = parse_partitioned_query(
+            '111', "SELECT segments.date, metrics.clicks FROM customer WHERE segments.date DURING YESTERDAY",
+            today=TODAY
+        )
+        self.assertEqual((plan.start, plan.end), (date(2026, 10, 17), date(2026, 10, 17)))
+
+    def test_not_partitionable(self):
+        """Test para rechazar consultas sin fecha, con ORDER BY o rango abierto"""
+        queries = [
+            "SELECT campaign.id, metrics.clicks FROM campaign WHERE segments.date DURING LAST_7_DAYS",
+            "SELECT segments.date, metrics.clicks FROM campaign WHERE segments.date DURING LAST_7_DAYS "
+            "ORDER BY metrics.clicks DESC",
+            "SELECT segments.date, metrics.clicks FROM campaign WHERE segments.date >= '2026-10-01'",
+            "SELECT segments.date, metrics.clicks FROM campaign WHERE segments.date DURING LAST_BUSINESS_WEEK",
+        ]
+        for query in queries:
+            self.assertIsNone(parse_partitioned_query('111', query, today=TODAY), query)
+
+
+class TestQueryPartitionCache(unittest.TestCase):
+    """Tests para la caché de particiones diarias"""
+
+    def setUp(self):
+        self.cache = QueryPartitionCache()
+        self.fetch = FakeFetch()
+        self.start = date.today() - timedelta(days=20)
+
+    def plan(self, first: int, last: int, fields: str = 'campaign.id, segments.date, metrics.clicks'):
+        start = self.start + timedelta(days=first)
+        end = self.start + timedelta(days=last)
+        return parse_partitioned_query(
+            '111', f"SELECT {fields} FROM campaign "
+                   f"WHERE segments.date BETWEEN '{start.isoformat()}' AND '{end.isoformat()}'"
+        )
+
+    def test_contiguous_ranges(self):
+        """Test para agrupar días faltantes en tramos contiguos"""
+        days = [self.start + timedelta(days=offset) for offset in (0, 1, 2, 5, 7, 8)]
+        self.assertEqual(_contiguous_ranges(days), [
+            (days[0], days[2]), (days[3], days[3]), (days[4], days[5])
+        ])
+
+    def test_fetches_only_missing_ranges(self):
+        """Test para consultar solo los tramos de días que faltan"""
+        self.cache.execute(self.plan(2, 4), self.fetch)
+        self.cache.execute(self.plan(8, 9), self.fetch)
+        self.fetch.queries.clear()
+
+        rows = self.cache.execute(self.plan(0, 10), self.fetch)
+
+        self.assertEqual(len(rows), 11)
+        self.assertEqual([row.segments.date for row in rows],
+                         [(self.start + timedelta(days=offset)).isoformat() for offset in range(11)])
+        fetched = [parse_partitioned_query('111', query) for query in self.fetch.queries]
+        self.assertEqual([(p.start, p.end) for p in fetched], [
+            (self.start, self.start + timedelta(days=1)),
+            (self.start + timedelta(days=5), self.start + timedelta(days=7)),
+            (self.start + timedelta(days=10), self.start + timedelta(days=10)),
+        ])
+
+    def test_superset_partition_is_reused(self):
+        """Test para responder con una partición de más columnas"""
+        self.cache.execute(self.plan(0, 3, 'campaign.id, campaign.name, segments.date, metrics.clicks'),
+                           self.fetch)
+        self.fetch.queries.clear()
+
+        self.cache.execute(self.plan(0, 3, 'campaign.id, segments.date, metrics.clicks'), self.fetch)
+        self.assertEqual(self.fetch.queries, [])
+
+        # Una columna segments.* extra cambia la granularidad: no se reutiliza
+        self.cache.execute(self.plan(0, 3, 'campaign.id, segments.date, segments.device, metrics.clicks'),
+                           self.fetch)
+        self.cache.execute(self.plan(0, 3, 'campaign.id, segments.date'), self.fetch)
+        self.assertEqual(len(self.fetch.queries), 1)
+
+    def test_invalidate_customer(self):
+        """Test para volver a consultar tras invalidar la cuenta"""
+        self.cache.execute(self.plan(0, 3), self.fetch)
+        self.cache.invalidate('222')
+        self.cache.execute(self.plan(0, 3), self.fetch)
+        self.assertEqual(len(self.fetch.queries), 1)
+
+        self.cache.invalidate('111')
+        self.assertEqual(self.cache.get_stats()['rows'], 0)
+        self.cache.execute(self.plan(0, 3), self.fetch)
+        self.assertEqual(len(self.fetch.queries), 2)
+
+
+class TestMutateInvalidation(unittest.TestCase):
+    """Tests para invalidar la cuenta tras cada mutate de campañas, grupos y anuncios"""
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.wrapper = MagicMock()
+        self.wrapper.get_client.return_value = self.client
+        self.partition_cache = MagicMock()
+        # La consulta previa de update_campaign_budget encuentra el presupuesto
+        self.client.get_service.return_value.search.return_value = [
+            SimpleNamespace(campaign=SimpleNamespace(campaign_budget='customers/111/campaignBudgets/5'))
+        ]
+
+    def actions(self):
+        from services.ad_group_actions import AdGroupActionsService
+        from services.ad_group_service import AdGroupService
+        from services.ad_management_service import AdManagementService
+        from services.campaign_actions import CampaignActionsService
+
+        campaigns = CampaignActionsService(self.wrapper)
+        ad_groups = AdGroupActionsService(self.wrapper)
+        self.ads = ads = AdManagementService(self.wrapper)
+        ad_group_service = AdGroupService(self.wrapper)
+        return [
+            ('services.campaign_actions', lambda: campaigns.pause_campaign('111', '1')),
+            ('services.campaign_actions', lambda: campaigns.bulk_resume_campaigns('111', ['1', '2'])),
+            ('services.campaign_actions', lambda: campaigns.update_campaign_budget('111', '1', 5_000_000)),
+            ('services.ad_group_actions', lambda: ad_groups.update_ad_group_bid('111', '10', 1_000_000)),
+            ('services.ad_group_actions', lambda: ad_groups.bulk_pause_ad_groups('111', ['10', '11'])),
+            ('services.ad_management_service', lambda: ads.pause_ad('111', '10', '100')),
+            ('services.ad_management_service', lambda: ads.enable_ad('111', '10', '100')),
+            ('services.ad_group_service', lambda: ad_group_service.create_ad_in_ad_group(
+                '111', '10', ['Tarot Hoy', 'Videncia', 'Consulta'], ['Lectura de tarot.', 'Atención 24 h.'],
+                'https://example.com'
+            )),
+        ]
+
+    def test_successful_mutates_invalidate_customer(self):
+        """Test para invalidar la cuenta después de un mutate exitoso"""
+        for module, action in self.actions():
+            with self.subTest(module=module), \
+                    patch(f'{module}.get_query_partition_cache', return_value=self.partition_cache):
+                self.partition_cache.reset_mock()
+                action()
+                self.partition_cache.invalidate.assert_called_with('111')
+
+    def test_failed_mutates_keep_cache(self):
+        """Test para no invalidar cuando el mutate falla"""
+        actions = self.actions()
+        failure = {
+            f'{name}.side_effect': RuntimeError('fallo')
+            for name in ('mutate_campaigns', 'mutate_campaign_budgets', 'mutate_ad_groups', 'mutate_ad_group_ads')
+        }
+        self.client.get_service.return_value.configure_mock(**failure)
+        # AdManagementService usa el stub del pool de clientes
+        self.ads.ad_group_ad_service.configure_mock(**failure)
+        for module, action in actions:
+            with self.subTest(module=module), \
+                    patch(f'{module}.get_query_partition_cache', return_value=self.partition_cache):
+                self.partition_cache.reset_mock()
+                action()
+                self.partition_cache.invalidate.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# Tests para rate_limit.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import patch
+from types import SimpleNamespace
+import sys
+import os
+from datetime import timedelta
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limit import RateLimiter, get_retry_after
+
+
+def quota_error(retry_delay, message="Resource has been exhausted"):
+    """Error con la forma de GoogleAdsException y QuotaErrorDetails"""
+    details = SimpleNamespace(quota_error_details=SimpleNamespace(retry_delay=retry_delay))
+    error = Exception(message)
+    error.failure = SimpleNamespace(errors=[SimpleNamespace(details=details)])
+    return error
+
+
+class TestGetRetryAfter(unittest.TestCase):
+    """Tests para leer el retry_delay de los errores de cuota"""
+
+    def test_timedelta_retry_delay(self):
+        """Test para el retry_delay de proto-plus (timedelta)"""
+        self.assertEqual(get_retry_after(quota_error(timedelta(seconds=3, milliseconds=500))), 3.5)
+        self.assertEqual(get_retry_after(quota_error(timedelta(days=1, seconds=30))), 86430.0)
+
+    def test_duration_retry_delay(self):
+        """Test para el retry_delay de protobuf (seconds + nanos)"""
+        self.assertEqual(get_retry_after(quota_error(SimpleNamespace(seconds=2, nanos=250_000_000))), 2.25)
+
+    def test_message_fallback(self):
+        """Test para usar el texto del error si no hay retry_delay"""
+        self.assertEqual(get_retry_after(quota_error(None, "Too many requests. Retry in 30 seconds.")), 30.0)
+        self.assertEqual(get_retry_after(quota_error(timedelta(0), "Retry in 5 seconds")), 5.0)
+        self.assertIsNone(get_retry_after(Exception("otro error")))
+
+
+class TestScopedBuckets(unittest.TestCase):
+    """Tests para el límite de buckets por cuenta"""
+
+    def setUp(self):
+        self.limiter = RateLimiter()
+        self.limiter.max_scoped_buckets = 6
+
+    def test_idle_buckets_are_pruned(self):
+        """Test para descartar buckets llenos al superar el límite"""
+        for customer in range(10):
+            self.assertTrue(self.limiter.acquire('search', customer_id=str(customer), timeout=None))
+        self.assertIn(('customer', '9'), self.limiter.scoped_buckets)
+
+        # Pasado el tiempo de recarga todos están llenos y se descartan
+        self.limiter.max_scoped_buckets = len(self.limiter.scoped_buckets)
+        clock = [self.limiter.scoped_buckets[('customer', '9')].last_refill + 3600]
+        with patch('utils.rate_limit.time.time', side_effect=lambda: clock[0]):
+            self.limiter.acquire('search', customer_id='new', timeout=None)
+        self.assertEqual(set(self.limiter.scoped_buckets), {('customer', 'new'), ('operation', 'new', 'search')})
+
+    def test_busy_buckets_stay_bounded(self):
+        """Test para no crecer sin límite aunque ningún bucket esté inactivo"""
+        for customer in range(50):
+            self.limiter.acquire('search', customer_id=str(customer), timeout=None)
+            self.assertLessEqual(len(self.limiter.scoped_buckets), self.limiter.max_scoped_buckets + 2)
+        # Sobreviven los más recientes
+        self.assertIn(('customer', '49'), self.limiter.scoped_buckets)
+        self.assertNotIn(('customer', '0'), self.limiter.scoped_buckets)
+
+    def test_blocked_bucket_is_kept(self):
+        """Test para conservar un bucket pausado por retry-after"""
+        self.limiter.apply_retry_after(600, scope='ACCOUNT', customer_id='111')
+        for customer in range(3):
+            self.limiter.acquire('search', customer_id=str(customer), timeout=None)
+
+        clock = [self.limiter.scoped_buckets[('customer', '0')].last_refill + 60]
+        with patch('utils.rate_limit.time.time', side_effect=lambda: clock[0]):
+            self.limiter._prune_scoped_buckets()
+        self.assertEqual(list(self.limiter.scoped_buckets), [('customer', '111')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+# Tests para report_service.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import Mock, patch
+from types import SimpleNamespace
+import sys
+import os
+import io
+import csv
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.models import ReportConfig
+from services.report_service import ReportService
+
+
+def make_row(campaign_id, clicks, conversions):
+    return SimpleNamespace(
+        campaign=SimpleNamespace(id=campaign_id, name=f"Campaña {campaign_id}"),
+        metrics=SimpleNamespace(clicks=clicks, conversions=conversions)
+    )
+
+
+class StreamingClient:
+    """Cliente con iter_query que puede fallar a mitad del stream de una cuenta"""
+
+    def __init__(self, rows_by_customer, fail_after=None):
+        self.rows_by_customer = rows_by_customer
+        self.fail_after = fail_after or {}
+
+    def iter_query(self, customer_id, query):
+        for index, row in enumerate(self.rows_by_customer.get(customer_id, [])):
+            if index == self.fail_after.get(customer_id):
+                raise RuntimeError("stream cortado")
+            yield row
+
+
+class TestStreamReport(unittest.TestCase):
+    """Tests para stream_report y el límite de reportes"""
+
+    def setUp(self):
+        self.config = ReportConfig(
+            report_name='Campañas',
+            customer_ids=['111', '222', '333'],
+            dimensions=['campaign.id', 'campaign.name'],
+            metrics=['metrics.clicks', 'metrics.conversions']
+        )
+        self.limiter = Mock()
+        self.limiter.acquire.return_value = True
+        patcher = patch('services.report_service.get_rate_limiter', return_value=self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def service(self, client):
+        return ReportService(client)
+
+    def test_failed_customer_is_marked_with_partial_rows(self):
+        """Test para marcar la cuenta que falla a mitad del stream"""
+        client = StreamingClient({
+            '111': [make_row(1, 10, 1.0), make_row(2, 5, 0.0)],
+            '222': [make_row(3, 7, 2.0), make_row(4, 1, 0.0), make_row(5, 2, 0.0)],
+            '333': [make_row(6, 3, 1.0)],
+        }, fail_after={'222': 2})
+        output = io.StringIO()
+
+        summary = self.service(client).stream_report(self.config, output, batch_size=1)
+
+        rows = list(csv.reader(io.StringIO(output.getvalue())))[1:]
+        self.assertEqual([row[0] for row in rows], ['111', '111', '222', '222', '333'])
+        self.assertFalse(summary['success'])
+        self.assertEqual(summary['failed_customers'], {'222': 2})
+        self.assertIn('2 partial rows', summary['errors'][0])
+
+    def test_each_customer_takes_a_reports_token(self):
+        """Test para pasar el stream de cada cuenta por el rate limiter"""
+        client = StreamingClient({'111': [make_row(1, 10, 1.0)]})
+        summary = self.service(client).stream_report(self.config, io.StringIO())
+
+        self.assertTrue(summary['success'])
+        self.assertEqual(
+            [call.kwargs.get('customer_id') for call in self.limiter.acquire.call_args_list],
+            ['111', '222', '333']
+        )
+        self.assertTrue(all(call.args[0] == 'reports' for call in self.limiter.acquire.call_args_list))
+
+    def test_rate_limited_customer_is_reported(self):
+        """Test para registrar como error la cuenta sin tokens"""
+        self.limiter.acquire.side_effect = [True, False, True]
+        client = StreamingClient({'111': [make_row(1, 10, 1.0)], '222': [make_row(2, 1, 0.0)]})
+
+        summary = self.service(client).stream_report(self.config, io.StringIO())
+
+        self.assertEqual(summary['rows_written'], 1)
+        self.assertEqual(summary['failed_customers'], {'222': 0})
+        self.assertIn('Rate limit exceeded', summary['errors'][0])
+
+    def test_customers_failed_without_ads_client(self):
+        """Test para no reportar éxito si el wrapper no tiene cliente"""
+        from modules.google_ads_client import GoogleAdsClientWrapper
+        wrapper = GoogleAdsClientWrapper()
+        output = io.StringIO()
+
+        with patch.object(wrapper, 'get_client', return_value=None):
+            summary = self.service(wrapper).stream_report(self.config, output)
+
+        self.assertFalse(summary['success'])
+        self.assertEqual(summary['rows_written'], 0)
+        self.assertEqual(summary['failed_customers'], {'111': 0, '222': 0, '333': 0})
+        self.assertIn('not initialized', summary['errors'][0])
+
+    def test_parquet_schema_fixed_from_fields(self):
+        """Test para escribir lotes con tipos distintos al primero"""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow no instalado")
+
+        client = StreamingClient({
+            '111': [make_row(None, None, None)],
+            '222': [make_row(2, 5, 3)],
+            '333': [make_row(3, 7, 1.5)],
+        })
+        output = io.BytesIO()
+
+        summary = self.service(client).stream_report(self.config, output, export_format='parquet', batch_size=1)
+
+        self.assertTrue(summary['success'], summary['errors'])
+        table = pq.read_table(io.BytesIO(output.getvalue()))
+        types = {field.name: str(field.type) for field in table.schema}
+        self.assertEqual(types, {
+            'customer_id': 'string', 'campaign.id': 'int64', 'campaign.name': 'string',
+            'metrics.clicks': 'int64', 'metrics.conversions': 'double'
+        })
+        self.assertEqual(table.column('metrics.conversions').to_pylist(), [None, 3.0, 1.5])
+
+if __name__ == '__main__':
+    unittest.main()
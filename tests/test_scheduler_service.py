@@ -0,0 +1,86 @@
+# Tests para scheduler_service.py
+# Generador IA 2.0
+
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+import json
+import tempfile
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestWeeklyReports(unittest.TestCase):
+    """Tests para la generación de reportes semanales por cuenta"""
+
+    def setUp(self):
+        """Scheduler sin __init__ con base de datos simulada"""
+        from services.database_service import MCCAccount
+        from services.report_job_runner import ReportJobRunner
+        from services.scheduler_service import SchedulerService
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Mock()
+        self.db.get_all_accounts.return_value = [
+            MCCAccount(customer_id='111', account_name='Uno', currency_code='USD', time_zone='UTC'),
+            MCCAccount(customer_id='222', account_name='Dos', currency_code='USD', time_zone='UTC'),
+        ]
+        self.db.get_health_scores.return_value = [{'health_score': 80}, {'health_score': 60}]
+        self.db.get_keyword_metrics.side_effect = lambda customer_id, days_back: (
+            [] if customer_id == '222' else
+            [{'keyword_text': 'tarot', 'cost': 10.0, 'conversions': 2}]
+        )
+
+        self.scheduler = SchedulerService.__new__(SchedulerService)
+        self.scheduler.db_service = self.db
+        self.scheduler.report_runner = ReportJobRunner(
+            max_workers=2, task_timeout=5, max_retries=0, output_dir=self.tmp_dir.name
+        )
+        self.scheduler.weekly_report_deadline = {'hour': 23, 'minute': 59}
+        self.logged = {}
+        self.scheduler._log_job_result = lambda job_id, data: self.logged.setdefault(job_id, data)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_generates_one_report_per_active_account(self):
+        """Test para generar un reporte por cuenta y escribir el manifiesto"""
+        self.scheduler.generate_weekly_reports()
+
+        self.db.get_all_accounts.assert_called_once_with(active_only=True)
+        result = self.logged['generate_weekly_reports']
+        self.assertNotIn('error', result)
+        self.assertEqual(result['reports_generated'], 2)
+        self.assertEqual(result['errors'], [])
+
+        with open(result['manifest_path'], encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest['totals']['success'], 2)
+        self.assertEqual({t['task_id'] for t in manifest['tasks']}, {'111', '222'})
+
+        report_path = next(t['output_path'] for t in manifest['tasks'] if t['task_id'] == '111')
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['total_cost'], 10.0)
+        self.assertEqual(report['avg_health_score'], 70)
+
+    def test_failed_account_is_reported(self):
+        """Test para registrar en el manifiesto la cuenta que falla"""
+        def get_health_scores(customer_id, days_back):
+            if customer_id == '222':
+                raise RuntimeError('db caída')
+            return []
+
+        self.db.get_health_scores.side_effect = get_health_scores
+        self.scheduler.generate_weekly_reports()
+
+        result = self.logged['generate_weekly_reports']
+        self.assertEqual(result['reports_generated'], 1)
+        self.assertEqual(result['errors'], [
+            {'customer_id': '222', 'status': 'failed', 'error': 'db caída'}
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
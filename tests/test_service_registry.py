@@ -0,0 +1,114 @@
+# Tests para service_registry.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+import threading
+import time
+import types
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.service_registry import ServiceRegistry, create_service_registry, DEFAULT_SERVICES
+
+FAKE_MODULE = 'tests_fake_registry_services'
+
+
+class SlowService:
+    """Servicio que tarda en construirse y cuenta sus instancias"""
+
+    created = 0
+    created_lock = threading.Lock()
+
+    def __init__(self, client=None):
+        time.sleep(0.05)
+        with SlowService.created_lock:
+            SlowService.created += 1
+        self.client = client
+
+
+class ClientlessService:
+    def __init__(self):
+        self.ready = True
+
+
+class TestServiceRegistry(unittest.TestCase):
+    """Tests para la construcción diferida de servicios"""
+
+    def setUp(self):
+        module = types.ModuleType(FAKE_MODULE)
+        module.SlowService = SlowService
+        module.ClientlessService = ClientlessService
+        sys.modules[FAKE_MODULE] = module
+        self.addCleanup(sys.modules.pop, FAKE_MODULE, None)
+        SlowService.created = 0
+
+        self.client = object()
+        self.registry = ServiceRegistry(self.client)
+        self.registry.register('slow', FAKE_MODULE, 'SlowService')
+        self.registry.register('clientless', FAKE_MODULE, 'ClientlessService', needs_client=False)
+
+    def test_services_built_on_first_access(self):
+        """Test para construir el servicio solo al pedirlo"""
+        self.assertIn('slow', self.registry)
+        self.assertFalse(self.registry.is_loaded('slow'))
+        self.assertEqual(SlowService.created, 0)
+
+        service = self.registry['slow']
+        self.assertIs(service.client, self.client)
+        self.assertIs(self.registry['slow'], service)
+        self.assertEqual(SlowService.created, 1)
+        self.assertTrue(self.registry.is_loaded('slow'))
+        self.assertTrue(self.registry['clientless'].ready)
+
+    def test_contains_and_mapping_interface(self):
+        """Test para comportarse como el antiguo dict de servicios"""
+        self.registry.set('manual', 'instancia')
+        self.assertIn('manual', self.registry)
+        self.assertNotIn('otro', self.registry)
+        self.assertEqual(sorted(self.registry), ['clientless', 'manual', 'slow'])
+        self.assertEqual(len(self.registry), 3)
+        self.assertIsNone(self.registry.get('otro'))
+        with self.assertRaises(KeyError):
+            self.registry['otro']
+        # __contains__ no construye nada
+        self.assertFalse(self.registry.is_loaded('slow'))
+
+    def test_stats_report_loaded_services(self):
+        """Test para registrar tiempos de import e init por servicio"""
+        self.registry['slow']
+        stats = self.registry.get_stats()
+
+        self.assertEqual(stats['registered'], 2)
+        self.assertEqual(stats['loaded'], ['slow'])
+        self.assertGreaterEqual(stats['services']['slow']['init_seconds'], 0.05)
+        self.assertIn('import_seconds', stats['services']['slow'])
+
+    def test_one_instance_under_concurrent_access(self):
+        """Test para construir una sola instancia con accesos simultáneos"""
+        barrier = threading.Barrier(8)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(self.registry['slow'])
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(SlowService.created, 1)
+        self.assertEqual(len({id(service) for service in results}), 1)
+
+    def test_default_registry_builds_nothing(self):
+        """Test para registrar los servicios principales sin importarlos"""
+        registry = create_service_registry(self.client)
+        self.assertEqual(sorted(registry), sorted(name for name, *_ in DEFAULT_SERVICES))
+        self.assertEqual(registry.get_stats()['loaded'], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -28,5 +28,56 @@ class TestTemplateManager(unittest.TestCase):
         """Test para aplicar plantillas"""
         pass
 
+
+class TestCompiledTemplates(unittest.TestCase):
+    """Tests para la generación desde templates compilados"""
+    
+    @classmethod
+    def setUpClass(cls):
+        from modules.template_manager import TemplateManager
+        cls.manager = TemplateManager()
+        cls.template_name = cls.manager.get_template_names()[0]
+    
+    def test_pools_are_valid(self):
+        """Test para verificar que los pools solo contienen textos válidos"""
+        headlines = self.manager.get_headline_pool(self.template_name)
+        descriptions = self.manager.get_description_pool(self.template_name)
+        self.assertTrue(headlines)
+        self.assertTrue(descriptions)
+        self.assertTrue(all(self.manager.validate_headline(h)[0] for h in headlines))
+        self.assertTrue(all(self.manager.validate_description(d)[0] for d in descriptions))
+    
+    def test_iter_ad_combinations_is_lazy_and_unique(self):
+        """Test para generar combinaciones únicas con límite"""
+        ads = list(self.manager.iter_ad_combinations(
+            self.template_name, num_headlines=5, num_descriptions=2, limit=200, seed=7
+        ))
+        self.assertEqual(len(ads), 200)
+        signatures = {
+            (frozenset(ad['headlines']), frozenset(ad['descriptions'])) for ad in ads
+        }
+        self.assertEqual(len(signatures), 200)
+        
+        enumerated = self.manager.iter_ad_combinations(
+            self.template_name, limit=10, mode='enumerate'
+        )
+        self.assertEqual(sum(1 for _ in enumerated), 10)
+    
+    def test_sampling_covers_every_combination_once(self):
+        """Test para no descartar combinaciones por colisiones de hash"""
+        from modules.template_manager import TemplateManager
+        headlines = ('Tarot Hoy', 'Videncia Real', 'Amarres de Amor', 'Consulta Ya')
+        descriptions = ('Lectura de tarot.', 'Atención 24 h.', 'Rituales efectivos.')
+        
+        # Con hash() constante el muestreo anterior se quedaba en una sola combinación
+        with patch('modules.template_manager.hash', create=True, return_value=0):
+            combos = list(TemplateManager._sample_combinations(
+                headlines, descriptions, 2, 1, seed=3, max_consecutive_repeats=2000
+            ))
+        
+        signatures = {(frozenset(h), frozenset(d)) for h, d in combos}
+        self.assertEqual(len(combos), 18)
+        self.assertEqual(len(signatures), 18)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
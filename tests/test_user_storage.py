@@ -0,0 +1,96 @@
+# Tests para user_storage.py
+# Generador IA 2.0
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.user_storage import HistoryLog
+
+
+class TestHistoryLog(unittest.TestCase):
+    """Tests para el historial NDJSON"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = Path(self.tmp_dir.name) / 'history.ndjson'
+        self.legacy_path = Path(self.tmp_dir.name) / 'history.json'
+
+    def history(self, **kwargs):
+        history = HistoryLog(self.path, **kwargs)
+        self.addCleanup(history.close)
+        return history
+
+    def lines(self):
+        return self.path.read_text(encoding='utf-8').splitlines()
+
+    def test_append_and_tail(self):
+        """Test para escribir una línea por entrada y leer las últimas"""
+        history = self.history(max_entries=10)
+        for i in range(5):
+            history.append({'action': 'generate', 'n': i})
+
+        self.assertEqual([e['n'] for e in history.tail(3)], [2, 3, 4])
+        self.assertEqual(history.tail(0), [])
+        self.assertEqual([json.loads(line)['n'] for line in self.lines()], [0, 1, 2, 3, 4])
+
+        # Otra instancia reconstruye el índice desde el archivo
+        history.close()
+        self.assertEqual(len(self.history(max_entries=10).tail(100)), 5)
+
+    def test_compaction_past_threshold(self):
+        """Test para reescribir el archivo con las últimas max_entries entradas"""
+        history = self.history(max_entries=3, compact_factor=2)
+        self.assertEqual(history.compact_threshold, 6)
+        for i in range(6):
+            history.append({'n': i})
+        self.assertEqual(len(self.lines()), 6)
+
+        history.append({'n': 6})
+
+        self.assertEqual([json.loads(line)['n'] for line in self.lines()], [4, 5, 6])
+        self.assertFalse(self.path.with_suffix('.ndjson.tmp').exists())
+        history.append({'n': 7})
+        self.assertEqual([json.loads(line)['n'] for line in self.lines()], [4, 5, 6, 7])
+        self.assertEqual([e['n'] for e in history.tail(10)], [5, 6, 7])
+
+    def test_truncated_lines_skipped(self):
+        """Test para ignorar la línea truncada por un cierre abrupto"""
+        self.path.write_text('{"n": 0}\n{"n": 1}\n{"n": 2, "acti\n', encoding='utf-8')
+
+        history = self.history(max_entries=10)
+        self.assertEqual([e['n'] for e in history.tail(10)], [0, 1])
+
+        history.append({'n': 3})
+        history.compact()
+        self.assertEqual([json.loads(line)['n'] for line in self.lines()], [0, 1, 3])
+
+    def test_legacy_history_migrated(self):
+        """Test para convertir el history.json anterior y borrarlo"""
+        self.legacy_path.write_text(json.dumps([{'n': i} for i in range(5)]), encoding='utf-8')
+
+        history = self.history(max_entries=3, legacy_path=self.legacy_path)
+
+        self.assertEqual([e['n'] for e in history.tail(10)], [2, 3, 4])
+        self.assertFalse(self.legacy_path.exists())
+        self.assertEqual([json.loads(line)['n'] for line in self.lines()], [2, 3, 4])
+
+    def test_legacy_ignored_when_ndjson_exists(self):
+        """Test para no pisar un historial NDJSON ya existente"""
+        self.path.write_text('{"n": 9}\n', encoding='utf-8')
+        self.legacy_path.write_text(json.dumps([{'n': 0}]), encoding='utf-8')
+
+        history = self.history(legacy_path=self.legacy_path)
+
+        self.assertEqual(history.tail(10), [{'n': 9}])
+        self.assertTrue(self.legacy_path.exists())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,13 @@
 """
 Account Cache Manager - Gestión de caché persistente para nombres de cuentas
 Evita consultas innecesarias a la API de Google Ads
+El mapa vive en memoria del proceso y se persiste con escritura diferida
 """
 
+import atexit
 import json
 import os
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, Optional
@@ -13,6 +16,133 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class _AccountNameStore:
+    """
+    Mapa de nombres de cuentas compartido por todo el proceso (uno por archivo)
+    
+    - Se carga una vez y se recarga solo si cambia el mtime del archivo
+    - Escritura diferida: los cambios se agrupan y se guardan flush_delay
+      segundos después del primero (y al cerrar el proceso)
+    - Al guardar se fusiona con el archivo actual y se reemplaza de forma
+      atómica (tmp + os.replace), así no se pisan cambios de otros procesos
+    """
+    
+    def __init__(self, cache_file: Path, flush_delay: float = 2.0):
+        self.cache_file = cache_file
+        self.flush_delay = flush_delay
+        
+        self._lock = threading.RLock()
+        self._data: Dict = {}
+        self._mtime: Optional[float] = None
+        self._loaded = False
+        self._pending: Dict[str, str] = {}
+        self._timer: Optional[threading.Timer] = None
+        
+        atexit.register(self.flush)
+    
+    def snapshot(self) -> Dict:
+        """Datos actuales del caché (sin leer el archivo si no cambió)"""
+        with self._lock:
+            self._reload_if_changed()
+            return self._data
+    
+    def update(self, accounts: Dict[str, str]) -> None:
+        """Actualiza nombres en memoria y programa el guardado"""
+        with self._lock:
+            self._reload_if_changed()
+            self._data.setdefault('accounts', {}).update(accounts)
+            self._data['last_updated'] = datetime.now().isoformat()
+            self._pending.update(accounts)
+            
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def flush(self) -> None:
+        """Guarda los cambios pendientes"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            
+            # Fusionar con cambios de otros procesos antes de reemplazar
+            self._reload_if_changed()
+            cache_data = dict(self._data)
+            cache_data['accounts'] = dict(self._data.get('accounts', {}))
+            cache_data['last_updated'] = datetime.now().isoformat()
+            
+            try:
+                tmp_path = self.cache_file.with_suffix(self.cache_file.suffix + '.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(cache_data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.cache_file)
+                
+                self._data = cache_data
+                self._mtime = self._current_mtime()
+                logger.info(f"✅ Caché guardado: {len(cache_data['accounts'])} cuentas ({len(self._pending)} cambios)")
+                self._pending = {}
+            except Exception as e:
+                logger.error(f"❌ Error guardando caché: {e}")
+    
+    def clear(self) -> None:
+        """Borra el caché en memoria y en disco"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = {}
+            self._data = {}
+            if self.cache_file.exists():
+                self.cache_file.unlink()
+            self._mtime = None
+            self._loaded = True
+    
+    def _reload_if_changed(self) -> None:
+        mtime = self._current_mtime()
+        if self._loaded and mtime == self._mtime:
+            return
+        
+        data: Dict = {}
+        if mtime is not None:
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                logger.info(f"✅ Caché cargado: {len(data.get('accounts', {}))} cuentas")
+            except Exception as e:
+                logger.error(f"❌ Error cargando caché: {e}")
+                data = {}
+        
+        # Los cambios que aún no se guardaron siguen vigentes
+        if self._pending:
+            data.setdefault('accounts', {}).update(self._pending)
+            data['last_updated'] = self._data.get('last_updated', datetime.now().isoformat())
+        
+        self._data = data
+        self._mtime = mtime
+        self._loaded = True
+    
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return self.cache_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+_stores: Dict[str, _AccountNameStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _get_store(cache_file: Path) -> _AccountNameStore:
+    key = str(cache_file.resolve())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = _AccountNameStore(cache_file)
+        return _stores[key]
+
+
 class AccountCacheManager:
     """Gestiona el caché persistente de nombres de cuentas de Google Ads"""
     
@@ -27,34 +157,19 @@ class AccountCacheManager:
         self.cache_file = Path(cache_file)
         self.cache_days = cache_days
         self._ensure_cache_directory()
+        self._store = _get_store(self.cache_file)
         
     def _ensure_cache_directory(self):
         """Crea el directorio de caché si no existe"""
         self.cache_file.parent.mkdir(parents=True, exist_ok=True)
         
     def _load_cache(self) -> Dict:
-        """Carga el caché desde el archivo JSON"""
-        if not self.cache_file.exists():
-            return {}
-        
-        try:
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-                logger.info(f"✅ Caché cargado: {len(cache_data.get('accounts', {}))} cuentas")
-                return cache_data
-        except Exception as e:
-            logger.error(f"❌ Error cargando caché: {e}")
-            return {}
+        """Obtiene el caché del mapa en memoria del proceso"""
+        return self._store.snapshot()
     
-    def _save_cache(self, cache_data: Dict):
-        """Guarda el caché en el archivo JSON"""
-        try:
-            cache_data['last_updated'] = datetime.now().isoformat()
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
-            logger.info(f"✅ Caché guardado: {len(cache_data.get('accounts', {}))} cuentas")
-        except Exception as e:
-            logger.error(f"❌ Error guardando caché: {e}")
+    def flush(self):
+        """Guarda de inmediato los cambios pendientes"""
+        self._store.flush()
     
     def _is_cache_valid(self, cache_data: Dict) -> bool:
         """Verifica si el caché es válido (no ha expirado)"""
@@ -68,7 +183,7 @@ class AccountCacheManager:
             
             if is_valid:
                 days_left = (expiration_date - datetime.now()).days
-                logger.info(f"✅ Caché válido. Expira en {days_left} días")
+                logger.debug(f"✅ Caché válido. Expira en {days_left} días")
             else:
                 logger.info("⚠️ Caché expirado")
             
@@ -92,8 +207,7 @@ class AccountCacheManager:
         if not self._is_cache_valid(cache_data):
             return None
         
-        accounts = cache_data.get('accounts', {})
-        return accounts.get(customer_id)
+        return cache_data.get('accounts', {}).get(customer_id)
     
     def get_all_account_names(self) -> Dict[str, str]:
         """
@@ -107,7 +221,7 @@ class AccountCacheManager:
         if not self._is_cache_valid(cache_data):
             return {}
         
-        return cache_data.get('accounts', {})
+        return dict(cache_data.get('accounts', {}))
     
     def set_account_name(self, customer_id: str, account_name: str):
         """
@@ -117,13 +231,7 @@ class AccountCacheManager:
             customer_id: ID del cliente
             account_name: Nombre de la cuenta
         """
-        cache_data = self._load_cache()
-        
-        if 'accounts' not in cache_data:
-            cache_data['accounts'] = {}
-        
-        cache_data['accounts'][customer_id] = account_name
-        self._save_cache(cache_data)
+        self._store.update({customer_id: account_name})
         logger.info(f"✅ Nombre guardado en caché: {customer_id} -> {account_name}")
     
     def set_multiple_accounts(self, accounts: Dict[str, str]):
@@ -133,21 +241,14 @@ class AccountCacheManager:
         Args:
             accounts: Diccionario con {customer_id: account_name}
         """
-        cache_data = self._load_cache()
-        
-        if 'accounts' not in cache_data:
-            cache_data['accounts'] = {}
-        
-        cache_data['accounts'].update(accounts)
-        self._save_cache(cache_data)
+        self._store.update(accounts)
         logger.info(f"✅ {len(accounts)} cuentas guardadas en caché")
     
     def clear_cache(self):
         """Limpia todo el caché"""
         try:
-            if self.cache_file.exists():
-                self.cache_file.unlink()
-                logger.info("✅ Caché limpiado")
+            self._store.clear()
+            logger.info("✅ Caché limpiado")
         except Exception as e:
             logger.error(f"❌ Error limpiando caché: {e}")
     
@@ -0,0 +1,299 @@
+"""
+🧩 KEYWORD CLUSTERING - Agrupación escalable de keywords
+Agrupa listas grandes de keywords con MinHash + LSH en tiempo casi lineal
+Versión: 1.0
+Autor: saltbalente
+"""
+
+import hashlib
+import logging
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Any, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordClusterEngine:
+    """
+    Motor de clustering de keywords para listas de decenas de miles de términos.
+
+    - Cada keyword se representa como conjunto disperso de raíces de palabras
+    - Firmas MinHash + buckets LSH para encontrar candidatos sin comparar todos los pares
+    - Cada bucket compara solo contra un número acotado de representantes
+    - Clusters con id estable (derivado de su primera keyword en el orden de
+      entrada) y tamaño máximo apto para grupos de anuncios
+    """
+
+    # Stopwords que no aportan al tema del grupo
+    STOPWORDS = {
+        'de', 'la', 'el', 'en', 'y', 'a', 'los', 'las', 'del', 'para', 'por',
+        'con', 'un', 'una', 'mi', 'que', 'se', 'al', 'lo', 'como', 'the', 'of',
+        'for', 'in', 'to', 'and'
+    }
+
+    TOKEN_PATTERN = re.compile(r'[0-9a-záéíóúñü]+')
+
+    # Primo de Mersenne para las permutaciones universales
+    _PRIME = (1 << 61) - 1
+
+    def __init__(
+        self,
+        num_perm: int = 32,
+        bands: int = 16,
+        similarity_threshold: float = 0.5,
+        stem_length: int = 5,
+        max_representatives: int = 8
+    ):
+        """
+        Inicializa el motor.
+
+        Args:
+            num_perm: Número de funciones hash de la firma MinHash
+            bands: Bandas LSH (num_perm debe ser divisible por bands)
+            similarity_threshold: Jaccard estimado mínimo para unir dos keywords
+            stem_length: Longitud de la raíz usada por palabra (amarre/amarres)
+            max_representatives: Representantes comparados por bucket
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm debe ser divisible por bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.similarity_threshold = similarity_threshold
+        self.stem_length = stem_length
+        self.max_representatives = max_representatives
+
+        # Coeficientes deterministas para que los clusters sean reproducibles
+        self._coefficients = [
+            (
+                int.from_bytes(hashlib.md5(f"a{i}".encode()).digest()[:8], 'big') % self._PRIME or 1,
+                int.from_bytes(hashlib.md5(f"b{i}".encode()).digest()[:8], 'big') % self._PRIME
+            )
+            for i in range(num_perm)
+        ]
+
+    # =========================================================================
+    # API PRINCIPAL
+    # =========================================================================
+
+    def cluster(
+        self,
+        keywords: Iterable[str],
+        max_cluster_size: Optional[int] = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Agrupa keywords por similitud.
+
+        Args:
+            keywords: Keywords a agrupar (se deduplican sin distinguir mayúsculas)
+            max_cluster_size: Máximo de keywords por cluster (None = sin límite)
+
+        Returns:
+            Lista de clusters ordenada por tamaño:
+            {'cluster_id', 'id_keyword', 'name', 'theme', 'keywords', 'size'}
+
+            id_keyword es la keyword de la que se deriva cluster_id: la primera
+            del cluster en el orden de entrada, así agregar keywords nuevas al
+            final de la lista no cambia el id de los clusters existentes.
+        """
+        unique = self._deduplicate(keywords)
+        if not unique:
+            return []
+        first_seen = {kw: position for position, kw in enumerate(unique)}
+
+        # Las keywords cortas (más genéricas) se procesan primero y actúan
+        # como líderes; así el resultado no depende del orden de entrada
+        unique.sort(key=lambda kw: (len(kw), kw.lower()))
+        features = [self._features(kw) for kw in unique]
+        signatures = [self._signature(f) for f in features]
+
+        # Buckets LSH con solo líderes y un máximo de representantes: cada
+        # keyword se compara con O(bands * max_representatives) candidatos y
+        # se asigna al líder más parecido (sin encadenar clusters)
+        buckets: Dict[tuple, List[int]] = defaultdict(list)
+        members_by_leader: Dict[int, List[int]] = {}
+
+        for idx, signature in enumerate(signatures):
+            band_keys = [
+                (band, *signature[band * self.rows:(band + 1) * self.rows])
+                for band in range(self.bands)
+            ]
+
+            best_leader, best_similarity = None, self.similarity_threshold
+            if features[idx]:
+                seen: Set[int] = set()
+                for key in band_keys:
+                    for leader in buckets.get(key, ()):
+                        if leader in seen:
+                            continue
+                        seen.add(leader)
+                        similarity = self._estimate_similarity(signature, signatures[leader])
+                        if similarity >= best_similarity:
+                            best_leader, best_similarity = leader, similarity
+
+            if best_leader is not None:
+                members_by_leader[best_leader].append(idx)
+                continue
+
+            members_by_leader[idx] = [idx]
+            if features[idx]:
+                for key in band_keys:
+                    representatives = buckets[key]
+                    if len(representatives) < self.max_representatives:
+                        representatives.append(idx)
+
+        clusters = []
+        for members in members_by_leader.values():
+            member_keywords = [unique[i] for i in members]
+            clusters.extend(self._build_clusters(member_keywords, max_cluster_size, first_seen))
+
+        clusters.sort(key=lambda c: (-c['size'], c['cluster_id']))
+
+        logger.info(
+            f"🧩 {len(unique)} keywords agrupadas en {len(clusters)} clusters"
+        )
+        return clusters
+
+    def split_into_groups(
+        self,
+        keywords: Iterable[str],
+        num_groups: int
+    ) -> List[List[str]]:
+        """
+        Reparte keywords en un número fijo de grupos manteniendo juntos los clusters.
+
+        Los clusters (limitados al tamaño objetivo por grupo) se asignan de
+        mayor a menor al grupo con menos keywords. Se agrupa sin distinguir
+        mayúsculas, pero se devuelven todas las keywords de entrada: las
+        variantes y repeticiones van al grupo de su keyword.
+
+        Args:
+            keywords: Keywords a repartir
+            num_groups: Número de grupos
+
+        Returns:
+            Lista de num_groups listas de keywords
+        """
+        variants: Dict[str, List[str]] = defaultdict(list)
+        for kw in keywords:
+            if kw and isinstance(kw, str) and kw.strip():
+                variants[' '.join(kw.split()).lower()].append(kw.strip())
+
+        unique = self._deduplicate(keywords)
+        num_groups = max(1, num_groups)
+        groups: List[List[str]] = [[] for _ in range(num_groups)]
+        if not unique:
+            return groups
+
+        target_size = -(-len(unique) // num_groups)
+        for cluster in self.cluster(unique, max_cluster_size=target_size):
+            smallest = min(range(num_groups), key=lambda g: len(groups[g]))
+            for kw in cluster['keywords']:
+                groups[smallest].extend(variants[kw.lower()])
+
+        # Evitar grupos vacíos cuando hay keywords suficientes
+        for group in groups:
+            if not group:
+                largest = max(groups, key=len)
+                if len(largest) > 1:
+                    group.append(largest.pop())
+
+        return groups
+
+    # =========================================================================
+    # REPRESENTACIÓN
+    # =========================================================================
+
+    def _features(self, keyword: str) -> Set[str]:
+        """Conjunto de raíces de palabras significativas."""
+        tokens = self.TOKEN_PATTERN.findall(keyword.lower())
+        stems = {t[:self.stem_length] for t in tokens if t not in self.STOPWORDS}
+        return stems or {t[:self.stem_length] for t in tokens}
+
+    def _signature(self, features: Set[str]) -> List[int]:
+        """Firma MinHash del conjunto de features."""
+        if not features:
+            return [0] * self.num_perm
+
+        hashed = [zlib.crc32(f.encode('utf-8')) for f in features]
+        prime = self._PRIME
+        return [
+            min((a * h + b) % prime for h in hashed)
+            for a, b in self._coefficients
+        ]
+
+    def _estimate_similarity(self, sig_a: List[int], sig_b: List[int]) -> float:
+        """Jaccard estimado como fracción de posiciones coincidentes."""
+        matches = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+        return matches / self.num_perm
+
+    # =========================================================================
+    # CONSTRUCCIÓN DE CLUSTERS
+    # =========================================================================
+
+    def _build_clusters(
+        self,
+        member_keywords: List[str],
+        max_cluster_size: Optional[int],
+        first_seen: Dict[str, int]
+    ) -> List[Dict[str, Any]]:
+        """Elige cabecera (el líder), id estable y divide clusters demasiado grandes."""
+
+        if max_cluster_size and len(member_keywords) > max_cluster_size:
+            chunks = [
+                member_keywords[i:i + max_cluster_size]
+                for i in range(0, len(member_keywords), max_cluster_size)
+            ]
+        else:
+            chunks = [member_keywords]
+
+        id_keyword = min(member_keywords, key=first_seen.__getitem__)
+        base_id = self.cluster_id_for(id_keyword)
+        theme = self._theme(member_keywords)
+
+        clusters = []
+        for part, chunk in enumerate(chunks):
+            clusters.append({
+                'cluster_id': base_id if part == 0 else f"{base_id}_{part + 1}",
+                'id_keyword': id_keyword,
+                'name': chunk[0],
+                'theme': theme,
+                'keywords': chunk,
+                'size': len(chunk)
+            })
+        return clusters
+
+    @staticmethod
+    def cluster_id_for(id_keyword: str) -> str:
+        """Id estable derivado de la keyword que identifica al cluster."""
+        digest = hashlib.md5(id_keyword.lower().encode('utf-8')).hexdigest()[:10]
+        return f"kwc_{digest}"
+
+    def _theme(self, member_keywords: List[str]) -> str:
+        """Palabra significativa más frecuente del cluster."""
+        counts: Dict[str, int] = defaultdict(int)
+        for kw in member_keywords:
+            for token in set(self.TOKEN_PATTERN.findall(kw.lower())):
+                if token not in self.STOPWORDS and len(token) > 2:
+                    counts[token] += 1
+        if not counts:
+            return member_keywords[0].split()[0].title() if member_keywords[0].split() else 'General'
+        return max(counts.items(), key=lambda item: (item[1], -len(item[0]), item[0]))[0].title()
+
+    @staticmethod
+    def _deduplicate(keywords: Iterable[str]) -> List[str]:
+        """Limpia y deduplica keywords conservando el orden."""
+        seen: Set[str] = set()
+        unique = []
+        for kw in keywords:
+            if not kw or not isinstance(kw, str):
+                continue
+            clean = ' '.join(kw.split())
+            key = clean.lower()
+            if clean and key not in seen:
+                seen.add(key)
+                unique.append(clean)
+        return unique
@@ -7,14 +7,17 @@ Autor: saltbalente
 """
 
 import logging
+import math
 import re
-from typing import Dict, List, Optional, Any, Tuple, Set
+from typing import Dict, List, Optional, Any, Tuple, Set, Union
 from datetime import datetime
 from collections import Counter, defaultdict
 import statistics
 from pathlib import Path
 import json
 
+from utils.keyword_clustering import KeywordClusterEngine
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -103,6 +106,15 @@ class KeywordExtractor:
         ]
     }
     
+    # Tokenizador compartido por extracción simple y modo corpus
+    TOKEN_PATTERN = re.compile(r'\b[a-záéíóúñü]+\b')
+    
+    # Tipo de keyword según número de palabras
+    NGRAM_TYPES = {1: 'single', 2: 'bigram', 3: 'trigram'}
+    
+    # Entradas máximas del memo de coincidencias con el dominio
+    DOMAIN_MATCH_CACHE_SIZE = 50_000
+    
     # Modificadores de keywords
     MODIFIERS = {
         'location': ['en', 'de', 'cerca', 'local'],
@@ -117,7 +129,9 @@ class KeywordExtractor:
         domain: str = 'esoterico',
         min_word_length: int = 3,
         max_keywords: int = 50,
-        include_ngrams: bool = True
+        include_ngrams: bool = True,
+        max_cached_documents: int = 10_000,
+        max_vocabulary_size: int = 500_000
     ):
         """
         Inicializa el extractor de keywords.
@@ -127,11 +141,16 @@ class KeywordExtractor:
             min_word_length: Longitud mínima de palabras
             max_keywords: Máximo de keywords a extraer
             include_ngrams: Incluir bi-gramas y tri-gramas
+            max_cached_documents: Vectores de documentos guardados entre llamadas
+                a extract_corpus; al superarlo se reinicia el modo corpus
+            max_vocabulary_size: Términos del vocabulario compartido antes de reiniciarlo
         """
         self.domain = domain
         self.min_word_length = min_word_length
         self.max_keywords = max_keywords
         self.include_ngrams = include_ngrams
+        self.max_cached_documents = max_cached_documents
+        self.max_vocabulary_size = max_vocabulary_size
         
         # Keywords del dominio
         self.domain_words = self.DOMAIN_KEYWORDS.get(domain, [])
@@ -139,6 +158,21 @@ class KeywordExtractor:
         # Cache de keywords extraídas
         self.cache: Dict[str, List[Dict[str, Any]]] = {}
         
+        # Modo corpus: vocabulario compartido y vectores dispersos por documento
+        # (term_id -> frecuencia), indexados por _hash_text
+        self.vocabulary: Dict[str, int] = {}
+        self.document_vectors: Dict[str, Dict[int, int]] = {}
+        
+        # Memo de coincidencias con el dominio (los n-gramas se repiten mucho);
+        # se vacía al llegar a DOMAIN_MATCH_CACHE_SIZE entradas
+        self._domain_match_cache: Dict[str, bool] = {}
+        all_domain_words = sorted(
+            {w for words in self.DOMAIN_KEYWORDS.values() for w in words},
+            key=len,
+            reverse=True
+        )
+        self._domain_pattern = re.compile('|'.join(re.escape(w) for w in all_domain_words))
+        
         # Estadísticas
         self.stats = {
             'total_extractions': 0,
@@ -276,13 +310,10 @@ class KeywordExtractor:
         Returns:
             Lista de keywords con metadata
         """
-        # Extraer palabras
-        words = re.findall(r'\b[a-záéíóúñü]+\b', text.lower())
-        
-        # Filtrar por longitud y stopwords
+        # Extraer palabras sin stopwords y filtrar por longitud
         filtered_words = [
-            w for w in words
-            if len(w) >= self.min_word_length and w not in self.STOPWORDS
+            w for w in self._tokenize(text)
+            if len(w) >= self.min_word_length
         ]
         
         # Contar frecuencias
@@ -298,11 +329,13 @@ class KeywordExtractor:
         keywords = []
         
         for word, frequency in word_counts.items():
+            is_domain = self._is_domain_keyword(word)
+            
             # Calcular relevancia base
             relevance = self._calculate_base_relevance(word, frequency, len(filtered_words))
             
             # Boost por dominio
-            if boost_domain and self._is_domain_keyword(word):
+            if boost_domain and is_domain:
                 relevance *= 1.5
             
             keyword_data = {
@@ -310,7 +343,7 @@ class KeywordExtractor:
                 'type': 'single',
                 'frequency': frequency,
                 'relevance_score': round(min(100, relevance), 1),
-                'is_domain': self._is_domain_keyword(word),
+                'is_domain': is_domain,
                 'length': len(word)
             }
             
@@ -335,69 +368,259 @@ class KeywordExtractor:
         Returns:
             Lista de n-gramas con metadata
         """
-        words = re.findall(r'\b[a-záéíóúñü]+\b', text.lower())
-        
         # Filtrar stopwords
-        filtered_words = [w for w in words if w not in self.STOPWORDS]
+        filtered_words = self._tokenize(text)
         
         ngrams = []
         
-        # Bi-gramas (2 palabras)
-        bigrams = []
-        for i in range(len(filtered_words) - 1):
-            bigram = f"{filtered_words[i]} {filtered_words[i+1]}"
-            bigrams.append(bigram)
-        
-        bigram_counts = Counter(bigrams)
-        
-        # Tri-gramas (3 palabras)
-        trigrams = []
-        for i in range(len(filtered_words) - 2):
-            trigram = f"{filtered_words[i]} {filtered_words[i+1]} {filtered_words[i+2]}"
-            trigrams.append(trigram)
-        
-        trigram_counts = Counter(trigrams)
-        
-        # Procesar bi-gramas
-        for ngram, frequency in bigram_counts.items():
-            if frequency >= min_frequency:
-                relevance = self._calculate_ngram_relevance(
-                    ngram, frequency, len(bigrams), 2
-                )
-                
-                if boost_domain and self._contains_domain_keyword(ngram):
-                    relevance *= 1.3
+        for n, domain_boost in ((2, 1.3), (3, 1.2)):
+            ngram_counts = self._count_ngrams(filtered_words, n)
+            total_ngrams = max(0, len(filtered_words) - n + 1)
+            
+            for ngram, frequency in ngram_counts.items():
+                if frequency < min_frequency:
+                    continue
                 
-                ngrams.append({
-                    'keyword': ngram,
-                    'type': 'bigram',
-                    'frequency': frequency,
-                    'relevance_score': round(min(100, relevance), 1),
-                    'is_domain': self._contains_domain_keyword(ngram),
-                    'length': len(ngram)
-                })
-        
-        # Procesar tri-gramas
-        for ngram, frequency in trigram_counts.items():
-            if frequency >= min_frequency:
+                is_domain = self._contains_domain_keyword(ngram)
                 relevance = self._calculate_ngram_relevance(
-                    ngram, frequency, len(trigrams), 3
+                    ngram, frequency, total_ngrams, n
                 )
                 
-                if boost_domain and self._contains_domain_keyword(ngram):
-                    relevance *= 1.2
+                if boost_domain and is_domain:
+                    relevance *= domain_boost
                 
                 ngrams.append({
                     'keyword': ngram,
-                    'type': 'trigram',
+                    'type': self.NGRAM_TYPES[n],
                     'frequency': frequency,
                     'relevance_score': round(min(100, relevance), 1),
-                    'is_domain': self._contains_domain_keyword(ngram),
+                    'is_domain': is_domain,
                     'length': len(ngram)
                 })
         
         return ngrams
     
+    def _tokenize(self, text: str) -> List[str]:
+        """Tokeniza texto normalizado descartando stopwords."""
+        return [
+            w for w in self.TOKEN_PATTERN.findall(text.lower())
+            if w not in self.STOPWORDS
+        ]
+    
+    def _count_ngrams(self, tokens: List[str], n: int) -> Counter:
+        """
+        Cuenta n-gramas de una lista de tokens.
+        
+        Se cuentan tuplas y solo se construye el string para n-gramas únicos.
+        """
+        if len(tokens) < n:
+            return Counter()
+        
+        tuple_counts = Counter(zip(*(tokens[i:] for i in range(n))))
+        return Counter({' '.join(gram): count for gram, count in tuple_counts.items()})
+    
+    # =========================================================================
+    # MODO CORPUS (TF-IDF)
+    # =========================================================================
+    
+    def extract_corpus(
+        self,
+        documents: Union[List[str], Dict[str, str]],
+        min_document_frequency: int = 1,
+        max_document_ratio: float = 1.0,
+        top_per_document: int = 20,
+        boost_domain: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Extrae keywords de muchos documentos en una sola pasada.
+        
+        Usa un vocabulario compartido, vectores dispersos de n-gramas por
+        documento (cacheados por hash de texto) y relevancia TF-IDF calculada
+        con las frecuencias de documento del corpus.
+        
+        Args:
+            documents: Lista de textos o diccionario {doc_id: texto}
+            min_document_frequency: Documentos mínimos en los que debe aparecer un término
+            max_document_ratio: Fracción máxima de documentos (descarta términos ubicuos)
+            top_per_document: Keywords a retornar por documento
+            boost_domain: Dar bonus a keywords del dominio
+        
+        Returns:
+            Diccionario con keywords del corpus y por documento
+        """
+        if isinstance(documents, dict):
+            doc_items = list(documents.items())
+        else:
+            doc_items = [(str(i), text) for i, text in enumerate(documents)]
+        
+        logger.info(f"📚 Extrayendo keywords de corpus: {len(doc_items)} documentos")
+        
+        # Los vectores usan ids del vocabulario: se descartan juntos, y antes
+        # de vectorizar para que esta llamada use un vocabulario consistente
+        if (len(self.document_vectors) >= self.max_cached_documents
+                or len(self.vocabulary) >= self.max_vocabulary_size):
+            logger.info(
+                f"🗑️ Reiniciando modo corpus ({len(self.document_vectors)} vectores, "
+                f"{len(self.vocabulary)} términos)"
+            )
+            self._reset_corpus()
+        
+        # 1. Vectorizar documentos (reutilizando vectores cacheados)
+        vectors: List[Tuple[str, Dict[int, int]]] = []
+        cache_hits = 0
+        for doc_id, text in doc_items:
+            text_hash = self._hash_text(text or '')
+            vector = self.document_vectors.get(text_hash)
+            if vector is None:
+                vector = self._vectorize_document(text or '')
+                self.document_vectors[text_hash] = vector
+            else:
+                cache_hits += 1
+            vectors.append((doc_id, vector))
+        
+        total_docs = len(vectors)
+        if total_docs == 0:
+            return {
+                'timestamp': datetime.now().isoformat(),
+                'total_documents': 0,
+                'vocabulary_size': len(self.vocabulary),
+                'keywords': [],
+                'documents': {},
+                'clusters': {},
+                'statistics': {}
+            }
+        
+        # 2. Frecuencia de documento e IDF suavizado
+        document_frequency: Counter = Counter()
+        for _, vector in vectors:
+            document_frequency.update(vector.keys())
+        
+        max_df = max(1, int(max_document_ratio * total_docs))
+        idf = {
+            term_id: math.log((1 + total_docs) / (1 + df)) + 1
+            for term_id, df in document_frequency.items()
+            if min_document_frequency <= df <= max_df
+        }
+        
+        terms = self._terms_by_id()
+        corpus_weights: Dict[int, float] = defaultdict(float)
+        corpus_frequency: Counter = Counter()
+        per_document: Dict[str, List[Dict[str, Any]]] = {}
+        
+        # 3. TF-IDF por documento (TF sublineal, normalización L2)
+        for doc_id, vector in vectors:
+            weights = {
+                term_id: (1 + math.log(count)) * idf[term_id]
+                for term_id, count in vector.items()
+                if term_id in idf
+            }
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            
+            scored = []
+            for term_id, weight in weights.items():
+                weight /= norm
+                corpus_weights[term_id] += weight
+                corpus_frequency[term_id] += vector[term_id]
+                scored.append((weight, term_id))
+            
+            scored.sort(reverse=True)
+            per_document[doc_id] = [
+                self._build_corpus_keyword(
+                    terms[term_id], weight, vector[term_id],
+                    document_frequency[term_id], boost_domain
+                )
+                for weight, term_id in scored[:top_per_document]
+            ]
+        
+        # 4. Ranking del corpus: peso TF-IDF medio por documento
+        ranked = sorted(corpus_weights.items(), key=lambda item: item[1], reverse=True)
+        corpus_keywords = [
+            self._build_corpus_keyword(
+                terms[term_id], total_weight / total_docs, corpus_frequency[term_id],
+                document_frequency[term_id], boost_domain
+            )
+            for term_id, total_weight in ranked[:self.max_keywords]
+        ]
+        corpus_keywords.sort(key=lambda kw: kw['relevance_score'], reverse=True)
+        
+        # Actualizar estadísticas
+        self.stats['total_extractions'] += 1
+        self.stats['total_keywords_extracted'] += len(corpus_keywords)
+        
+        logger.info(f"✅ Corpus procesado")
+        logger.info(f"   - Vocabulario: {len(self.vocabulary)} términos")
+        logger.info(f"   - Vectores en caché reutilizados: {cache_hits}")
+        
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'total_documents': total_docs,
+            'vocabulary_size': len(self.vocabulary),
+            'cache_hits': cache_hits,
+            'keywords': corpus_keywords,
+            'top_keywords': corpus_keywords[:10],
+            'documents': per_document,
+            'clusters': self._cluster_keywords(corpus_keywords),
+            'statistics': self._calculate_statistics(corpus_keywords)
+        }
+    
+    def _vectorize_document(self, text: str) -> Dict[int, int]:
+        """
+        Convierte un documento en vector disperso {term_id: frecuencia}.
+        
+        Los términos nuevos se agregan al vocabulario compartido.
+        """
+        tokens = self._tokenize(self._normalize_text(text))
+        
+        counts = Counter(w for w in tokens if len(w) >= self.min_word_length)
+        if self.include_ngrams:
+            counts.update(self._count_ngrams(tokens, 2))
+            counts.update(self._count_ngrams(tokens, 3))
+        
+        vocabulary = self.vocabulary
+        vector: Dict[int, int] = {}
+        for term, count in counts.items():
+            term_id = vocabulary.get(term)
+            if term_id is None:
+                term_id = len(vocabulary)
+                vocabulary[term] = term_id
+            vector[term_id] = count
+        
+        return vector
+    
+    def _terms_by_id(self) -> List[str]:
+        """Vocabulario invertido (term_id -> término)."""
+        terms = [''] * len(self.vocabulary)
+        for term, term_id in self.vocabulary.items():
+            terms[term_id] = term
+        return terms
+    
+    def _build_corpus_keyword(
+        self,
+        term: str,
+        tfidf: float,
+        frequency: int,
+        document_frequency: int,
+        boost_domain: bool
+    ) -> Dict[str, Any]:
+        """Construye el diccionario de keyword para resultados de corpus."""
+        n = term.count(' ') + 1
+        is_domain = self._contains_domain_keyword(term)
+        
+        relevance = tfidf * 100
+        if boost_domain and is_domain:
+            relevance *= {1: 1.5, 2: 1.3}.get(n, 1.2)
+        
+        return {
+            'keyword': term,
+            'type': self.NGRAM_TYPES.get(n, 'ngram'),
+            'frequency': frequency,
+            'document_frequency': document_frequency,
+            'tfidf': round(tfidf, 4),
+            'relevance_score': round(min(100, relevance), 1),
+            'is_domain': is_domain,
+            'length': len(term)
+        }
+    
     # =========================================================================
     # CÁLCULO DE RELEVANCIA
     # =========================================================================
@@ -573,6 +796,30 @@ class KeywordExtractor:
         # Convertir a dict regular
         return dict(clusters)
     
+    def cluster_keyword_list(
+        self,
+        keywords: List[str],
+        max_cluster_size: Optional[int] = 20,
+        similarity_threshold: float = 0.5
+    ) -> List[Dict[str, Any]]:
+        """
+        Agrupa listas grandes de keywords por similitud (MinHash + LSH).
+        
+        A diferencia de _cluster_keywords (categorías fijas del dominio),
+        descubre los grupos a partir de las propias keywords y escala a
+        decenas de miles de términos.
+        
+        Args:
+            keywords: Keywords a agrupar
+            max_cluster_size: Máximo de keywords por cluster
+            similarity_threshold: Similitud mínima para agrupar
+        
+        Returns:
+            Lista de clusters con 'cluster_id' estable, 'name', 'theme' y 'keywords'
+        """
+        engine = KeywordClusterEngine(similarity_threshold=similarity_threshold)
+        return engine.cluster(keywords, max_cluster_size=max_cluster_size)
+    
     # =========================================================================
     # ANÁLISIS DE INTENCIÓN
     # =========================================================================
@@ -837,20 +1084,18 @@ class KeywordExtractor:
     
     def _is_domain_keyword(self, word: str) -> bool:
         """Verifica si palabra es del dominio."""
-        return any(
-            domain_word in word.lower()
-            for category_words in self.DOMAIN_KEYWORDS.values()
-            for domain_word in category_words
-        )
+        return self._contains_domain_keyword(word)
     
     def _contains_domain_keyword(self, text: str) -> bool:
         """Verifica si texto contiene palabra del dominio."""
         text_lower = text.lower()
-        return any(
-            domain_word in text_lower
-            for category_words in self.DOMAIN_KEYWORDS.values()
-            for domain_word in category_words
-        )
+        cached = self._domain_match_cache.get(text_lower)
+        if cached is None:
+            cached = self._domain_pattern.search(text_lower) is not None
+            if len(self._domain_match_cache) >= self.DOMAIN_MATCH_CACHE_SIZE:
+                self._domain_match_cache.clear()
+            self._domain_match_cache[text_lower] = cached
+        return cached
     
     def _hash_text(self, text: str) -> str:
         """Genera hash del texto para caché."""
@@ -858,17 +1103,26 @@ class KeywordExtractor:
         return hashlib.md5(text.encode()).hexdigest()
     
     def clear_cache(self) -> int:
-        """Limpia caché."""
-        count = len(self.cache)
+        """Limpia caché (incluye vocabulario, vectores y memo de dominio)."""
+        count = len(self.cache) + len(self.document_vectors)
         self.cache.clear()
+        self._reset_corpus()
+        self._domain_match_cache.clear()
         logger.info(f"🗑️ Caché limpiada: {count} entradas")
         return count
     
+    def _reset_corpus(self) -> None:
+        """Descarta vocabulario y vectores del modo corpus."""
+        self.vocabulary.clear()
+        self.document_vectors.clear()
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Obtiene estadísticas del extractor."""
         return {
             **self.stats,
-            'cache_size': len(self.cache)
+            'cache_size': len(self.cache),
+            'vocabulary_size': len(self.vocabulary),
+            'document_vectors': len(self.document_vectors)
         }
     
     def export_keywords(
@@ -2,9 +2,10 @@
 Lazy Imports - Importa módulos solo cuando se necesitan
 """
 
-import importlib
 from typing import Any
 
+from utils.service_registry import timed_import
+
 
 class LazyImport:
     """Importa módulos de forma lazy"""
@@ -15,7 +16,8 @@ class LazyImport:
     
     def __getattr__(self, name: str) -> Any:
         if self._module is None:
-            self._module = importlib.import_module(self.module_name)
+            # timed_import registra el tiempo de la primera importación
+            self._module = timed_import(self.module_name)
         
         return getattr(self._module, name)
 
@@ -23,4 +25,7 @@ class LazyImport:
 # Módulos pesados que se cargan solo cuando se necesitan
 pd = LazyImport('pandas')
 np = LazyImport('numpy')
-plt = LazyImport('matplotlib.pyplot')
\ No newline at end of file
+plt = LazyImport('matplotlib.pyplot')
+px = LazyImport('plotly.express')
+go = LazyImport('plotly.graph_objects')
+subplots = LazyImport('plotly.subplots')
@@ -0,0 +1,349 @@
+"""
+Query Partition Cache - Caché de consultas GAQL por recurso y día
+Guarda los resultados de consultas segmentadas por segments.date en
+particiones diarias y responde cualquier rango combinando días cacheados
+con consultas solo para los días que faltan
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Condiciones del WHERE separadas por AND fuera de comillas
+_AND_SPLIT_RE = re.compile(r"\s+AND\s+(?=(?:[^']*'[^']*')*[^']*$)", re.IGNORECASE)
+_QUERY_RE = re.compile(
+    r"^\s*SELECT\s+(?P<select>.+?)\s+FROM\s+(?P<resource>\w+)"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?P<tail>\s+(?:ORDER\s+BY|LIMIT|PARAMETERS)\b.*)?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+_DATE_BETWEEN_RE = re.compile(
+    r"^segments\.date\s+BETWEEN\s+'?(\d{4}-\d{2}-\d{2})'?\s+AND\s+'?(\d{4}-\d{2}-\d{2})'?$", re.IGNORECASE
+)
+_DATE_COMPARE_RE = re.compile(r"^segments\.date\s*(>=|<=|>|<|=)\s*'?(\d{4}-\d{2}-\d{2})'?$", re.IGNORECASE)
+_DATE_DURING_RE = re.compile(r"^segments\.date\s+DURING\s+(\w+)$", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class PartitionedQuery:
+    """Consulta descompuesta en grupo (recurso + filtros), columnas y rango"""
+    customer_id: str
+    resource: str
+    fields: Tuple[str, ...]
+    filters: Tuple[str, ...]
+    start: date
+    end: date
+
+    @property
+    def group_key(self) -> Tuple[str, str, Tuple[str, ...]]:
+        return (self.customer_id, self.resource, self.filters)
+
+    def days(self) -> List[date]:
+        return [self.start + timedelta(days=offset) for offset in range((self.end - self.start).days + 1)]
+
+    def to_gaql(self, start: date, end: date) -> str:
+        conditions = list(self.filters) + [f"segments.date BETWEEN '{start.isoformat()}' AND '{end.isoformat()}'"]
+        return f"SELECT {', '.join(self.fields)} FROM {self.resource} WHERE {' AND '.join(conditions)}"
+
+
+def resolve_during(literal: str, today: Optional[date] = None) -> Optional[Tuple[date, date]]:
+    """
+    Traduce un rango DURING a fechas explícitas
+
+    Usa la fecha local del proceso; la API usa la zona horaria de la cuenta,
+    por lo que cerca de medianoche el rango puede diferir en un día.
+    """
+    today = today or date.today()
+    literal = literal.upper()
+    if literal == 'TODAY':
+        return today, today
+    if literal == 'YESTERDAY':
+        yesterday = today - timedelta(days=1)
+        return yesterday, yesterday
+    match = re.match(r"^LAST_(\d+)_DAYS$", literal)
+    if match:
+        days = int(match.group(1))
+        return today - timedelta(days=days), today - timedelta(days=1)
+    if literal == 'THIS_MONTH':
+        return today.replace(day=1), today
+    if literal == 'LAST_MONTH':
+        last_day = today.replace(day=1) - timedelta(days=1)
+        return last_day.replace(day=1), last_day
+    return None
+
+
+def parse_partitioned_query(customer_id: str, query: str,
+                            today: Optional[date] = None) -> Optional[PartitionedQuery]:
+    """
+    Analiza una consulta y devuelve su descomposición si se puede particionar
+
+    Solo se particionan consultas que seleccionan segments.date, tienen un
+    rango de fechas cerrado y no usan ORDER BY, LIMIT ni PARAMETERS.
+    """
+    match = _QUERY_RE.match(query)
+    if not match or match.group('tail') or not match.group('where'):
+        return None
+
+    fields = tuple(field.strip() for field in match.group('select').split(',') if field.strip())
+    if 'segments.date' not in fields:
+        return None
+
+    conditions = _split_conditions(match.group('where'))
+    start: Optional[date] = None
+    end: Optional[date] = None
+    filters: List[str] = []
+
+    for condition in conditions:
+        if not condition.lower().startswith('segments.date'):
+            filters.append(condition)
+            continue
+
+        between = _DATE_BETWEEN_RE.match(condition)
+        compare = _DATE_COMPARE_RE.match(condition)
+        during = _DATE_DURING_RE.match(condition)
+        if between:
+            start = _max_date(start, _parse_date(between.group(1)))
+            end = _min_date(end, _parse_date(between.group(2)))
+        elif compare:
+            operator, value = compare.group(1), _parse_date(compare.group(2))
+            if operator in ('>=', '='):
+                start = _max_date(start, value)
+            if operator in ('<=', '='):
+                end = _min_date(end, value)
+            if operator == '>':
+                start = _max_date(start, value + timedelta(days=1))
+            if operator == '<':
+                end = _min_date(end, value - timedelta(days=1))
+        elif during:
+            resolved = resolve_during(during.group(1), today)
+            if not resolved:
+                return None
+            start = _max_date(start, resolved[0])
+            end = _min_date(end, resolved[1])
+        else:
+            return None
+
+    if start is None or end is None or end < start:
+        return None
+
+    return PartitionedQuery(
+        customer_id=str(customer_id),
+        resource=match.group('resource'),
+        fields=fields,
+        filters=tuple(sorted(filters)),
+        start=start,
+        end=end
+    )
+
+
+def _split_conditions(where: str) -> List[str]:
+    """Separa el WHERE por AND, manteniendo juntos los BETWEEN x AND y"""
+    parts = [' '.join(part.split()) for part in _AND_SPLIT_RE.split(where.strip())]
+    conditions: List[str] = []
+    for part in parts:
+        if conditions and re.search(r"\bBETWEEN\s+\S+$", conditions[-1], re.IGNORECASE):
+            conditions[-1] = f"{conditions[-1]} AND {part}"
+        else:
+            conditions.append(part)
+    return conditions
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _max_date(current: Optional[date], value: date) -> date:
+    return value if current is None or value > current else current
+
+
+def _min_date(current: Optional[date], value: date) -> date:
+    return value if current is None or value < current else current
+
+
+class QueryPartitionCache:
+    """
+    Caché de filas GAQL particionadas por (cuenta, recurso, filtros, columnas, día)
+
+    - Un rango se responde con los días ya cacheados y una consulta por cada
+      tramo contiguo de días faltantes
+    - Una partición con más columnas sirve para una consulta con menos, si
+      las columnas extra no son segments.* (no cambian la granularidad)
+    - Los días recientes (conversiones aún en ajuste) expiran antes que los
+      días cerrados
+    - Límite de filas en memoria con expulsión LRU por partición
+    - Las particiones guardan atributos (estado, pujas, nombres) junto a las
+      métricas, por eso los servicios que hacen mutate llaman a
+      invalidate(customer_id) después de cada cambio
+    """
+
+    def __init__(self,
+                 recent_days: int = 3,
+                 recent_ttl: int = 900,
+                 settled_ttl: int = 86400,
+                 max_rows: int = 500_000):
+        """
+        Args:
+            recent_days: Días (contando hoy) que se consideran aún abiertos
+            recent_ttl: TTL en segundos de las particiones recientes
+            settled_ttl: TTL en segundos de las particiones cerradas
+            max_rows: Filas máximas en memoria
+        """
+        self.recent_days = recent_days
+        self.recent_ttl = recent_ttl
+        self.settled_ttl = settled_ttl
+        self.max_rows = max_rows
+
+        self._lock = threading.Lock()
+        # (group_key, fields, day) -> (fetched_at, rows); orden = uso reciente
+        self._partitions: "OrderedDict[Tuple, Tuple[float, List[Any]]]" = OrderedDict()
+        # group_key -> {fields}
+        self._field_sets: Dict[Tuple, set] = {}
+        self._row_count = 0
+
+        self.stats = {'queries': 0, 'days_hit': 0, 'days_fetched': 0, 'fetches': 0, 'evictions': 0}
+
+    def execute(self, plan: PartitionedQuery, fetch: Callable[[str], List[Any]]) -> List[Any]:
+        """
+        Responde la consulta desde las particiones, consultando solo lo que falta
+
+        Args:
+            plan: Consulta particionada (ver parse_partitioned_query)
+            fetch: Función que ejecuta una consulta GAQL y devuelve sus filas
+
+        Returns:
+            Filas ordenadas por día
+        """
+        days = plan.days()
+        cached: Dict[date, List[Any]] = {}
+        with self._lock:
+            self.stats['queries'] += 1
+            for day in days:
+                rows = self._lookup(plan, day)
+                if rows is not None:
+                    cached[day] = rows
+
+        missing = [day for day in days if day not in cached]
+        for start, end in _contiguous_ranges(missing):
+            rows = fetch(plan.to_gaql(start, end))
+            by_day: Dict[date, List[Any]] = {day: [] for day in _date_span(start, end)}
+            for row in rows:
+                try:
+                    by_day.setdefault(_parse_date(row.segments.date), []).append(row)
+                except (AttributeError, ValueError):
+                    continue
+            with self._lock:
+                self.stats['fetches'] += 1
+                self.stats['days_fetched'] += len(by_day)
+                for day, day_rows in by_day.items():
+                    self._store(plan, day, day_rows)
+            cached.update(by_day)
+
+        with self._lock:
+            self.stats['days_hit'] += len(days) - len(missing)
+
+        if missing:
+            logger.debug(
+                f"🧩 {plan.resource} {plan.start}..{plan.end}: {len(days) - len(missing)} días en caché, "
+                f"{len(missing)} consultados"
+            )
+
+        results: List[Any] = []
+        for day in days:
+            results.extend(cached.get(day, []))
+        return results
+
+    def invalidate(self, customer_id: Optional[str] = None) -> None:
+        """Descarta las particiones de una cuenta (o todas)"""
+        with self._lock:
+            if customer_id is None:
+                self._partitions.clear()
+                self._field_sets.clear()
+                self._row_count = 0
+                return
+            for key in [key for key in self._partitions if key[0][0] == str(customer_id)]:
+                self._row_count -= len(self._partitions.pop(key)[1])
+            for group_key in [group_key for group_key in self._field_sets if group_key[0] == str(customer_id)]:
+                del self._field_sets[group_key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'partitions': len(self._partitions), 'rows': self._row_count}
+
+    def _lookup(self, plan: PartitionedQuery, day: date) -> Optional[List[Any]]:
+        """Partición vigente para el día con las columnas pedidas (o un superconjunto)"""
+        requested = set(plan.fields)
+        candidates = [plan.fields] + [
+            fields for fields in self._field_sets.get(plan.group_key, ())
+            if fields != plan.fields and requested.issubset(fields)
+            and not any(field.startswith('segments.') for field in set(fields) - requested)
+        ]
+        ttl = self._ttl_for(day)
+        now = time.time()
+        for fields in candidates:
+            key = (plan.group_key, fields, day)
+            entry = self._partitions.get(key)
+            if entry is None:
+                continue
+            if now - entry[0] > ttl:
+                self._row_count -= len(self._partitions.pop(key)[1])
+                continue
+            self._partitions.move_to_end(key)
+            return entry[1]
+        return None
+
+    def _store(self, plan: PartitionedQuery, day: date, rows: List[Any]) -> None:
+        key = (plan.group_key, plan.fields, day)
+        previous = self._partitions.pop(key, None)
+        if previous:
+            self._row_count -= len(previous[1])
+        self._partitions[key] = (time.time(), rows)
+        self._row_count += len(rows)
+        self._field_sets.setdefault(plan.group_key, set()).add(plan.fields)
+
+        while self._row_count > self.max_rows and len(self._partitions) > 1:
+            _, (_, evicted) = self._partitions.popitem(last=False)
+            self._row_count -= len(evicted)
+            self.stats['evictions'] += 1
+
+    def _ttl_for(self, day: date) -> int:
+        if (date.today() - day).days < self.recent_days:
+            return self.recent_ttl
+        return self.settled_ttl
+
+
+def _date_span(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def _contiguous_ranges(days: List[date]) -> List[Tuple[date, date]]:
+    """Agrupa días ordenados en tramos contiguos"""
+    ranges: List[Tuple[date, date]] = []
+    for day in days:
+        if ranges and day - ranges[-1][1] == timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+# Instancia global
+_query_partition_cache: Optional[QueryPartitionCache] = None
+_query_partition_cache_lock = threading.Lock()
+
+
+def get_query_partition_cache() -> QueryPartitionCache:
+    """Obtiene la caché de particiones del proceso"""
+    global _query_partition_cache
+    if _query_partition_cache is None:
+        with _query_partition_cache_lock:
+            if _query_partition_cache is None:
+                _query_partition_cache = QueryPartitionCache()
+    return _query_partition_cache
@@ -3,9 +3,13 @@ Rate limiting utilities for Google Ads API calls
 Implements token bucket algorithm for API rate limiting
 """
 
+import asyncio
+import functools
+import inspect
+import re
 import time
 import threading
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
@@ -26,6 +30,7 @@ class TokenBucket:
         self.refill_rate = refill_rate
         self.tokens = capacity
         self.last_refill = time.time()
+        self.blocked_until = 0.0  # Set from retry-after hints
         self.lock = threading.Lock()
     
     def consume(self, tokens: int = 1) -> bool:
@@ -41,15 +46,15 @@ class TokenBucket:
         with self.lock:
             self._refill()
             
-            if self.tokens >= tokens:
+            if self.tokens >= tokens and self.blocked_until <= time.time():
                 self.tokens -= tokens
                 return True
             
             return False
     
-    def _refill(self):
+    def _refill(self, now: Optional[float] = None):
         """Refill tokens based on elapsed time"""
-        now = time.time()
+        now = now or time.time()
         elapsed = now - self.last_refill
         
         # Add tokens based on elapsed time
@@ -57,6 +62,46 @@ class TokenBucket:
         self.tokens = min(self.capacity, self.tokens + tokens_to_add)
         self.last_refill = now
     
+    def time_until_available(self, tokens: int = 1, now: Optional[float] = None) -> float:
+        """
+        Seconds until the requested tokens can be taken (0 if available now)
+        
+        Must be called with the bucket lock held.
+        """
+        now = now or time.time()
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < tokens:
+            wait = max(wait, (tokens - self.tokens) / self.refill_rate)
+        return wait
+    
+    def reserve(self, tokens: int = 1, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Reserve tokens without sleeping
+        
+        The tokens are debited immediately (the balance may go negative), so
+        later callers queue behind this reservation instead of racing for it.
+        
+        Args:
+            tokens: Number of tokens needed
+            max_wait: Do not reserve if the wait would be longer than this
+            
+        Returns:
+            Seconds the caller must wait before proceeding, or None if the
+            wait would exceed max_wait
+        """
+        with self.lock:
+            wait = self.time_until_available(tokens)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= tokens
+            return wait
+    
+    def block_for(self, seconds: float):
+        """Stop handing out tokens for the given number of seconds"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.time() + seconds)
+    
     def wait_for_tokens(self, tokens: int = 1, timeout: Optional[float] = None) -> bool:
         """
         Wait until enough tokens are available
@@ -68,25 +113,13 @@ class TokenBucket:
         Returns:
             True if tokens were acquired, False if timeout
         """
-        start_time = time.time()
-        
-        while True:
-            if self.consume(tokens):
-                return True
-            
-            # Check timeout
-            if timeout and (time.time() - start_time) >= timeout:
-                return False
-            
-            # Calculate wait time until next token
-            with self.lock:
-                self._refill()
-                if self.tokens < tokens:
-                    tokens_needed = tokens - self.tokens
-                    wait_time = tokens_needed / self.refill_rate
-                    time.sleep(min(wait_time, 0.1))  # Sleep at most 100ms at a time
-                else:
-                    time.sleep(0.01)  # Small sleep to prevent busy waiting
+        # Sleep outside the lock so other callers can reserve concurrently
+        wait = self.reserve(tokens, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
 
 class RateLimiter:
     """Rate limiter for Google Ads API calls"""
@@ -109,6 +142,25 @@ class RateLimiter:
             'search': TokenBucket(capacity=100, refill_rate=0.115),  # ~10k/day
         }
         
+        # Hierarchical limits below the developer token (capacity, tokens/second).
+        # The operation buckets above are shared by everything using the token;
+        # these are created lazily per manager, customer and customer+operation.
+        self.level_limits: Dict[str, Tuple[int, float]] = {
+            'manager': (200, 20.0),
+            'customer': (100, 10.0),
+        }
+        self.operation_limits: Dict[str, Tuple[int, float]] = {
+            'general': (50, 5.0),
+            'reports': (10, 1.0),
+            'mutate': (25, 2.5),
+            'search': (50, 5.0),
+        }
+        self.scoped_buckets: Dict[Tuple[str, ...], TokenBucket] = {}
+        self.customer_managers: Dict[str, str] = {}
+        # Above this many scoped buckets, idle ones (full and not blocked) are dropped;
+        # a dropped bucket is recreated full, so nothing is lost
+        self.max_scoped_buckets = 10_000
+        
         # Track API call statistics
         self.stats = {
             'total_calls': 0,
@@ -117,28 +169,83 @@ class RateLimiter:
         }
         
         self.stats_lock = threading.Lock()
+        # Guards multi-bucket reservations; never held while sleeping
+        self.lock = threading.Lock()
+    
+    def register_manager(self, customer_id: str, manager_id: str):
+        """Record the manager (MCC) a customer is accessed through"""
+        self.customer_managers[_normalize_id(customer_id)] = _normalize_id(manager_id)
     
     def acquire(self, operation_type: str = 'general', tokens: int = 1, 
-                timeout: Optional[float] = 30.0) -> bool:
+                timeout: Optional[float] = 30.0,
+                customer_id: Optional[str] = None,
+                manager_id: Optional[str] = None) -> bool:
         """
         Acquire tokens for API operation
         
+        Tokens are reserved from every bucket in the hierarchy
+        (developer token -> manager -> customer -> operation type) at once,
+        then the caller sleeps outside any lock until the reservation is due.
+        
         Args:
             operation_type: Type of operation (general, reports, mutate, search)
             tokens: Number of tokens to acquire
             timeout: Maximum time to wait
+            customer_id: Customer the call is made for (enables per-customer buckets)
+            manager_id: Manager account used as login customer
             
         Returns:
             True if tokens acquired, False if timeout or invalid operation
         """
+        wait = self.reserve(operation_type, tokens, timeout, customer_id, manager_id)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+    
+    async def acquire_async(self, operation_type: str = 'general', tokens: int = 1,
+                            timeout: Optional[float] = 30.0,
+                            customer_id: Optional[str] = None,
+                            manager_id: Optional[str] = None) -> bool:
+        """Asyncio version of acquire; waits with asyncio.sleep"""
+        wait = self.reserve(operation_type, tokens, timeout, customer_id, manager_id)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+    
+    def reserve(self, operation_type: str = 'general', tokens: int = 1,
+                timeout: Optional[float] = 30.0,
+                customer_id: Optional[str] = None,
+                manager_id: Optional[str] = None) -> Optional[float]:
+        """
+        Reserve tokens across the bucket hierarchy without sleeping
+        
+        Returns:
+            Seconds to wait before making the call, or None if the wait
+            would exceed timeout (nothing is reserved in that case)
+        """
         if operation_type not in self.buckets:
             logger.warning(f"Unknown operation type: {operation_type}, using 'general'")
             operation_type = 'general'
         
-        bucket = self.buckets[operation_type]
-        
-        # Try to acquire tokens
-        success = bucket.wait_for_tokens(tokens, timeout)
+        with self.lock:
+            buckets = self._bucket_chain(operation_type, customer_id, manager_id)
+            now = time.time()
+            
+            for bucket in buckets:
+                bucket.lock.acquire()
+            try:
+                wait = max(bucket.time_until_available(tokens, now) for bucket in buckets)
+                success = timeout is None or wait <= timeout
+                if success:
+                    for bucket in buckets:
+                        bucket.tokens -= tokens
+            finally:
+                for bucket in buckets:
+                    bucket.lock.release()
         
         # Update statistics
         with self.stats_lock:
@@ -148,8 +255,122 @@ class RateLimiter:
         
         if not success:
             logger.warning(f"Rate limit exceeded for {operation_type} operation")
+            return None
+        
+        return wait
+    
+    def apply_retry_after(self, seconds: float, scope: Optional[str] = None,
+                          customer_id: Optional[str] = None,
+                          manager_id: Optional[str] = None,
+                          operation_type: Optional[str] = None):
+        """
+        Pause the affected buckets after the API returned a retry-after hint
+        
+        Args:
+            seconds: Retry delay reported by the API
+            scope: Quota rate scope ('ACCOUNT' or 'DEVELOPER'); defaults to the
+                   customer when one is given, otherwise the developer token
+            customer_id: Customer that received the error
+            manager_id: Manager account used as login customer
+            operation_type: Operation type that received the error
+        """
+        with self.lock:
+            if scope == 'DEVELOPER' or (scope is None and not customer_id):
+                targets = list(self.buckets.values())
+            elif customer_id:
+                targets = [self._scoped_bucket(('customer', _normalize_id(customer_id)))]
+            else:
+                targets = [self.buckets.get(operation_type or 'general', self.buckets['general'])]
+        
+        for bucket in targets:
+            bucket.block_for(seconds)
+        
+        logger.warning(
+            f"Retry-after {seconds:.1f}s applied to {scope or 'default'} scope"
+            f"{f' for customer {customer_id}' if customer_id else ''}"
+        )
+    
+    def execute(self, func: Callable, *args, operation_type: str = 'general',
+                tokens: int = 1, timeout: Optional[float] = 30.0,
+                customer_id: Optional[str] = None, manager_id: Optional[str] = None,
+                max_retries: int = 2, **kwargs):
+        """
+        Call func under the limiter, retrying after quota errors
+        
+        Quota errors with a retry-after hint pause the matching buckets and
+        the call is retried (up to max_retries times) once they reopen.
+        """
+        attempt = 0
+        while True:
+            if not self.acquire(operation_type, tokens, timeout, customer_id, manager_id):
+                raise Exception(f"Rate limit exceeded for {operation_type} operation")
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                retry_after = get_retry_after(e)
+                if retry_after is None or attempt >= max_retries:
+                    raise
+                attempt += 1
+                self.apply_retry_after(retry_after, get_quota_scope(e),
+                                       customer_id, manager_id, operation_type)
+    
+    def _bucket_chain(self, operation_type: str, customer_id: Optional[str],
+                      manager_id: Optional[str]) -> List[TokenBucket]:
+        """Buckets a call has to take tokens from, outermost first"""
+        if len(self.scoped_buckets) >= self.max_scoped_buckets:
+            self._prune_scoped_buckets()
+        
+        chain = [self.buckets[operation_type]]
+        
+        if customer_id:
+            customer_id = _normalize_id(customer_id)
+            manager_id = _normalize_id(manager_id) if manager_id else self.customer_managers.get(customer_id)
+        if manager_id and manager_id != customer_id:
+            chain.append(self._scoped_bucket(('manager', manager_id)))
+        if customer_id:
+            chain.append(self._scoped_bucket(('customer', customer_id)))
+            chain.append(self._scoped_bucket(('operation', customer_id, operation_type)))
+        
+        return chain
+    
+    def _scoped_bucket(self, key: Tuple[str, ...]) -> TokenBucket:
+        """Get or lazily create a manager/customer/operation bucket"""
+        bucket = self.scoped_buckets.get(key)
+        if bucket is None:
+            level = key[0]
+            if level == 'operation':
+                capacity, rate = self.operation_limits.get(key[2], self.operation_limits['general'])
+            else:
+                capacity, rate = self.level_limits[level]
+            bucket = TokenBucket(capacity=capacity, refill_rate=rate)
+            self.scoped_buckets[key] = bucket
+        return bucket
+    
+    def _prune_scoped_buckets(self):
+        """
+        Keep scoped buckets under max_scoped_buckets
+        
+        Idle buckets are dropped first. If every bucket is still refilling,
+        the least recently used ones go too, so the dict never grows past
+        the limit. Must be called with self.lock held.
+        """
+        now = time.time()
+        idle = []
+        for key, bucket in self.scoped_buckets.items():
+            with bucket.lock:
+                if bucket.time_until_available(bucket.capacity, now) == 0:
+                    idle.append(key)
+        for key in idle:
+            del self.scoped_buckets[key]
         
-        return success
+        # Leave room for the buckets of the call being made
+        excess = len(self.scoped_buckets) - self.max_scoped_buckets // 2
+        if excess > 0 and len(self.scoped_buckets) >= self.max_scoped_buckets:
+            stalest = sorted(self.scoped_buckets, key=lambda key: self.scoped_buckets[key].last_refill)
+            for key in stalest[:excess]:
+                del self.scoped_buckets[key]
+        
+        logger.debug(f"Pruned scoped rate limit buckets, {len(self.scoped_buckets)} left")
     
     def get_stats(self) -> Dict:
         """Get rate limiting statistics"""
@@ -166,7 +387,8 @@ class RateLimiter:
                         'refill_rate': bucket.refill_rate
                     }
                     for name, bucket in self.buckets.items()
-                }
+                },
+                'scoped_buckets': len(self.scoped_buckets)
             }
     
     def reset_stats(self):
@@ -180,37 +402,135 @@ class RateLimiter:
 
 # Global rate limiter instance
 _rate_limiter = None
+_rate_limiter_lock = threading.Lock()
 
 def get_rate_limiter() -> RateLimiter:
     """Get global rate limiter instance"""
     global _rate_limiter
     if _rate_limiter is None:
-        _rate_limiter = RateLimiter()
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
     return _rate_limiter
 
+_RETRY_IN_PATTERN = re.compile(r'retry in (\d+(?:\.\d+)?)\s*(?:s|sec|second)', re.IGNORECASE)
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """
+    Extract the retry delay (seconds) from a Google Ads API error
+    
+    Reads QuotaErrorDetails.retry_delay from GoogleAdsException failures and
+    falls back to a "Retry in N seconds" hint in the error message. proto-plus
+    messages expose retry_delay as a timedelta; raw protobuf messages as a
+    Duration with seconds and nanos.
+    """
+    failure = getattr(error, 'failure', None)
+    for api_error in getattr(failure, 'errors', None) or []:
+        quota_details = getattr(getattr(api_error, 'details', None), 'quota_error_details', None)
+        retry_delay = getattr(quota_details, 'retry_delay', None)
+        if isinstance(retry_delay, timedelta):
+            seconds = retry_delay.total_seconds()
+        elif retry_delay is not None:
+            seconds = getattr(retry_delay, 'seconds', 0) + getattr(retry_delay, 'nanos', 0) / 1e9
+        else:
+            continue
+        if seconds > 0:
+            return seconds
+    
+    match = _RETRY_IN_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
+def get_quota_scope(error: BaseException) -> Optional[str]:
+    """Quota rate scope ('ACCOUNT', 'DEVELOPER') of a Google Ads quota error"""
+    failure = getattr(error, 'failure', None)
+    for api_error in getattr(failure, 'errors', None) or []:
+        quota_details = getattr(getattr(api_error, 'details', None), 'quota_error_details', None)
+        rate_scope = getattr(quota_details, 'rate_scope', None)
+        name = getattr(rate_scope, 'name', None)
+        if name in ('ACCOUNT', 'DEVELOPER'):
+            return name
+    return None
+
 def rate_limited(operation_type: str = 'general', tokens: int = 1, timeout: float = 30.0):
     """
     Decorator to apply rate limiting to functions
     
+    When the decorated function takes a customer_id argument the call also
+    counts against that customer's buckets, and retry-after hints from quota
+    errors pause the buckets before the error is re-raised.
+    
     Args:
         operation_type: Type of operation for rate limiting
         tokens: Number of tokens to consume
         timeout: Maximum time to wait for tokens
     """
     def decorator(func):
+        try:
+            signature = inspect.signature(func)
+        except (TypeError, ValueError):
+            signature = None
+        takes_customer = signature is not None and 'customer_id' in signature.parameters
+        
+        def customer_of(args, kwargs) -> Optional[str]:
+            if not takes_customer:
+                return None
+            if 'customer_id' in kwargs:
+                value = kwargs['customer_id']
+            else:
+                try:
+                    value = signature.bind_partial(*args, **kwargs).arguments.get('customer_id')
+                except TypeError:
+                    return None
+            return value if isinstance(value, str) and value else None
+        
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                rate_limiter = get_rate_limiter()
+                customer_id = customer_of(args, kwargs)
+                
+                if not await rate_limiter.acquire_async(operation_type, tokens, timeout, customer_id):
+                    raise Exception(f"Rate limit exceeded for {operation_type} operation")
+                
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    _apply_retry_hint(rate_limiter, e, customer_id, operation_type)
+                    raise
+            
+            return async_wrapper
+        
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
             rate_limiter = get_rate_limiter()
+            customer_id = customer_of(args, kwargs)
             
             # Try to acquire tokens
-            if not rate_limiter.acquire(operation_type, tokens, timeout):
+            if not rate_limiter.acquire(operation_type, tokens, timeout, customer_id):
                 raise Exception(f"Rate limit exceeded for {operation_type} operation")
             
             # Execute function
-            return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                _apply_retry_hint(rate_limiter, e, customer_id, operation_type)
+                raise
         
         return wrapper
     return decorator
 
+def _apply_retry_hint(rate_limiter: RateLimiter, error: BaseException,
+                      customer_id: Optional[str], operation_type: str):
+    """Pause buckets if the error carries a retry-after hint"""
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        rate_limiter.apply_retry_after(retry_after, get_quota_scope(error),
+                                       customer_id=customer_id, operation_type=operation_type)
+
+def _normalize_id(account_id: str) -> str:
+    """Customer IDs without dashes so 123-456-7890 and 1234567890 share buckets"""
+    return str(account_id).replace('-', '')
+
 class AdaptiveRateLimiter:
     """Adaptive rate limiter that adjusts based on API responses"""
     
@@ -225,10 +545,25 @@ class AdaptiveRateLimiter:
         self.min_rate = 0.1
         self.max_rate = 10.0
         self.last_request = 0.0
+        self.next_slot = 0.0  # Earliest start time for the next reservation
         self.consecutive_successes = 0
         self.consecutive_failures = 0
         self.lock = threading.Lock()
     
+    def reserve(self) -> float:
+        """
+        Reserve the next request slot without sleeping
+        
+        Returns:
+            Seconds the caller must wait before sending its request
+        """
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + 1.0 / self.current_rate
+            self.last_request = slot
+            return slot - now
+    
     def wait_and_execute(self, func, *args, **kwargs):
         """
         Execute function with adaptive rate limiting
@@ -241,50 +576,73 @@ class AdaptiveRateLimiter:
         Returns:
             Function result
         """
-        with self.lock:
-            # Calculate wait time
-            now = time.time()
-            time_since_last = now - self.last_request
-            min_interval = 1.0 / self.current_rate
-            
-            if time_since_last < min_interval:
-                wait_time = min_interval - time_since_last
-                time.sleep(wait_time)
-            
-            self.last_request = time.time()
+        # The slot is reserved under the lock; the wait happens outside it
+        wait_time = self.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
         
         try:
-            # Execute function
             result = func(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        
+        self._record_success()
+        return result
+    
+    async def execute_async(self, func, *args, **kwargs):
+        """
+        Await a coroutine function with adaptive rate limiting
+        
+        Args:
+            func: Coroutine function to execute
+            *args: Function arguments
+            **kwargs: Function keyword arguments
             
-            # Success - potentially increase rate
-            with self.lock:
-                self.consecutive_successes += 1
-                self.consecutive_failures = 0
-                
-                # Increase rate after several successes
-                if self.consecutive_successes >= 5:
-                    self.current_rate = min(self.max_rate, self.current_rate * 1.1)
-                    self.consecutive_successes = 0
-                    logger.debug(f"Increased rate to {self.current_rate:.2f} req/s")
+        Returns:
+            Function result
+        """
+        wait_time = self.reserve()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+        
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        
+        self._record_success()
+        return result
+    
+    def _record_success(self):
+        """Success - potentially increase rate"""
+        with self.lock:
+            self.consecutive_successes += 1
+            self.consecutive_failures = 0
             
-            return result
+            # Increase rate after several successes
+            if self.consecutive_successes >= 5:
+                self.current_rate = min(self.max_rate, self.current_rate * 1.1)
+                self.consecutive_successes = 0
+                logger.debug(f"Increased rate to {self.current_rate:.2f} req/s")
+    
+    def _record_failure(self, error: BaseException):
+        """Slow down on rate limit errors, honoring the API retry-after hint"""
+        retry_after = get_retry_after(error)
+        if retry_after is None and not self._is_rate_limit_error(error):
+            return
+        
+        with self.lock:
+            self.consecutive_failures += 1
+            self.consecutive_successes = 0
             
-        except Exception as e:
-            # Check if it's a rate limit error
-            if self._is_rate_limit_error(e):
-                with self.lock:
-                    self.consecutive_failures += 1
-                    self.consecutive_successes = 0
-                    
-                    # Decrease rate on rate limit errors
-                    self.current_rate = max(self.min_rate, self.current_rate * 0.5)
-                    logger.warning(f"Rate limited, decreased rate to {self.current_rate:.2f} req/s")
-                
-                # Wait longer before retrying
-                time.sleep(2.0)
+            # Decrease rate on rate limit errors
+            self.current_rate = max(self.min_rate, self.current_rate * 0.5)
             
-            raise
+            # Push back the next slot for every caller instead of sleeping here
+            self.next_slot = max(self.next_slot, time.time() + (retry_after or 2.0))
+            logger.warning(f"Rate limited, decreased rate to {self.current_rate:.2f} req/s")
     
     def _is_rate_limit_error(self, error) -> bool:
         """Check if error is related to rate limiting"""
@@ -309,7 +667,14 @@ def adaptive_rate_limited(initial_rate: float = 1.0):
     limiter = AdaptiveRateLimiter(initial_rate)
     
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await limiter.execute_async(func, *args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
             return limiter.wait_and_execute(func, *args, **kwargs)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,171 @@
+"""
+Service Registry - Construcción diferida de servicios
+Los servicios (y sus dependencias pesadas: pandas, protobufs de Google Ads,
+plotly...) se importan y se crean la primera vez que una página los pide
+"""
+
+import importlib
+import logging
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# TIEMPOS DE IMPORTACIÓN
+# ============================================================================
+
+# módulo -> segundos que tardó su primera importación en este proceso
+_import_timings: Dict[str, float] = {}
+_import_timings_lock = threading.Lock()
+
+
+def timed_import(module_name: str):
+    """
+    Importa un módulo registrando cuánto tardó la primera vez
+
+    Si el módulo ya estaba cargado (por otra página o servicio) no se
+    registra nada: el costo ya lo pagó quien lo importó primero
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+
+    with _import_timings_lock:
+        _import_timings.setdefault(module_name, elapsed)
+    logger.debug(f"📦 Importado {module_name} en {elapsed * 1000:.0f} ms")
+    return module
+
+
+def get_import_report(top: Optional[int] = None) -> List[Tuple[str, float]]:
+    """
+    Importaciones diferidas ordenadas de la más lenta a la más rápida
+
+    Returns:
+        [(módulo, segundos), ...]
+    """
+    with _import_timings_lock:
+        report = sorted(_import_timings.items(), key=lambda item: item[1], reverse=True)
+    return report[:top] if top else report
+
+
+# ============================================================================
+# REGISTRO DE SERVICIOS
+# ============================================================================
+
+class ServiceRegistry(Mapping):
+    """
+    Diccionario de servicios que se construyen en el primer acceso
+
+    Es compatible con el antiguo st.session_state.services (dict):
+    services['report'] importa services.report_service y crea
+    ReportService(client) solo la primera vez que se usa
+    """
+
+    def __init__(self, client: Any = None):
+        """
+        Args:
+            client: GoogleAdsClientWrapper que reciben los servicios
+        """
+        self.client = client
+        self._factories: Dict[str, Tuple[str, str, bool]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, module_name: str, class_name: str, needs_client: bool = True):
+        """
+        Registra un servicio sin importarlo
+
+        Args:
+            name: Clave del servicio ('report', 'billing'...)
+            module_name: Módulo que define la clase
+            class_name: Clase del servicio
+            needs_client: Pasar el cliente de Google Ads al constructor
+        """
+        self._factories[name] = (module_name, class_name, needs_client)
+
+    def set(self, name: str, instance: Any):
+        """Registra una instancia ya construida"""
+        with self._lock:
+            self._instances[name] = instance
+
+    def __getitem__(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        if name not in self._factories:
+            raise KeyError(name)
+
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+
+            module_name, class_name, needs_client = self._factories[name]
+
+            start = time.perf_counter()
+            module = timed_import(module_name)
+            imported = time.perf_counter()
+            service_class = getattr(module, class_name)
+            instance = service_class(self.client) if needs_client else service_class()
+            initialized = time.perf_counter()
+
+            self._instances[name] = instance
+            self._stats[name] = {
+                'import_seconds': imported - start,
+                'init_seconds': initialized - imported
+            }
+            logger.info(
+                f"⚡ Servicio '{name}' listo: import {(imported - start) * 1000:.0f} ms, "
+                f"init {(initialized - imported) * 1000:.0f} ms"
+            )
+            return instance
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._factories.keys() | self._instances.keys())
+
+    def __len__(self) -> int:
+        return len(self._factories.keys() | self._instances.keys())
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._factories or name in self._instances
+
+    def is_loaded(self, name: str) -> bool:
+        """Si el servicio ya fue construido"""
+        return name in self._instances
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Servicios construidos y tiempos de import/init de cada uno"""
+        with self._lock:
+            return {
+                'registered': len(self),
+                'loaded': sorted(self._instances.keys()),
+                'services': dict(self._stats)
+            }
+
+
+# Servicios principales del dashboard: (nombre, módulo, clase, necesita cliente)
+DEFAULT_SERVICES: List[Tuple[str, str, str, bool]] = [
+    ('billing', 'services.billing_service', 'BillingService', True),
+    ('campaign', 'services.campaign_service', 'CampaignService', True),
+    ('report', 'services.report_service', 'ReportService', True),
+    ('alert', 'services.alert_service', 'AlertService', True),
+    ('bid_adjustment', 'services.bid_adjustment_service', 'BidAdjustmentService', True),
+    ('ai_ad_generator', 'modules.ai_ad_generator', 'AIAdGenerator', False),
+]
+
+
+def create_service_registry(client: Any) -> ServiceRegistry:
+    """Registro con los servicios principales, sin construir ninguno"""
+    registry = ServiceRegistry(client)
+    for name, module_name, class_name, needs_client in DEFAULT_SERVICES:
+        registry.register(name, module_name, class_name, needs_client)
+    return registry
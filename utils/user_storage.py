@@ -3,8 +3,12 @@ Sistema de Almacenamiento Local de Usuario
 Guarda preferencias, API keys, configuraciones, etc.
 """
 
+import atexit
 import json
 import os
+import threading
+import time
+from collections import deque
 from typing import Any, Dict, Optional, List
 from datetime import datetime
 from pathlib import Path
@@ -22,7 +26,7 @@ class UserStorage:
     - Guarda datos en JSON
     - Encripta API keys automáticamente
     - Sincronización automática
-    - Historial de cambios
+    - Historial de cambios (log append-only, ver HistoryLog)
     """
     
     def __init__(self, user_id: str = "saltbalente"):
@@ -45,7 +49,7 @@ class UserStorage:
             'api_keys': self.base_path / 'api_keys.enc',
             'settings': self.base_path / 'settings.json',
             'favorites': self.base_path / 'favorites.json',
-            'history': self.base_path / 'history.json',
+            'history': self.base_path / 'history.ndjson',
             'campaigns_config': self.base_path / 'campaigns_config.json',
             'theme': self.base_path / 'theme.json'
         }
@@ -53,6 +57,11 @@ class UserStorage:
         # Cache en memoria
         self._cache = {}
         
+        # Historial append-only (compartido por todas las instancias del usuario)
+        self.history_log = get_history_log(
+            self.files['history'], legacy_path=self.base_path / 'history.json'
+        )
+        
         logger.info(f"✅ UserStorage inicializado para {user_id}")
     
     # ========================================================================
@@ -327,22 +336,12 @@ class UserStorage:
     def add_to_history(self, action: str, data: Dict[str, Any]) -> bool:
         """Agrega una acción al historial"""
         try:
-            history = self._load_json(self.files['history'], [])
-            
-            history.append({
+            return self.history_log.append({
                 'action': action,
                 'data': data,
                 'timestamp': datetime.utcnow().isoformat(),
                 'user': self.user_id
             })
-            
-            # Mantener solo últimos 1000 registros
-            history = history[-1000:]
-            
-            with open(self.files['history'], 'w', encoding='utf-8') as f:
-                json.dump(history, f, indent=2, ensure_ascii=False)
-            
-            return True
         
         except Exception as e:
             logger.error(f"Error guardando en historial: {e}")
@@ -351,8 +350,7 @@ class UserStorage:
     def get_history(self, limit: int = 100) -> List[Dict]:
         """Obtiene historial de acciones"""
         try:
-            history = self._load_json(self.files['history'], [])
-            return history[-limit:]
+            return self.history_log.tail(limit)
         
         except Exception as e:
             logger.error(f"Error cargando historial: {e}")
@@ -369,9 +367,6 @@ class UserStorage:
             bool: True si se guardó exitosamente
         """
         try:
-            # Cargar historial existente
-            history = self._load_json(self.files['history'], [])
-            
             # Agregar nuevo anuncio con timestamp
             ad_entry = {
                 'type': 'ad_saved',
@@ -379,15 +374,8 @@ class UserStorage:
                 'ad_data': ad_data
             }
             
-            history.append(ad_entry)
-            
-            # Mantener solo los últimos 1000 registros
-            if len(history) > 1000:
-                history = history[-1000:]
-            
-            # Guardar historial actualizado
-            with open(self.files['history'], 'w', encoding='utf-8') as f:
-                json.dump(history, f, indent=2, ensure_ascii=False)
+            if not self.history_log.append(ad_entry):
+                return False
             
             logger.info(f"✅ Anuncio guardado en historial: {ad_data.get('id', 'sin_id')}")
             return True
@@ -506,6 +494,184 @@ class UserStorage:
         }
 
 
+# ============================================================================
+# HISTORIAL APPEND-ONLY
+# ============================================================================
+
+class HistoryLog:
+    """
+    Historial en formato NDJSON (una entrada JSON por línea)
+    
+    Características:
+    - append() escribe una sola línea: O(1) sin reescribir el archivo
+    - Índice en memoria con las últimas max_entries entradas para tail()
+    - fsync por lotes: cada fsync_every entradas o fsync_interval segundos
+      (y al cerrar el proceso); cada línea se vacía al SO al escribirla
+    - Compactación: cuando el archivo supera compact_factor * max_entries
+      líneas se reescribe con las últimas max_entries (tmp + os.replace)
+    - Migra el history.json anterior la primera vez
+    """
+    
+    def __init__(self, path: Path, max_entries: int = 1000, compact_factor: int = 2,
+                 fsync_every: int = 20, fsync_interval: float = 2.0,
+                 legacy_path: Optional[Path] = None):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.compact_threshold = max_entries * max(2, compact_factor)
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        
+        self._lock = threading.RLock()
+        self._tail: Optional[deque] = None
+        self._line_count = 0
+        self._handle = None
+        self._pending_sync = 0
+        self._last_sync = time.monotonic()
+        
+        atexit.register(self.close)
+    
+    def append(self, entry: Dict[str, Any]) -> bool:
+        """Agrega una entrada al final del historial"""
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._load()
+            handle = self._open()
+            handle.write(line)
+            handle.flush()
+            
+            self._tail.append(entry)
+            self._line_count += 1
+            self._pending_sync += 1
+            
+            if (self._pending_sync >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+            
+            if self._line_count > self.compact_threshold:
+                self.compact()
+        return True
+    
+    def tail(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Últimas entradas (las más recientes al final)"""
+        with self._lock:
+            self._load()
+            if limit <= 0:
+                return []
+            entries = list(self._tail)
+        return entries[-limit:]
+    
+    def compact(self) -> None:
+        """Reescribe el archivo con las últimas max_entries entradas"""
+        with self._lock:
+            self._load()
+            self._close_handle()
+            
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in self._tail:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            
+            self._line_count = len(self._tail)
+            self._pending_sync = 0
+            self._last_sync = time.monotonic()
+        logger.debug(f"🧹 Historial compactado: {self._line_count} entradas")
+    
+    def flush(self) -> None:
+        """Fuerza el fsync de las entradas pendientes"""
+        with self._lock:
+            if self._handle and self._pending_sync:
+                self._sync()
+    
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._close_handle()
+    
+    def size_bytes(self) -> int:
+        return self.path.stat().st_size if self.path.exists() else 0
+    
+    def _load(self) -> None:
+        """Carga el índice en memoria la primera vez"""
+        if self._tail is not None:
+            return
+        
+        self._tail = deque(maxlen=self.max_entries)
+        self._migrate_legacy()
+        
+        if not self.path.exists():
+            return
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                self._line_count += 1
+                try:
+                    self._tail.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Línea truncada por un cierre abrupto; se descarta en la compactación
+                    continue
+    
+    def _migrate_legacy(self) -> None:
+        """Convierte el history.json (lista completa) al formato NDJSON"""
+        if not self.legacy_path or not self.legacy_path.exists() or self.path.exists():
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in entries[-self.max_entries:]:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.legacy_path.unlink()
+            logger.info(f"✅ Historial migrado a NDJSON: {len(entries)} entradas")
+        except Exception as e:
+            logger.error(f"Error migrando historial: {e}")
+    
+    def _open(self):
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.path, 'a', encoding='utf-8')
+        return self._handle
+    
+    def _sync(self) -> None:
+        try:
+            os.fsync(self._handle.fileno())
+        except OSError as e:
+            logger.warning(f"⚠️ fsync del historial falló: {e}")
+        self._pending_sync = 0
+        self._last_sync = time.monotonic()
+    
+    def _close_handle(self) -> None:
+        if self._handle is not None:
+            try:
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+                self._handle.close()
+            except (OSError, ValueError):
+                pass
+            self._handle = None
+            self._pending_sync = 0
+
+
+_history_logs: Dict[str, HistoryLog] = {}
+_history_logs_lock = threading.Lock()
+
+
+def get_history_log(path: Path, legacy_path: Optional[Path] = None) -> HistoryLog:
+    """Obtiene el HistoryLog de un archivo (uno por ruta en todo el proceso)"""
+    key = str(Path(path).resolve())
+    with _history_logs_lock:
+        if key not in _history_logs:
+            _history_logs[key] = HistoryLog(path, legacy_path=legacy_path)
+        return _history_logs[key]
+
+
 # ============================================================================
 # INSTANCIA GLOBAL
 # ============================================================================